@@ -2,10 +2,24 @@ import os
 
 from flask import Flask
 
+from app.infrastructure.blob_store import blob_store
 from app.infrastructure.config import load_config
 from app.infrastructure.db import init_db
 from app.infrastructure.extensions import db, login_manager, migrate
+from app.infrastructure.job_queue import job_queue
+from app.infrastructure.log_writer import log_writer
+from app.infrastructure.output_codec import output_codec
+from app.infrastructure.output_collector import output_limits
+from app.infrastructure.redaction import redactor
+from app.infrastructure.resolver import resolver
+from app.infrastructure.ssh_pool import ssh_pool
+from app.infrastructure.ssh_tunnels import tunnel_manager
+from app.infrastructure.telnet_engine import telnet_engine
+from app.infrastructure.user_cache import user_cache
+from app.interfaces.cli import jobs_cli, logs_cli
 from app.interfaces.controllers.main_controller import bp
+from app.interfaces.repositories import jobs_repo, logs_repo
+from app.services import logs_service, target_expr
 
 
 def create_app():
@@ -29,6 +43,18 @@ def create_app():
 
     db.init_app(app)
     login_manager.init_app(app)
+    ssh_pool.init_app(app)
+    telnet_engine.init_app(app)
+    tunnel_manager.init_app(app)
+    resolver.init_app(app)
+    user_cache.init_app(app)
+    job_queue.init_app(app, jobs_repo.touch)
+    output_limits.init_app(app)
+    redactor.init_app(app)
+    target_expr.init_app(app)
+    log_writer.init_app(app, logs_service.write_logs)
+    blob_store.init_app(app)
+    output_codec.init_app(app, logs_repo.load_dictionaries)
 
     if app.config.get("MIGRATIONS_ENABLED"):
         migrate.init_app(app, db)
@@ -36,6 +62,8 @@ def create_app():
         init_db(app)
 
     app.register_blueprint(bp)
+    app.cli.add_command(logs_cli)
+    app.cli.add_command(jobs_cli)
 
     return app
 
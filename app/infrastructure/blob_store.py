@@ -0,0 +1,215 @@
+import mmap
+import os
+import tempfile
+import threading
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class BlobStore:
+    """
+    Контентно-адресуемое хранилище вывода команд на диске.
+
+    Блоб называется SHA-256 исходного текста и лежит в
+    root/ab/cd/<hex>, поэтому одинаковый вывод (повторные
+    show running-config, show version) хранится один раз.
+    Файлы неизменяемы: запись атомарна (временный файл + rename),
+    чтение — через mmap без копирования в память процесса.
+
+    Если root не задан (BLOB_STORE_DIR пуст), хранилище выключено
+    и вывод хранится в базе.
+    """
+
+    def __init__(self, root: str | None = None, min_size: int = 4096):
+        self.root = root
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._stats = {
+            "writes": 0,
+            "dedup_hits": 0,
+            "bytes_written": 0,
+            "reads": 0,
+            "removed": 0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.root = app.config.get("BLOB_STORE_DIR", self.root) or None
+        self.min_size = app.config.get("BLOB_MIN_SIZE", self.min_size)
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    def path(self, digest: str) -> str:
+        """
+        Возвращает путь к блобу.
+
+        Args:
+            digest (str): SHA-256 в hex.
+
+        Returns:
+            str: Путь root/ab/cd/<digest>.
+        """
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, digest: str, produce: Callable[[], bytes]) -> bool:
+        """
+        Сохраняет блоб, если его ещё нет.
+
+        Args:
+            digest (str): SHA-256 исходного текста в hex.
+            produce (Callable): Возвращает содержимое файла; не
+                вызывается, если блоб уже сохранён.
+
+        Returns:
+            bool: True, если файл записан, False — если найден дубль.
+        """
+        path = self.path(digest)
+        if os.path.exists(path):
+            # Обновляем mtime: сборщик мусора не удаляет свежие блобы,
+            # на которые ещё не успела сослаться запись в базе.
+            os.utime(path)
+            with self._lock:
+                self._stats["dedup_hits"] += 1
+            return False
+        data = produce()
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._stats["writes"] += 1
+            self._stats["bytes_written"] += len(data)
+        return True
+
+    def touch(self, digest: str) -> bool:
+        """
+        Обновляет mtime блоба, на который будет сослана новая запись
+        (сборщик мусора не удаляет свежие блобы).
+
+        Args:
+            digest (str): SHA-256 в hex.
+
+        Returns:
+            bool: False, если блоба нет.
+        """
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def read(self, digest: str, decode: Callable[[memoryview], T]) -> T:
+        """
+        Отображает блоб в память и передаёт его decode.
+
+        Args:
+            digest (str): SHA-256 в hex.
+            decode (Callable): Получает содержимое файла; ссылки на
+                буфер нельзя сохранять после возврата.
+
+        Returns:
+            T: Результат decode.
+
+        Raises:
+            FileNotFoundError: Блоба нет в хранилище.
+        """
+        with open(self.path(digest), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    result = decode(view)
+        with self._lock:
+            self._stats["reads"] += 1
+        return result
+
+    def iter_blobs(self) -> Iterator[tuple[str, float]]:
+        """
+        Перебирает блобы хранилища.
+
+        Yields:
+            tuple[str, float]: (digest, mtime).
+        """
+        if not self.enabled or not os.path.isdir(self.root):
+            return
+        for first in sorted(os.scandir(self.root), key=lambda e: e.name):
+            if not first.is_dir():
+                continue
+            for second in sorted(os.scandir(first.path), key=lambda e: e.name):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if entry.is_file() and not entry.name.startswith("."):
+                        yield entry.name, entry.stat().st_mtime
+
+    def remove(self, digest: str, older_than: float | None = None) -> bool:
+        """
+        Удаляет блоб.
+
+        Args:
+            digest (str): SHA-256 в hex.
+            older_than (float | None): Удалять, только если mtime
+                раньше этого момента (time.time()).
+
+        Returns:
+            bool: True, если файл удалён.
+        """
+        path = self.path(digest)
+        try:
+            if older_than is not None and os.stat(path).st_mtime >= older_than:
+                return False
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            self._stats["removed"] += 1
+        return True
+
+    def remove_temp_files(self, older_than: float) -> int:
+        """
+        Удаляет временные файлы прерванных записей.
+
+        Args:
+            older_than (float): Удаляются файлы с mtime раньше
+                этого момента (time.time()).
+
+        Returns:
+            int: Количество удалённых файлов.
+        """
+        removed = 0
+        if not self.enabled:
+            return removed
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.startswith(".tmp-") and (
+                    os.stat(path).st_mtime < older_than
+                ):
+                    os.unlink(path)
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики хранилища.
+
+        Returns:
+            dict: enabled, writes, dedup_hits, bytes_written, reads
+                  и removed.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        return stats
+
+
+blob_store = BlobStore()
@@ -16,10 +16,11 @@ def load_config():
     db_path = os.path.join(instance_dir, "nettools.db")
     default_db_uri = f"sqlite:///{db_path}"
 
-    if (
+    testing = (
         os.getenv("TESTING") in ("1", "True", "true")
         or os.getenv("FLASK_ENV") == "testing"
-    ):
+    )
+    if testing:
         sql_uri = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///:memory:")
     else:
         sql_uri = os.getenv("SQLALCHEMY_DATABASE_URI", default_db_uri)
@@ -37,4 +38,73 @@ def load_config():
         "DEFAULT_DNS": os.getenv("DEFAULT_DNS", "8.8.8.8"),
         "ADMIN_USERNAME": os.getenv("ADMIN_USERNAME", None),
         "ADMIN_PASSWORD": os.getenv("ADMIN_PASSWORD", None),
+        "SSH_POOL_MAX_SIZE": int(os.getenv("SSH_POOL_MAX_SIZE", 16)),
+        "SSH_POOL_IDLE_TIMEOUT": float(
+            os.getenv("SSH_POOL_IDLE_TIMEOUT", 120)
+        ),
+        "SSH_POOL_MAX_AGE": float(os.getenv("SSH_POOL_MAX_AGE", 900)),
+        "TELNET_POOL_MAX_SIZE": int(os.getenv("TELNET_POOL_MAX_SIZE", 16)),
+        "TELNET_POOL_IDLE_TIMEOUT": float(
+            os.getenv("TELNET_POOL_IDLE_TIMEOUT", 120)
+        ),
+        "TELNET_POOL_MAX_AGE": float(os.getenv("TELNET_POOL_MAX_AGE", 900)),
+        "TELNET_CONNECT_MINWAIT": float(
+            os.getenv("TELNET_CONNECT_MINWAIT", 0.1)
+        ),
+        "TUNNEL_IDLE_TIMEOUT": float(os.getenv("TUNNEL_IDLE_TIMEOUT", 300)),
+        "TUNNEL_MAX_AGE": float(os.getenv("TUNNEL_MAX_AGE", 3600)),
+        "HISTORY_PAGE_SIZE": int(os.getenv("HISTORY_PAGE_SIZE", 50)),
+        # В тестах логи пишутся синхронно.
+        "LOG_WRITER_ENABLED": os.getenv(
+            "LOG_WRITER_ENABLED", "0" if testing else "1"
+        )
+        == "1",
+        "LOG_WRITER_QUEUE_SIZE": int(
+            os.getenv("LOG_WRITER_QUEUE_SIZE", 10000)
+        ),
+        "LOG_WRITER_BATCH_SIZE": int(os.getenv("LOG_WRITER_BATCH_SIZE", 500)),
+        "LOG_WRITER_FLUSH_INTERVAL": float(
+            os.getenv("LOG_WRITER_FLUSH_INTERVAL", 0.5)
+        ),
+        "EXPORT_BATCH_SIZE": int(os.getenv("EXPORT_BATCH_SIZE", 500)),
+        "LOG_RETENTION": os.getenv("LOG_RETENTION", ""),
+        "LOG_ARCHIVE_DIR": os.getenv(
+            "LOG_ARCHIVE_DIR", os.path.join(instance_dir, "archive")
+        ),
+        "RETENTION_CHUNK_SIZE": int(os.getenv("RETENTION_CHUNK_SIZE", 1000)),
+        "BULK_MAX_WORKERS": int(os.getenv("BULK_MAX_WORKERS", 16)),
+        "TARGET_GROUPS": os.getenv("TARGET_GROUPS", ""),
+        "TARGET_MAX_HOSTS": int(os.getenv("TARGET_MAX_HOSTS", 4096)),
+        "OUTPUT_MAX_SIZE": int(os.getenv("OUTPUT_MAX_SIZE", 64 * 1024 * 1024)),
+        "OUTPUT_SPOOL_SIZE": int(os.getenv("OUTPUT_SPOOL_SIZE", 1024 * 1024)),
+        "OUTPUT_REDACTION": os.getenv("OUTPUT_REDACTION", "1") == "1",
+        "OUTPUT_COMPRESSION": os.getenv("OUTPUT_COMPRESSION", "1") == "1",
+        "OUTPUT_COMPRESS_MIN_SIZE": int(
+            os.getenv("OUTPUT_COMPRESS_MIN_SIZE", 512)
+        ),
+        "OUTPUT_COMPRESS_LEVEL": int(os.getenv("OUTPUT_COMPRESS_LEVEL", 6)),
+        # В тестах вывод хранится только в базе.
+        "BLOB_STORE_DIR": os.getenv(
+            "BLOB_STORE_DIR",
+            "" if testing else os.path.join(instance_dir, "blobs"),
+        ),
+        "BLOB_MIN_SIZE": int(os.getenv("BLOB_MIN_SIZE", 4096)),
+        "BLOB_GC_GRACE": float(os.getenv("BLOB_GC_GRACE", 3600)),
+        "DELTA_SNAPSHOT_INTERVAL": int(
+            os.getenv("DELTA_SNAPSHOT_INTERVAL", 20)
+        ),
+        "DELTA_MAX_LINES": int(os.getenv("DELTA_MAX_LINES", 20000)),
+        "JOB_WORKERS": int(os.getenv("JOB_WORKERS", 4)),
+        "JOB_WAIT_TIMEOUT": float(os.getenv("JOB_WAIT_TIMEOUT", 25)),
+        "JOB_HEARTBEAT_INTERVAL": float(
+            os.getenv("JOB_HEARTBEAT_INTERVAL", 30)
+        ),
+        "JOB_LEASE_TIMEOUT": float(os.getenv("JOB_LEASE_TIMEOUT", 120)),
+        "JOB_OUTPUT_TAIL": int(os.getenv("JOB_OUTPUT_TAIL", 64 * 1024)),
+        "JOB_RETENTION_HOURS": float(os.getenv("JOB_RETENTION_HOURS", 24)),
+        "USER_CACHE_MAX_SIZE": int(os.getenv("USER_CACHE_MAX_SIZE", 1024)),
+        "USER_CACHE_TTL": float(os.getenv("USER_CACHE_TTL", 30)),
+        "RESOLVER_MAX_SIZE": int(os.getenv("RESOLVER_MAX_SIZE", 1024)),
+        "RESOLVER_TTL": float(os.getenv("RESOLVER_TTL", 60)),
+        "RESOLVER_NEGATIVE_TTL": float(os.getenv("RESOLVER_NEGATIVE_TTL", 10)),
     }
@@ -1,9 +1,60 @@
+from sqlalchemy import event, text
+
 from .extensions import db
 
 
+def _enable_incremental_vacuum(dbapi_connection, connection_record):
+    # Действует только на новой (пустой) базе; существующую переводит
+    # vacuum(full=True).
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.close()
+
+
 def init_db(app):
     """
     Инициализирует базу данных и создаёт таблицы при первом запуске.
     """
     with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", _enable_incremental_vacuum)
         db.create_all()
+
+
+def vacuum(full: bool = False) -> dict:
+    """
+    Возвращает свободные страницы SQLite операционной системе.
+
+    В режиме auto_vacuum=INCREMENTAL выполняет PRAGMA incremental_vacuum
+    (быстро, без перезаписи файла). full=True переводит базу в этот
+    режим и выполняет полный VACUUM (один раз для старых баз;
+    перезаписывает файл целиком и блокирует запись на время работы).
+
+    Args:
+        full (bool): Выполнить полный VACUUM.
+
+    Returns:
+        dict: auto_vacuum, freed_pages и page_count после очистки.
+    """
+    with db.engine.connect() as conn:
+        if conn.dialect.name != "sqlite":
+            return {"auto_vacuum": None, "freed_pages": 0, "page_count": None}
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        before = conn.execute(text("PRAGMA freelist_count")).scalar()
+        if full:
+            conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+        else:
+            # sqlite3.execute() делает один шаг оператора, то есть
+            # освобождает одну страницу; executescript() — до конца.
+            conn.connection.driver_connection.executescript(
+                "PRAGMA incremental_vacuum"
+            )
+        after = conn.execute(text("PRAGMA freelist_count")).scalar()
+        mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+        pages = conn.execute(text("PRAGMA page_count")).scalar()
+    return {
+        "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}[mode],
+        "freed_pages": before - after,
+        "page_count": pages,
+    }
@@ -0,0 +1,307 @@
+import atexit
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+import threading
+from typing import Callable, Deque, Dict, Iterator, List
+
+SKIPPED_MARKER = "... (начало вывода не показано, полный вывод — в истории)\n"
+
+
+class JobStream:
+    """
+    Вывод выполняющейся задачи для подписчиков (SSE).
+
+    Последние replay_limit символов хранятся в памяти, поэтому
+    подписчик, подключившийся позже, сначала получает уже отправленный
+    хвост вывода. Если часть вывода вытеснена из окна, подписчик
+    получает SKIPPED_MARKER вместо неё.
+    """
+
+    def __init__(self, replay_limit: int = 64 * 1024):
+        self.replay_limit = max(1, replay_limit)
+        self.chunks: Deque[str] = deque()
+        # Номер первого хранимого фрагмента от начала вывода.
+        self.offset = 0
+        self.size = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def publish(self, chunk: str) -> None:
+        with self.condition:
+            self.chunks.append(chunk)
+            self.size += len(chunk)
+            while self.size > self.replay_limit and len(self.chunks) > 1:
+                self.size -= len(self.chunks.popleft())
+                self.offset += 1
+            if self.size > self.replay_limit:
+                # Один фрагмент больше окна — оставляем его хвост.
+                start = len(self.chunks[0]) - self.replay_limit
+                self.chunks[0] = SKIPPED_MARKER + self.chunks[0][start:]
+                self.size = len(self.chunks[0])
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def follow(self, heartbeat: float) -> Iterator[str | None]:
+        """
+        Отдаёт фрагменты по мере поступления; None — если за heartbeat
+        секунд ничего не пришло (для keep-alive).
+        """
+        position = 0
+        while True:
+            with self.condition:
+                end = self.offset + len(self.chunks)
+                if position == end and not self.closed:
+                    self.condition.wait(heartbeat)
+                    end = self.offset + len(self.chunks)
+                skipped = position < self.offset
+                position = max(position, self.offset)
+                chunks = list(
+                    islice(self.chunks, position - self.offset, None)
+                )
+                closed = self.closed
+            position = end
+            if skipped:
+                chunks.insert(0, SKIPPED_MARKER)
+            if chunks:
+                yield "".join(chunks)
+            elif not closed:
+                yield None
+            if closed:
+                return
+
+
+class JobQueue:
+    """
+    Пул рабочих потоков для фонового выполнения сетевых задач.
+
+    Обработчик Flask ставит задачу в очередь и сразу возвращает
+    ответ; задача выполняется в контексте приложения в одном
+    из JOB_WORKERS потоков. Ожидающие результат могут
+    блокироваться на wait() вместо частого опроса базы.
+
+    Пока задача стоит в очереди или выполняется, фоновый поток раз
+    в heartbeat_interval секунд передаёт её ID в on_heartbeat — так
+    другие процессы отличают живые задачи от брошенных.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        heartbeat_interval: float = 30,
+        replay_limit: int = 64 * 1024,
+    ):
+        self.workers = workers
+        self.heartbeat_interval = heartbeat_interval
+        self.replay_limit = replay_limit
+        self._on_heartbeat: Callable[[List[str]], None] | None = None
+        self._heartbeat_app = None
+        self._heartbeat_thread = None
+        self._stop = threading.Event()
+        self._executor = None
+        self._events: Dict[str, threading.Event] = {}
+        self._streams: Dict[str, JobStream] = {}
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats = {
+            "submitted": 0,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+
+    def init_app(
+        self,
+        app,
+        on_heartbeat: Callable[[List[str]], None] | None = None,
+    ) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+
+        Args:
+            app: Flask-приложение.
+            on_heartbeat (Callable | None): Продлевает задачи процесса
+                (вызывается со списком их ID в контексте приложения).
+        """
+        self.workers = app.config.get("JOB_WORKERS", self.workers)
+        self.heartbeat_interval = app.config.get(
+            "JOB_HEARTBEAT_INTERVAL", self.heartbeat_interval
+        )
+        self.replay_limit = app.config.get(
+            "JOB_OUTPUT_TAIL", self.replay_limit
+        )
+        self._on_heartbeat = on_heartbeat
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.workers),
+                    thread_name_prefix="job",
+                )
+            return self._executor
+
+    def _ensure_heartbeat(self, app) -> None:
+        with self._lock:
+            running = (
+                self._heartbeat_thread is not None
+                and self._heartbeat_thread.is_alive()
+                and not self._stop.is_set()
+            )
+            if self._on_heartbeat is None or running:
+                return
+            self._heartbeat_app = app
+            self._stop.clear()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop,
+                name="job-heartbeat",
+                daemon=True,
+            )
+            self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                job_ids = list(self._events)
+            if not job_ids:
+                continue
+            try:
+                with self._heartbeat_app.app_context():
+                    self._on_heartbeat(job_ids)
+            except Exception:
+                # Пропущенное продление не критично: lease с запасом.
+                pass
+
+    def _run(self, app, job_id: str, func: Callable, *args) -> None:
+        with self._lock:
+            self._stats["running"] += 1
+        try:
+            with app.app_context():
+                func(job_id, *args)
+            outcome = "completed"
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            with self._lock:
+                self._stats["running"] -= 1
+                self._stats[outcome] += 1
+                event = self._events.pop(job_id, None)
+                stream = self._streams.pop(job_id, None)
+            if stream is not None:
+                stream.close()
+            if event is not None:
+                event.set()
+
+    def submit(self, app, job_id: str, func: Callable, *args) -> Future:
+        """
+        Ставит задачу в очередь.
+
+        Args:
+            app: Flask-приложение, в контексте которого выполнять задачу.
+            job_id (str): Идентификатор задачи.
+            func (Callable): Функция, вызываемая как func(job_id, *args).
+
+        Returns:
+            Future: Future выполнения задачи.
+        """
+        executor = self._ensure_executor()
+        self._ensure_heartbeat(app)
+        with self._lock:
+            self._events[job_id] = threading.Event()
+            self._streams[job_id] = JobStream(self.replay_limit)
+            self._stats["submitted"] += 1
+        return executor.submit(self._run, app, job_id, func, *args)
+
+    def publish(self, job_id: str, chunk: str) -> None:
+        """
+        Передаёт фрагмент вывода подписчикам задачи.
+
+        Args:
+            job_id (str): Идентификатор задачи.
+            chunk (str): Фрагмент вывода.
+        """
+        with self._lock:
+            stream = self._streams.get(job_id)
+        if stream is not None and chunk:
+            stream.publish(chunk)
+
+    def follow(self, job_id: str, heartbeat: float = 15) -> Iterator:
+        """
+        Отдаёт вывод задачи по мере поступления до её завершения.
+        Для задач, которые этот процесс не выполняет, сразу завершается.
+
+        Args:
+            job_id (str): Идентификатор задачи.
+            heartbeat (float): Интервал keep-alive (секунды).
+
+        Returns:
+            Iterator[str | None]: Фрагменты вывода; None — keep-alive.
+        """
+        with self._lock:
+            stream = self._streams.get(job_id)
+        if stream is None:
+            return iter(())
+        return stream.follow(heartbeat)
+
+    def wait(self, job_id: str, timeout: float) -> bool:
+        """
+        Ждёт завершения задачи, поставленной этим процессом.
+
+        Args:
+            job_id (str): Идентификатор задачи.
+            timeout (float): Предельное время ожидания (секунды).
+
+        Returns:
+            bool: True, если задача в этом процессе уже не выполняется.
+        """
+        with self._lock:
+            event = self._events.get(job_id)
+        return event is None or event.wait(timeout)
+
+    def join(self) -> None:
+        """
+        Ждёт завершения всех задач, поставленных этим процессом.
+        """
+        while True:
+            with self._lock:
+                events = list(self._events.values())
+            if not events:
+                return
+            for event in events:
+                event.wait()
+
+    def shutdown(self) -> None:
+        """
+        Останавливает пул, не дожидаясь очереди: незавершённые
+        задачи перестают продлеваться и восстанавливаются командой
+        flask jobs recover.
+        """
+        self._stop.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики задач.
+
+        Returns:
+            dict: workers, submitted, running, pending, completed, failed.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._events) - stats["running"]
+        stats["workers"] = self.workers
+        return stats
+
+
+job_queue = JobQueue()
@@ -0,0 +1,239 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List
+
+from flask import has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter:
+    """
+    Отложенная (write-behind) запись логов пачками.
+
+    create_log() только ставит запись в ограниченную очередь,
+    фоновый поток вставляет накопленное одной транзакцией, как только
+    набралось batch_size записей или прошло flush_interval секунд.
+    При заполненной очереди вызывающий поток ждёт (backpressure)
+    до put_timeout секунд, затем записывает сам, синхронно.
+    При остановке очередь дописывается до конца.
+
+    Если писатель выключен (LOG_WRITER_ENABLED=0, тесты), записи
+    сохраняются синхронно в вызывающем потоке.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        put_timeout: float = 5,
+    ):
+        self.enabled = enabled
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._app = None
+        self._write_batch: Callable[[List[dict]], None] | None = None
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._flusher = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats = {
+            "written": 0,
+            "batches": 0,
+            "blocked": 0,
+            "sync_writes": 0,
+            "failed": 0,
+            "batched": 0,
+        }
+
+    def init_app(self, app, write_batch: Callable[[List[dict]], None]) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+
+        Args:
+            app: Flask-приложение (в его контексте выполняется запись).
+            write_batch (Callable): Сохраняет список записей одной
+                транзакцией.
+        """
+        self.enabled = app.config.get("LOG_WRITER_ENABLED", self.enabled)
+        self.max_queue = app.config.get(
+            "LOG_WRITER_QUEUE_SIZE", self.max_queue
+        )
+        self.batch_size = app.config.get(
+            "LOG_WRITER_BATCH_SIZE", self.batch_size
+        )
+        self.flush_interval = app.config.get(
+            "LOG_WRITER_FLUSH_INTERVAL", self.flush_interval
+        )
+        self._app = app
+        self._write_batch = write_batch
+        with self._lock:
+            if self._flusher is None and self._queue.empty():
+                self._queue = queue.Queue(self.max_queue)
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_forever,
+                name="log-writer",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def submit(self, record: dict) -> None:
+        """
+        Ставит запись в очередь на сохранение.
+
+        Args:
+            record (dict): Поля лога.
+        """
+        if not self.enabled or self._stop.is_set():
+            self._write([record], sync=True)
+            return
+        self._ensure_flusher()
+        try:
+            self._queue.put_nowait(record)
+            return
+        except queue.Full:
+            with self._lock:
+                self._stats["blocked"] += 1
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            # Фоновый поток не успевает: сохраняем сами, но не теряем.
+            self._write([record], sync=True)
+
+    def _write_once(self, records: List[dict]) -> None:
+        if has_app_context():
+            self._write_batch(records)
+        else:
+            with self._app.app_context():
+                self._write_batch(records)
+
+    def _write(self, records: List[dict], sync: bool = False) -> None:
+        written, failed = len(records), 0
+        try:
+            self._write_once(records)
+        except Exception:
+            # Одна повторная попытка: типичная причина — занятая
+            # блокировка записи SQLite.
+            time.sleep(0.1)
+            try:
+                self._write_once(records)
+            except Exception:
+                logger.exception("failed to write %d log records", written)
+                written, failed = 0, written
+        with self._lock:
+            self._stats["written"] += written
+            self._stats["failed"] += failed
+            if sync:
+                self._stats["sync_writes"] += 1
+            else:
+                self._stats["batches"] += 1
+                self._stats["batched"] += len(records)
+
+    def _next_batch(self) -> List[dict]:
+        stopping = self._stop.is_set()
+        try:
+            item = self._queue.get(
+                block=not stopping, timeout=self.flush_interval
+            )
+        except queue.Empty:
+            return []
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        # None в очереди — сигнал остановки от shutdown().
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._stop.is_set():
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+        self._queue.task_done()
+        return batch
+
+    def _flush_forever(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            elif self._stop.is_set():
+                return
+
+    def flush(self) -> None:
+        """
+        Ждёт, пока все поставленные в очередь записи будут сохранены.
+        """
+        if self._flusher is not None and self._flusher.is_alive():
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 30) -> None:
+        """
+        Дописывает очередь и останавливает фоновый поток.
+        Новые записи после остановки сохраняются синхронно.
+
+        Args:
+            timeout (float): Предельное время ожидания (секунды).
+        """
+        self._stop.set()
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            flusher.join(timeout)
+        # Записи, поставленные в очередь одновременно с остановкой.
+        leftovers = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                leftovers.append(record)
+        if leftovers:
+            self._write(leftovers)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики записи.
+
+        Returns:
+            dict: enabled, queued, written, batches, blocked,
+                  sync_writes, failed и avg_batch.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        batched = stats.pop("batched")
+        stats["enabled"] = self.enabled
+        stats["queued"] = self._queue.qsize()
+        stats["avg_batch"] = (
+            round(batched / stats["batches"], 1) if stats["batches"] else 0.0
+        )
+        return stats
+
+
+log_writer = LogWriter()
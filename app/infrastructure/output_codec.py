@@ -0,0 +1,460 @@
+from collections import Counter, OrderedDict
+import hashlib
+import logging
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+import zlib
+
+from sqlalchemy import event
+
+from .blob_store import blob_store, BlobStore
+from .extensions import db
+from .output_delta import apply_delta, make_delta
+
+logger = logging.getLogger(__name__)
+
+# Заголовок сжатого значения: версия формата и ID словаря (0 — без
+# словаря), далее raw deflate. Несжатый вывод хранится как TEXT,
+# сжатый — как BLOB, поэтому отличить их можно по типу значения.
+# Версия BLOB_REF_VERSION — ссылка на блоб в BlobStore: заголовок
+# и SHA-256 текста (содержимое блоба — значение версии 1).
+# Версия DELTA_VERSION — построчная дельта (raw deflate) к снимку
+# в BlobStore: номер дельты после снимка и SHA-256 снимка.
+HEADER = struct.Struct(">BH")
+FORMAT_VERSION = 1
+BLOB_REF_VERSION = 2
+BLOB_REF_SIZE = HEADER.size + hashlib.sha256().digest_size
+DELTA_VERSION = 3
+DELTA_HEADER = struct.Struct(">BH32s")
+# Дельта больше 1/DELTA_MAX_RATIO текста невыгодна — пишется снимок.
+DELTA_MAX_RATIO = 8
+SNAPSHOT_CACHE_SIZE = 64
+# zlib использует не более 32 КБ предустановленного словаря.
+MAX_DICTIONARY_SIZE = 32 * 1024
+SQL_FUNCTION = "nettools_output"
+
+
+def train_dictionary(
+    samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE
+) -> bytes:
+    """
+    Строит предустановленный словарь zlib из образцов вывода.
+
+    В словарь попадают строки, повторяющиеся в разных образцах
+    (шапки таблиц, ключевые слова конфигураций, баннеры), с весом
+    «число образцов × длина». deflate дешевле кодирует близкие
+    ссылки, поэтому самые ценные строки ставятся в конец словаря.
+
+    Args:
+        samples (Iterable[str]): Образцы вывода команд.
+        size (int): Максимальный размер словаря (байты).
+
+    Returns:
+        bytes: Словарь (пустой, если повторов нет).
+    """
+    seen = Counter()
+    for sample in samples:
+        seen.update(set(sample.splitlines(keepends=True)))
+    ranked = sorted(
+        (
+            (count * len(line), line.encode("utf-8"))
+            for line, count in seen.items()
+            if count > 1 and line.strip()
+        ),
+        reverse=True,
+    )
+    chosen, total = [], 0
+    for _, line in ranked:
+        if total + len(line) > size:
+            continue
+        chosen.append(line)
+        total += len(line)
+    return b"".join(reversed(chosen))
+
+
+class OutputCodec:
+    """
+    Прозрачное сжатие вывода команд в колонке logs.output.
+
+    Вывод длиннее min_size байт сжимается zlib с последним обученным
+    словарём (flask logs train-dict); словари хранятся в базе,
+    ID словаря записывается в заголовок значения. Чтение
+    распаковывает значения любого формата: несжатые (TEXT), без
+    словаря и с любым из словарей.
+
+    Вывод длиннее порога BlobStore сохраняется на диск один раз
+    для одинакового текста, в базе остаётся только ссылка.
+    Повторный вывод той же команды на том же хосте хранится
+    дельтой к последнему снимку (encode_delta): восстановление —
+    одно чтение снимка и один проход по дельте, новый снимок
+    пишется каждые delta_interval запусков.
+
+    В каждое соединение SQLite добавляется функция
+    nettools_output(output), возвращающая текст, — через неё
+    логи читают полнотекстовый индекс и SQL-запросы. Без неё
+    триггеры индекса не дают ни добавить, ни удалить лог, поэтому
+    внешние соединения регистрируют её через register_function().
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_size: int = 512,
+        level: int = 6,
+        delta_interval: int = 20,
+        delta_max_lines: int = 20000,
+    ):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.level = level
+        self.delta_interval = delta_interval
+        self.delta_max_lines = delta_max_lines
+        self._snapshots: OrderedDict[str, List[str]] = OrderedDict()
+        self.blobs: BlobStore | None = None
+        self._load_dictionaries: Callable[[], Dict[int, bytes]] = dict
+        self._dictionaries: Dict[int, bytes] | None = None
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "compressed": 0,
+            "stored_plain": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "blob_refs": 0,
+            "deltas": 0,
+            "delta_bytes": 0,
+            "decompressed": 0,
+            "decompress_time": 0.0,
+            "sql_errors": 0,
+        }
+
+    def init_app(
+        self, app, load_dictionaries: Callable[[], Dict[int, bytes]]
+    ) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения
+        и регистрирует SQL-функцию в соединениях SQLite.
+
+        Args:
+            app: Flask-приложение.
+            load_dictionaries (Callable): Возвращает словари из базы
+                ({id: данные}).
+        """
+        self.enabled = app.config.get("OUTPUT_COMPRESSION", self.enabled)
+        self.min_size = app.config.get(
+            "OUTPUT_COMPRESS_MIN_SIZE", self.min_size
+        )
+        self.level = app.config.get("OUTPUT_COMPRESS_LEVEL", self.level)
+        self.delta_interval = app.config.get(
+            "DELTA_SNAPSHOT_INTERVAL", self.delta_interval
+        )
+        self.delta_max_lines = app.config.get(
+            "DELTA_MAX_LINES", self.delta_max_lines
+        )
+        self._load_dictionaries = load_dictionaries
+        self.blobs = blob_store
+        with self._lock:
+            self._dictionaries = None
+            self._active = 0
+        with app.app_context():
+            engine = db.engine
+            if engine.dialect.name == "sqlite" and not event.contains(
+                engine, "connect", self._register_function
+            ):
+                event.listen(engine, "connect", self._register_function)
+
+    def _register_function(self, dbapi_connection, connection_record):
+        self.register_function(dbapi_connection)
+
+    def register_function(self, dbapi_connection) -> None:
+        """
+        Добавляет SQL-функцию nettools_output в соединение SQLite
+        (соединения движка приложения получают её автоматически).
+
+        Args:
+            dbapi_connection: Соединение sqlite3.
+        """
+        dbapi_connection.create_function(
+            SQL_FUNCTION, 1, self._sql_output, deterministic=True
+        )
+
+    def _sql_output(self, value: str | bytes | None) -> str | None:
+        # Исключение в функции обрывает запрос, а триггер индекса
+        # вызывает её и при удалении лога: потерянный блоб не должен
+        # мешать удалению. Индекс при этом может сохранить слова
+        # удалённой строки; в выдачу они не попадут (строки нет
+        # в logs_text).
+        try:
+            return self.decompress(value)
+        except Exception:
+            logger.warning("output is not readable", exc_info=True)
+            with self._lock:
+                self._stats["sql_errors"] += 1
+            return ""
+
+    def reload(self) -> None:
+        """
+        Перечитывает словари из базы; новые записи сжимаются
+        последним из них.
+        """
+        try:
+            dictionaries = self._load_dictionaries()
+        except Exception:
+            # До миграции таблицы словарей может не быть.
+            logger.warning("output dictionaries are not available")
+            dictionaries = {}
+        with self._lock:
+            self._dictionaries = dict(dictionaries)
+            self._active = max(self._dictionaries, default=0)
+
+    def add_dictionary(self, dictionary_id: int, data: bytes) -> None:
+        """
+        Регистрирует новый словарь и делает его активным.
+
+        Args:
+            dictionary_id (int): ID словаря в базе.
+            data (bytes): Словарь.
+        """
+        if self._dictionaries is None:
+            self.reload()
+        with self._lock:
+            self._dictionaries[dictionary_id] = data
+            self._active = max(self._active, dictionary_id)
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        if dictionary_id == 0:
+            return b""
+        data = (self._dictionaries or {}).get(dictionary_id)
+        if data is None:
+            # Словари ещё не загружены или обучены в другом процессе.
+            self.reload()
+            data = self._dictionaries[dictionary_id]
+        return data
+
+    def _pack(self, raw: bytes) -> bytes:
+        if self._dictionaries is None:
+            # Словари читаются при первой записи, а не при запуске:
+            # база может быть ещё не создана или не мигрирована.
+            self.reload()
+        with self._lock:
+            dictionary_id = self._active
+            dictionary = self._dictionaries.get(dictionary_id, b"")
+        if dictionary:
+            compressor = zlib.compressobj(
+                self.level, zlib.DEFLATED, -15, zdict=dictionary
+            )
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return (
+            HEADER.pack(FORMAT_VERSION, dictionary_id)
+            + compressor.compress(raw)
+            + compressor.flush()
+        )
+
+    def compress(self, text: str | None) -> str | bytes | None:
+        """
+        Сжимает вывод, если он длиннее порога и сжатие выгодно,
+        или сохраняет его в BlobStore и возвращает ссылку.
+
+        Args:
+            text (str | None): Вывод команды.
+
+        Returns:
+            str | bytes | None: Исходный текст, сжатое значение
+                                или ссылка на блоб.
+        """
+        if text is None or isinstance(text, bytes):
+            # bytes — уже закодированное значение (encode_delta).
+            return text
+        raw = text.encode("utf-8")
+        blobs = self.blobs
+        if blobs is not None and blobs.enabled and len(raw) >= blobs.min_size:
+            digest = hashlib.sha256(raw).digest()
+            blobs.put(digest.hex(), lambda: self._pack(raw))
+            with self._lock:
+                self._stats["blob_refs"] += 1
+            return HEADER.pack(BLOB_REF_VERSION, 0) + digest
+        if not self.enabled or len(raw) < self.min_size:
+            return text
+        packed = self._pack(raw)
+        with self._lock:
+            if len(packed) >= len(raw):
+                self._stats["stored_plain"] += 1
+                return text
+            self._stats["compressed"] += 1
+            self._stats["bytes_in"] += len(raw)
+            self._stats["bytes_out"] += len(packed)
+        return packed
+
+    def _snapshot(self, digest: str) -> List[str]:
+        with self._lock:
+            lines = self._snapshots.get(digest)
+            if lines is not None:
+                self._snapshots.move_to_end(digest)
+                return lines
+        lines = self.blobs.read(digest, self._inflate).splitlines(
+            keepends=True
+        )
+        with self._lock:
+            self._snapshots[digest] = lines
+            if len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+                self._snapshots.popitem(last=False)
+        return lines
+
+    def wants_delta(self, text: str | None) -> bool:
+        """
+        Проверяет, имеет ли смысл искать предыдущий запуск для
+        дельты: дельты включены и вывод попадает в хранилище блобов.
+        """
+        blobs = self.blobs
+        return bool(
+            text
+            and self.delta_interval
+            and blobs is not None
+            and blobs.enabled
+            and len(text) >= blobs.min_size
+        )
+
+    def encode_delta(
+        self, text: str, previous: str | bytes | None
+    ) -> bytes | None:
+        """
+        Кодирует вывод дельтой к снимку, на который опирается
+        предыдущий запуск той же команды.
+
+        Args:
+            text (str): Новый вывод.
+            previous (str | bytes | None): Хранимое значение
+                предыдущего запуска.
+
+        Returns:
+            bytes | None: Значение для колонки output или None, если
+                          нужен полный снимок (интервал исчерпан,
+                          дельта невыгодна, вывод совпал со снимком
+                          или хранилище блобов выключено).
+        """
+        blobs = self.blobs
+        if (
+            not self.delta_interval
+            or blobs is None
+            or not blobs.enabled
+            or not isinstance(previous, bytes)
+            or not previous
+        ):
+            return None
+        raw = text.encode("utf-8")
+        if len(raw) < blobs.min_size:
+            return None
+        if previous[0] == BLOB_REF_VERSION and len(previous) == BLOB_REF_SIZE:
+            _, _, digest = DELTA_HEADER.unpack(previous)
+            depth = 0
+        elif previous[0] == DELTA_VERSION:
+            _, depth, digest = DELTA_HEADER.unpack_from(previous)
+        else:
+            return None
+        if depth >= self.delta_interval:
+            return None
+        if hashlib.sha256(raw).digest() == digest:
+            # Тот же текст — обычная ссылка на снимок.
+            return None
+        lines = text.splitlines(keepends=True)
+        if len(lines) > self.delta_max_lines:
+            return None
+        if not blobs.touch(digest.hex()):
+            return None
+        base = self._snapshot(digest.hex())
+        if len(base) > self.delta_max_lines:
+            return None
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        delta = make_delta(base, lines).encode("utf-8")
+        value = (
+            DELTA_HEADER.pack(DELTA_VERSION, depth + 1, digest)
+            + compressor.compress(delta)
+            + compressor.flush()
+        )
+        if len(value) * DELTA_MAX_RATIO > len(raw):
+            return None
+        with self._lock:
+            self._stats["deltas"] += 1
+            self._stats["delta_bytes"] += len(value)
+        return value
+
+    def _inflate(self, value: bytes | memoryview) -> str:
+        version, dictionary_id = HEADER.unpack_from(value)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unknown output format {version}")
+        dictionary = self._dictionary(dictionary_id)
+        if dictionary:
+            decompressor = zlib.decompressobj(-15, zdict=dictionary)
+        else:
+            decompressor = zlib.decompressobj(-15)
+        offset = HEADER.size
+        with memoryview(value)[offset:] as body:
+            data = decompressor.decompress(body) + decompressor.flush()
+        return data.decode("utf-8")
+
+    def decompress(self, value: str | bytes | None) -> str | None:
+        """
+        Возвращает текст вывода независимо от формата хранения.
+
+        Args:
+            value (str | bytes | None): Значение колонки output.
+
+        Returns:
+            str | None: Текст.
+
+        Raises:
+            ValueError: Неизвестная версия формата.
+            FileNotFoundError: Блоб, на который ссылается значение,
+                               удалён из хранилища.
+        """
+        if not isinstance(value, (bytes, memoryview)):
+            return value
+        started = time.perf_counter()
+        if value[0] == BLOB_REF_VERSION:
+            offset = HEADER.size
+            digest = bytes(value[offset:BLOB_REF_SIZE]).hex()
+            text = self.blobs.read(digest, self._inflate)
+        elif value[0] == DELTA_VERSION:
+            _, _, digest = DELTA_HEADER.unpack_from(value)
+            offset = DELTA_HEADER.size
+            delta = zlib.decompress(bytes(value)[offset:], -15)
+            text = apply_delta(self._snapshot(digest.hex()), delta.decode())
+        else:
+            text = self._inflate(value)
+        with self._lock:
+            self._stats["decompressed"] += 1
+            self._stats["decompress_time"] += time.perf_counter() - started
+        return text
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики сжатия.
+
+        Returns:
+            dict: enabled, dictionary, compressed, stored_plain,
+                  bytes_in, bytes_out, ratio, blob_refs, deltas,
+                  delta_bytes, decompressed, avg_decompress_us
+                  и sql_errors.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["dictionary"] = self._active
+        decompress_time = stats.pop("decompress_time")
+        stats["enabled"] = self.enabled
+        stats["ratio"] = (
+            round(stats["bytes_in"] / stats["bytes_out"], 2)
+            if stats["bytes_out"]
+            else None
+        )
+        stats["avg_decompress_us"] = (
+            round(decompress_time / stats["decompressed"] * 1e6, 1)
+            if stats["decompressed"]
+            else 0.0
+        )
+        return stats
+
+
+output_codec = OutputCodec()
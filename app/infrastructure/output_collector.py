@@ -0,0 +1,139 @@
+import mmap
+import tempfile
+from typing import List
+
+TAIL_SIZE = 512
+
+
+class OutputCollector:
+    """
+    Накопитель вывода устройства.
+
+    Фрагменты добавляются в список за амортизированное O(1), хвост
+    для поиска приглашения хранится отдельно и не превышает
+    tail_size. После spool_size символов данные переносятся во
+    временный файл, после max_size — перестают сохраняться
+    (чтение при этом продолжается, чтобы дождаться приглашения).
+    """
+
+    def __init__(
+        self,
+        max_size: int = 64 * 1024 * 1024,
+        spool_size: int = 1024 * 1024,
+        tail_size: int = TAIL_SIZE,
+    ):
+        self.max_size = max_size
+        self.spool_size = spool_size
+        self.tail_size = tail_size
+        self.size = 0
+        self.dropped = 0
+        self.tail = ""
+        self._chunks: List[str] = []
+        self._buffered = 0
+        self._file = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    def append(self, text: str) -> None:
+        """
+        Добавляет фрагмент вывода.
+
+        Args:
+            text (str): Декодированный фрагмент.
+        """
+        if not text:
+            return
+        tail_size = self.tail_size
+        if len(text) >= tail_size:
+            self.tail = text[-tail_size:]
+        else:
+            self.tail = (self.tail + text)[-tail_size:]
+
+        room = self.max_size - self.size
+        if room <= 0:
+            self.dropped += len(text)
+            return
+        if len(text) > room:
+            self.dropped += len(text) - room
+            text = text[:room]
+        self.size += len(text)
+
+        if self._file is not None:
+            self._file.write(text.encode("utf-8"))
+            return
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered > self.spool_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._file = tempfile.TemporaryFile()
+        self._file.writelines(chunk.encode("utf-8") for chunk in self._chunks)
+        self._chunks = []
+        self._buffered = 0
+
+    def getvalue(self) -> str:
+        """
+        Возвращает сохранённый вывод одной строкой
+        (с пометкой, если он был обрезан по max_size).
+
+        Returns:
+            str: Вывод.
+        """
+        if self._file is not None:
+            # Декодируем прямо из отображения файла, без копии в bytes.
+            self._file.flush()
+            with mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as view:
+                text = str(view, "utf-8")
+        else:
+            text = "".join(self._chunks)
+            self._chunks = [text]
+        if self.dropped:
+            text += f"\n... output truncated ({self.dropped} chars dropped)"
+        return text
+
+    def close(self) -> None:
+        """
+        Освобождает временный файл.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._chunks = []
+
+
+class OutputLimits:
+    """
+    Настройки накопителей вывода из конфигурации приложения.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 64 * 1024 * 1024,
+        spool_size: int = 1024 * 1024,
+    ):
+        self.max_size = max_size
+        self.spool_size = spool_size
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.max_size = app.config.get("OUTPUT_MAX_SIZE", self.max_size)
+        self.spool_size = app.config.get("OUTPUT_SPOOL_SIZE", self.spool_size)
+
+    def collector(self) -> OutputCollector:
+        """
+        Создаёт накопитель с текущими ограничениями.
+
+        Returns:
+            OutputCollector: Новый накопитель.
+        """
+        return OutputCollector(self.max_size, self.spool_size)
+
+
+output_limits = OutputLimits()
@@ -0,0 +1,79 @@
+from difflib import SequenceMatcher
+import json
+from typing import List, Sequence
+
+
+def _replaced(base: Sequence[str], lines: Sequence[str]) -> List | None:
+    # Операции для построчной замены; None — изменилось больше
+    # восьмой части строк (вероятно, сдвиг — нужен полный поиск).
+    ops: List = []
+    changed, start = 0, 0
+    for i, (old, new) in enumerate(zip(base, lines)):
+        if old == new:
+            continue
+        changed += 1
+        if changed * 8 > len(lines):
+            return None
+        if start < i:
+            ops.append([start, i])
+        if ops and isinstance(ops[-1], str):
+            ops[-1] += new
+        else:
+            ops.append(new)
+        start = i + 1
+    if start < len(lines):
+        ops.append([start, len(lines)])
+    return ops
+
+
+def make_delta(base: Sequence[str], lines: Sequence[str]) -> str:
+    """
+    Строит построчную дельту lines относительно base.
+
+    Дельта — JSON-список операций: пара [i, j] копирует строки
+    base[i:j], строка — вставляемый текст (несколько строк подряд
+    склеиваются). Строки передаются с окончаниями (keepends=True).
+
+    Args:
+        base (Sequence[str]): Строки снимка.
+        lines (Sequence[str]): Строки новой версии.
+
+    Returns:
+        str: Дельта в JSON.
+    """
+    # Частый случай — строки заменены на месте (счётчики, время,
+    # описания): достаточно одного прохода.
+    ops = _replaced(base, lines) if len(base) == len(lines) else None
+    if ops is None:
+        ops = []
+        # Частые строки ("!", пустые) с autojunk не начинают
+        # совпадение, но присоединяются к соседним: дельта почти та
+        # же, а поиск в несколько раз быстрее.
+        matcher = SequenceMatcher(None, base, lines)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append([i1, i2])
+            elif j1 != j2:
+                ops.append("".join(lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: Sequence[str], delta: str) -> str:
+    """
+    Восстанавливает текст по снимку и дельте.
+
+    Args:
+        base (Sequence[str]): Строки снимка (keepends=True).
+        delta (str): Дельта из make_delta().
+
+    Returns:
+        str: Восстановленный текст.
+    """
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            start, end = op
+            parts.extend(base[start:end])
+    return "".join(parts)
@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+
+MASK = "<removed>"
+
+# Текст, за которым следует секрет: ключевые слова
+# конфигураций Cisco-подобных (IOS, NX-OS, Eltex, EcoRouter), Huawei
+# и Juniper. Тип шифрования (0, 5, 7, ...) остаётся в выводе.
+VENDOR_SECRETS = [
+    # enable secret, username ... secret/password, line password,
+    # neighbor ... password, ppp chap password; Huawei password simple.
+    r"\bsecret(?: [0-9])? ",
+    r"\bpassword(?: [0-9]| encrypted| simple| (?:irreversible-)?cipher)?"
+    r" (?!encryption\b)",
+    r"\b(?:tacacs-server|radius-server)(?: host \S+(?: \S+)*?)? key"
+    r"(?: [0-9])? ",
+    # Блок "tacacs server"/"radius server": key 7 <...>; "key 1"
+    # в key chain — номер ключа, не секрет.
+    r"^[ \t]*(?:server-private \S+ )?key(?: [0-9])? (?!chain |[0-9]+$)",
+    r"\bkey-string(?: [0-9])? ",
+    r"\bcrypto isakmp key(?: [0-9])? ",
+    r"\bpre-shared-key(?: local| remote| ascii-text| hexadecimal)?"
+    r"(?: [0-9])? ",
+    r"\bauthentication-key(?: [0-9]+ md5)?(?: [0-9])? ",
+    r"\bmessage-digest-key [0-9]+ md5(?: [0-9])? ",
+    r"\bwpa-psk ascii(?: [0-9])? ",
+    r"\bsnmp-server community ",
+    r"\bsnmp-server host \S+(?: informs| traps)?"
+    r"(?: version (?:1|2c|3 (?:auth|noauth|priv)))? ",
+    r"\bauth (?:md5|sha\S*) ",
+    r"\bpriv (?:des|3des|aes(?: [0-9]+)?) ",
+    # Huawei: ... cipher %^%#...%^%#, snmp-agent community read <...>.
+    r"\b(?:irreversible-)?cipher ",
+    r"\bsnmp-agent community (?:read|write) (?!cipher )",
+    # Juniper: encrypted-password "$6$...", community public {.
+    r"\b(?:encrypted|simple)-password ",
+    r"^[ \t]*community ",
+    # key=value (RouterOS, wpa_supplicant и т.п.).
+    r"\b(?:password|passphrase|secret|psk|pre-shared-key)=",
+]
+
+SECRET = r'"[^"\n]*"|[^\s"]+'
+# Слова, без которых ни один шаблон не совпадёт: по ним строки
+# отбираются для полной проверки. Альтернативы сгруппированы по
+# первой букве — так re быстрее отбрасывает позиции.
+KEYWORDS = (
+    r"(?:s(?:ecret|nmp)|p(?:ass(?:word|phrase)|sk|riv)|key"
+    r"|c(?:ommunity|ipher)|auth)"
+)
+
+
+class Redactor:
+    """
+    Удаление секретов (пароли, ключи, SNMP community) из вывода
+    устройств до того, как он попадёт в базу, задачи и поток
+    терминала.
+
+    Текст просматривается за один проход выражением из ключевых слов
+    (только литералы — в re это быстрый поиск по первым символам);
+    строки с ключевым словом проверяются одним объединённым
+    выражением всех шаблонов. Шаблоны не выходят за границы строки:
+    вывод можно обрабатывать по частям, если каждая часть — целые
+    строки (так их отдаёт TerminalStream).
+    """
+
+    def __init__(self, enabled: bool = True, mask: str = MASK):
+        self.enabled = enabled
+        self.mask = mask
+        self.regex = re.compile(
+            "(?P<prefix>" + "|".join(VENDOR_SECRETS) + f")(?:{SECRET})",
+            re.MULTILINE,
+        )
+        self._keywords = re.compile(KEYWORDS)
+        self._template = rf"\g<prefix>{mask}"
+        self._lock = threading.Lock()
+        self._stats = {
+            "chars": 0,
+            "redacted": 0,
+            "time": 0.0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.enabled = app.config.get("OUTPUT_REDACTION", self.enabled)
+
+    def redact(self, text: str) -> str:
+        """
+        Заменяет секреты в тексте на маску.
+
+        Args:
+            text (str): Вывод (целые строки).
+
+        Returns:
+            str: Текст без секретов.
+        """
+        if not self.enabled or not text:
+            return text
+        started = time.perf_counter()
+        parts, copied, line_end, count = [], 0, -1, 0
+        for hit in self._keywords.finditer(text):
+            if hit.start() < line_end:
+                continue
+            line_start = text.rfind("\n", 0, hit.start()) + 1
+            line_end = text.find("\n", hit.end())
+            if line_end < 0:
+                line_end = len(text)
+            line, found = self.regex.subn(
+                self._template, text[line_start:line_end]
+            )
+            if found:
+                parts.append(text[copied:line_start])
+                parts.append(line)
+                copied = line_end
+                count += found
+        size = len(text)
+        if count:
+            parts.append(text[copied:])
+            text = "".join(parts)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["chars"] += size
+            self._stats["redacted"] += count
+            self._stats["time"] += elapsed
+        return text
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики обработки.
+
+        Returns:
+            dict: enabled, chars, redacted и mb_per_s (скорость
+                  просмотра).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        elapsed = stats.pop("time")
+        stats["enabled"] = self.enabled
+        stats["mb_per_s"] = (
+            round(stats["chars"] / elapsed / 1e6, 1) if elapsed else 0.0
+        )
+        return stats
+
+
+redactor = Redactor()
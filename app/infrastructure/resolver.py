@@ -0,0 +1,243 @@
+from collections import OrderedDict
+import ipaddress
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+
+class _Entry:
+    """
+    Результат разрешения имени: адреса или ошибка resolver'а.
+    """
+
+    def __init__(self, addresses: List[str], error, ttl: float):
+        self.addresses = addresses
+        self.error = error
+        self.expires_at = time.monotonic() + ttl
+
+
+class _Pending:
+    """
+    Разрешение имени, которое уже выполняется в другом потоке.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+
+
+class ResolverCache:
+    """
+    Общий для всех инструментов кэш разрешения имён (getaddrinfo).
+
+    Удачные ответы хранятся ttl секунд, ошибки (NXDOMAIN и т.п.) —
+    negative_ttl секунд. TTL самих DNS-записей не учитывается:
+    getaddrinfo его не сообщает, поэтому срок жизни записи задаётся
+    настройкой RESOLVER_TTL и не должен превышать TTL зон, которые
+    часто меняются. Кэшируется полный список адресов; connect() перебирает
+    их по порядку, как это делает socket.create_connection. Размер
+    ограничен по LRU. Если имя уже
+    разрешается в другом потоке, остальные ждут тот же результат,
+    а не отправляют параллельные запросы (защита от stampede).
+    IP-адреса возвращаются без обращения к кэшу.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 60,
+        negative_ttl: float = 10,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._pending: Dict[tuple, _Pending] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "lookup_ms_total": 0.0,
+            "lookup_ms_max": 0.0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.max_size = app.config.get("RESOLVER_MAX_SIZE", self.max_size)
+        self.ttl = app.config.get("RESOLVER_TTL", self.ttl)
+        self.negative_ttl = app.config.get(
+            "RESOLVER_NEGATIVE_TTL", self.negative_ttl
+        )
+
+    def _lookup(self, host: str, family: int) -> _Entry:
+        started = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, None, family, socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            entry = _Entry(addresses, None, self.ttl)
+        except (socket.gaierror, UnicodeError) as e:
+            entry = _Entry([], e, self.negative_ttl)
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["lookup_ms_total"] += elapsed
+            self._stats["lookup_ms_max"] = max(
+                self._stats["lookup_ms_max"], elapsed
+            )
+        return entry
+
+    def _store(self, key: tuple, entry: _Entry) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def resolve_all(
+        self, host: str, family: int = socket.AF_UNSPEC
+    ) -> List[str]:
+        """
+        Возвращает все адреса узла с учётом кэша.
+
+        Args:
+            host (str): Доменное имя или IP-адрес.
+            family (int): Семейство адресов (AF_UNSPEC, AF_INET, AF_INET6).
+
+        Returns:
+            List[str]: Адреса в порядке, выданном системным resolver'ом.
+
+        Raises:
+            socket.gaierror: Если имя не разрешается (в том числе
+                из негативного кэша).
+        """
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host.rstrip(".").lower(), family)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                hit = "negative_hits" if entry.error else "hits"
+                self._stats[hit] += 1
+            else:
+                entry = None
+                pending = self._pending.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._pending[key] = _Pending()
+                    self._stats["misses"] += 1
+                else:
+                    self._stats["coalesced"] += 1
+
+        if entry is None and owner:
+            try:
+                entry = self._lookup(host, family)
+            finally:
+                with self._lock:
+                    if entry is not None:
+                        self._store(key, entry)
+                    del self._pending[key]
+                pending.entry = entry
+                pending.done.set()
+        elif entry is None:
+            pending.done.wait()
+            entry = pending.entry
+            if entry is None:
+                # Поток-владелец упал с неожиданной ошибкой — пробуем сами.
+                return self.resolve_all(host, family)
+
+        if entry.error is not None:
+            raise entry.error
+        return list(entry.addresses)
+
+    def resolve(self, host: str, family: int = socket.AF_UNSPEC) -> str:
+        """
+        Возвращает первый адрес узла с учётом кэша.
+
+        Args:
+            host (str): Доменное имя или IP-адрес.
+            family (int): Семейство адресов.
+
+        Returns:
+            str: IP-адрес.
+        """
+        return self.resolve_all(host, family)[0]
+
+    def connect(
+        self,
+        host: str,
+        connect: Callable[[str], T],
+        family: int = socket.AF_UNSPEC,
+    ) -> T:
+        """
+        Подключается к первому доступному адресу узла.
+
+        Адреса перебираются в порядке resolve_all(); следующий пробуется,
+        только если connect упал с OSError (отказ, таймаут, недоступность
+        сети). Прочие ошибки, например неверный пароль, пробрасываются
+        сразу.
+
+        Args:
+            host (str): Доменное имя или IP-адрес.
+            connect (Callable): Получает IP-адрес и возвращает соединение.
+            family (int): Семейство адресов.
+
+        Returns:
+            Результат connect для первого адреса, к которому удалось
+            подключиться.
+
+        Raises:
+            OSError: Ошибка разрешения имени или подключения к последнему
+                адресу.
+        """
+        error = None
+        for address in self.resolve_all(host, family):
+            try:
+                return connect(address)
+            except OSError as e:
+                error = e
+        raise error
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику попаданий и времени разрешения.
+
+        Returns:
+            dict: hits, negative_hits, misses, coalesced, evictions,
+                  entries, hit_ratio, lookup_ms_avg и lookup_ms_max.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total_ms = stats.pop("lookup_ms_total")
+        hits = stats["hits"] + stats["negative_hits"] + stats["coalesced"]
+        total = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / total, 3) if total else 0.0
+        stats["lookup_ms_avg"] = (
+            round(total_ms / stats["misses"], 3) if stats["misses"] else 0.0
+        )
+        stats["lookup_ms_max"] = round(stats["lookup_ms_max"], 3)
+        return stats
+
+
+resolver = ResolverCache()
@@ -0,0 +1,254 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, List
+
+
+class SSHSession:
+    """
+    Авторизованное SSH-подключение с открытым интерактивным shell.
+    """
+
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self.matcher = None
+        self.key = None
+        self.fingerprint = None
+        self.reused = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def is_alive(self) -> bool:
+        """
+        Проверяет, что транспорт и канал ещё живы.
+
+        Returns:
+            bool: True, если сессию можно переиспользовать.
+        """
+        try:
+            transport = self.client.get_transport()
+            if transport is None or not transport.is_active():
+                return False
+            if self.channel.closed or self.channel.exit_status_ready():
+                return False
+            transport.send_ignore()
+            return True
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        """
+        Закрывает канал и подключение, игнорируя ошибки.
+        """
+        for resource in (self.channel, self.client):
+            try:
+                resource.close()
+            except Exception:
+                pass
+
+
+class SSHSessionPool:
+    """
+    Пул SSH-сессий с ключом (host, port, username, model).
+
+    Сессия выдаётся в монопольное пользование через acquire()
+    и возвращается через release() или discard().
+    Простаивающие сессии вытесняются по времени простоя,
+    максимальному возрасту и размеру пула (LRU).
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        idle_timeout: float = 120,
+        max_age: float = 900,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self._idle: List[SSHSession] = []
+        self._lock = threading.Lock()
+        self._salt = os.urandom(16)
+        self._atexit_registered = False
+        self._reaper = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "failed_health_checks": 0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки пула из конфигурации Flask-приложения.
+        """
+        self.max_size = app.config.get("SSH_POOL_MAX_SIZE", self.max_size)
+        self.idle_timeout = app.config.get(
+            "SSH_POOL_IDLE_TIMEOUT", self.idle_timeout
+        )
+        self.max_age = app.config.get("SSH_POOL_MAX_AGE", self.max_age)
+        if not self._atexit_registered:
+            atexit.register(self.close_all)
+            self._atexit_registered = True
+
+    def _fingerprint(self, password: str) -> bytes:
+        return hashlib.sha256(self._salt + (password or "").encode()).digest()
+
+    def _expired(self, session: SSHSession, now: float) -> bool:
+        return (
+            now - session.last_used > self.idle_timeout
+            or now - session.created_at > self.max_age
+        )
+
+    def _evict_expired(self) -> List[SSHSession]:
+        now = time.monotonic()
+        expired = [s for s in self._idle if self._expired(s, now)]
+        if expired:
+            self._idle = [s for s in self._idle if s not in expired]
+            self._stats["evictions"] += len(expired)
+        return expired
+
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        model: str,
+        factory: Callable[[], SSHSession],
+    ) -> SSHSession:
+        """
+        Возвращает живую сессию из пула или создаёт новую.
+
+        Args:
+            host (str): Адрес устройства.
+            port (int): SSH-порт.
+            username (str): Имя пользователя.
+            password (str): Пароль (сравнивается по отпечатку).
+            model (str): Модель оборудования.
+            factory (Callable[[], SSHSession]): Создаёт новую сессию.
+
+        Returns:
+            SSHSession: Сессия, захваченная вызывающим кодом.
+        """
+        key = (host, port, username, (model or "").lower())
+        fingerprint = self._fingerprint(password)
+
+        with self._lock:
+            stale = self._evict_expired()
+            candidate = None
+            for session in reversed(self._idle):
+                if session.key == key:
+                    candidate = session
+                    break
+            if candidate is not None:
+                self._idle.remove(candidate)
+                if candidate.fingerprint != fingerprint:
+                    # Чужие учётные данные: сессию не отдаём.
+                    stale.append(candidate)
+                    candidate = None
+
+        for session in stale:
+            session.close()
+
+        if candidate is not None:
+            if candidate.is_alive():
+                with self._lock:
+                    self._stats["hits"] += 1
+                candidate.reused = True
+                candidate.last_used = time.monotonic()
+                return candidate
+            candidate.close()
+            with self._lock:
+                self._stats["failed_health_checks"] += 1
+
+        with self._lock:
+            self._stats["misses"] += 1
+
+        session = factory()
+        session.key = key
+        session.fingerprint = fingerprint
+        return session
+
+    def release(self, session: SSHSession) -> None:
+        """
+        Возвращает сессию в пул для повторного использования.
+
+        Args:
+            session (SSHSession): Ранее выданная сессия.
+        """
+        if self.max_size <= 0:
+            session.close()
+            return
+
+        session.last_used = time.monotonic()
+        with self._lock:
+            stale = self._evict_expired()
+            self._idle.append(session)
+            while len(self._idle) > self.max_size:
+                stale.append(self._idle.pop(0))
+                self._stats["evictions"] += 1
+            self._ensure_reaper()
+
+        for s in stale:
+            s.close()
+
+    def discard(self, session: SSHSession) -> None:
+        """
+        Закрывает сессию, не возвращая её в пул.
+
+        Args:
+            session (SSHSession): Ранее выданная сессия.
+        """
+        session.close()
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(
+            target=self._reap_forever,
+            name="ssh-pool-reaper",
+            daemon=True,
+        )
+        self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            time.sleep(max(1.0, min(self.idle_timeout / 2, 30.0)))
+            with self._lock:
+                stale = self._evict_expired()
+                empty = not self._idle
+            for session in stale:
+                session.close()
+            if empty:
+                return
+
+    def close_all(self) -> None:
+        """
+        Закрывает все простаивающие сессии.
+        """
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики попаданий и промахов пула.
+
+        Returns:
+            dict: hits, misses, evictions, failed_health_checks,
+                  idle и hit_ratio.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+ssh_pool = SSHSessionPool()
@@ -0,0 +1,299 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List
+
+import paramiko
+
+from app.infrastructure.resolver import resolver
+
+
+class TunnelHop:
+    """
+    Авторизованное подключение к одному jump host'у цепочки.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    @property
+    def transport(self):
+        return self.client.get_transport()
+
+    def is_alive(self) -> bool:
+        try:
+            transport = self.transport
+            return transport is not None and transport.is_active()
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class TunnelManager:
+    """
+    Кэш цепочек jump host'ов.
+
+    Каждый префикс цепочки (hop1, hop1→hop2, ...) хранится как отдельное
+    авторизованное подключение, поэтому цепочка строится один раз,
+    а к конечным устройствам открываются только новые каналы
+    direct-tcpip поверх последнего хопа. Transport paramiko
+    потокобезопасен, так что каналы к сотням устройств за одним
+    бастионом можно открывать параллельно.
+
+    Простаивающие и устаревшие хопы закрывает фоновый поток, пока
+    в кэше есть хопы; вместе с хопом удаляется и его блокировка
+    построения.
+    """
+
+    def __init__(self, idle_timeout: float = 300, max_age: float = 3600):
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self._hops: Dict[tuple, TunnelHop] = {}
+        self._build_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._salt = os.urandom(16)
+        self._atexit_registered = False
+        self._reaper = None
+        self._stats = {
+            "hop_hits": 0,
+            "hop_misses": 0,
+            "channels": 0,
+            "evictions": 0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.idle_timeout = app.config.get(
+            "TUNNEL_IDLE_TIMEOUT", self.idle_timeout
+        )
+        self.max_age = app.config.get("TUNNEL_MAX_AGE", self.max_age)
+        if not self._atexit_registered:
+            atexit.register(self.close_all)
+            self._atexit_registered = True
+
+    def _hop_key(self, hop: Dict[str, str]) -> tuple:
+        fingerprint = hashlib.sha256(
+            self._salt + (hop.get("password") or "").encode()
+        ).digest()
+        return (
+            hop["host"],
+            int(hop.get("port", 22)),
+            hop["username"],
+            fingerprint,
+        )
+
+    def _evict(self, prefix: tuple) -> None:
+        """
+        Удаляет хоп и все цепочки, построенные поверх него.
+        """
+        with self._lock:
+            stale = [key for key in self._hops if key[: len(prefix)] == prefix]
+            hops = [self._hops.pop(key) for key in stale]
+            self._stats["evictions"] += len(hops)
+            self._prune_build_locks()
+        for hop in hops:
+            hop.close()
+
+    def _prune_build_locks(self) -> None:
+        """
+        Удаляет блокировки префиксов без хопа в кэше, которые никто
+        не держит. Вызывается под self._lock.
+        """
+        for key, build_lock in list(self._build_locks.items()):
+            if key not in self._hops and not build_lock.locked():
+                del self._build_locks[key]
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key
+                for key, hop in self._hops.items()
+                if now - hop.last_used > self.idle_timeout
+                or now - hop.created_at > self.max_age
+            ]
+            self._prune_build_locks()
+        for key in expired:
+            self._evict(key)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(
+            target=self._reap_forever,
+            name="ssh-tunnels-reaper",
+            daemon=True,
+        )
+        self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            time.sleep(max(1.0, min(self.idle_timeout / 2, 30.0)))
+            self._evict_expired()
+            with self._lock:
+                if not self._hops:
+                    return
+
+    def _connect_hop(self, hop: Dict[str, str], parent, timeout: float):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            if parent is None:
+                # Следующие хопы разрешает уже сам бастион.
+                resolver.connect(
+                    hop["host"],
+                    lambda address: client.connect(
+                        address,
+                        port=hop.get("port", 22),
+                        username=hop["username"],
+                        password=hop["password"],
+                        timeout=timeout,
+                    ),
+                )
+            else:
+                sock = parent.transport.open_channel(
+                    "direct-tcpip",
+                    (hop["host"], hop.get("port", 22)),
+                    ("127.0.0.1", 0),
+                )
+                client.connect(
+                    hop["host"],
+                    port=hop.get("port", 22),
+                    username=hop["username"],
+                    password=hop["password"],
+                    sock=sock,
+                    timeout=timeout,
+                )
+        except Exception:
+            client.close()
+            raise
+        return TunnelHop(client)
+
+    def _get_hop(self, chain: List[Dict[str, str]], timeout: float):
+        """
+        Возвращает живой последний хоп цепочки, достраивая недостающие.
+        """
+        parent = None
+        prefix = ()
+        for hop in chain:
+            prefix = prefix + (self._hop_key(hop),)
+            with self._lock:
+                cached = self._hops.get(prefix)
+                build_lock = self._build_locks.setdefault(
+                    prefix, threading.Lock()
+                )
+
+            if cached is not None and cached.is_alive():
+                with self._lock:
+                    self._stats["hop_hits"] += 1
+                cached.last_used = time.monotonic()
+                parent = cached
+                continue
+
+            with build_lock:
+                with self._lock:
+                    cached = self._hops.get(prefix)
+                if cached is not None and cached.is_alive():
+                    # Цепочку уже достроил параллельный запрос.
+                    with self._lock:
+                        self._stats["hop_hits"] += 1
+                    parent = cached
+                    continue
+                if cached is not None:
+                    self._evict(prefix)
+
+                entry = self._connect_hop(hop, parent, timeout)
+                with self._lock:
+                    # Блокировку могли удалить во время построения —
+                    # тогда параллельно мог появиться другой хоп.
+                    replaced = self._hops.get(prefix)
+                    self._hops[prefix] = entry
+                    self._stats["hop_misses"] += 1
+                    self._ensure_reaper()
+                if replaced is not None:
+                    replaced.close()
+                parent = entry
+        return parent, prefix
+
+    def open_channel(
+        self,
+        chain: List[Dict[str, str]],
+        host: str,
+        port: int,
+        timeout: float,
+    ):
+        """
+        Открывает канал direct-tcpip к устройству через цепочку хопов.
+
+        Если кэшированный бастион отказал, цепочка перестраивается
+        один раз.
+
+        Args:
+            chain (List[Dict[str, str]]): Jump host'ы по порядку.
+            host (str): Адрес конечного устройства.
+            port (int): Порт SSH конечного устройства.
+            timeout (float): Таймаут подключения к хопам.
+
+        Returns:
+            paramiko.Channel: Канал, пригодный как sock для SSHClient.
+        """
+        self._evict_expired()
+        for attempt in range(2):
+            last_hop, prefix = self._get_hop(chain, timeout)
+            try:
+                channel = last_hop.transport.open_channel(
+                    "direct-tcpip",
+                    (host, port),
+                    ("127.0.0.1", 0),
+                    timeout=timeout,
+                )
+            except (paramiko.SSHException, EOFError, OSError):
+                if attempt or last_hop.is_alive():
+                    raise
+                self._evict(prefix)
+                continue
+            with self._lock:
+                self._stats["channels"] += 1
+            last_hop.last_used = time.monotonic()
+            return channel
+
+    def close_all(self) -> None:
+        """
+        Закрывает все кэшированные подключения к jump host'ам.
+        """
+        with self._lock:
+            hops, self._hops = list(self._hops.values()), {}
+            self._build_locks.clear()
+        for hop in reversed(hops):
+            hop.close()
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику переиспользования туннелей.
+
+        Returns:
+            dict: hop_hits, hop_misses, channels, evictions, hops
+                  и hop_reuse_ratio.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hops"] = len(self._hops)
+        total = stats["hop_hits"] + stats["hop_misses"]
+        stats["hop_reuse_ratio"] = (
+            round(stats["hop_hits"] / total, 3) if total else 0.0
+        )
+        return stats
+
+
+tunnel_manager = TunnelManager()
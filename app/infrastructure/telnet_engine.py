@@ -0,0 +1,254 @@
+import asyncio
+import atexit
+import hashlib
+import os
+import threading
+import time
+from typing import Awaitable, Callable, List
+
+
+class TelnetSession:
+    """
+    Авторизованная Telnet-сессия telnetlib3 с выученным приглашением.
+    """
+
+    def __init__(self, reader, writer, matcher):
+        self.reader = reader
+        self.writer = writer
+        self.matcher = matcher
+        self.key = None
+        self.fingerprint = None
+        self.reused = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def is_alive(self) -> bool:
+        """
+        Проверяет, что соединение не закрыто удалённой стороной.
+
+        Returns:
+            bool: True, если сессию можно переиспользовать.
+        """
+        try:
+            return not self.reader.at_eof() and not self.writer.is_closing()
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        """
+        Закрывает соединение, игнорируя ошибки.
+        """
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class TelnetEngine:
+    """
+    Фоновый поток с единственным event loop для всех Telnet-сессий.
+
+    Flask-обработчики вызывают run() синхронно; корутины выполняются
+    в общем loop, поэтому команды к разным устройствам идут параллельно,
+    а авторизованные сессии переиспользуются между запросами.
+    Состояние пула изменяется только из потока loop.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        idle_timeout: float = 120,
+        max_age: float = 900,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.connect_minwait = 0.1
+        self._idle: List[TelnetSession] = []
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._salt = os.urandom(16)
+        self._atexit_registered = False
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.max_size = app.config.get("TELNET_POOL_MAX_SIZE", self.max_size)
+        self.idle_timeout = app.config.get(
+            "TELNET_POOL_IDLE_TIMEOUT", self.idle_timeout
+        )
+        self.max_age = app.config.get("TELNET_POOL_MAX_AGE", self.max_age)
+        self.connect_minwait = app.config.get(
+            "TELNET_CONNECT_MINWAIT", self.connect_minwait
+        )
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="telnet-engine",
+                    daemon=True,
+                )
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._reap(), self._loop)
+        return self._loop
+
+    def run(self, coro: Awaitable, timeout: float):
+        """
+        Выполняет корутину в фоновом loop и ждёт результат.
+
+        Args:
+            coro (Awaitable): Корутина для выполнения.
+            timeout (float): Предельное время выполнения (секунды).
+
+        Returns:
+            Результат корутины.
+
+        Raises:
+            TimeoutError: Если корутина не уложилась в timeout.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(coro, timeout),
+            loop,
+        )
+        return future.result()
+
+    def _fingerprint(self, password: str) -> bytes:
+        return hashlib.sha256(self._salt + (password or "").encode()).digest()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        keep = []
+        for session in self._idle:
+            if (
+                now - session.last_used > self.idle_timeout
+                or now - session.created_at > self.max_age
+            ):
+                session.close()
+                self._stats["evictions"] += 1
+            else:
+                keep.append(session)
+        self._idle = keep
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(self.idle_timeout / 2, 30.0)))
+            self._evict_expired()
+
+    async def acquire(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        model: str,
+        factory: Callable[[], Awaitable[TelnetSession]],
+    ) -> TelnetSession:
+        """
+        Возвращает живую сессию из пула или открывает новую.
+
+        Args:
+            host (str): Адрес устройства.
+            port (int): Telnet-порт.
+            username (str): Имя пользователя.
+            password (str): Пароль (сравнивается по отпечатку).
+            model (str): Модель оборудования.
+            factory (Callable): Корутинная функция, открывающая сессию.
+
+        Returns:
+            TelnetSession: Сессия в монопольном пользовании.
+        """
+        key = (host, port, username, (model or "").lower())
+        fingerprint = self._fingerprint(password)
+
+        self._evict_expired()
+        for session in reversed(self._idle):
+            if session.key != key:
+                continue
+            self._idle.remove(session)
+            if session.fingerprint == fingerprint and session.is_alive():
+                self._stats["hits"] += 1
+                session.reused = True
+                session.last_used = time.monotonic()
+                return session
+            session.close()
+            break
+
+        self._stats["misses"] += 1
+        session = await factory()
+        session.key = key
+        session.fingerprint = fingerprint
+        return session
+
+    def release(self, session: TelnetSession) -> None:
+        """
+        Возвращает сессию в пул (вызывается из потока loop).
+
+        Args:
+            session (TelnetSession): Ранее выданная сессия.
+        """
+        if self.max_size <= 0:
+            session.close()
+            return
+        session.last_used = time.monotonic()
+        self._idle.append(session)
+        while len(self._idle) > self.max_size:
+            self._idle.pop(0).close()
+            self._stats["evictions"] += 1
+
+    def discard(self, session: TelnetSession) -> None:
+        """
+        Закрывает сессию, не возвращая её в пул.
+
+        Args:
+            session (TelnetSession): Ранее выданная сессия.
+        """
+        session.close()
+
+    async def _close_idle(self) -> None:
+        sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+    def close_all(self) -> None:
+        """
+        Закрывает все простаивающие сессии.
+        """
+        if self._loop is not None and self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(
+                self._close_idle(), self._loop
+            ).result(timeout=5)
+
+    def shutdown(self) -> None:
+        """
+        Закрывает сессии и останавливает фоновый loop.
+        """
+        self.close_all()
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики попаданий и промахов пула.
+
+        Returns:
+            dict: hits, misses, evictions, idle и hit_ratio.
+        """
+        stats = dict(self._stats)
+        stats["idle"] = len(self._idle)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+telnet_engine = TelnetEngine()
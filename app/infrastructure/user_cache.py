@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Callable
+
+from flask_login import UserMixin
+
+
+class CachedUser(UserMixin):
+    """
+    Данные пользователя для current_user, не привязанные к сессии
+    SQLAlchemy (хеш пароля не кэшируется).
+    """
+
+    def __init__(self, id: int, username: str, role: str):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __repr__(self) -> str:
+        return f"<CachedUser {self.id} {self.username!r} {self.role!r}>"
+
+
+class _Entry:
+    def __init__(self, user: CachedUser, ttl: float):
+        self.user = user
+        self.expires_at = time.monotonic() + ttl
+
+
+class UserCache:
+    """
+    Кэш пользователей для user_loader Flask-Login: аутентифицированный
+    запрос не обращается к базе, пока запись не устарела (ttl секунд)
+    или не сброшена invalidate() — при удалении пользователя и смене
+    роли. Размер ограничен по LRU.
+
+    Кэш локален для процесса: в других процессах изменения видны
+    не позже чем через ttl секунд.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        # Растёт при каждом сбросе: загрузка, начатая до сброса,
+        # не кладёт в кэш устаревшие данные.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    def init_app(self, app) -> None:
+        """
+        Применяет настройки из конфигурации Flask-приложения.
+        """
+        self.max_size = app.config.get("USER_CACHE_MAX_SIZE", self.max_size)
+        self.ttl = app.config.get("USER_CACHE_TTL", self.ttl)
+
+    def get(
+        self, user_id: int, load: Callable[[int], object | None]
+    ) -> CachedUser | None:
+        """
+        Возвращает пользователя из кэша или загружает его.
+
+        Args:
+            user_id (int): ID пользователя.
+            load (Callable): Загружает пользователя (с атрибутами id,
+                username, role) или возвращает None.
+
+        Returns:
+            CachedUser | None: Пользователь или None, если не найден
+                               (отсутствие не кэшируется).
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry.user
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        user = load(user_id)
+        if user is None:
+            return None
+        cached = CachedUser(user.id, user.username, user.role)
+        with self._lock:
+            if self.max_size > 0 and generation == self._generation:
+                self._entries[user_id] = _Entry(cached, self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return cached
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Сбрасывает запись пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику попаданий.
+
+        Returns:
+            dict: hits, misses, invalidations, evictions, entries
+                  и hit_ratio.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+user_cache = UserCache()
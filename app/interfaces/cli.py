@@ -0,0 +1,238 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.infrastructure.blob_store import blob_store
+from app.infrastructure.job_queue import job_queue
+from app.services import jobs_service, logs_service, retention_service
+
+logs_cli = AppGroup("logs", help="Обслуживание журнала команд.")
+jobs_cli = AppGroup("jobs", help="Фоновые задачи.")
+
+
+@logs_cli.command("fts-backfill")
+@click.option(
+    "--batch-size",
+    default=10000,
+    show_default=True,
+    help="Количество строк в одной транзакции.",
+)
+def fts_backfill(batch_size):
+    """
+    Индексирует для полнотекстового поиска логи, записанные
+    до появления индекса. Можно прерывать и запускать повторно.
+    """
+
+    def progress(total, last_id):
+        click.echo(f"indexed {total} rows (up to id {last_id})")
+
+    total = logs_service.backfill_search_index(batch_size, progress)
+    click.echo(f"done: {total} rows indexed")
+
+
+@logs_cli.command("prune")
+@click.option("--dry-run", is_flag=True, help="Только показать объём.")
+@click.option("--no-archive", is_flag=True, help="Удалять без архива.")
+@click.option(
+    "--vacuum/--no-vacuum",
+    "run_vacuum",
+    default=True,
+    show_default=True,
+    help="Вернуть освободившееся место файловой системе.",
+)
+def prune(dry_run, no_archive, run_vacuum):
+    """
+    Удаляет логи по политикам LOG_RETENTION небольшими транзакциями,
+    предварительно сохраняя их в LOG_ARCHIVE_DIR. Заодно удаляет
+    завершённые задачи старше JOB_RETENTION_HOURS.
+    """
+    if not dry_run:
+        click.echo(f"jobs: pruned {jobs_service.prune_jobs()}")
+    try:
+        policies = retention_service.parse_policies(
+            current_app.config.get("LOG_RETENTION")
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if not policies:
+        click.echo("LOG_RETENTION не задан, удалять нечего")
+        return
+
+    def progress(name, pruned):
+        click.echo(f"{name}: {pruned} rows pruned")
+
+    archive_dir = (
+        None if no_archive else current_app.config.get("LOG_ARCHIVE_DIR")
+    )
+    result = retention_service.prune_logs(
+        policies,
+        archive_dir=archive_dir or None,
+        chunk_size=current_app.config.get("RETENTION_CHUNK_SIZE", 1000),
+        dry_run=dry_run,
+        on_progress=progress,
+    )
+    verb = "would prune" if dry_run else "pruned"
+    for name, count in result.items():
+        click.echo(f"{name}: {verb} {count} rows")
+    if dry_run or not any(result.values()):
+        return
+    if blob_store.enabled:
+        blobs = retention_service.collect_blobs(
+            current_app.config.get("BLOB_GC_GRACE", 3600)
+        )
+        click.echo(f"blobs: removed {blobs['removed']} unreferenced")
+    if run_vacuum:
+        stats = retention_service.vacuum()
+        click.echo(f"vacuum: freed {stats['freed_pages']} pages")
+
+
+@logs_cli.command("import-archive")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="Количество строк в одной транзакции.",
+)
+def import_archive(paths, batch_size):
+    """
+    Восстанавливает логи из архивов prune или NDJSON-выгрузок.
+    """
+    for path in paths:
+        restored = retention_service.import_archive(path, batch_size)
+        click.echo(f"{path}: restored {restored} rows")
+
+
+@logs_cli.command("vacuum")
+@click.option(
+    "--full",
+    is_flag=True,
+    help="Полный VACUUM с включением auto_vacuum=INCREMENTAL "
+    "(однократно для существующей базы, блокирует запись).",
+)
+def vacuum(full):
+    """
+    Возвращает свободные страницы SQLite файловой системе.
+    """
+    stats = retention_service.vacuum(full=full)
+    click.echo(
+        f"auto_vacuum={stats['auto_vacuum']}, "
+        f"freed {stats['freed_pages']} pages, "
+        f"{stats['page_count']} pages in file"
+    )
+
+
+@logs_cli.command("train-dict")
+@click.option(
+    "--samples",
+    default=2000,
+    show_default=True,
+    help="Количество последних логов для обучения.",
+)
+def train_dict(samples):
+    """
+    Обучает словарь сжатия вывода на последних логах.
+    """
+    result = logs_service.train_output_dictionary(samples)
+    if result["id"] is None:
+        click.echo(f"no repeated lines in {result['samples']} samples")
+        return
+    click.echo(
+        f"dictionary {result['id']}: {result['size']} bytes "
+        f"from {result['samples']} samples"
+    )
+
+
+@logs_cli.command("compress")
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="Количество строк в одной транзакции.",
+)
+@click.option(
+    "--recompress",
+    is_flag=True,
+    help="Пересжать и уже сжатые строки активным словарём.",
+)
+def compress(batch_size, recompress):
+    """
+    Сжимает вывод уже сохранённых логов (с --recompress также
+    переносит крупный вывод в BLOB_STORE_DIR). Можно прерывать
+    и запускать повторно.
+    """
+
+    def progress(total, last_id):
+        click.echo(f"compressed {total} rows (up to id {last_id})")
+
+    total = logs_service.compress_outputs(batch_size, recompress, progress)
+    click.echo(f"done: {total} rows compressed")
+    stats = retention_service.vacuum()
+    click.echo(f"vacuum: freed {stats['freed_pages']} pages")
+
+
+@logs_cli.command("gc-blobs")
+@click.option("--dry-run", is_flag=True, help="Только показать объём.")
+@click.option(
+    "--grace",
+    type=float,
+    default=None,
+    help="Минимальный возраст удаляемого блоба, секунды "
+    "(по умолчанию BLOB_GC_GRACE).",
+)
+def gc_blobs(dry_run, grace):
+    """
+    Удаляет из хранилища вывода блобы, на которые не ссылается
+    ни один лог.
+    """
+    if not blob_store.enabled:
+        raise click.ClickException("BLOB_STORE_DIR не задан")
+    if grace is None:
+        grace = current_app.config.get("BLOB_GC_GRACE", 3600)
+    result = retention_service.collect_blobs(grace, dry_run=dry_run)
+    verb = "would remove" if dry_run else "removed"
+    click.echo(
+        f"checked {result['checked']} blobs, {verb} "
+        f"{result['unreferenced'] if dry_run else result['removed']}, "
+        f"temp files removed {result['temp_removed']}"
+    )
+
+
+@jobs_cli.command("recover")
+@click.option(
+    "--lease",
+    type=float,
+    default=None,
+    help="Секунд без продления, после которых задача считается "
+    "брошенной (по умолчанию JOB_LEASE_TIMEOUT).",
+)
+def recover(lease):
+    """
+    Перезапускает диагностические задачи остановленных процессов
+    в этом процессе и завершает ошибкой их подключения к устройствам.
+    Задачи работающих процессов не затрагиваются. Запускать после
+    перезапуска сервиса (один раз, не в каждом воркере).
+    Завершённые задачи старше JOB_RETENTION_HOURS удаляются.
+    """
+    click.echo(f"pruned {jobs_service.prune_jobs()} finished jobs")
+    requeued = jobs_service.recover_jobs(lease)
+    click.echo(f"requeued {requeued} jobs")
+    if requeued:
+        job_queue.join()
+        click.echo("done")
+
+
+@jobs_cli.command("prune")
+@click.option(
+    "--hours",
+    type=float,
+    default=None,
+    help="Возраст завершённой задачи, часы "
+    "(по умолчанию JOB_RETENTION_HOURS).",
+)
+def prune_jobs(hours):
+    """
+    Удаляет завершённые задачи. Полный вывод команд остаётся
+    в журнале (flask logs prune).
+    """
+    click.echo(f"pruned {jobs_service.prune_jobs(hours)} finished jobs")
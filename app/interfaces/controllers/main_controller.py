@@ -1,29 +1,83 @@
+from datetime import datetime
+
 from flask import (
+    abort,
     Blueprint,
+    current_app,
     flash,
     jsonify,
     redirect,
     render_template,
     request,
+    Response,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required, login_user, logout_user
 
+from app.infrastructure.blob_store import blob_store
 from app.infrastructure.extensions import login_manager
-from app.services import logs_service, user_service
-from app.services.nettools_service import run_commands, run_connect, valid_ip
+from app.infrastructure.job_queue import job_queue
+from app.infrastructure.log_writer import log_writer
+from app.infrastructure.output_codec import output_codec
+from app.infrastructure.redaction import redactor
+from app.infrastructure.resolver import resolver
+from app.infrastructure.ssh_pool import ssh_pool
+from app.infrastructure.ssh_tunnels import tunnel_manager
+from app.infrastructure.telnet_engine import telnet_engine
+from app.infrastructure.user_cache import user_cache
+from app.services import (
+    bulk_service,
+    jobs_service,
+    logs_service,
+    target_expr,
+    user_service,
+)
 
 bp = Blueprint("main", __name__)
 
 
+def _target_error(host: str | None) -> str | None:
+    """
+    Проверяет поле «Хост»: IP, имя или выражение (см. target_expr).
+
+    Returns:
+        str | None: Сообщение об ошибке или None.
+    """
+    try:
+        if target_expr.count(host, limit=target_expr.max_hosts()):
+            return None
+    except ValueError as e:
+        return f"Некорректный IP, имя или список узлов: {e}"
+    return "Некорректный IP или доменное имя"
+
+
+def _concurrency(value: str | None, max_workers: int) -> int | None:
+    """
+    Разбирает число параллельных подключений из формы /bulk.
+
+    Returns:
+        int | None: Значение в пределах 1..max_workers (пустое поле —
+                    max_workers) или None, если это не целое число.
+    """
+    if not value or not value.strip():
+        return max_workers
+    try:
+        concurrency = int(value)
+    except ValueError:
+        return None
+    return max(1, min(concurrency, max_workers))
+
+
 @bp.route("/", methods=["GET", "POST"])
 def index():
-    result, status, action = None, None, request.form.get("action")
+    job_id, action = None, request.form.get("action")
 
     if request.method == "POST":
         host = request.form.get("host")
-        if not valid_ip(host):
-            flash("Некорректный IP или доменное имя", "danger")
+        error = _target_error(host)
+        if error:
+            flash(error, "danger")
         else:
             match action:
                 case "ping":
@@ -39,7 +93,9 @@ def index():
                     }
                 case "nslookup":
                     params = {
-                        "qtype": request.form.get("ns_type", "A"),
+                        # Несколько типов запрашиваются одновременно.
+                        "qtype": ",".join(request.form.getlist("ns_type"))
+                        or "A",
                         "dns_server": request.form.get(
                             "dns_server",
                             "8.8.8.8",
@@ -49,19 +105,18 @@ def index():
                     flash("Неизвестная команда", "danger")
                     params = {}
 
-            result, status = run_commands(action, host=host, **params)
+            job_id = jobs_service.submit_command(action, host=host, **params)
 
     return render_template(
         "index.html",
-        result=result,
-        status=status,
+        job_id=job_id,
         action=action,
     )
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return user_service.get_user_by_id(user_id)
+    return user_service.load_user(user_id)
 
 
 @bp.route("/login", methods=["GET", "POST"])
@@ -134,8 +189,52 @@ def delete_user(user_id):
 @bp.route("/history")
 @login_required
 def history():
-    logs = logs_service.get_all_logs()
-    return render_template("history.html", logs=logs)
+    filters = {
+        key: request.args.get(key, "").strip() or None
+        for key in ("action", "host", "status")
+    }
+    limit = current_app.config.get("HISTORY_PAGE_SIZE", 50)
+    q = request.args.get("q", "").strip()
+    results = []
+    if q:
+        try:
+            results = logs_service.search_logs(q, limit=limit, **filters)
+        except ValueError:
+            flash("Некорректный поисковый запрос", "danger")
+        page = {"logs": [], "next_cursor": None}
+    else:
+        page = logs_service.get_logs_page(
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            **filters,
+        )
+    return render_template(
+        "history.html",
+        logs=page["logs"],
+        next_cursor=page["next_cursor"],
+        filters={key: value for key, value in filters.items() if value},
+        first_page=not request.args.get("cursor"),
+        q=q,
+        results=results,
+    )
+
+
+@bp.route("/logs")
+@login_required
+def query_logs():
+    try:
+        return jsonify(logs_service.query_logs(request.args))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+
+@bp.route("/logs/search")
+@login_required
+def search_logs():
+    try:
+        return jsonify(logs_service.search_logs_by_args(request.args))
+    except ValueError as e:
+        abort(400, description=str(e))
 
 
 @bp.route("/history_detail/<int:log_id>")
@@ -145,7 +244,11 @@ def history_detail(log_id):
     if not log:
         flash("Лог не найден", "danger")
         return redirect(url_for("main.history"))
-    return render_template("history_detail.html", log=log)
+    return render_template(
+        "history_detail.html",
+        log=log,
+        diff=logs_service.diff_with_previous(log),
+    )
 
 
 @bp.route("/delete_history", methods=["POST"])
@@ -169,14 +272,63 @@ def del_log_history(log_id):
 @bp.route("/export/json")
 @login_required
 def export_json():
-    logs = logs_service.export_logs_to_json()
-    return jsonify(logs)
+    fmt = request.args.get("format", "json")
+    if fmt not in ("json", "ndjson"):
+        abort(400)
+    try:
+        since, until = (
+            datetime.fromisoformat(value) if value else None
+            for value in (request.args.get("since"), request.args.get("until"))
+        )
+    except ValueError:
+        abort(400)
+
+    chunks = logs_service.export_logs(
+        fmt,
+        action=request.args.get("action") or None,
+        host=request.args.get("host") or None,
+        since=since,
+        until=until,
+        batch_size=current_app.config.get("EXPORT_BATCH_SIZE", 500),
+    )
+    filename = f"nettools-logs.{fmt}"
+    mimetype = (
+        "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    )
+    if request.args.get("gzip") == "1":
+        chunks = logs_service.gzip_stream(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@bp.route("/stats")
+@login_required
+def stats():
+    return jsonify(
+        {
+            "ssh_pool": ssh_pool.stats(),
+            "telnet_pool": telnet_engine.stats(),
+            "ssh_tunnels": tunnel_manager.stats(),
+            "resolver": resolver.stats(),
+            "jobs": job_queue.stats(),
+            "log_writer": log_writer.stats(),
+            "output_codec": output_codec.stats(),
+            "blob_store": blob_store.stats(),
+            "redaction": redactor.stats(),
+            "user_cache": user_cache.stats(),
+        }
+    )
 
 
 @bp.route("/connect", methods=["GET", "POST"])
 @login_required
 def connect():
-    result, status = None, None
+    job_id = None
 
     if request.method == "POST":
         protocol = request.form.get("protocol")
@@ -202,18 +354,112 @@ def connect():
                         }
                     )
 
-        result, status = run_connect(
-            protocol,
-            host=host,
-            username=username,
-            password=password,
-            command=command,
-            model=model,
-            jumphosts=jumphosts,
+        error = _target_error(host)
+        if error:
+            flash(error, "danger")
+        else:
+            job_id = jobs_service.submit_connect(
+                protocol,
+                host=host,
+                username=username,
+                password=password,
+                command=command,
+                model=model,
+                jumphosts=jumphosts,
+            )
+
+    return render_template("connect.html", job_id=job_id)
+
+
+def _get_visible_job(job_id):
+    job = jobs_service.get_job(job_id)
+    if job is None:
+        abort(404)
+    if job["kind"] != "command" and not current_user.is_authenticated:
+        # Результаты команд на устройствах — только после входа.
+        abort(401)
+    return job
+
+
+@bp.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = _get_visible_job(job_id)
+
+    wait = min(
+        request.args.get("wait", 0, type=float),
+        current_app.config.get("JOB_WAIT_TIMEOUT", 25),
+    )
+    if wait > 0 and job["state"] not in jobs_service.FINAL_STATES:
+        job = jobs_service.get_job(job_id, wait=wait)
+    return jsonify(job)
+
+
+@bp.route("/jobs/<job_id>/stream")
+def job_stream(job_id):
+    _get_visible_job(job_id)
+    return Response(
+        stream_with_context(jobs_service.stream_job(job_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@bp.route("/bulk", methods=["GET", "POST"])
+@login_required
+def bulk():
+    job_id = request.args.get("job")
+    max_workers = current_app.config.get("BULK_MAX_WORKERS", 16)
+
+    if request.method == "POST":
+        try:
+            targets = bulk_service.parse_targets(
+                request.form.get("targets", ""),
+                defaults={
+                    "username": request.form.get("username"),
+                    "password": request.form.get("password"),
+                    "model": request.form.get("model", "cisco"),
+                },
+            )
+        except ValueError as e:
+            flash(f"Ошибка в списке устройств: {e}", "danger")
+            targets = None
+        commands = [
+            line.strip()
+            for line in request.form.get("commands", "").splitlines()
+            if line.strip()
+        ]
+        concurrency = _concurrency(
+            request.form.get("concurrency"), max_workers
         )
 
+        if targets is None:
+            pass  # ошибка разбора уже показана
+        elif concurrency is None:
+            flash(
+                "Число параллельных подключений должно быть целым "
+                f"от 1 до {max_workers}",
+                "danger",
+            )
+        elif not targets or not commands:
+            flash("Укажите устройства и команды", "danger")
+        else:
+            try:
+                bulk_service.count_hosts(targets)
+            except ValueError as e:
+                flash(f"Ошибка в списке устройств: {e}", "danger")
+            else:
+                # Пакет выполняется в фоне; страница задачи получает
+                # результаты хостов по мере завершения.
+                job_id = jobs_service.submit_bulk(
+                    request.form.get("protocol", "ssh"),
+                    targets,
+                    commands,
+                    max_workers=concurrency,
+                )
+                return redirect(url_for("main.bulk", job=job_id))
+
     return render_template(
-        "connect.html",
-        output=result,
-        status=status,
+        "bulk.html",
+        job_id=job_id,
+        max_workers=max_workers,
     )
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy.exc import OperationalError
+
+from app.infrastructure.extensions import db
+from app.models.job import Job
+
+
+def _utcnow() -> datetime:
+    # Как created_at (CURRENT_TIMESTAMP SQLite) и timestamp логов:
+    # наивное UTC-время.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def create(
+    job_id: str,
+    kind: str,
+    action: str,
+    host: str,
+    params: dict,
+) -> None:
+    """
+    Сохраняет новую задачу в состоянии queued.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+        kind (str): Тип задачи ("command" или "connect").
+        action (str): Действие или протокол.
+        host (str): Целевой хост.
+        params (dict): Параметры без секретов.
+    """
+    db.session.add(
+        Job(
+            id=job_id,
+            kind=kind,
+            action=action,
+            host=host,
+            params=params,
+            state="queued",
+            heartbeat_at=_utcnow(),
+        )
+    )
+    db.session.commit()
+
+
+def get_by_id(job_id: str) -> Job | None:
+    """
+    Возвращает задачу по ID.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+
+    Returns:
+        Job | None: Задача, если найдена, иначе None.
+    """
+    return db.session.get(Job, job_id, populate_existing=True)
+
+
+def claim(job_id: str) -> bool:
+    """
+    Атомарно переводит задачу из queued в running.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+
+    Returns:
+        bool: True, если задачу забрал текущий процесс.
+    """
+    updated = Job.query.filter_by(id=job_id, state="queued").update(
+        {
+            "state": "running",
+            "started_at": _utcnow(),
+            "heartbeat_at": _utcnow(),
+        }
+    )
+    db.session.commit()
+    return updated == 1
+
+
+def finish(job_id: str, state: str, status: str, output: str) -> None:
+    """
+    Записывает результат выполнения задачи.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+        state (str): Итоговое состояние ("done" или "failed").
+        status (str): Статус результата ("ok", "warn", "danger").
+        output (str): Вывод команды.
+    """
+    Job.query.filter_by(id=job_id).update(
+        {
+            "state": state,
+            "status": status,
+            "output": output,
+            "finished_at": _utcnow(),
+        }
+    )
+    db.session.commit()
+
+
+def touch(job_ids: List[str]) -> None:
+    """
+    Продлевает незавершённые задачи текущего процесса.
+
+    Args:
+        job_ids (List[str]): Идентификаторы задач.
+    """
+    Job.query.filter(
+        Job.id.in_(job_ids), Job.state.in_(("queued", "running"))
+    ).update({"heartbeat_at": _utcnow()}, synchronize_session=False)
+    db.session.commit()
+
+
+def get_stale(lease: float) -> List[Job]:
+    """
+    Возвращает незавершённые задачи, которые никто не продлевал
+    дольше lease секунд (их процесс остановлен).
+
+    Args:
+        lease (float): Срок без продления (секунды).
+
+    Returns:
+        List[Job]: Брошенные задачи (пустой список, если таблица
+                   ещё не создана миграцией).
+    """
+    cutoff = _utcnow() - timedelta(seconds=lease)
+    try:
+        return Job.query.filter(
+            Job.state.in_(("queued", "running")),
+            db.func.coalesce(Job.heartbeat_at, Job.created_at) < cutoff,
+        ).all()
+    except OperationalError:
+        db.session.rollback()
+        return []
+
+
+def delete_finished(before: datetime) -> int:
+    """
+    Удаляет завершённые задачи, закончившиеся раньше before.
+
+    Args:
+        before (datetime): Граница (наивное UTC-время).
+
+    Returns:
+        int: Количество удалённых задач.
+    """
+    deleted = Job.query.filter(
+        Job.state.in_(("done", "failed")), Job.finished_at < before
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def requeue(job_id: str) -> bool:
+    """
+    Возвращает прерванную задачу в состояние queued.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+
+    Returns:
+        bool: True, если задачу вернул текущий процесс.
+    """
+    updated = Job.query.filter_by(id=job_id, state="running").update(
+        {"state": "queued", "started_at": None, "heartbeat_at": _utcnow()}
+    )
+    db.session.commit()
+    return updated == 1
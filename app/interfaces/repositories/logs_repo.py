@@ -1,7 +1,13 @@
-from typing import List
+from datetime import datetime
+from typing import Iterator, List
+
+from sqlalchemy import and_, column, delete, func, insert, literal_column, Row
+from sqlalchemy import or_, select, table, text, tuple_, type_coerce
+from sqlalchemy import union_all, update
 
 from app.infrastructure.extensions import db
 from app.models.log import Log
+from app.models.output_dictionary import OutputDictionary
 
 
 def save(
@@ -32,6 +38,22 @@ def save(
     db.session.commit()
 
 
+def save_many(records: List[dict]) -> None:
+    """
+    Сохраняет пачку логов одной транзакцией (executemany).
+
+    Args:
+        records (List[dict]): Поля логов: timestamp, action, host,
+            params, status, output.
+    """
+    try:
+        db.session.execute(insert(Log), records)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
 def get_by_id(log_id: int) -> Log | None:
     """
     Возвращает лог по его ID.
@@ -63,6 +85,47 @@ def delete_by_id(log_id: int) -> bool:
     return False
 
 
+# Ключи params, по которым можно фильтровать: генерируемые
+# индексированные колонки модели Log.
+PARAM_COLUMNS = {
+    "dns_server": Log.dns_server,
+    "model": Log.model,
+}
+
+
+logs_fts = table("logs_fts", column("rowid"), column("output"))
+
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+
+
+def _filtered(
+    query,
+    action: str | None = None,
+    host: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    params: dict | None = None,
+):
+    """
+    Добавляет к запросу (Query или Select) фильтры по логам.
+    """
+    for key, value in (params or {}).items():
+        query = query.filter(PARAM_COLUMNS[key] == value)
+    if action:
+        query = query.filter(Log.action == action)
+    if host:
+        query = query.filter(Log.host == host)
+    if status:
+        query = query.filter(Log.status == status)
+    if since is not None:
+        query = query.filter(Log.timestamp >= since)
+    if until is not None:
+        query = query.filter(Log.timestamp < until)
+    return query
+
+
 def get_all() -> List[Log]:
     """
     Возвращает список всех действий.
@@ -73,12 +136,565 @@ def get_all() -> List[Log]:
     return Log.query.all()
 
 
-def delete_all() -> None:
+def get_page(
+    limit: int,
+    before: tuple[datetime, int] | None = None,
+    action: str | None = None,
+    host: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    params: dict | None = None,
+) -> List[Log]:
     """
-    Удаляет все логи из базы данных.
+    Возвращает страницу логов от новых к старым без колонки output.
+
+    Используется keyset-пагинация: следующая страница начинается
+    строго после (timestamp, id) последней записи предыдущей,
+    поэтому стоимость не зависит от номера страницы.
+
+    Args:
+        limit (int): Размер страницы.
+        before (tuple[datetime, int] | None): Ключ (timestamp, id)
+            последней записи предыдущей страницы.
+        action (str | None): Фильтр по действию.
+        host (str | None): Фильтр по хосту.
+        status (str | None): Фильтр по статусу.
+        since (datetime | None): Начало интервала (включительно).
+        until (datetime | None): Конец интервала (не включительно).
+        params (dict | None): Фильтры по ключам params
+            из PARAM_COLUMNS.
 
     Returns:
-        None
+        List[Log]: Логи с отложенной загрузкой output.
     """
-    Log.query.delete()
+    query = _filtered(
+        Log.query,
+        action=action,
+        host=host,
+        status=status,
+        since=since,
+        until=until,
+        params=params,
+    )
+    if before is not None:
+        query = query.filter(tuple_(Log.timestamp, Log.id) < before)
+    return (
+        query.order_by(Log.timestamp.desc(), Log.id.desc()).limit(limit).all()
+    )
+
+
+def iter_batches(
+    batch_size: int = 500,
+    action: str | None = None,
+    host: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[List[Row]]:
+    """
+    Перебирает логи пачками от старых к новым.
+
+    Каждая пачка — отдельный keyset-запрос по (timestamp, id),
+    строки читаются как кортежи колонок и не попадают в identity map
+    сессии, поэтому память не растёт с количеством записей.
+
+    Args:
+        batch_size (int): Размер пачки.
+        action (str | None): Фильтр по действию.
+        host (str | None): Фильтр по хосту.
+        since (datetime | None): Начало интервала (включительно).
+        until (datetime | None): Конец интервала (не включительно).
+
+    Yields:
+        List[Row]: Строки с колонками id, timestamp, action, host,
+                   params, status, output.
+    """
+    stmt = _filtered(
+        select(
+            Log.id,
+            Log.timestamp,
+            Log.action,
+            Log.host,
+            Log.params,
+            Log.status,
+            Log.output,
+        ),
+        action=action,
+        host=host,
+        since=since,
+        until=until,
+    ).order_by(Log.timestamp, Log.id)
+    after = None
+    while True:
+        batch_stmt = stmt
+        if after is not None:
+            batch_stmt = stmt.filter(tuple_(Log.timestamp, Log.id) > after)
+        rows = db.session.execute(batch_stmt.limit(batch_size)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].timestamp, rows[-1].id)
+
+
+def search(
+    match: str,
+    limit: int = 50,
+    action: str | None = None,
+    host: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> List[Row]:
+    """
+    Ищет логи по выводу команд через FTS5.
+
+    Args:
+        match (str): Выражение FTS5 MATCH.
+        limit (int): Максимальное количество результатов.
+        action, host, status, since, until: Фильтры, как в get_page().
+
+    Returns:
+        List[Row]: Строки id, timestamp, action, host, status, rank
+                   и snippet — фрагмент вывода, найденные слова
+                   обрамлены SNIPPET_START/SNIPPET_END.
+    """
+    rank = func.bm25(literal_column("logs_fts"))
+    stmt = select(
+        Log.id,
+        Log.timestamp,
+        Log.action,
+        Log.host,
+        Log.status,
+        rank.label("rank"),
+        func.snippet(
+            literal_column("logs_fts"),
+            0,
+            SNIPPET_START,
+            SNIPPET_END,
+            "…",
+            16,
+        ).label("snippet"),
+    ).join(logs_fts, logs_fts.c.rowid == Log.id)
+    stmt = _filtered(
+        stmt.where(literal_column("logs_fts").op("MATCH")(match)),
+        action=action,
+        host=host,
+        status=status,
+        since=since,
+        until=until,
+    )
+    return db.session.execute(stmt.order_by(rank).limit(limit)).all()
+
+
+def backfill_fts(after: int = 0, batch_size: int = 10000) -> tuple[int, int]:
+    """
+    Индексирует в logs_fts следующий диапазон строк с id > after,
+    пропуская уже проиндексированные (записанные после появления
+    триггеров). Диапазон выбирается по первичному ключу, поэтому
+    стоимость пачки не зависит от размера таблицы.
+
+    Args:
+        after (int): Последний обработанный id.
+        batch_size (int): Размер диапазона.
+
+    Returns:
+        tuple[int, int]: (проиндексировано строк, последний id
+                         диапазона); последний id равен after,
+                         если строк больше нет.
+    """
+    upper = db.session.execute(
+        text(
+            "SELECT max(id) FROM "
+            "(SELECT id FROM logs WHERE id > :after ORDER BY id LIMIT :n)"
+        ),
+        {"after": after, "n": batch_size},
+    ).scalar()
+    if upper is None:
+        return 0, after
+    result = db.session.execute(
+        text(
+            "INSERT INTO logs_fts(rowid, output) "
+            "SELECT id, nettools_output(output) FROM logs "
+            "WHERE id > :after AND id <= :upper AND NOT EXISTS "
+            "(SELECT 1 FROM logs_fts_docsize d WHERE d.id = logs.id)"
+        ),
+        {"after": after, "upper": upper},
+    )
     db.session.commit()
+    return result.rowcount, upper
+
+
+def get_actions() -> List[str]:
+    """
+    Возвращает действия, встречающиеся в логах
+    (по индексу ix_logs_action_timestamp, без чтения таблицы).
+
+    Returns:
+        List[str]: Действия в алфавитном порядке.
+    """
+    stmt = select(Log.action).distinct().order_by(Log.action)
+    return list(db.session.execute(stmt).scalars())
+
+
+def _action_filter(stmt, action: str | None, exclude: List[str]):
+    if action is not None:
+        return stmt.filter(Log.action == action)
+    if exclude:
+        return stmt.filter(Log.action.not_in(exclude))
+    return stmt
+
+
+def key_after_rows(
+    action: str | None, keep: int, exclude: List[str] = ()
+) -> tuple[datetime, int] | None:
+    """
+    Возвращает ключ, начиная с которого (включительно, от новых
+    к старым) строки выходят за лимит keep записей.
+
+    Args:
+        action (str | None): Действие; None — все, кроме exclude.
+        keep (int): Сколько новейших записей оставить.
+        exclude (List[str]): Действия, не входящие в выборку.
+
+    Returns:
+        tuple[datetime, int] | None: (timestamp, id) или None,
+                                     если записей не больше keep.
+    """
+    stmt = _action_filter(select(Log.timestamp, Log.id), action, exclude)
+    row = db.session.execute(
+        stmt.order_by(Log.timestamp.desc(), Log.id.desc())
+        .offset(keep)
+        .limit(1)
+    ).first()
+    return (row.timestamp, row.id) if row else None
+
+
+def key_after_size(
+    action: str | None, max_bytes: int, exclude: List[str] = ()
+) -> tuple[datetime, int] | None:
+    """
+    Возвращает ключ первой (от новых к старым) строки, на которой
+    суммарный размер хранимого (сжатого) вывода превышает max_bytes.
+
+    Args:
+        action (str | None): Действие; None — все, кроме exclude.
+        max_bytes (int): Допустимый суммарный размер вывода.
+        exclude (List[str]): Действия, не входящие в выборку.
+
+    Returns:
+        tuple[datetime, int] | None: (timestamp, id) или None.
+    """
+    newest = (Log.timestamp.desc(), Log.id.desc())
+    running = (
+        _action_filter(
+            select(
+                Log.timestamp,
+                Log.id,
+                func.sum(func.length(Log.output))
+                .over(order_by=newest)
+                .label("total"),
+            ),
+            action,
+            exclude,
+        )
+    ).subquery()
+    row = db.session.execute(
+        select(running.c.timestamp, running.c.id)
+        .where(running.c.total > max_bytes)
+        .order_by(running.c.timestamp.desc(), running.c.id.desc())
+        .limit(1)
+    ).first()
+    return (row.timestamp, row.id) if row else None
+
+
+def get_expired(
+    action: str | None,
+    bound: tuple[datetime, int],
+    limit: int,
+    exclude: List[str] = (),
+    full: bool = True,
+) -> List[Row]:
+    """
+    Возвращает самые старые строки с (timestamp, id) < bound.
+
+    Args:
+        action (str | None): Действие; None — все, кроме exclude.
+        bound (tuple[datetime, int]): Исключающая верхняя граница.
+        limit (int): Размер пачки.
+        exclude (List[str]): Действия, не входящие в выборку.
+        full (bool): Все колонки лога; False — только id и timestamp
+            (вывод не читается).
+
+    Returns:
+        List[Row]: Строки лога.
+    """
+    columns = [Log.id, Log.timestamp]
+    if full:
+        columns += [Log.action, Log.host, Log.params, Log.status, Log.output]
+    stmt = _action_filter(
+        select(*columns),
+        action,
+        exclude,
+    ).filter(tuple_(Log.timestamp, Log.id) < bound)
+    return db.session.execute(
+        stmt.order_by(Log.timestamp, Log.id).limit(limit)
+    ).all()
+
+
+def count_expired(
+    action: str | None,
+    bound: tuple[datetime, int],
+    exclude: List[str] = (),
+) -> int:
+    """
+    Считает строки с (timestamp, id) < bound.
+    """
+    stmt = _action_filter(select(func.count()), action, exclude)
+    stmt = stmt.select_from(Log).filter(tuple_(Log.timestamp, Log.id) < bound)
+    return db.session.execute(stmt).scalar()
+
+
+def delete_ids(ids: List[int]) -> None:
+    """
+    Удаляет логи по списку ID одной короткой транзакцией.
+
+    Args:
+        ids (List[int]): Идентификаторы.
+    """
+    db.session.execute(delete(Log).where(Log.id.in_(ids)))
+    db.session.commit()
+
+
+def restore_many(records: List[dict]) -> int:
+    """
+    Восстанавливает логи из архива с исходными ID; уже
+    существующие записи пропускаются.
+
+    Args:
+        records (List[dict]): Поля логов, включая id.
+
+    Returns:
+        int: Количество вставленных записей.
+    """
+    # Core-вставка: ORM executemany не сообщает rowcount.
+    try:
+        result = db.session.connection().execute(
+            insert(Log.__table__).prefix_with("OR IGNORE"), records
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
+
+
+def delete_all(batch_size: int = 5000) -> None:
+    """
+    Удаляет все логи из базы данных короткими транзакциями
+    по batch_size строк, не блокируя запись надолго.
+
+    Args:
+        batch_size (int): Размер пачки.
+    """
+    while True:
+        ids = list(
+            db.session.execute(
+                select(Log.id).order_by(Log.id).limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            return
+        delete_ids(ids)
+
+
+def sample_outputs(limit: int, min_size: int = 0) -> List[str]:
+    """
+    Возвращает вывод последних логов для обучения словаря сжатия.
+
+    Args:
+        limit (int): Количество образцов.
+        min_size (int): Минимальный размер несжатого вывода; сжатый
+                        берётся всегда.
+
+    Returns:
+        List[str]: Тексты вывода.
+    """
+    stmt = (
+        select(Log.output)
+        .where(
+            or_(
+                func.typeof(Log.output) == "blob",
+                func.length(Log.output) >= min_size,
+            )
+        )
+        .order_by(Log.id.desc())
+        .limit(limit)
+    )
+    return list(db.session.execute(stmt).scalars())
+
+
+def save_dictionary(data: bytes, samples: int) -> int:
+    """
+    Сохраняет словарь сжатия вывода.
+
+    Args:
+        data (bytes): Словарь.
+        samples (int): Количество образцов, на которых он обучен.
+
+    Returns:
+        int: ID словаря.
+    """
+    dictionary = OutputDictionary(data=data, samples=samples)
+    db.session.add(dictionary)
+    db.session.commit()
+    return dictionary.id
+
+
+def load_dictionaries() -> dict[int, bytes]:
+    """
+    Загружает все словари сжатия вывода отдельным соединением
+    (вызывается и во время чтения результатов другого запроса).
+
+    Returns:
+        dict[int, bytes]: Словари по ID.
+    """
+    with db.engine.connect() as conn:
+        rows = conn.execute(select(OutputDictionary.id, OutputDictionary.data))
+        return {row.id: row.data for row in rows}
+
+
+def compress_range(
+    after: int = 0,
+    batch_size: int = 1000,
+    min_size: int = 0,
+    recompress: bool = False,
+) -> tuple[int, int]:
+    """
+    Перезаписывает вывод следующего диапазона строк (id > after)
+    в текущем формате сжатия одной транзакцией.
+
+    Args:
+        after (int): Последний обработанный id.
+        batch_size (int): Размер диапазона.
+        min_size (int): Строки с более коротким выводом не трогаются.
+        recompress (bool): Пересжимать и уже сжатые строки
+                           (например, новым словарём).
+
+    Returns:
+        tuple[int, int]: (обработано строк, последний id диапазона);
+                         последний id равен after, если строк больше нет.
+    """
+    ids = select(Log.id).where(Log.id > after).order_by(Log.id)
+    upper = db.session.execute(
+        select(func.max(ids.limit(batch_size).subquery().c.id))
+    ).scalar()
+    if upper is None:
+        return 0, after
+    candidates = func.length(Log.output) >= min_size
+    if recompress:
+        # Ссылки на блобы и дельты не пересжимаются: перезапись
+        # превратила бы дельту в полный снимок.
+        candidates = and_(
+            or_(candidates, func.typeof(Log.output) == "blob"),
+            Log.output_ref.is_(None),
+        )
+    else:
+        candidates = and_(candidates, func.typeof(Log.output) == "text")
+    stmt = select(Log.id, Log.output).where(
+        Log.id > after, Log.id <= upper, candidates
+    )
+    rows = db.session.execute(stmt).all()
+    if rows:
+        db.session.execute(
+            update(Log),
+            [{"id": row.id, "output": row.output} for row in rows],
+        )
+    db.session.commit()
+    return len(rows), upper
+
+
+def referenced_blobs(digests: List[str]) -> set[str]:
+    """
+    Возвращает те из блобов, на которые ссылаются логи
+    (только по индексу ix_logs_output_ref).
+
+    Args:
+        digests (List[str]): SHA-256 блобов в hex.
+
+    Returns:
+        set[str]: Используемые блобы.
+    """
+    stmt = select(Log.output_ref).where(Log.output_ref.in_(digests))
+    return set(db.session.execute(stmt.distinct()).scalars())
+
+
+def _same_command(action: str, host: str, command: str | None):
+    return and_(
+        Log.host == host,
+        (
+            Log.command == command
+            if command is not None
+            else Log.command.is_(None)
+        ),
+        Log.action == action,
+    )
+
+
+def get_last_stored_outputs(
+    keys: List[tuple[str, str, str | None]],
+) -> dict[tuple, str | bytes]:
+    """
+    Возвращает хранимые (не распакованные) значения вывода последних
+    запусков команд на хостах: один запрос из UNION ALL поиска по
+    индексу ix_logs_host_command для каждого ключа.
+
+    Args:
+        keys (List[tuple]): Ключи (action, host, command); command —
+            команда из params или None.
+
+    Returns:
+        dict[tuple, str | bytes]: Значение колонки output по ключу;
+                                  ключей без запусков в словаре нет.
+    """
+    stored = type_coerce(Log.__table__.c.output, db.Text).label("output")
+    found = {}
+    # Не больше SQLITE_MAX_COMPOUND_SELECT (500) частей в запросе.
+    for start in range(0, len(keys), 100):
+        end = start + 100
+        parts = [
+            select(
+                select(Log.action, Log.host, Log.command, stored)
+                .where(_same_command(*key))
+                .order_by(Log.id.desc())
+                .limit(1)
+                .subquery()
+            )
+            for key in keys[start:end]
+        ]
+        for row in db.session.execute(union_all(*parts)):
+            found[(row.action, row.host, row.command)] = row.output
+    return found
+
+
+def get_previous_run(log: Log) -> Log | None:
+    """
+    Возвращает предыдущий запуск той же команды на том же хосте.
+
+    Args:
+        log (Log): Текущий лог.
+
+    Returns:
+        Log | None: Предыдущий лог или None.
+    """
+    stmt = (
+        select(Log)
+        .where(
+            _same_command(log.action, log.host, log.command),
+            Log.id < log.id,
+        )
+        .order_by(Log.id.desc())
+        .limit(1)
+    )
+    return db.session.execute(stmt).scalar()
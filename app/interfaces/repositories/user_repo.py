@@ -66,6 +66,25 @@ def save(user: User) -> None:
     db.session.commit()
 
 
+def update_role(user_id: int, role: str) -> bool:
+    """
+    Меняет роль пользователя.
+
+    Args:
+        user_id (int): ID пользователя.
+        role (str): Новая роль.
+
+    Returns:
+        bool: True если изменена, False если пользователь не найден.
+    """
+    user = User.query.get(user_id)
+    if user:
+        user.role = role
+        db.session.commit()
+        return True
+    return False
+
+
 def delete_by_id(user_id: int) -> bool:
     """
     Удаляет пользователя по его ID.
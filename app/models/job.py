@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.infrastructure.extensions import db
+
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(db.String(32), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        db.DateTime,
+        default=db.func.now(),
+    )
+    started_at: Mapped[datetime | None] = mapped_column(db.DateTime)
+    finished_at: Mapped[datetime | None] = mapped_column(db.DateTime)
+    # Продлевается процессом, в очереди которого задача; по нему
+    # flask jobs recover находит задачи остановленных процессов.
+    heartbeat_at: Mapped[datetime | None] = mapped_column(db.DateTime)
+    kind: Mapped[str] = mapped_column(db.String(16), nullable=False)
+    action: Mapped[str] = mapped_column(db.String(64), nullable=False)
+    host: Mapped[str] = mapped_column(db.String(128), nullable=False)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+    state: Mapped[str] = mapped_column(
+        db.String(16),
+        nullable=False,
+        index=True,
+    )
+    status: Mapped[str | None] = mapped_column(db.String(16))
+    # Хвост вывода (JOB_OUTPUT_TAIL): полный вывод хранится в logs.
+    output: Mapped[str | None] = mapped_column(db.Text)
@@ -1,21 +1,154 @@
 from datetime import datetime
 
-from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.sqlite import DATETIME, JSON
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TypeDecorator
 
 from app.infrastructure.extensions import db
+from app.infrastructure.output_codec import BLOB_REF_SIZE, BLOB_REF_VERSION
+from app.infrastructure.output_codec import DELTA_VERSION, HEADER, output_codec
+
+# CURRENT_TIMESTAMP в SQLite хранится без долей секунды. Параметры
+# запросов должны иметь тот же формат, иначе строковое сравнение
+# ключа (timestamp, id) при пагинации будет неверным.
+TIMESTAMP = db.DateTime().with_variant(
+    DATETIME(
+        storage_format=(
+            "%(year)04d-%(month)02d-%(day)02d "
+            "%(hour)02d:%(minute)02d:%(second)02d"
+        )
+    ),
+    "sqlite",
+)
+
+# Ссылка на блоб — и у ссылки на снимок, и у дельты к нему.
+OUTPUT_REF_SQL = (
+    "CASE WHEN typeof(output) = 'blob' AND ("
+    f"(length(output) = {BLOB_REF_SIZE} "
+    f"AND substr(output, 1, 1) = x'{BLOB_REF_VERSION:02x}') "
+    f"OR (length(output) > {BLOB_REF_SIZE} "
+    f"AND substr(output, 1, 1) = x'{DELTA_VERSION:02x}')) "
+    f"THEN lower(hex(substr(output, {HEADER.size + 1}, 32))) END"
+)
+
+
+class CompressedText(TypeDecorator):
+    """
+    Текст, который при записи сжимается (см. OutputCodec), а при
+    чтении прозрачно распаковывается. Значение bytes уже закодировано
+    (дельта из logs_service.write_logs) и пишется как есть.
+    """
+
+    impl = db.Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return output_codec.compress(value)
+
+    def process_result_value(self, value, dialect):
+        return output_codec.decompress(value)
 
 
 class Log(db.Model):
     __tablename__ = "logs"
+    # Keyset-пагинация истории идёт по (timestamp, id); составные
+    # индексы фильтров заканчиваются timestamp (id входит неявно),
+    # чтобы сортировка не требовала отдельного шага.
+    __table_args__ = (
+        db.Index("ix_logs_timestamp_id", "timestamp", "id"),
+        db.Index("ix_logs_host_timestamp", "host", "timestamp"),
+        db.Index("ix_logs_action_timestamp", "action", "timestamp"),
+        db.Index("ix_logs_status_timestamp", "status", "timestamp"),
+        db.Index("ix_logs_dns_server_timestamp", "dns_server", "timestamp"),
+        db.Index("ix_logs_model_timestamp", "model", "timestamp"),
+        db.Index("ix_logs_output_ref", "output_ref"),
+        db.Index("ix_logs_host_command", "host", "command"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     timestamp: Mapped[datetime] = mapped_column(
-        db.DateTime,
+        TIMESTAMP,
         default=db.func.now(),
     )
     action: Mapped[str] = mapped_column(db.String(64), nullable=False)
     host: Mapped[str] = mapped_column(db.String(128), nullable=False)
     params: Mapped[dict] = mapped_column(JSON, nullable=False)
     status: Mapped[str] = mapped_column(db.String(16), nullable=False)
-    output: Mapped[str] = mapped_column(db.Text, nullable=False)
+    # Вывод загружается только при обращении к атрибуту (страница деталей).
+    output: Mapped[str] = mapped_column(
+        CompressedText, nullable=False, deferred=True
+    )
+    # Генерируемые (VIRTUAL) колонки из params — для индексов по ним.
+    dns_server: Mapped[str | None] = mapped_column(
+        db.String(255),
+        db.Computed("json_extract(params, '$.dns_server')"),
+    )
+    model: Mapped[str | None] = mapped_column(
+        db.String(64),
+        db.Computed("json_extract(params, '$.model')"),
+    )
+    command: Mapped[str | None] = mapped_column(
+        db.Text,
+        db.Computed("json_extract(params, '$.command')"),
+    )
+    # SHA-256 блоба, если вывод вынесен в BlobStore (по индексу
+    # сборщик мусора проверяет ссылки, не читая сам вывод).
+    output_ref: Mapped[str | None] = mapped_column(
+        db.String(64),
+        db.Computed(OUTPUT_REF_SQL),
+        deferred=True,
+    )
+
+
+# Полнотекстовый индекс вывода команд: FTS5-таблица с внешним
+# содержимым, синхронизируется триггерами. Вывод в logs может быть
+# сжат, поэтому индекс читает текст через представление logs_text
+# и функцию nettools_output (регистрируется OutputCodec). Функция
+# нужна каждому соединению, которое пишет в logs: без неё вставка
+# и удаление падают с «no such function» (для внешних соединений —
+# output_codec.register_function). Ошибки чтения вывода функция
+# не пробрасывает, а возвращает пустую строку.
+# Удаление из индекса выполняется только для уже проиндексированных
+# строк (ещё не обработанных backfill'ом — нет).
+FTS_DDL = [
+    "CREATE VIEW IF NOT EXISTS logs_text AS "
+    "SELECT id, nettools_output(output) AS output FROM logs",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5("
+    "output, content='logs_text', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN "
+    "INSERT INTO logs_fts(rowid, output) "
+    "VALUES (new.id, nettools_output(new.output)); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs "
+    "WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN "
+    "INSERT INTO logs_fts(logs_fts, rowid, output) "
+    "VALUES ('delete', old.id, nettools_output(old.output)); "
+    "END",
+    # Пересжатие не меняет текст — индекс не трогаем.
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF output ON logs "
+    "WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) "
+    "AND nettools_output(old.output) IS NOT nettools_output(new.output) "
+    "BEGIN "
+    "INSERT INTO logs_fts(logs_fts, rowid, output) "
+    "VALUES ('delete', old.id, nettools_output(old.output)); "
+    "INSERT INTO logs_fts(rowid, output) "
+    "VALUES (new.id, nettools_output(new.output)); "
+    "END",
+]
+
+for statement in FTS_DDL:
+    event.listen(
+        Log.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+for statement in (
+    "DROP TABLE IF EXISTS logs_fts",
+    "DROP VIEW IF EXISTS logs_text",
+):
+    event.listen(
+        Log.__table__,
+        "after_drop",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
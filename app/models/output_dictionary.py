@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.infrastructure.extensions import db
+
+
+class OutputDictionary(db.Model):
+    """
+    Словарь zlib для сжатия вывода команд. Строки не удаляются:
+    по ID словаря из заголовка распаковываются старые записи.
+    """
+
+    __tablename__ = "output_dictionaries"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        db.DateTime,
+        default=db.func.now(),
+    )
+    samples: Mapped[int] = mapped_column(nullable=False)
+    data: Mapped[bytes] = mapped_column(db.LargeBinary, nullable=False)
@@ -0,0 +1,246 @@
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import time
+from typing import Callable, Dict, Iterator, List
+import uuid
+
+from flask import current_app
+
+from app.services import nettools_service, target_expr
+
+
+def parse_targets(text: str, defaults: Dict[str, str]) -> List[dict]:
+    """
+    Разбирает список устройств: по одному на строку в формате
+    host[,username,password[,model]]. Пустые поля берутся из defaults.
+    В поле host можно указать выражение: "sw[01-24].dc1", подсеть,
+    диапазон или группу (см. target_expr) — строка применяется к каждому
+    узлу. Выражения проверяются, но не разворачиваются.
+
+    Args:
+        text (str): Текст из формы.
+        defaults (Dict[str, str]): username, password и model по умолчанию.
+
+    Returns:
+        List[dict]: Список целей с учётными данными.
+
+    Raises:
+        ValueError: Некорректный host в одной из строк.
+    """
+    targets = []
+    for row in csv.reader((text or "").splitlines()):
+        row = [field.strip() for field in row]
+        if not row or not row[0] or row[0].startswith("#"):
+            continue
+        row += [""] * (4 - len(row))
+        host, username, password, model = row[:4]
+        try:
+            target_expr.parse(host)
+        except ValueError as e:
+            raise ValueError(f"{host}: {e}") from e
+        targets.append(
+            {
+                "host": host,
+                "username": username or defaults.get("username"),
+                "password": password or defaults.get("password"),
+                "model": model or defaults.get("model", "cisco"),
+            }
+        )
+    return targets
+
+
+def _run_target(
+    app,
+    protocol: str,
+    target: dict,
+    commands: List[str],
+    batch_id: str,
+) -> dict:
+    """
+    Выполняет все команды на одном устройстве последовательно,
+    чтобы они переиспользовали одну SSH-сессию из пула.
+    """
+    started = time.perf_counter()
+    results = []
+    with app.app_context():
+        for command in commands:
+            cmd_started = time.perf_counter()
+            try:
+                output, status = nettools_service.run_connect(
+                    protocol,
+                    command=command,
+                    batch=batch_id,
+                    **target,
+                )
+            except Exception as e:
+                output, status = f"Bulk error: {e}", "danger"
+            results.append(
+                {
+                    "command": command,
+                    "output": str(output),
+                    "status": status,
+                    "elapsed": round(time.perf_counter() - cmd_started, 3),
+                }
+            )
+
+    return {
+        "host": target["host"],
+        "status": max(
+            (r["status"] for r in results),
+            key=lambda s: nettools_service.STATUS_ORDER.get(s, 2),
+            default="ok",
+        ),
+        "results": results,
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def _expand(targets: List[dict]) -> Iterator[dict]:
+    for target in targets:
+        for host in target_expr.expand(target["host"]):
+            yield {**target, "host": host}
+
+
+def count_hosts(targets: List[dict]) -> int:
+    """
+    Считает узлы пакета, не разворачивая выражения.
+
+    Args:
+        targets (List[dict]): Устройства (как у parse_targets).
+
+    Returns:
+        int: Количество узлов.
+
+    Raises:
+        ValueError: Некорректное выражение или узлов больше
+            TARGET_MAX_HOSTS.
+    """
+    total = sum(target_expr.count(target["host"]) for target in targets)
+    if total > target_expr.max_hosts():
+        raise ValueError(f"limited to {target_expr.max_hosts()} hosts")
+    return total
+
+
+def run_bulk(
+    protocol: str,
+    targets: List[dict],
+    commands: List[str],
+    max_workers: int | None = None,
+    on_result: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Выполняет команды на множестве устройств с ограниченным параллелизмом.
+
+    Ошибка на одном устройстве не останавливает остальные.
+    Каждая команда сохраняется в логи с общим идентификатором batch.
+    Выражения в host разворачиваются по мере постановки задач в пул.
+
+    Args:
+        protocol (str): "ssh" или "telnet".
+        targets (List[dict]): Устройства (host — узел или выражение,
+            username, password, model).
+        commands (List[str]): Команды для выполнения.
+        max_workers (int | None): Предел параллелизма
+            (по умолчанию BULK_MAX_WORKERS из конфигурации).
+        on_result (Callable | None): Вызывается из рабочих потоков
+            с результатом каждого хоста по мере завершения.
+
+    Returns:
+        dict: batch, elapsed и results — результаты по хостам
+              в порядке исходного списка.
+
+    Raises:
+        ValueError: Некорректное выражение или узлов больше
+            TARGET_MAX_HOSTS.
+    """
+    app = current_app._get_current_object()
+    limit = max_workers or app.config.get("BULK_MAX_WORKERS", 16)
+    batch_id = uuid.uuid4().hex
+    started = time.perf_counter()
+
+    if not targets or not commands:
+        return {"batch": batch_id, "elapsed": 0.0, "results": []}
+
+    total = count_hosts(targets)
+
+    def run_target(target: dict) -> dict:
+        result = _run_target(app, protocol, target, commands, batch_id)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(limit, total)),
+        thread_name_prefix="bulk",
+    ) as pool:
+        futures = [
+            pool.submit(run_target, target) for target in _expand(targets)
+        ]
+        results = [future.result() for future in futures]
+
+    return {
+        "batch": batch_id,
+        "elapsed": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+
+
+def format_result(result: dict) -> str:
+    """
+    Форматирует результат одного хоста текстом.
+
+    Args:
+        result (dict): Элемент results из run_bulk().
+
+    Returns:
+        str: Заголовок хоста и вывод каждой команды.
+    """
+    lines = [
+        f"=== {result['host']} · {result['status']} · "
+        f"{result['elapsed']} с ==="
+    ]
+    for item in result["results"]:
+        lines.append(f"--- {item['command']} ({item['elapsed']} с)")
+        lines.append(item["output"])
+    return "\n".join(lines) + "\n"
+
+
+def run_batch(
+    protocol: str,
+    targets: List[dict],
+    commands: List[str],
+    max_workers: int | None = None,
+    on_output: Callable[[str], None] | None = None,
+) -> tuple[str, str]:
+    """
+    Выполняет пакет как фоновую задачу (см. jobs_service.submit_bulk):
+    результат каждого хоста передаётся в on_output по мере
+    завершения, итоговый вывод — по хостам в исходном порядке.
+
+    Args:
+        protocol (str): "ssh" или "telnet".
+        targets (List[dict]): Устройства (как у run_bulk).
+        commands (List[str]): Команды для выполнения.
+        max_workers (int | None): Предел параллелизма.
+        on_output (Callable | None): Получает вывод по мере выполнения.
+
+    Returns:
+        tuple[str, str]: (вывод по хостам, худший статус).
+    """
+
+    def on_result(result: dict) -> None:
+        if on_output is not None:
+            on_output(format_result(result))
+
+    batch = run_bulk(protocol, targets, commands, max_workers, on_result)
+    results = batch["results"]
+    summary = f"{len(results)} устройств за {batch['elapsed']} с"
+    status = max(
+        (r["status"] for r in results),
+        key=lambda s: nettools_service.STATUS_ORDER.get(s, 2),
+        default="ok",
+    )
+    output = "".join(format_result(r) for r in results) + summary
+    if on_output is not None:
+        on_output(summary)
+    return output, status
@@ -0,0 +1,402 @@
+import secrets
+import socket
+import struct
+import time
+from typing import Dict, List
+
+DNS_PORT = 53
+UDP_PAYLOAD = 4096
+
+QTYPES = {
+    "A": 1,
+    "NS": 2,
+    "CNAME": 5,
+    "SOA": 6,
+    "PTR": 12,
+    "MX": 15,
+    "TXT": 16,
+    "AAAA": 28,
+    "SRV": 33,
+    "ANY": 255,
+}
+QTYPE_NAMES = {v: k for k, v in QTYPES.items()}
+
+RCODES = {
+    0: "NOERROR",
+    1: "FORMERR",
+    2: "SERVFAIL",
+    3: "NXDOMAIN",
+    4: "NOTIMP",
+    5: "REFUSED",
+}
+
+HEADER = struct.Struct("!HHHHHH")
+RR_FIXED = struct.Struct("!HHIH")
+
+
+class DNSError(Exception):
+    """
+    Некорректный DNS-ответ.
+    """
+
+
+def encode_name(name: str) -> bytes:
+    """
+    Кодирует доменное имя в wire-формат (последовательность меток).
+
+    Args:
+        name (str): Доменное имя (допускается IDN).
+
+    Returns:
+        bytes: Имя в wire-формате.
+    """
+    name = name.rstrip(".")
+    if not name:
+        return b"\x00"
+    try:
+        raw = name.encode("idna")
+    except UnicodeError:
+        raw = name.encode("ascii")
+    out = bytearray()
+    for label in raw.split(b"."):
+        if not 0 < len(label) < 64:
+            raise DNSError(f"invalid label in {name!r}")
+        out.append(len(label))
+        out += label
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(qid: int, name: str, qtype: int) -> bytes:
+    """
+    Собирает DNS-запрос с флагом RD и EDNS0 (увеличенный UDP payload).
+
+    Args:
+        qid (int): Идентификатор запроса.
+        name (str): Запрашиваемое имя.
+        qtype (int): Числовой тип записи.
+
+    Returns:
+        bytes: Пакет запроса.
+    """
+    header = HEADER.pack(qid, 0x0100, 1, 0, 0, 1)
+    question = encode_name(name) + struct.pack("!HH", qtype, 1)
+    opt = b"\x00" + struct.pack("!HHIH", 41, UDP_PAYLOAD, 0, 0)
+    return header + question + opt
+
+
+def decode_name(data: bytes, offset: int) -> tuple[str, int]:
+    """
+    Декодирует имя с учётом сжатия (указателей).
+
+    Args:
+        data (bytes): Весь пакет.
+        offset (int): Смещение начала имени.
+
+    Returns:
+        tuple[str, int]: (имя с завершающей точкой, смещение после имени).
+    """
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSError("name out of bounds")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DNSError("truncated pointer")
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > 64:
+                raise DNSError("compression loop")
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length == 0:
+            offset += 1
+            break
+        start, offset = offset + 1, offset + 1 + length
+        labels.append(data[start:offset].decode("ascii", "replace"))
+    return ".".join(labels) + ".", end if end is not None else offset
+
+
+def _decode_rdata(data: bytes, rtype: int, start: int, length: int):
+    end = start + length
+    rdata = data[start:end]
+    match rtype:
+        case 1 if length == 4:
+            return socket.inet_ntop(socket.AF_INET, rdata)
+        case 28 if length == 16:
+            return socket.inet_ntop(socket.AF_INET6, rdata)
+        case 2 | 5 | 12:
+            return decode_name(data, start)[0]
+        case 15:
+            preference = struct.unpack_from("!H", data, start)[0]
+            return f"{preference} {decode_name(data, start + 2)[0]}"
+        case 16:
+            parts, pos = [], 0
+            while pos < length:
+                size, pos = rdata[pos], pos + 1
+                chunk, pos = rdata[pos:][:size], pos + size
+                parts.append(chunk.decode("utf-8", "replace"))
+            return " ".join(f'"{p}"' for p in parts)
+        case 33:
+            priority, weight, port = struct.unpack_from("!HHH", data, start)
+            target = decode_name(data, start + 6)[0]
+            return f"{priority} {weight} {port} {target}"
+        case 6:
+            mname, pos = decode_name(data, start)
+            rname, pos = decode_name(data, pos)
+            serial, refresh, retry, expire, minimum = struct.unpack_from(
+                "!IIIII", data, pos
+            )
+            return (
+                f"{mname} {rname} {serial} {refresh} "
+                f"{retry} {expire} {minimum}"
+            )
+        case _:
+            return rdata.hex()
+
+
+def parse_response(data: bytes) -> Dict:
+    """
+    Разбирает DNS-ответ.
+
+    Args:
+        data (bytes): Пакет ответа.
+
+    Returns:
+        Dict: id, rcode, truncated, question и answers —
+              записи {"name", "type", "ttl", "data"}.
+    """
+    if len(data) < HEADER.size:
+        raise DNSError("short packet")
+    qid, flags, qdcount, ancount, nscount, _ = HEADER.unpack_from(data)
+    offset = HEADER.size
+
+    question = None
+    for _ in range(qdcount):
+        qname, offset = decode_name(data, offset)
+        qtype, _qclass = struct.unpack_from("!HH", data, offset)
+        offset += 4
+        question = (qname.lower(), qtype)
+
+    sections = {"answers": [], "authority": []}
+    for section, count in (("answers", ancount), ("authority", nscount)):
+        for _ in range(count):
+            name, offset = decode_name(data, offset)
+            if offset + RR_FIXED.size > len(data):
+                raise DNSError("truncated record")
+            rtype, _rclass, ttl, rdlength = RR_FIXED.unpack_from(data, offset)
+            offset += RR_FIXED.size
+            sections[section].append(
+                {
+                    "name": name,
+                    "type": QTYPE_NAMES.get(rtype, str(rtype)),
+                    "ttl": ttl,
+                    "data": _decode_rdata(data, rtype, offset, rdlength),
+                }
+            )
+            offset += rdlength
+
+    return {
+        "id": qid,
+        "rcode": RCODES.get(flags & 0x000F, str(flags & 0x000F)),
+        "truncated": bool(flags & 0x0200),
+        "question": question,
+        **sections,
+    }
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise DNSError("connection closed")
+        chunks += chunk
+    return bytes(chunks)
+
+
+def _query_tcp(
+    name: str,
+    qtypes: List[int],
+    server: tuple,
+    family: int,
+    timeout: float,
+    results: Dict[int, Dict],
+) -> None:
+    """
+    Отправляет запросы по одному TCP-соединению (RFC 7766 pipelining)
+    и дописывает ответы в results по мере прихода: при обрыве
+    соединения полученные ответы сохраняются.
+    """
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(server)
+        pending = {}
+        payload = b""
+        for qtype in qtypes:
+            qid = secrets.randbelow(0x10000)
+            pending[qid] = qtype
+            packet = build_query(qid, name, qtype)
+            payload += struct.pack("!H", len(packet)) + packet
+        sock.sendall(payload)
+        while pending:
+            (length,) = struct.unpack("!H", _recv_exact(sock, 2))
+            response = parse_response(_recv_exact(sock, length))
+            qtype = pending.pop(response["id"], None)
+            if qtype is not None:
+                results[qtype] = response
+
+
+def query(
+    name: str,
+    qtypes: List[str],
+    server: str,
+    port: int | None = None,
+    timeout: float = 2,
+) -> Dict[str, Dict]:
+    """
+    Выполняет несколько DNS-запросов к одному серверу через один
+    UDP-сокет. Усечённые ответы (TC) повторяются по TCP.
+
+    Args:
+        name (str): Запрашиваемое имя.
+        qtypes (List[str]): Типы записей (A, AAAA, MX, TXT...).
+        server (str): Адрес или имя DNS-сервера.
+        port (int | None): Порт сервера (по умолчанию 53).
+        timeout (float): Общее время ожидания (секунды).
+
+    Returns:
+        Dict[str, Dict]: Ответ parse_response() по каждому типу;
+                         для неответивших — {"rcode": "TIMEOUT"},
+                         для усечённых, которые не удалось повторить
+                         по TCP, — {"rcode": "TCP ERROR", "error": ...}.
+    """
+    port = port or DNS_PORT
+    info = socket.getaddrinfo(server, port, proto=socket.IPPROTO_UDP)[0]
+    family, address = info[0], info[4]
+    wanted = {}
+    for qtype in qtypes:
+        code = QTYPES.get(qtype.upper())
+        if code is None:
+            raise DNSError(f"unsupported qtype {qtype}")
+        wanted[code] = qtype.upper()
+
+    expected_name = decode_name(encode_name(name), 0)[0].lower()
+    responses: Dict[int, Dict] = {}
+    truncated = []
+
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.connect(address)
+        pending = {}
+        for code in wanted:
+            qid = secrets.randbelow(0x10000)
+            while qid in pending:
+                qid = secrets.randbelow(0x10000)
+            pending[qid] = code
+            sock.send(build_query(qid, name, code))
+
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data = sock.recv(UDP_PAYLOAD)
+            except socket.timeout:
+                break
+            except ConnectionRefusedError:
+                break
+            try:
+                response = parse_response(data)
+            except (DNSError, struct.error, IndexError):
+                continue
+            code = pending.get(response["id"])
+            if code is None or response["question"] != (expected_name, code):
+                continue
+            del pending[response["id"]]
+            if response["truncated"]:
+                truncated.append(code)
+            else:
+                responses[code] = response
+
+    if truncated:
+        remaining = max(deadline - time.monotonic(), 0.5)
+        try:
+            _query_tcp(name, truncated, address, family, remaining, responses)
+        except (OSError, DNSError, struct.error, IndexError) as e:
+            # Ответы UDP по остальным типам остаются в силе.
+            for code in truncated:
+                responses.setdefault(
+                    code,
+                    {"rcode": "TCP ERROR", "error": str(e), "answers": []},
+                )
+
+    return {
+        qtype: responses.get(code, {"rcode": "TIMEOUT", "answers": []})
+        for code, qtype in wanted.items()
+    }
+
+
+def classify(results: Dict[str, Dict]) -> str:
+    """
+    Определяет статус по кодам ответа (rcode).
+
+    Args:
+        results (Dict[str, Dict]): Результат query().
+
+    Returns:
+        str: "ok" — получены записи по всем типам,
+             "warn" — записи есть не везде (NODATA, таймаут части),
+             "danger" — NXDOMAIN, SERVFAIL, REFUSED или нет ответа.
+    """
+    rcodes = [r["rcode"] for r in results.values()]
+    answered = [r for r in results.values() if r["answers"]]
+    if answered:
+        return "ok" if len(answered) == len(results) else "warn"
+    if all(rcode == "NOERROR" for rcode in rcodes):
+        return "warn"
+    return "danger"
+
+
+def format_results(name: str, server: str, results: Dict[str, Dict]) -> str:
+    """
+    Форматирует ответы в текстовый отчёт в духе nslookup.
+
+    Args:
+        name (str): Запрашиваемое имя.
+        server (str): DNS-сервер.
+        results (Dict[str, Dict]): Результат query().
+
+    Returns:
+        str: Текстовый отчёт.
+    """
+    lines = [f"Server:\t{server}", f"Name:\t{name}", ""]
+    for qtype, result in results.items():
+        if result["rcode"] == "TIMEOUT":
+            lines.append(
+                f"{qtype}\t*** Timeout: no response from DNS server {server}"
+            )
+            continue
+        if result["rcode"] == "TCP ERROR":
+            lines.append(
+                f"{qtype}\t*** Truncated answer, TCP retry failed: "
+                f"{result['error']}"
+            )
+            continue
+        if result["rcode"] != "NOERROR":
+            lines.append(f"{qtype}\t*** {result['rcode']}")
+            continue
+        if not result["answers"]:
+            lines.append(f"{qtype}\t*** No {qtype} records")
+            continue
+        for record in result["answers"]:
+            lines.append(
+                f"{record['type']}\t{record['name']}\t"
+                f"{record['ttl']}\t{record['data']}"
+            )
+    return "\n".join(lines).strip()
@@ -0,0 +1,267 @@
+from datetime import datetime, timedelta, timezone
+import json
+from typing import Callable, Iterator, List
+import uuid
+
+from flask import current_app
+
+from app.infrastructure.job_queue import job_queue
+from app.interfaces.repositories import jobs_repo
+from app.services import bulk_service, nettools_service
+
+FINAL_STATES = ("done", "failed")
+
+
+def _tail(output: str) -> str:
+    """
+    Последние JOB_OUTPUT_TAIL символов вывода: полный вывод уже
+    сохранён в логах (сжатым), задача его не дублирует.
+    """
+    limit = current_app.config.get("JOB_OUTPUT_TAIL", 64 * 1024)
+    if len(output) <= limit:
+        return output
+    start = len(output) - limit
+    return (
+        f"... (последние {limit} символов, полный вывод — в истории)\n"
+        + output[start:]
+    )
+
+
+def _execute(job_id: str, runner: Callable, name: str, kwargs: dict) -> None:
+    """
+    Выполняет задачу в рабочем потоке и сохраняет результат.
+    Запись в логи делают run_commands / run_connect.
+    """
+    if not jobs_repo.claim(job_id):
+        # Задачу уже забрал другой процесс.
+        return
+
+    def on_output(chunk: str) -> None:
+        job_queue.publish(job_id, chunk)
+
+    try:
+        output, status = runner(name, on_output=on_output, **kwargs)
+    except Exception as e:
+        jobs_repo.finish(job_id, "failed", "danger", f"Job error: {e}")
+        raise
+    jobs_repo.finish(job_id, "done", status, _tail(str(output)))
+
+
+def _submit(
+    kind: str,
+    runner: Callable,
+    name: str,
+    kwargs: dict,
+    host: str | None = None,
+) -> str:
+    job_id = uuid.uuid4().hex
+    params = nettools_service.mask_sensitive_values(
+        {k: v for k, v in kwargs.items() if k != "host"}
+    )
+    jobs_repo.create(
+        job_id,
+        kind=kind,
+        action=name,
+        host=host or kwargs.get("host") or "unknown",
+        params=params,
+    )
+    job_queue.submit(
+        current_app._get_current_object(),
+        job_id,
+        _execute,
+        runner,
+        name,
+        kwargs,
+    )
+    return job_id
+
+
+def submit_command(action: str, **kwargs) -> str:
+    """
+    Ставит в очередь диагностическую команду (ping, traceroute,
+    nslookup).
+
+    Args:
+        action (str): Тип действия.
+        **kwargs: Параметры команды (как у run_commands).
+
+    Returns:
+        str: Идентификатор задачи.
+    """
+    return _submit("command", nettools_service.run_commands, action, kwargs)
+
+
+def submit_connect(protocol: str, **kwargs) -> str:
+    """
+    Ставит в очередь выполнение команды на устройстве.
+
+    Учётные данные передаются рабочему потоку в памяти
+    и в базу не сохраняются.
+
+    Args:
+        protocol (str): "ssh" или "telnet".
+        **kwargs: Параметры подключения (как у run_connect).
+
+    Returns:
+        str: Идентификатор задачи.
+    """
+    return _submit("connect", nettools_service.run_connect, protocol, kwargs)
+
+
+def submit_bulk(
+    protocol: str,
+    targets: List[dict],
+    commands: List[str],
+    max_workers: int | None = None,
+) -> str:
+    """
+    Ставит в очередь пакетное выполнение команд на устройствах
+    (см. bulk_service.run_batch). Учётные данные, как и у
+    submit_connect, в базу не сохраняются.
+
+    Args:
+        protocol (str): "ssh" или "telnet".
+        targets (List[dict]): Устройства (как у bulk_service.run_bulk).
+        commands (List[str]): Команды для выполнения.
+        max_workers (int | None): Предел параллелизма.
+
+    Returns:
+        str: Идентификатор задачи.
+    """
+    host = targets[0]["host"] if targets else "unknown"
+    if len(targets) > 1:
+        host = f"{host} (+{len(targets) - 1})"
+    return _submit(
+        "bulk",
+        bulk_service.run_batch,
+        protocol,
+        {
+            "targets": targets,
+            "commands": commands,
+            "max_workers": max_workers,
+        },
+        host=host[:128],
+    )
+
+
+def get_job(job_id: str, wait: float = 0) -> dict | None:
+    """
+    Возвращает состояние задачи, при необходимости дождавшись
+    её завершения.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+        wait (float): Сколько секунд ждать завершения (long polling).
+
+    Returns:
+        dict | None: id, kind, action, host, state, status, output
+                     и отметки времени; None, если задачи нет.
+    """
+    job = jobs_repo.get_by_id(job_id)
+    if job is None:
+        return None
+    if wait > 0 and job.state not in FINAL_STATES:
+        job_queue.wait(job_id, wait)
+        job = jobs_repo.get_by_id(job_id)
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "action": job.action,
+        "host": job.host,
+        "state": job.state,
+        "status": job.status,
+        "output": job.output,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": (
+            job.finished_at.isoformat() if job.finished_at else None
+        ),
+    }
+
+
+def stream_job(job_id: str, heartbeat: float = 15) -> Iterator[str]:
+    """
+    Формирует поток Server-Sent Events для задачи: события output
+    с фрагментами вывода по мере поступления и завершающее событие
+    done с итоговым состоянием (как в get_job()).
+
+    Args:
+        job_id (str): Идентификатор задачи.
+        heartbeat (float): Интервал keep-alive комментариев (секунды).
+
+    Returns:
+        Iterator[str]: Сообщения в формате text/event-stream.
+    """
+    for chunk in job_queue.follow(job_id, heartbeat):
+        if chunk is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"event: output\ndata: {json.dumps(chunk)}\n\n"
+
+    # Если задачу выполняет другой процесс, состояние может быть
+    # незавершённым — клиент тогда переходит на опрос /jobs/<id>.
+    job = get_job(job_id)
+    yield f"event: done\ndata: {json.dumps(job)}\n\n"
+
+
+def recover_jobs(lease: float | None = None) -> int:
+    """
+    Восстанавливает задачи остановленных процессов: незавершённые
+    задачи, которые никто не продлевал дольше lease секунд. Задачи
+    живых процессов продлеваются JobQueue и не затрагиваются.
+
+    Диагностические команды не содержат секретов и ставятся
+    в очередь текущего процесса повторно. Подключения к устройствам
+    завершаются ошибкой: пароли в базе не хранятся.
+
+    Args:
+        lease (float | None): Срок без продления (по умолчанию
+            JOB_LEASE_TIMEOUT из конфигурации).
+
+    Returns:
+        int: Количество повторно поставленных задач.
+    """
+    app = current_app._get_current_object()
+    if lease is None:
+        lease = app.config.get("JOB_LEASE_TIMEOUT", 120)
+    requeued = 0
+    for job in jobs_repo.get_stale(lease):
+        if job.kind != "command":
+            jobs_repo.finish(
+                job.id,
+                "failed",
+                "danger",
+                "Job interrupted by restart; credentials are not persisted",
+            )
+            continue
+        if job.state == "running" and not jobs_repo.requeue(job.id):
+            continue
+        job_queue.submit(
+            app,
+            job.id,
+            _execute,
+            nettools_service.run_commands,
+            job.action,
+            {"host": job.host, **job.params},
+        )
+        requeued += 1
+    return requeued
+
+
+def prune_jobs(max_age_hours: float | None = None) -> int:
+    """
+    Удаляет завершённые задачи: их результат нужен только для
+    страницы задачи, история команд хранится в логах.
+
+    Args:
+        max_age_hours (float | None): Возраст завершённой задачи
+            (по умолчанию JOB_RETENTION_HOURS из конфигурации).
+
+    Returns:
+        int: Количество удалённых задач.
+    """
+    if max_age_hours is None:
+        max_age_hours = current_app.config.get("JOB_RETENTION_HOURS", 24)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return jobs_repo.delete_finished(now - timedelta(hours=max_age_hours))
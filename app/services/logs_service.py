@@ -1,5 +1,17 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+import difflib
+import json
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional
+import zlib
 
+from markupsafe import escape, Markup
+
+from app.infrastructure.log_writer import log_writer
+from app.infrastructure.output_codec import (
+    MAX_DICTIONARY_SIZE,
+    output_codec,
+    train_dictionary,
+)
 from app.interfaces.repositories import logs_repo
 from app.models.log import Log
 
@@ -14,6 +26,314 @@ def get_all_logs() -> List[Log]:
     return logs_repo.get_all()
 
 
+def _encode_cursor(log: Log) -> str:
+    return f"{log.timestamp.isoformat()}_{log.id}"
+
+
+def _decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if not cursor:
+        return None
+    try:
+        timestamp, log_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except ValueError:
+        return None
+
+
+def get_logs_page(
+    limit: int = 50,
+    cursor: str | None = None,
+    action: str | None = None,
+    host: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    params: dict | None = None,
+) -> dict:
+    """
+    Возвращает страницу истории (без вывода команд).
+
+    Args:
+        limit (int): Размер страницы.
+        cursor (str | None): Курсор следующей страницы из предыдущего
+            вызова; None — первая страница.
+        action (str | None): Фильтр по действию.
+        host (str | None): Фильтр по хосту.
+        status (str | None): Фильтр по статусу.
+        since (datetime | None): Начало интервала (включительно).
+        until (datetime | None): Конец интервала (не включительно).
+        params (dict | None): Фильтры по ключам params
+            (dns_server, model).
+
+    Returns:
+        dict: logs — список Log, next_cursor — курсор следующей
+              страницы или None, если записей больше нет.
+    """
+    logs = logs_repo.get_page(
+        limit + 1,
+        before=_decode_cursor(cursor),
+        action=action,
+        host=host,
+        status=status,
+        since=since,
+        until=until,
+        params=params,
+    )
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = _encode_cursor(logs[-1])
+    return {"logs": logs, "next_cursor": next_cursor}
+
+
+def parse_filters(args: Mapping[str, str]) -> dict:
+    """
+    Извлекает фильтры action, host, status, since и until
+    из параметров строки запроса.
+
+    Args:
+        args (Mapping[str, str]): Параметры запроса.
+
+    Returns:
+        dict: Фильтры для get_logs_page()/search_logs().
+
+    Raises:
+        ValueError: Дата не в формате ISO 8601.
+    """
+    filters = {
+        key: args.get(key) or None for key in ("action", "host", "status")
+    }
+    for key in ("since", "until"):
+        value = args.get(key)
+        filters[key] = datetime.fromisoformat(value) if value else None
+    return filters
+
+
+def _parse_limit(args: Mapping[str, str], max_limit: int) -> int:
+    limit = int(args.get("limit") or 50)
+    if not 0 < limit <= max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    return limit
+
+
+def query_logs(args: Mapping[str, str], max_limit: int = 500) -> dict:
+    """
+    Выполняет запрос к логам по параметрам строки запроса.
+
+    Поддерживаются host, action, status, since/until (ISO 8601),
+    ключи params (dns_server, model), limit и cursor. Все фильтры
+    обслуживаются индексами таблицы logs.
+
+    Args:
+        args (Mapping[str, str]): Параметры запроса.
+        max_limit (int): Максимальный размер страницы.
+
+    Returns:
+        dict: logs — записи без вывода команд, next_cursor.
+
+    Raises:
+        ValueError: Некорректное значение параметра.
+    """
+    page = get_logs_page(
+        limit=_parse_limit(args, max_limit),
+        cursor=args.get("cursor"),
+        params={
+            key: args[key] for key in logs_repo.PARAM_COLUMNS if args.get(key)
+        },
+        **parse_filters(args),
+    )
+    return {
+        "logs": [
+            {
+                "id": log.id,
+                "timestamp": log.timestamp.isoformat(),
+                "action": log.action,
+                "host": log.host,
+                "params": log.params,
+                "status": log.status,
+            }
+            for log in page["logs"]
+        ],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+def _fts_query(text: str) -> str:
+    """
+    Превращает строку поиска в выражение FTS5: каждое слово —
+    отдельная фраза (все должны встретиться), «*» в конце — префикс.
+    Знаки препинания внутри слова («%LINK-3-UPDOWN», MAC-адрес)
+    делают его фразой из нескольких токенов.
+    """
+    phrases = []
+    for term in text.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            phrase = '"' + term.replace('"', '""') + '"'
+            phrases.append(phrase + ("*" if prefix else ""))
+    if not phrases:
+        raise ValueError("empty search query")
+    return " ".join(phrases)
+
+
+def search_logs(
+    text: str,
+    limit: int = 50,
+    action: str | None = None,
+    host: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> List[dict]:
+    """
+    Полнотекстовый поиск по выводу команд.
+
+    Args:
+        text (str): Слова для поиска.
+        limit (int): Максимальное количество результатов.
+        action, host, status, since, until: Дополнительные фильтры.
+
+    Returns:
+        List[dict]: Логи по убыванию релевантности (bm25) с полем
+                    snippet — HTML-фрагментом вывода, где найденные
+                    слова выделены <mark>.
+
+    Raises:
+        ValueError: Пустой запрос.
+    """
+    rows = logs_repo.search(
+        _fts_query(text),
+        limit=limit,
+        action=action,
+        host=host,
+        status=status,
+        since=since,
+        until=until,
+    )
+    return [
+        {
+            "id": row.id,
+            "timestamp": row.timestamp.isoformat(),
+            "action": row.action,
+            "host": row.host,
+            "status": row.status,
+            "rank": round(row.rank, 3),
+            "snippet": Markup(
+                str(escape(row.snippet))
+                .replace(logs_repo.SNIPPET_START, "<mark>")
+                .replace(logs_repo.SNIPPET_END, "</mark>")
+            ),
+        }
+        for row in rows
+    ]
+
+
+def search_logs_by_args(args: Mapping[str, str], max_limit: int = 500):
+    """
+    Выполняет полнотекстовый поиск по параметрам строки запроса:
+    q — слова для поиска, limit и фильтры parse_filters().
+
+    Args:
+        args (Mapping[str, str]): Параметры запроса.
+        max_limit (int): Максимальное количество результатов.
+
+    Returns:
+        List[dict]: Результат search_logs().
+
+    Raises:
+        ValueError: Пустой запрос или некорректный параметр.
+    """
+    return search_logs(
+        args.get("q", ""),
+        limit=_parse_limit(args, max_limit),
+        **parse_filters(args),
+    )
+
+
+def backfill_search_index(
+    batch_size: int = 10000,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """
+    Индексирует для полнотекстового поиска логи, записанные
+    до появления индекса, пачками по batch_size строк.
+
+    Args:
+        batch_size (int): Размер пачки.
+        on_progress (Callable | None): Вызывается после каждой пачки
+            с (проиндексировано всего, последний id).
+
+    Returns:
+        int: Количество проиндексированных строк.
+    """
+    total, after = 0, 0
+    while True:
+        indexed, last_id = logs_repo.backfill_fts(after, batch_size)
+        if last_id == after:
+            return total
+        total += indexed
+        after = last_id
+        if on_progress is not None:
+            on_progress(total, last_id)
+
+
+def train_output_dictionary(
+    samples: int = 2000, size: int = MAX_DICTIONARY_SIZE
+) -> dict:
+    """
+    Обучает словарь сжатия на выводе последних логов и делает его
+    активным: новые записи сжимаются им, старые остаются читаемыми.
+
+    Args:
+        samples (int): Количество образцов.
+        size (int): Максимальный размер словаря (байты).
+
+    Returns:
+        dict: id (None, если повторяющихся строк не нашлось),
+              samples и size словаря.
+    """
+    outputs = logs_repo.sample_outputs(samples, output_codec.min_size)
+    data = train_dictionary(outputs, size)
+    if not data:
+        return {"id": None, "samples": len(outputs), "size": 0}
+    dictionary_id = logs_repo.save_dictionary(data, len(outputs))
+    output_codec.add_dictionary(dictionary_id, data)
+    return {"id": dictionary_id, "samples": len(outputs), "size": len(data)}
+
+
+def compress_outputs(
+    batch_size: int = 1000,
+    recompress: bool = False,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """
+    Сжимает вывод уже сохранённых логов пачками по batch_size строк
+    (каждая пачка — отдельная транзакция, можно прерывать).
+
+    Args:
+        batch_size (int): Размер пачки.
+        recompress (bool): Пересжать и сжатые строки активным
+                           словарём.
+        on_progress (Callable | None): Вызывается после каждой пачки
+            с (обработано всего, последний id).
+
+    Returns:
+        int: Количество перезаписанных строк.
+    """
+    total, after = 0, 0
+    while True:
+        written, last_id = logs_repo.compress_range(
+            after, batch_size, output_codec.min_size, recompress
+        )
+        if last_id == after:
+            return total
+        total += written
+        after = last_id
+        if on_progress is not None:
+            on_progress(total, last_id)
+
+
 def get_log_by_id(log_id: int) -> Optional[Log]:
     """
     Возвращает лог по ID.
@@ -27,6 +347,34 @@ def get_log_by_id(log_id: int) -> Optional[Log]:
     return logs_repo.get_by_id(log_id)
 
 
+def diff_with_previous(log: Log, context: int = 3) -> dict | None:
+    """
+    Сравнивает вывод лога с предыдущим запуском той же команды
+    на том же хосте.
+
+    Args:
+        log (Log): Лог.
+        context (int): Строк контекста вокруг изменений.
+
+    Returns:
+        dict | None: previous — предыдущий Log, lines — строки
+                     unified diff (пустой список — вывод не менялся);
+                     None, если предыдущего запуска нет.
+    """
+    previous = logs_repo.get_previous_run(log)
+    if previous is None:
+        return None
+    lines = difflib.unified_diff(
+        previous.output.splitlines(),
+        log.output.splitlines(),
+        fromfile=f"#{previous.id}",
+        tofile=f"#{log.id}",
+        n=context,
+        lineterm="",
+    )
+    return {"previous": previous, "lines": list(lines)}
+
+
 def delete_log(log_id: int) -> bool:
     """
     Удаляет лог по его ID.
@@ -48,26 +396,117 @@ def delete_all_logs() -> None:
     logs_repo.delete_all()
 
 
-def export_logs_to_json() -> List[dict]:
+def _log_record(row) -> dict:
+    return {
+        "id": row.id,
+        "timestamp": row.timestamp.isoformat(),
+        "action": row.action,
+        "host": row.host,
+        "params": row.params,
+        "status": row.status,
+        "output": row.output,
+    }
+
+
+def export_logs(
+    fmt: str = "ndjson",
+    action: str | None = None,
+    host: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    batch_size: int = 500,
+) -> Iterator[str]:
     """
-    Экспортирует все логи в список словарей (для JSON).
+    Потоково экспортирует логи в NDJSON или JSON-массив.
 
-    Returns:
-        List[dict]: Логи в формате словарей.
+    Записи читаются из базы пачками и сразу сериализуются,
+    поэтому память не зависит от количества логов.
+
+    Args:
+        fmt (str): "ndjson" (запись на строку) или "json" (массив).
+        action (str | None): Фильтр по действию.
+        host (str | None): Фильтр по хосту.
+        since (datetime | None): Начало интервала (включительно).
+        until (datetime | None): Конец интервала (не включительно).
+        batch_size (int): Размер пачки чтения из базы.
+
+    Yields:
+        str: Очередной фрагмент документа.
     """
-    logs = logs_repo.get_all()
-    return [
-        {
-            "id": log.id,
-            "timestamp": log.timestamp.isoformat(),
-            "action": log.action,
-            "host": log.host,
-            "params": log.params,
-            "status": log.status,
-            "output": log.output,
-        }
-        for log in logs
-    ]
+    batches = logs_repo.iter_batches(
+        batch_size, action=action, host=host, since=since, until=until
+    )
+    if fmt == "ndjson":
+        for rows in batches:
+            yield "".join(
+                json.dumps(_log_record(row), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        return
+
+    separator = "[\n"
+    for rows in batches:
+        parts = []
+        for row in rows:
+            parts.append(
+                separator + json.dumps(_log_record(row), ensure_ascii=False)
+            )
+            separator = ",\n"
+        yield "".join(parts)
+    yield "[]\n" if separator == "[\n" else "\n]\n"
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Сжимает поток текстовых фрагментов в gzip на лету.
+
+    Args:
+        chunks (Iterable[str]): Фрагменты документа.
+
+    Yields:
+        bytes: Фрагменты gzip-потока.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def write_logs(records: List[dict]) -> None:
+    """
+    Сохраняет пачку логов (вызывается LogWriter).
+
+    Вывод, повторяющий предыдущий запуск той же команды на том же
+    хосте, кодируется дельтой к его снимку (OutputCodec.encode_delta);
+    остальной — как обычно (сжатие, хранилище блобов).
+
+    Args:
+        records (List[dict]): Поля логов: timestamp, action, host,
+            params, status, output.
+    """
+    keys = {}
+    for n, record in enumerate(records):
+        if output_codec.wants_delta(record["output"]):
+            command = (record["params"] or {}).get("command")
+            keys[n] = (record["action"], record["host"], command)
+    if not keys:
+        logs_repo.save_many(records)
+        return
+    latest = logs_repo.get_last_stored_outputs(list(set(keys.values())))
+    encoded = []
+    for n, record in enumerate(records):
+        key = keys.get(n)
+        if key is not None:
+            output = record["output"]
+            value = output_codec.encode_delta(output, latest.get(key))
+            if value is None:
+                value = output_codec.compress(output)
+            latest[key] = value
+            record = dict(record, output=value)
+        encoded.append(record)
+    logs_repo.save_many(encoded)
 
 
 def create_log(
@@ -87,11 +526,14 @@ def create_log(
         status (str): Статус выполнения ("ok", "warn", "danger").
         output (str): Вывод команды.
     """
-
-    logs_repo.save(
-        action=action,
-        host=host,
-        params=params,
-        status=status,
-        output=output,
+    # Время фиксируется при постановке в очередь, а не при записи.
+    log_writer.submit(
+        {
+            "timestamp": datetime.now(timezone.utc).replace(tzinfo=None),
+            "action": action,
+            "host": host,
+            "params": params,
+            "status": status,
+            "output": output,
+        }
     )
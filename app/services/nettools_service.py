@@ -1,19 +1,43 @@
 import asyncio
-from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 import ipaddress
 import re
+import socket
 import subprocess
 import sys
-import time
-from typing import Dict, List, Tuple
+import threading
+from typing import Callable, Dict, List, Tuple
 
+from flask import current_app
 import paramiko
 from pythonping import ping
 import telnetlib3
 
-from app.services import logs_service
-
-ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+from app.infrastructure.redaction import redactor
+from app.infrastructure.resolver import resolver
+from app.infrastructure.ssh_pool import ssh_pool, SSHSession
+from app.infrastructure.ssh_tunnels import tunnel_manager
+from app.infrastructure.telnet_engine import telnet_engine, TelnetSession
+from app.services import (
+    dns_client,
+    logs_service,
+    ping_sweep,
+    target_expr,
+    traceroute_engine,
+)
+from app.services.prompt_engine import (
+    aread_until_prompt,
+    extract_output,
+    PromptMatcher,
+    PromptTimeoutError,
+    read_until_eof,
+    read_until_prompt,
+)
+
+STATUS_ORDER = {"ok": 0, "warn": 1, "danger": 2}
+
+# Ключи параметров, значения которых не сохраняются.
+SENSITIVE_KEY = re.compile(r"pass|pwd|secret|token|key", re.IGNORECASE)
 
 PAGING_COMMANDS = {
     "cisco": ["terminal length 0"],
@@ -29,22 +53,13 @@ PAGING_COMMANDS = {
 def mask_sensitive_values(data):
     """
     Рекурсивно заменяет чувствительные данные (пароли, токены и т.д.)
-    на звёздочки в структурах dict / list.
-    """
-    sensitive_keys = {
-        "password",
-        "pass",
-        "passwd",
-        "pwd",
-        "secret",
-        "token",
-        "key",
-    }
-
+    на звёздочки в структурах dict / list. Из строковых значений
+    (например, команд конфигурации) секреты удаляются Redactor.
+    """
     if isinstance(data, dict):
         clean = {}
         for k, v in data.items():
-            if any(word in k.lower() for word in sensitive_keys):
+            if SENSITIVE_KEY.search(k):
                 clean[k] = "******"
             else:
                 clean[k] = mask_sensitive_values(v)
@@ -53,6 +68,9 @@ def mask_sensitive_values(data):
     if isinstance(data, list):
         return [mask_sensitive_values(v) for v in data]
 
+    if isinstance(data, str):
+        return redactor.redact(data)
+
     return data
 
 
@@ -66,26 +84,114 @@ def valid_ip(target: str) -> bool:
     Returns:
         bool: True, если target корректный IP или hostname.
     """
-    try:
-        ipaddress.ip_address(target)
-        return True
-    except ValueError:
-        pass
+    return target_expr.valid_host(target)
 
-    if all(part.isdigit() for part in target.split(".")):
-        return False
 
-    target = target.rstrip(".")
-    if len(target) > 253:
-        return False
+class _OrderedOutput:
+    """
+    Потоковый вывод нескольких узлов по порядку: вывод первого
+    незавершённого узла передаётся сразу, остальных — копится
+    и передаётся, когда до них дойдёт очередь.
+    """
+
+    def __init__(self, on_output: Callable[[str], None] | None):
+        self.on_output = on_output
+        self.current = 0
+        self.pending: Dict[int, List[str]] = {}
+        self.done = set()
+        self.lock = threading.Lock()
+
+    def write(self, index: int, chunk: str) -> None:
+        if self.on_output is None:
+            return
+        with self.lock:
+            if index == self.current:
+                self.on_output(chunk)
+            else:
+                self.pending.setdefault(index, []).append(chunk)
 
-    label_regex = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
-    labels = target.split(".")
-    for label in labels:
-        if not label_regex.match(label):
-            return False
+    def finish(self, index: int) -> None:
+        if self.on_output is None:
+            return
+        with self.lock:
+            self.done.add(index)
+            while self.current in self.done:
+                self.current += 1
+                for chunk in self.pending.pop(self.current, ()):
+                    self.on_output(chunk)
 
-    return True
+
+def _run_host(app, runner, name, kwargs, output, index) -> tuple[str, str]:
+    try:
+        with app.app_context():
+            return runner(
+                name,
+                **kwargs,
+                on_output=lambda chunk: output.write(index, chunk),
+            )
+    finally:
+        output.finish(index)
+
+
+def _run_each(
+    runner: Callable,
+    name: str,
+    kwargs: dict,
+    on_output: Callable[[str], None] | None,
+) -> tuple[str, str]:
+    """
+    Выполняет действие на каждом узле выражения из host параллельно,
+    не более BULK_MAX_WORKERS узлов одновременно. Вывод передаётся
+    и собирается в порядке узлов; каждый узел сохраняется в логи
+    отдельной записью.
+
+    Returns:
+        tuple[str, str]: (вывод по узлам, худший статус).
+    """
+    try:
+        total = target_expr.count(
+            kwargs.get("host"), limit=target_expr.max_hosts()
+        )
+        hosts = target_expr.expand(kwargs.get("host"))
+    except ValueError as e:
+        output = f"Ошибка в списке узлов: {e}"
+        if on_output is not None:
+            on_output(output)
+        return output, "danger"
+
+    app = current_app._get_current_object()
+    workers = app.config.get("BULK_MAX_WORKERS", 16)
+    output = _OrderedOutput(on_output)
+    headers, futures = [], []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, total)),
+        thread_name_prefix="each",
+    ) as pool:
+        for index, host in enumerate(hosts):
+            headers.append(f"=== {host} ===\n")
+            output.write(index, headers[-1])
+            futures.append(
+                pool.submit(
+                    _run_host,
+                    app,
+                    runner,
+                    name,
+                    {**kwargs, "host": host},
+                    output,
+                    index,
+                )
+            )
+        results = [future.result() for future in futures]
+
+    parts = [
+        header + str(result) for header, (result, _) in zip(headers, results)
+    ]
+    status = max(
+        (host_status for _, host_status in results),
+        key=lambda s: STATUS_ORDER.get(s, 2),
+        default="ok",
+    )
+    return "\n".join(parts), status
 
 
 def run_commands(action: str, **kwargs) -> tuple[str, str]:
@@ -94,20 +200,34 @@ def run_commands(action: str, **kwargs) -> tuple[str, str]:
 
     Args:
         action (str): Тип действия ("ping", "traceroute", "nslookup").
-        **kwargs: Параметры команды.
+        **kwargs: Параметры команды; host — узел или выражение
+            (см. target_expr), on_output — необязательный callback,
+            получающий вывод по мере выполнения.
 
     Returns:
         tuple[str, str]: (результат, статус).
     """
+    on_output = kwargs.pop("on_output", None)
     host = kwargs.get("host", "unknown")
+    if action.lower() != "ping" and target_expr.is_expression(host):
+        return _run_each(run_commands, action, kwargs, on_output)
     params = {k: v for k, v in kwargs.items() if k != "password"}
 
     match action.lower():
+        case "ping" if ping_sweep.is_sweep(host):
+            output, status = sweep_hosts(
+                host,
+                count=kwargs.get("count", 1),
+                timeout=kwargs.get("timeout", 1),
+            )
+            if on_output is not None:
+                on_output(output)
         case "ping":
             output, status = ping_host(
                 kwargs.get("host"),
                 count=kwargs.get("count", 4),
                 timeout=kwargs.get("timeout", 1),
+                on_output=on_output,
             )
         case "traceroute":
             output, status = traceroute_host(
@@ -115,6 +235,7 @@ def run_commands(action: str, **kwargs) -> tuple[str, str]:
                 max_hops=kwargs.get("max_hops", 15),
                 timeout=kwargs.get("timeout", 1),
                 queries=kwargs.get("queries", 1),
+                on_output=on_output,
             )
         case "nslookup":
             output, status = nslookup(
@@ -123,6 +244,8 @@ def run_commands(action: str, **kwargs) -> tuple[str, str]:
                 dns_server=kwargs.get("dns_server", "8.8.8.8"),
                 timeout=kwargs.get("timeout", 2),
             )
+            if on_output is not None:
+                on_output(output)
         case _:
             output, status = f"Неизвестная команда: {action}", "danger"
 
@@ -144,12 +267,17 @@ def run_connect(protocol: str, **kwargs) -> tuple[str, str]:
 
     Args:
         protocol (str): Протокол подключения ("ssh" или "telnet").
-        **kwargs: Параметры подключения и команды.
+        **kwargs: Параметры подключения и команды; host — узел
+            или выражение (см. target_expr), on_output —
+            необязательный callback для вывода по мере поступления.
 
     Returns:
         tuple[str, str]: (результат, статус).
     """
+    on_output = kwargs.pop("on_output", None)
     host = kwargs.get("host", "unknown")
+    if target_expr.is_expression(host):
+        return _run_each(run_connect, protocol, kwargs, on_output)
     safe_params = mask_sensitive_values(kwargs)
 
     match protocol.lower():
@@ -169,6 +297,7 @@ def run_connect(protocol: str, **kwargs) -> tuple[str, str]:
                         model=kwargs.get("model", "cisco"),
                         port=kwargs.get("port", 22),
                         timeout=kwargs.get("timeout", 5),
+                        on_output=on_output,
                     )
                 except Exception as e:
                     return f"JumpHost error: {e}", "danger"
@@ -181,6 +310,7 @@ def run_connect(protocol: str, **kwargs) -> tuple[str, str]:
                     model=kwargs.get("model", "cisco"),
                     port=kwargs.get("port", 22),
                     timeout=kwargs.get("timeout", 5),
+                    on_output=on_output,
                 )
 
         case "telnet":
@@ -192,6 +322,7 @@ def run_connect(protocol: str, **kwargs) -> tuple[str, str]:
                 model=kwargs.get("model", "cisco"),
                 port=kwargs.get("port", 23),
                 timeout=kwargs.get("timeout", 5),
+                on_output=on_output,
             )
         case _:
             output, status = f"Неизвестный протокол: {protocol}", "danger"
@@ -207,10 +338,29 @@ def run_connect(protocol: str, **kwargs) -> tuple[str, str]:
     return output, status
 
 
+class _OutputStream:
+    """
+    Файлоподобный объект, пересылающий запись в callback
+    (для verbose-вывода pythonping).
+    """
+
+    def __init__(self, on_output: Callable[[str], None]):
+        self.on_output = on_output
+
+    def write(self, text: str) -> int:
+        if text:
+            self.on_output(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
 def ping_host(
     host: str,
     count: int = 4,
     timeout: int = 1,
+    on_output: Callable[[str], None] | None = None,
 ) -> tuple[str, str]:
     """
     Выполняет ping до указанного хоста.
@@ -220,39 +370,181 @@ def ping_host(
     host (str): IP или доменное имя.
     count (int): Количество пакетов.
     timeout (int): Таймаут ожидания ответа (секунды).
+    on_output (Callable | None): Получает ответы по мере прихода.
 
 
     Returns:
     tuple[str, str]: (результат команды, статус: "ok", "warn" или "danger").
     """
     try:
-        result = ping(host, count=count, timeout=timeout)
+        address = resolver.resolve(host, socket.AF_INET)
+        if on_output is not None:
+            result = ping(
+                address,
+                count=count,
+                timeout=timeout,
+                verbose=True,
+                out=_OutputStream(on_output),
+            )
+        else:
+            result = ping(address, count=count, timeout=timeout)
         status = "warn" if result.stats_packets_lost >= (count // 2) else "ok"
         return result, status
     except OSError as e:
         return f"Ошибка сети: {e}", "danger"
 
 
+def _resolve_sweep_target(name: str) -> tuple[str, str | None]:
+    """
+    Разрешает элемент sweep в IPv4-адрес.
+
+    Returns:
+        tuple[str, str | None]: ("ok", адрес); ("ipv6", None), если
+        у узла есть только IPv6-адреса (sweep работает по ICMPv4);
+        ("unresolved", None), если имя не разрешается.
+    """
+    try:
+        if ipaddress.ip_address(name).version == 6:
+            return "ipv6", None
+    except ValueError:
+        pass
+    try:
+        return "ok", resolver.resolve(name, socket.AF_INET)
+    except OSError:
+        pass
+    try:
+        resolver.resolve(name, socket.AF_INET6)
+        return "ipv6", None
+    except OSError:
+        return "unresolved", None
+
+
+def sweep_hosts(
+    target: str,
+    count: int = 1,
+    timeout: float = 1,
+) -> tuple[str, str]:
+    """
+    Опрашивает ping'ом диапазон, подсеть или список узлов
+    одновременно через один ICMP-сокет. Имена разрешаются
+    параллельно (не более BULK_MAX_WORKERS потоков); узлы только
+    с IPv6-адресами отмечаются как неподдерживаемые.
+
+
+    Args:
+    target (str): Выражение целей (см. target_expr).
+    count (int): Количество пакетов на узел.
+    timeout (float): Ожидание ответов (секунды).
+
+
+    Returns:
+    tuple[str, str]: (сводный отчёт, статус: "ok", "warn" или "danger").
+    """
+    try:
+        names = ping_sweep.expand_targets(target)
+    except ValueError as e:
+        return f"Ошибка в списке узлов: {e}", "danger"
+
+    workers = current_app.config.get("BULK_MAX_WORKERS", 16)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(names))),
+        thread_name_prefix="sweep-resolve",
+    ) as pool:
+        resolved = list(pool.map(_resolve_sweep_target, names))
+
+    addresses, unresolved, ipv6 = [], [], []
+    for name, (kind, address) in zip(names, resolved):
+        if kind == "ok":
+            addresses.append(address)
+        elif kind == "ipv6":
+            ipv6.append(name)
+        else:
+            unresolved.append(name)
+
+    try:
+        result = ping_sweep.sweep(addresses, count=count, timeout=timeout)
+    except (OSError, ValueError) as e:
+        return f"Ошибка сети: {e}", "danger"
+
+    output = ping_sweep.format_result(target, result)
+    status = ping_sweep.classify(result)
+    if ipv6:
+        output += f"\nunsupported (IPv6): {', '.join(ipv6)}"
+    if unresolved:
+        output += f"\nunresolved: {', '.join(unresolved)}"
+    if (ipv6 or unresolved) and status == "ok":
+        status = "warn"
+    return output, status
+
+
 def traceroute_host(
     host: str,
     max_hops: int = 15,
     timeout: int = 1,
     queries: int = 1,
+    on_output: Callable[[str], None] | None = None,
 ) -> tuple[str, str]:
     """
     Выполняет traceroute до указанного хоста.
 
+    На Linux используется встроенный движок с параллельными пробами,
+    на остальных платформах — системная утилита.
+
 
     Args:
     host (str): IP или доменное имя.
     max_hops (int): Максимальное количество прыжков.
     timeout (int): Таймаут ожидания (секунды).
     queries (int): Количество запросов.
+    on_output (Callable | None): Получает строки хопов по мере ответа.
 
 
     Returns:
     tuple[str, str]: (результат команды, статус: "ok", "warn" или "danger").
     """
+    try:
+        address = resolver.resolve(host)
+    except OSError as e:
+        return f"Ошибка при выполнении traceroute: {e}", "danger"
+
+    if not traceroute_engine.is_supported():
+        return _traceroute_subprocess(
+            address, max_hops, timeout, queries, on_output
+        )
+
+    def on_hop(hop):
+        on_output(traceroute_engine.format_hop(hop) + "\n")
+
+    if on_output is not None:
+        on_output(f"traceroute to {host} ({address}), {max_hops} hops max\n")
+
+    try:
+        result = traceroute_engine.trace(
+            address,
+            max_hops=max_hops,
+            timeout=timeout,
+            queries=queries,
+            on_hop=on_hop if on_output is not None else None,
+        )
+        return (
+            traceroute_engine.format_result(host, result, max_hops),
+            traceroute_engine.classify(result),
+        )
+    except Exception as e:
+        return f"Ошибка при выполнении traceroute: {e}", "danger"
+
+
+def _traceroute_subprocess(
+    host: str,
+    max_hops: int,
+    timeout: int,
+    queries: int,
+    on_output: Callable[[str], None] | None = None,
+) -> tuple[str, str]:
+    """
+    Traceroute через системную утилиту (tracert / traceroute).
+    Вывод читается построчно по мере появления.
+    """
     try:
         is_windows = sys.platform.startswith("win")
 
@@ -278,8 +570,18 @@ def traceroute_host(
             ]
         )
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        output = (result.stdout or "") + "\n" + (result.stderr or "")
+        lines = []
+        with subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        ) as proc:
+            for line in proc.stdout:
+                lines.append(line)
+                if on_output is not None:
+                    on_output(line)
+        output = "".join(lines)
 
         if is_windows:
             status = (
@@ -307,12 +609,17 @@ def nslookup(
     timeout: int = 2,
 ) -> tuple[str, str]:
     """
-    Выполняет DNS-запрос (nslookup).
+    Выполняет DNS-запрос встроенным клиентом.
+
+    Несколько типов через запятую ("A,AAAA,MX") отправляются
+    одновременно через один сокет. Для IP-адреса, как и nslookup,
+    запрашивается PTR-запись его имени в in-addr.arpa / ip6.arpa.
 
 
     Args:
-    host (str): Доменное имя.
-    qtype (str): Тип записи (A, MX, AAAA и т.д.).
+    host (str): Доменное имя или IP-адрес.
+    qtype (str): Тип записи (A, MX, AAAA и т.д.) или список через запятую
+        (для IP-адреса не используется).
     dns_server (str): DNS-сервер.
     timeout (int): Таймаут ожидания (секунды).
 
@@ -320,48 +627,33 @@ def nslookup(
     Returns:
     tuple[str, str]: (результат запроса, статус: "ok", "warn" или "danger").
     """
+    dns_server = dns_server or "8.8.8.8"
+    qtypes = [t.strip().upper() for t in qtype.split(",") if t.strip()]
+    name = host
     try:
-        cmd = ["nslookup", f"-type={qtype}", host, dns_server]
+        name = ipaddress.ip_address(host).reverse_pointer
+        qtypes = ["PTR"]
+    except ValueError:
+        pass
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
+    try:
+        results = dns_client.query(
+            name,
+            qtypes or ["A"],
+            resolver.resolve(dns_server),
             timeout=timeout,
         )
-        output = (result.stdout or "") + "\n" + (result.stderr or "")
-        lower_output = output.lower()
-
-        checks = [
-            (
-                lambda o: "timed out" in o or "no response" in o,
-                "danger",
-            ),
-            (
-                lambda o: "non-existent domain" in o or "can't find" in o,
-                "danger",
-            ),
-            (
-                lambda o: "name:" in o and "address" in o,
-                "ok",
-            ),
-        ]
-
-        status = next((s for cond, s in checks if cond(lower_output)), "warn")
-
-        return output.strip(), status
-
-    except subprocess.TimeoutExpired:
-        return (
-            f"*** Timeout: no response from DNS server {dns_server}",
-            "danger",
-        )
     except Exception as e:
         return (
             f"Error while running nslookup: {e}",
             "danger",
         )
 
+    return (
+        dns_client.format_results(name, dns_server, results),
+        dns_client.classify(results),
+    )
+
 
 def ssh_command(
     host: str,
@@ -371,6 +663,7 @@ def ssh_command(
     model: str = "cisco",
     port: int = 22,
     timeout: int = 5,
+    on_output: Callable[[str], None] | None = None,
 ) -> tuple[str, str]:
     """
     Выполняет SSH-подключение и выполнение команды.
@@ -381,78 +674,94 @@ def ssh_command(
     username (str): Имя пользователя.
     password (str): Пароль.
     command (str): Команда для выполнения.
-    model (str): Модель оборудования (для отключения paging).
+    model (str): Модель оборудования (paging и формат приглашения).
     port (int): Порт SSH.
     timeout (int): Таймаут (секунды).
+    on_output (Callable | None): Получает вывод канала по мере прихода.
 
 
     Returns:
-    tuple[str, str]: (результат выполнения, статус: "ok" или "danger").
+    tuple[str, str]: (результат выполнения, статус: "ok", "warn"
+    (приглашение не дождались) или "danger").
     """
-    try:
-        with paramiko.SSHClient() as client:
+
+    def open_session() -> SSHSession:
+        client = paramiko.SSHClient()
+        try:
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
+            resolver.connect(
                 host,
-                port=port,
-                username=username,
-                password=password,
-                timeout=timeout,
-                look_for_keys=False,
-                allow_agent=False,
+                lambda address: client.connect(
+                    address,
+                    port=port,
+                    username=username,
+                    password=password,
+                    timeout=timeout,
+                    look_for_keys=False,
+                    allow_agent=False,
+                ),
+            )
+
+            chan = client.invoke_shell()
+            matcher = PromptMatcher(model)
+            matcher.learn(read_until_prompt(chan, matcher, timeout))
+
+            for cmd in PAGING_COMMANDS.get(model.lower(), []):
+                chan.send(cmd + "\r")
+                matcher.learn(read_until_prompt(chan, matcher, timeout))
+        except Exception:
+            client.close()
+            raise
+
+        session = SSHSession(client, chan)
+        session.matcher = matcher
+        return session
+
+    session = None
+    try:
+        session = ssh_pool.acquire(
+            host, port, username, password, model, open_session
+        )
+        chan = session.channel
+
+        if session.reused:
+            # Остатки вывода от предыдущей команды в переиспользуемом shell.
+            while chan.recv_ready():
+                chan.recv(4096)
+
+        chan.send(command + "\r")
+        try:
+            buffer = read_until_prompt(
+                chan, session.matcher, timeout, on_output
             )
+        except PromptTimeoutError as e:
+            # Состояние shell неизвестно — в пул его не возвращаем.
+            ssh_pool.discard(session)
+            return extract_output(e.buffer, command, session.matcher), "warn"
 
-            with closing(client.invoke_shell()) as chan:
-                chan.settimeout(timeout)
-                time.sleep(1)
-
-                if chan.recv_ready():
-                    _ = chan.recv(4096)
-
-                match model.lower():
-                    case "linux":
-                        pass
-                    case m if m in PAGING_COMMANDS:
-                        for cmd in PAGING_COMMANDS[m]:
-                            chan.send(cmd + "\r")
-                            time.sleep(0.5)
-                            while chan.recv_ready():
-                                chan.recv(4096)
-                    case _:
-                        pass
-
-                chan.send(command + "\r")
-                buffer = ""
-                end_markers = ["#", ">", "$"]
-
-                start_time = time.time()
-                while True:
-                    if chan.recv_ready():
-                        chunk = chan.recv(4096).decode(
-                            "utf-8",
-                            errors="ignore",
-                        )
-                        buffer += chunk
-                        ends_with_marker = (
-                            buffer.strip().endswith(m) for m in end_markers
-                        )
-                        if any(ends_with_marker):
-                            break
-                    if time.time() - start_time > timeout:
-                        break
-                    time.sleep(0.1)
-
-                clean_output = ANSI_ESCAPE.sub("", buffer)
-                lines = clean_output.strip().splitlines()
-                if lines and command.split()[0] in lines[0]:
-                    lines = lines[1:]
-
-                return "\n".join(lines).strip(), "ok"
+        ssh_pool.release(session)
+        return extract_output(buffer, command, session.matcher), "ok"
 
     except Exception as e:
+        if session is not None:
+            ssh_pool.discard(session)
         return f"SSH error: {e}", "danger"
 
 
+async def _drain(reader) -> None:
+    """
+    Отбрасывает остатки вывода от предыдущей команды в переиспользуемой
+    Telnet-сессии, не дожидаясь новых данных: уже полученное read()
+    отдаёт без ожидания, а ожидание прерывает нулевой таймаут.
+    """
+    try:
+        async with asyncio.timeout(0):
+            while await reader.read(4096):
+                pass
+    except TimeoutError:
+        pass
+
+
 def telnet_command(
     host: str,
     username: str,
@@ -461,9 +770,11 @@ def telnet_command(
     model: str = "cisco",
     port: int = 23,
     timeout: int = 5,
+    on_output: Callable[[str], None] | None = None,
 ) -> tuple[str, str]:
     """
-    Выполняет Telnet-подключение и выполнение команды (async).
+    Выполняет команду по Telnet через общий фоновый event loop.
+    Авторизованные сессии переиспользуются между вызовами.
 
 
     Args:
@@ -471,58 +782,80 @@ def telnet_command(
     username (str): Имя пользователя.
     password (str): Пароль.
     command (str): Команда для выполнения.
-    model (str): Модель оборудования (зарезервировано для будущего).
+    model (str): Модель оборудования (paging и формат приглашения).
     port (int): Порт Telnet.
     timeout (int): Таймаут (секунды).
+    on_output (Callable | None): Получает вывод по мере прихода.
 
 
     Returns:
-    tuple[str, str]: (результат выполнения, статус: "ok" или "danger").
+    tuple[str, str]: (результат выполнения, статус: "ok", "warn"
+    (приглашение не дождались) или "danger").
     """
 
-    async def run_telnet():
-        async with telnetlib3.open_connection(
-            host, port=port, connect_minwait=0.5, connect_maxwait=1.0
-        ) as (reader, writer):
-            await reader.readuntil(":", timeout=timeout)
+    async def connect():
+        # Перебираем все адреса узла, как resolver.connect().
+        for i, address in enumerate(addresses, 1):
+            try:
+                return await telnetlib3.open_connection(
+                    address,
+                    port=port,
+                    connect_minwait=telnet_engine.connect_minwait,
+                    connect_maxwait=1.0,
+                )
+            except OSError:
+                if i == len(addresses):
+                    raise
+
+    async def open_session() -> TelnetSession:
+        reader, writer = await connect()
+        try:
+            await asyncio.wait_for(reader.readuntil(b":"), timeout)
             writer.write(username + "\n")
 
-            await reader.readuntil(":", timeout=timeout)
+            await asyncio.wait_for(reader.readuntil(b":"), timeout)
             writer.write(password + "\n")
 
-            match model.lower():
-                case "linux":
-                    pass
-                case m if m in PAGING_COMMANDS:
-                    for prep_cmd in PAGING_COMMANDS[m]:
-                        writer.write(prep_cmd + "\n")
-                        await asyncio.sleep(0.3)
-                case _:
-                    pass
+            matcher = PromptMatcher(model)
+            matcher.learn(await aread_until_prompt(reader, matcher, timeout))
 
-            writer.write(command + "\n")
+            for prep_cmd in PAGING_COMMANDS.get(model.lower(), []):
+                writer.write(prep_cmd + "\n")
+                matcher.learn(
+                    await aread_until_prompt(reader, matcher, timeout)
+                )
+        except BaseException:
+            writer.close()
+            raise
 
-            buffer = ""
-            while True:
-                try:
-                    chunk = await asyncio.wait_for(
-                        reader.read(1024),
-                        timeout=1,
-                    )
-                except asyncio.TimeoutError:
-                    break
-                if not chunk:
-                    break
-                buffer += chunk
-                if any(buffer.strip().endswith(m) for m in ["#", ">", "$"]):
-                    break
+        return TelnetSession(reader, writer, matcher)
+
+    async def run_telnet():
+        session = await telnet_engine.acquire(
+            host, port, username, password, model, open_session
+        )
+        try:
+            if session.reused:
+                await _drain(session.reader)
+            session.writer.write(command + "\n")
+            buffer = await aread_until_prompt(
+                session.reader, session.matcher, timeout, on_output
+            )
+        except PromptTimeoutError as e:
+            telnet_engine.discard(session)
+            return extract_output(e.buffer, command, session.matcher), "warn"
+        except BaseException:
+            telnet_engine.discard(session)
+            raise
 
-            clean_output = ANSI_ESCAPE.sub("", buffer).strip()
-            return clean_output, "ok"
+        telnet_engine.release(session)
+        return extract_output(buffer, command, session.matcher), "ok"
 
     try:
-        return asyncio.run(asyncio.wait_for(run_telnet(), timeout=timeout))
-    except asyncio.TimeoutError:
+        # Разрешаем имя в потоке запроса, чтобы не блокировать общий loop.
+        addresses = resolver.resolve_all(host)
+        return telnet_engine.run(run_telnet(), timeout=timeout)
+    except TimeoutError:
         return "Telnet error: session timeout", "danger"
     except Exception as e:
         return f"Telnet error: {e}", "danger"
@@ -535,12 +868,16 @@ def ssh_via_jumphost(
     model: str = "cisco",
     port: int = 22,
     timeout: int = 5,
+    on_output: Callable[[str], None] | None = None,
 ) -> Tuple[str, str]:
     """
-    Подключение к целевому устройству через один или несколько jump host'ов.
-    Поддерживает рекурсивную схему переходов:
+    Подключение к целевому устройству через один или несколько jump host'ов:
         localhost → jumphost1 → jumphost2 → ... → destination
 
+    Цепочка хопов строится один раз и кэшируется в tunnel_manager;
+    для каждого устройства поверх последнего хопа открывается
+    только новый канал direct-tcpip.
+
     Args:
         jump_chain (List[Dict[str, str]]): Список промежуточных хостов.
             Пример:
@@ -552,86 +889,40 @@ def ssh_via_jumphost(
             {"host": "10.0.0.10", "username": "admin", "password": "secret"}
         command (str): Команда для выполнения на конечном устройстве.
         model (str): Вендор (Cisco, Huawei и т.д.).
-        port (int): SSH порт.
+        port (int): SSH порт конечного устройства.
         timeout (int): Таймаут подключения.
+        on_output (Callable | None): Получает вывод по мере поступления.
 
     Returns:
         Tuple[str, str]: (output, status)
     """
     try:
-        current_jump = jump_chain[0]
-        jump_client = paramiko.SSHClient()
-        jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        jump_client.connect(
-            current_jump["host"],
-            port=current_jump.get("port", 22),
-            username=current_jump["username"],
-            password=current_jump["password"],
-            timeout=timeout,
+        chan = tunnel_manager.open_channel(
+            jump_chain,
+            dest["host"],
+            dest.get("port", port),
+            timeout,
         )
 
-        if len(jump_chain) > 1:
-            next_jump_chain = jump_chain[1:]
-            next_host = next_jump_chain[0]
-
-            transport = jump_client.get_transport()
-            chan = transport.open_channel(
-                "direct-tcpip",
-                (next_host["host"], next_host.get("port", 22)),
-                ("127.0.0.1", 0),
+        with paramiko.SSHClient() as dest_client:
+            dest_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            dest_client.connect(
+                dest["host"],
+                username=dest["username"],
+                password=dest["password"],
+                sock=chan,
+                timeout=timeout,
             )
 
-            with paramiko.SSHClient() as inner_client:
-                inner_client.set_missing_host_key_policy(
-                    paramiko.AutoAddPolicy()
-                )
-                inner_client.connect(
-                    next_host["host"],
-                    username=next_host["username"],
-                    password=next_host["password"],
-                    sock=chan,
-                    timeout=timeout,
-                )
-
-                return ssh_via_jumphost(
-                    next_jump_chain, dest, command, model, port, timeout
-                )
-
-        else:
-            transport = jump_client.get_transport()
-            chan = transport.open_channel(
-                "direct-tcpip",
-                (dest["host"], dest.get("port", 22)),
-                ("127.0.0.1", 0),
+            stdin, stdout, stderr = dest_client.exec_command(
+                command, timeout=timeout
             )
-
-            with paramiko.SSHClient() as dest_client:
-                dest_client.set_missing_host_key_policy(
-                    paramiko.AutoAddPolicy()
-                )
-                dest_client.connect(
-                    dest["host"],
-                    username=dest["username"],
-                    password=dest["password"],
-                    sock=chan,
-                    timeout=timeout,
-                )
-
-                stdin, stdout, stderr = dest_client.exec_command(
-                    command, timeout=timeout
-                )
-                output = stdout.read().decode("utf-8") + stderr.read().decode(
-                    "utf-8"
-                )
+            # stderr — в том же потоке, что и stdout: канал читается
+            # порциями, а не целиком через stdout.read().
+            stdout.channel.set_combine_stderr(True)
+            output = read_until_eof(stdout.channel, on_output)
 
         return output, "ok"
 
     except Exception as e:
         return f"Ошибка при подключении через jumphost: {e}", "danger"
-
-    finally:
-        try:
-            jump_client.close()
-        except Exception:
-            pass
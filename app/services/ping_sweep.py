@@ -0,0 +1,258 @@
+import ipaddress
+import os
+import selectors
+import socket
+import struct
+import time
+from typing import Dict, List
+
+from app.services import target_expr
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP_HEADER = struct.Struct("!BBHHH")
+
+PAYLOAD = b"nettools-sweep".ljust(32, b"\x00")
+
+
+def is_sweep(target: str) -> bool:
+    """
+    Определяет, задаёт ли строка несколько узлов: CIDR, диапазон
+    (10.0.0.1-10.0.0.50 или 10.0.0.1-50), список, шаблон имени
+    или группу (см. target_expr).
+
+    Args:
+        target (str): Строка из поля «Хост».
+
+    Returns:
+        bool: True, если нужен режим sweep.
+    """
+    return target_expr.is_expression(target)
+
+
+def expand_targets(target: str, limit: int | None = None) -> List[str]:
+    """
+    Разворачивает выражение целей в упорядоченный список уникальных
+    элементов (IP-адресов или имён).
+
+    Args:
+        target (str): Выражение целей (см. target_expr.parse).
+        limit (int | None): Максимальное количество узлов
+            (по умолчанию TARGET_MAX_HOSTS из конфигурации).
+
+    Returns:
+        List[str]: Адреса и имена узлов.
+
+    Raises:
+        ValueError: Некорректный элемент или превышен лимит.
+    """
+    return list(target_expr.expand(target, limit=limit))
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _open_socket() -> tuple[socket.socket, bool]:
+    """
+    Открывает ICMP-сокет: непривилегированный datagram, если разрешён
+    net.ipv4.ping_group_range, иначе raw (нужны права root/CAP_NET_RAW).
+
+    Returns:
+        tuple[socket.socket, bool]: (сокет, признак raw-сокета).
+    """
+    try:
+        sock = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP
+        )
+        return sock, False
+    except PermissionError:
+        sock = socket.socket(
+            socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP
+        )
+        return sock, True
+
+
+def _echo_request(identifier: int, sequence: int) -> bytes:
+    header = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _checksum(header + PAYLOAD)
+    header = ICMP_HEADER.pack(
+        ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence
+    )
+    return header + PAYLOAD
+
+
+def sweep(
+    addresses: List[str],
+    count: int = 1,
+    timeout: float = 1,
+) -> Dict:
+    """
+    Отправляет echo request всем адресам через один ICMP-сокет
+    и собирает ответы параллельно. Ответы сопоставляются
+    по номеру последовательности и адресу отправителя
+    (и по идентификатору для raw-сокета).
+
+    Args:
+        addresses (List[str]): IPv4-адреса.
+        count (int): Количество пакетов на узел.
+        timeout (float): Ожидание ответов после отправки (секунды).
+
+    Returns:
+        Dict: elapsed и hosts — список {"address", "sent", "received",
+              "rtts"} в порядке addresses (rtt в мс).
+    """
+    if len(addresses) * count > 0xFFFF:
+        raise ValueError("too many probes for one sweep")
+
+    started = time.perf_counter()
+    sock, raw = _open_socket()
+    # Случайный идентификатор: raw-сокет видит ответы всех sweep'ов
+    # процесса, в том числе параллельных.
+    identifier = int.from_bytes(os.urandom(2), "big")
+    hosts = [
+        {"address": address, "sent": 0, "received": 0, "rtts": []}
+        for address in addresses
+    ]
+    probes = {}
+
+    selector = selectors.DefaultSelector()
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        # Пока идёт отправка, сокет блокирующий: при заполненном
+        # буфере sendto подождёт, а не потеряет пробу.
+        sock.settimeout(timeout)
+        sequence = 0
+        for _ in range(count):
+            for host in hosts:
+                sequence += 1
+                try:
+                    sock.sendto(
+                        _echo_request(identifier, sequence),
+                        (host["address"], 0),
+                    )
+                except OSError:
+                    continue
+                probes[sequence] = (host, time.perf_counter())
+                host["sent"] += 1
+
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        deadline = time.monotonic() + timeout
+        while probes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not selector.select(remaining):
+                break
+            while True:
+                try:
+                    data, peer = sock.recvfrom(2048)
+                except (BlockingIOError, InterruptedError):
+                    break
+                received_at = time.perf_counter()
+                if raw:
+                    # raw-сокет отдаёт пакет вместе с IP-заголовком.
+                    header_size = (data[0] & 0x0F) * 4
+                    data = data[header_size:]
+                if len(data) < ICMP_HEADER.size:
+                    continue
+                icmp_type, _code, _sum, reply_id, seq = (
+                    ICMP_HEADER.unpack_from(data)
+                )
+                if icmp_type != ICMP_ECHO_REPLY:
+                    continue
+                if raw and reply_id != identifier:
+                    continue
+                probe = probes.get(seq)
+                if probe is None or probe[0]["address"] != peer[0]:
+                    continue
+                del probes[seq]
+                host, sent_at = probe
+                host["received"] += 1
+                host["rtts"].append(round((received_at - sent_at) * 1000, 3))
+    finally:
+        selector.close()
+        sock.close()
+
+    return {
+        "elapsed": round(time.perf_counter() - started, 3),
+        "hosts": hosts,
+    }
+
+
+def classify(result: Dict) -> str:
+    """
+    Определяет статус sweep.
+
+    Args:
+        result (Dict): Результат sweep().
+
+    Returns:
+        str: "ok" — ответили все узлы без потерь,
+             "warn" — часть узлов недоступна или есть потери,
+             "danger" — не ответил ни один узел.
+    """
+    hosts = result["hosts"]
+    if not any(host["received"] for host in hosts):
+        return "danger"
+    if all(host["received"] == host["sent"] > 0 for host in hosts):
+        return "ok"
+    return "warn"
+
+
+def _collapse(addresses: List[str]) -> str:
+    """
+    Сворачивает подряд идущие IPv4-адреса в диапазоны.
+    """
+    ranges = []
+    for address in addresses:
+        try:
+            value = int(ipaddress.IPv4Address(address))
+        except ValueError:
+            value = None
+        last = ranges[-1] if ranges else None
+        if last and value is not None and last[2] is not None:
+            if value == last[2] + 1:
+                last[1:] = [address, value]
+                continue
+        ranges.append([address, address, value])
+    return ", ".join(
+        first if first == last else f"{first}-{last}"
+        for first, last, _ in ranges
+    )
+
+
+def format_result(target: str, result: Dict) -> str:
+    """
+    Форматирует sweep в компактный отчёт: строка на каждый
+    ответивший узел и свёрнутый список недоступных.
+
+    Args:
+        target (str): Исходное описание целей.
+        result (Dict): Результат sweep().
+
+    Returns:
+        str: Текстовый отчёт.
+    """
+    hosts = result["hosts"]
+    alive = [host for host in hosts if host["received"]]
+    down = [host["address"] for host in hosts if not host["received"]]
+    lines = [
+        f"Sweep {target}: {len(hosts)} hosts, {len(alive)} up, "
+        f"{len(down)} down ({result['elapsed']:.2f}s)"
+    ]
+    for host in alive:
+        rtts = host["rtts"]
+        loss = 100 * (host["sent"] - host["received"]) // max(host["sent"], 1)
+        lines.append(
+            f"{host['address']:<16} {host['received']}/{host['sent']} "
+            f"loss {loss}%  rtt min/avg/max "
+            f"{min(rtts):.3f}/{sum(rtts) / len(rtts):.3f}/{max(rtts):.3f} ms"
+        )
+    if down:
+        lines.append(f"down: {_collapse(down)}")
+    return "\n".join(lines)
@@ -0,0 +1,291 @@
+import asyncio
+import re
+import socket
+import time
+from typing import Callable
+
+from app.infrastructure.output_collector import output_limits
+from app.infrastructure.redaction import redactor
+from app.services.terminal_stream import TerminalStream
+
+ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+
+_CISCO_LIKE = r"[\w.\-/:@]+(?:\([\w.\-/:]+\))?[#>]"
+
+VENDOR_PROMPTS = {
+    "cisco": _CISCO_LIKE,
+    "eltex": _CISCO_LIKE,
+    "ecorouter": _CISCO_LIKE,
+    "huawei": r"(?:<[\w.\-/:~]+>|\[[~*]?[\w.\-/:~]+\])",
+    "linux": (r"(?:\[[^\]\n]+\]|(?:[\w.\-]+@)?[\w.\-]+(?::[^\n$#]*)?) ?[$#]"),
+}
+
+GENERIC_PROMPT = "|".join(f"(?:{p})" for p in VENDOR_PROMPTS.values())
+
+HOSTNAME = re.compile(r"[<\[~*]*(?:[\w.\-]+@)?([\w.\-]+)")
+
+READ_SIZE = 4096
+
+
+class PromptTimeoutError(Exception):
+    """
+    Приглашение устройства не появилось за отведённое время.
+    """
+
+    def __init__(self, buffer: str):
+        super().__init__("prompt timeout")
+        self.buffer = buffer
+
+
+class PromptMatcher:
+    """
+    Определяет приглашение устройства в потоке вывода.
+
+    До обучения ищет приглашение по регулярному выражению вендора.
+    После learn() ожидает ровно выученное приглашение либо
+    приглашение того же хоста в другом режиме (например, config).
+    """
+
+    def __init__(self, model: str = "cisco"):
+        pattern = VENDOR_PROMPTS.get((model or "").lower(), GENERIC_PROMPT)
+        self.regex = re.compile(pattern)
+        self.prompt = None
+        self.hostname = None
+
+    @staticmethod
+    def last_line(text: str) -> str:
+        start = max(text.rfind("\n"), text.rfind("\r")) + 1
+        return ANSI_ESCAPE.sub("", text[start:]).strip()
+
+    def learn(self, text: str) -> str | None:
+        """
+        Запоминает приглашение из последней строки вывода.
+
+        Args:
+            text (str): Вывод, оканчивающийся приглашением.
+
+        Returns:
+            str | None: Выученное приглашение или None.
+        """
+        line = self.last_line(text)
+        if not self.regex.fullmatch(line):
+            return None
+        self.prompt = line
+        match = HOSTNAME.match(line)
+        self.hostname = match.group(1) if match else None
+        return line
+
+    def is_complete(self, text: str) -> bool:
+        """
+        Проверяет, оканчивается ли вывод приглашением.
+
+        Args:
+            text (str): Хвост накопленного вывода.
+
+        Returns:
+            bool: True, если устройство вернуло приглашение.
+        """
+        line = self.last_line(text)
+        if not line:
+            return False
+        if self.prompt is not None and line == self.prompt:
+            return True
+        if not self.regex.fullmatch(line):
+            return False
+        return self.hostname is None or self.hostname in line
+
+
+def _screen_tail(collector, stream: TerminalStream) -> str:
+    """
+    Хвост вывода вместе с незавершённой строкой (обычно приглашением).
+    """
+    return collector.tail + stream.tail(collector.tail_size)
+
+
+def read_until_prompt(
+    chan,
+    matcher: PromptMatcher,
+    timeout: float,
+    on_data: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Читает SSH-канал до появления приглашения.
+
+    Ожидание выполняется блокирующим recv() с таймаутом канала,
+    поэтому управление возвращается сразу после прихода данных.
+    Вывод нормализуется потоково (TerminalStream): UTF-8 на границах
+    фрагментов, ANSI-последовательности, CR и backspace. Секреты
+    удаляются (Redactor) из каждой порции завершённых строк.
+
+    Args:
+        chan: Канал paramiko (или совместимый объект).
+        matcher (PromptMatcher): Детектор приглашения.
+        timeout (float): Максимальное время ожидания (секунды).
+        on_data (Callable | None): Вызывается с нормализованным
+            текстом по мере завершения строк.
+
+    Returns:
+        str: Нормализованный вывод, включая приглашение.
+
+    Raises:
+        PromptTimeoutError: Если приглашение не появилось вовремя.
+    """
+    deadline = time.monotonic() + timeout
+    collector = output_limits.collector()
+    stream = TerminalStream()
+
+    def commit(text: str) -> None:
+        if text:
+            text = redactor.redact(text)
+            if on_data is not None:
+                on_data(text)
+            collector.append(text)
+
+    def timed_out() -> PromptTimeoutError:
+        commit(stream.flush())
+        return PromptTimeoutError(collector.getvalue())
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise timed_out()
+            chan.settimeout(remaining)
+            try:
+                data = chan.recv(READ_SIZE)
+            except socket.timeout:
+                raise timed_out()
+            if not data:
+                raise timed_out()
+            commit(stream.feed(data))
+            if matcher.is_complete(_screen_tail(collector, stream)):
+                commit(stream.flush())
+                return collector.getvalue()
+    finally:
+        collector.close()
+
+
+def read_until_eof(
+    chan,
+    on_data: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Читает канал exec-команды порциями до конца вывода.
+
+    Как и read_until_prompt(), нормализует вывод потоково
+    (TerminalStream) и удаляет секреты (Redactor) из каждой порции
+    завершённых строк; вывод не держится в памяти целиком
+    (см. OUTPUT_MAX_SIZE).
+
+    Args:
+        chan: Канал paramiko (или совместимый объект); таймаут
+            чтения — таймаут канала.
+        on_data (Callable | None): Вызывается с нормализованным
+            текстом по мере завершения строк.
+
+    Returns:
+        str: Нормализованный вывод.
+
+    Raises:
+        socket.timeout: Если данных нет дольше таймаута канала.
+    """
+    collector = output_limits.collector()
+    stream = TerminalStream()
+
+    def commit(text: str) -> None:
+        if text:
+            text = redactor.redact(text)
+            if on_data is not None:
+                on_data(text)
+            collector.append(text)
+
+    try:
+        while True:
+            data = chan.recv(READ_SIZE)
+            if not data:
+                break
+            commit(stream.feed(data))
+        commit(stream.flush())
+        return collector.getvalue()
+    finally:
+        collector.close()
+
+
+async def aread_until_prompt(
+    reader,
+    matcher: PromptMatcher,
+    timeout: float,
+    on_data: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Асинхронный аналог read_until_prompt() для telnetlib3.
+
+    Args:
+        reader: TelnetReader (или совместимый объект).
+        matcher (PromptMatcher): Детектор приглашения.
+        timeout (float): Максимальное время ожидания (секунды).
+        on_data (Callable | None): Вызывается с нормализованным
+            текстом по мере завершения строк.
+
+    Returns:
+        str: Нормализованный вывод, включая приглашение.
+
+    Raises:
+        PromptTimeoutError: Если приглашение не появилось вовремя.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    collector = output_limits.collector()
+    stream = TerminalStream()
+
+    def commit(text: str) -> None:
+        if text:
+            text = redactor.redact(text)
+            if on_data is not None:
+                on_data(text)
+            collector.append(text)
+
+    def timed_out() -> PromptTimeoutError:
+        commit(stream.flush())
+        return PromptTimeoutError(collector.getvalue())
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise timed_out()
+            try:
+                data = await asyncio.wait_for(
+                    reader.read(READ_SIZE), remaining
+                )
+            except asyncio.TimeoutError:
+                raise timed_out()
+            if not data:
+                raise timed_out()
+            commit(stream.feed(data))
+            if matcher.is_complete(_screen_tail(collector, stream)):
+                commit(stream.flush())
+                return collector.getvalue()
+    finally:
+        collector.close()
+
+
+def extract_output(buffer: str, command: str, matcher: PromptMatcher) -> str:
+    """
+    Убирает из вывода эхо команды и завершающее приглашение.
+
+    Args:
+        buffer (str): Нормализованный вывод после отправки команды
+            (результат read_until_prompt()/aread_until_prompt()).
+        command (str): Отправленная команда.
+        matcher (PromptMatcher): Детектор приглашения.
+
+    Returns:
+        str: Очищенный вывод команды.
+    """
+    lines = buffer.strip().splitlines()
+    if lines and command.split() and command.split()[0] in lines[0]:
+        lines = lines[1:]
+    if lines and matcher.is_complete(lines[-1]):
+        lines = lines[:-1]
+    return "\n".join(lines).strip()
@@ -0,0 +1,269 @@
+from datetime import datetime, timedelta, timezone
+import gzip
+import json
+import os
+import time
+from typing import Callable, Iterator, List, Mapping
+
+from app.infrastructure import db as database
+from app.infrastructure.blob_store import blob_store
+from app.interfaces.repositories import logs_repo
+from app.services.logs_service import _log_record
+
+DEFAULT_POLICY = "*"
+POLICY_KEYS = ("max_age_days", "max_rows", "max_size_mb")
+
+
+def parse_policies(raw: str | Mapping | None) -> dict:
+    """
+    Разбирает политики хранения из LOG_RETENTION.
+
+    Пример: {"*": {"max_age_days": 90},
+             "ping": {"max_age_days": 30, "max_rows": 100000},
+             "ssh": {"max_size_mb": 500}}
+    Политика "*" применяется к действиям без собственной политики.
+
+    Args:
+        raw (str | Mapping | None): JSON-строка или словарь.
+
+    Returns:
+        dict: Политики по действиям.
+
+    Raises:
+        ValueError: Некорректный JSON, неизвестный ключ или
+                    неположительное значение.
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LOG_RETENTION: {e}") from e
+    if not isinstance(raw, Mapping):
+        raise ValueError("LOG_RETENTION: ожидается объект")
+    policies = {}
+    for action, policy in raw.items():
+        if not isinstance(policy, Mapping):
+            raise ValueError(f"LOG_RETENTION[{action}]: ожидается объект")
+        unknown = set(policy) - set(POLICY_KEYS)
+        if unknown:
+            raise ValueError(
+                f"LOG_RETENTION[{action}]: неизвестные ключи "
+                f"{', '.join(sorted(unknown))}"
+            )
+        for key, value in policy.items():
+            if not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(
+                    f"LOG_RETENTION[{action}].{key}: ожидается число > 0"
+                )
+        policies[action] = dict(policy)
+    return policies
+
+
+def _bound(
+    action: str | None,
+    policy: Mapping,
+    exclude: List[str],
+    now: datetime,
+) -> tuple[datetime, int] | None:
+    # Исключающая граница (timestamp, id): удаляется всё, что старше.
+    # Из нескольких ограничений побеждает самое строгое.
+    bounds = []
+    if "max_age_days" in policy:
+        cutoff = now - timedelta(days=policy["max_age_days"])
+        bounds.append((cutoff.replace(microsecond=0), 0))
+    keys = []
+    if "max_rows" in policy:
+        keys.append(
+            logs_repo.key_after_rows(action, int(policy["max_rows"]), exclude)
+        )
+    if "max_size_mb" in policy:
+        max_bytes = int(policy["max_size_mb"] * 1024 * 1024)
+        keys.append(logs_repo.key_after_size(action, max_bytes, exclude))
+    # Строка-ключ сама подлежит удалению: граница — сразу после неё.
+    bounds.extend((key[0], key[1] + 1) for key in keys if key)
+    return max(bounds) if bounds else None
+
+
+def _archive_path(archive_dir: str, day: str) -> str:
+    return os.path.join(archive_dir, f"logs-{day}.ndjson.gz")
+
+
+def _archive(rows: List, archive_dir: str) -> None:
+    # Дописываем в файл дня новый gzip-член: gzip и zcat читают
+    # такие многочленные файлы как один поток.
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row.timestamp.date().isoformat(), []).append(row)
+    os.makedirs(archive_dir, exist_ok=True)
+    for day, day_rows in by_day.items():
+        lines = "".join(
+            json.dumps(_log_record(row), ensure_ascii=False) + "\n"
+            for row in day_rows
+        )
+        with open(_archive_path(archive_dir, day), "ab") as f:
+            with gzip.GzipFile(fileobj=f, mode="ab") as gz:
+                gz.write(lines.encode("utf-8"))
+            # Архив должен быть на диске до удаления строк из базы.
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def prune_logs(
+    policies: Mapping,
+    archive_dir: str | None = None,
+    chunk_size: int = 1000,
+    dry_run: bool = False,
+    now: datetime | None = None,
+    on_progress: Callable[[str, int], None] | None = None,
+) -> dict:
+    """
+    Удаляет логи, вышедшие за пределы политик хранения.
+
+    Удаление идёт от старых к новым пачками по chunk_size строк,
+    каждая пачка — отдельная короткая транзакция, поэтому запись
+    новых логов не блокируется надолго. Если задан archive_dir,
+    строки перед удалением дописываются в logs-YYYY-MM-DD.ndjson.gz;
+    архив пишется до удаления, так что прерванная очистка
+    не теряет данных (повторный импорт пропускает дубли).
+
+    Args:
+        policies (Mapping): Политики по действиям (см. parse_policies).
+        archive_dir (str | None): Каталог архивов; None — без архива.
+        chunk_size (int): Строк в одной транзакции.
+        dry_run (bool): Только посчитать, ничего не удалять.
+        now (datetime | None): Текущее время (UTC), для тестов.
+        on_progress (Callable | None): Вызывается как
+            on_progress(action, pruned) после каждой пачки.
+
+    Returns:
+        dict: Количество удалённых (или подлежащих удалению) строк
+              по политикам.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    explicit = [action for action in policies if action != DEFAULT_POLICY]
+    result = {}
+    for name, policy in policies.items():
+        action, exclude = (
+            (None, explicit) if name == DEFAULT_POLICY else (name, [])
+        )
+        bound = _bound(action, policy, exclude, now)
+        if bound is None:
+            result[name] = 0
+            continue
+        if dry_run:
+            result[name] = logs_repo.count_expired(action, bound, exclude)
+            continue
+        pruned = 0
+        while True:
+            rows = logs_repo.get_expired(
+                action, bound, chunk_size, exclude, full=bool(archive_dir)
+            )
+            if not rows:
+                break
+            if archive_dir:
+                _archive(rows, archive_dir)
+            logs_repo.delete_ids([row.id for row in rows])
+            pruned += len(rows)
+            if on_progress:
+                on_progress(name, pruned)
+        result[name] = pruned
+    return result
+
+
+def _read_archive(path: str) -> Iterator[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            yield record
+
+
+def import_archive(path: str, batch_size: int = 1000) -> int:
+    """
+    Загружает логи из архива (NDJSON, в т.ч. .gz, или выгрузки
+    /export/json?format=ndjson) обратно в базу с исходными ID.
+    Уже существующие записи пропускаются, импорт можно повторять.
+
+    Args:
+        path (str): Путь к файлу.
+        batch_size (int): Строк в одной транзакции.
+
+    Returns:
+        int: Количество восстановленных записей.
+    """
+    restored, batch = 0, []
+    for record in _read_archive(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            restored += logs_repo.restore_many(batch)
+            batch = []
+    if batch:
+        restored += logs_repo.restore_many(batch)
+    return restored
+
+
+def collect_blobs(
+    grace: float = 3600, batch_size: int = 500, dry_run: bool = False
+) -> dict:
+    """
+    Удаляет из BlobStore блобы, на которые не ссылается ни один лог.
+
+    Блобы моложе grace секунд не трогаются: вывод может быть уже
+    записан на диск, а строка лога — ещё в очереди LogWriter.
+
+    Args:
+        grace (float): Минимальный возраст удаляемого блоба (секунды).
+        batch_size (int): Сколько блобов проверять одним запросом.
+        dry_run (bool): Только посчитать.
+
+    Returns:
+        dict: checked, unreferenced, removed и temp_removed.
+    """
+    result = {"checked": 0, "unreferenced": 0, "removed": 0}
+    cutoff = time.time() - grace
+
+    def sweep(batch):
+        used = logs_repo.referenced_blobs(batch)
+        for digest in batch:
+            if digest in used:
+                continue
+            result["unreferenced"] += 1
+            if not dry_run and blob_store.remove(digest, older_than=cutoff):
+                result["removed"] += 1
+
+    batch = []
+    for digest, mtime in blob_store.iter_blobs():
+        if mtime >= cutoff:
+            continue
+        result["checked"] += 1
+        batch.append(digest)
+        if len(batch) >= batch_size:
+            sweep(batch)
+            batch = []
+    if batch:
+        sweep(batch)
+    result["temp_removed"] = (
+        0 if dry_run else blob_store.remove_temp_files(cutoff)
+    )
+    return result
+
+
+def vacuum(full: bool = False) -> dict:
+    """
+    Возвращает освободившееся после очистки место файловой системе
+    (см. app.infrastructure.db.vacuum).
+
+    Args:
+        full (bool): Полный VACUUM с переводом базы в режим
+                     auto_vacuum=INCREMENTAL.
+
+    Returns:
+        dict: auto_vacuum, freed_pages и page_count.
+    """
+    return database.vacuum(full=full)
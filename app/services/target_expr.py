@@ -0,0 +1,439 @@
+import bisect
+import ipaddress
+import json
+import re
+from typing import Dict, Iterator, List, Mapping
+
+from flask import current_app, has_app_context
+
+MAX_HOSTS = 4096
+
+IP_RANGE = re.compile(
+    r"^(\d{1,3}(?:\.\d{1,3}){3})\s*-\s*(\d{1,3}(?:\.\d{1,3}){3}|\d{1,3})$"
+)
+HOSTNAME = re.compile(
+    r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)(?:\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*"
+)
+# Элемент выражения: всё до запятой или пробела, кроме запятых
+# внутри [...] шаблона имени.
+TOKEN = re.compile(r"(?:\[[^\]]*\]|[^\s,\[\]])+")
+SEPARATORS = re.compile(r"[\s,]*")
+# Синтаксис выражений, которого нет в IP и именах.
+MULTI_SYNTAX = re.compile(r"[\s,/\[@]")
+BRACKET = re.compile(r"\[([^\]]*)\]")
+NUMBERS = re.compile(r"^(\d+)-(\d+)$")
+WORD = re.compile(r"^[A-Za-z0-9-]+$")
+
+
+def valid_host(target: str) -> bool:
+    """
+    Проверяет корректность IP-адреса или доменного имени.
+
+    Args:
+        target (str): IP-адрес или доменное имя.
+
+    Returns:
+        bool: True, если target корректный IP или hostname.
+    """
+    # ipaddress разбирает только строки с ":" (IPv6) или из одних
+    # чисел (IPv4) — имена не проходят через дорогое исключение.
+    if ":" in target or all(part.isdigit() for part in target.split(".")):
+        try:
+            ipaddress.ip_address(target)
+            return True
+        except ValueError:
+            return False
+
+    target = target.rstrip(".")
+    return len(target) <= 253 and HOSTNAME.fullmatch(target) is not None
+
+
+def parse_groups(raw: str | Mapping | None) -> Dict[str, str]:
+    """
+    Разбирает группы узлов из TARGET_GROUPS.
+
+    Пример: {"core": "10.0.0.1-4, core-sw[1-2]",
+             "dc1": ["@core", "10.1.0.0/24"]}
+
+    Args:
+        raw (str | Mapping | None): JSON-строка или словарь.
+
+    Returns:
+        Dict[str, str]: Выражение каждой группы.
+
+    Raises:
+        ValueError: Некорректный формат.
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"TARGET_GROUPS: {e}") from e
+    if not isinstance(raw, Mapping):
+        raise ValueError("TARGET_GROUPS: ожидается объект")
+    groups = {}
+    for name, members in raw.items():
+        if isinstance(members, list):
+            members = ", ".join(members)
+        if not isinstance(members, str):
+            raise ValueError(
+                f"TARGET_GROUPS[{name}]: ожидается строка или список"
+            )
+        groups[name] = members
+    return groups
+
+
+def init_app(app) -> None:
+    """
+    Разбирает и проверяет TARGET_GROUPS один раз при запуске:
+    ошибка в группах останавливает приложение, а не каждый запрос.
+
+    Args:
+        app: Flask-приложение.
+
+    Raises:
+        ValueError: Некорректный JSON, неизвестная группа, цикл или
+                    ошибка в выражении группы.
+    """
+    groups = parse_groups(app.config.get("TARGET_GROUPS"))
+    for name, members in groups.items():
+        try:
+            _parse(members, groups, (name,))
+        except ValueError as e:
+            raise ValueError(f"TARGET_GROUPS[{name}]: {e}") from e
+    app.config["TARGET_GROUPS"] = groups
+
+
+def _config_groups() -> Mapping:
+    # Уже разобраны init_app.
+    if not has_app_context():
+        return {}
+    return current_app.config.get("TARGET_GROUPS") or {}
+
+
+def _choices(body: str, token: str) -> List[tuple]:
+    """
+    Разбирает содержимое [...]: числа "1-20" (с нулями "01-20"
+    сохраняется ширина) и слова через запятую.
+    """
+    choices = []
+    for part in body.split(","):
+        part = part.strip()
+        match = NUMBERS.match(part)
+        if match:
+            first, last = match.groups()
+            if int(last) < int(first):
+                raise ValueError(f"invalid range in {token}")
+            width = len(first) if first.startswith("0") else 0
+            choices.append(("num", int(first), int(last), width))
+        elif WORD.match(part):
+            choices.append(("word", part))
+        else:
+            raise ValueError(f"invalid pattern {token}")
+    return choices
+
+
+def _values(choices: List[tuple]) -> Iterator[str]:
+    for choice in choices:
+        if choice[0] == "word":
+            yield choice[1]
+        else:
+            _, first, last, width = choice
+            for n in range(first, last + 1):
+                yield str(n).zfill(width)
+
+
+def _size(choices: List[tuple]) -> int:
+    return sum(1 if c[0] == "word" else c[2] - c[1] + 1 for c in choices)
+
+
+def _longest(choices: List[tuple]) -> str:
+    return max(
+        (c[1] if c[0] == "word" else str(c[2]).zfill(c[3]) for c in choices),
+        key=len,
+    )
+
+
+def _pattern(token: str) -> tuple:
+    parts, position = [], 0
+    for match in BRACKET.finditer(token):
+        start = match.start()
+        parts.append(token[position:start])
+        parts.append(_choices(match.group(1), token))
+        position = match.end()
+    parts.append(token[position:])
+    # Проверяются крайние варианты: первый и самый длинный.
+    first = "".join(
+        p if isinstance(p, str) else next(_values(p)) for p in parts
+    )
+    longest = "".join(p if isinstance(p, str) else _longest(p) for p in parts)
+    if not valid_host(first) or not valid_host(longest):
+        raise ValueError(f"invalid pattern {token}")
+    return ("pattern", parts)
+
+
+def _parse_token(token: str, groups, stack: tuple) -> List[tuple]:
+    if token.startswith("@"):
+        name = token[1:]
+        if name not in groups:
+            raise ValueError(f"unknown group {name}")
+        if name in stack:
+            raise ValueError(f"group {name} includes itself")
+        return _parse(groups[name], groups, stack + (name,))
+    if "[" in token:
+        return [_pattern(token)]
+    if "/" in token:
+        network = ipaddress.ip_network(token, strict=False)
+        first, last = int(network.network_address), int(network[-1])
+        # Как network.hosts(): без адреса сети и broadcast (IPv4)
+        # и без anycast-адреса маршрутизатора подсети (IPv6).
+        if network.version == 4 and network.prefixlen < 31:
+            first, last = first + 1, last - 1
+        elif network.version == 6 and network.prefixlen < 127:
+            first += 1
+        return [("ip", network.version, first, last)]
+    match = IP_RANGE.match(token)
+    if match:
+        first = ipaddress.IPv4Address(match.group(1))
+        last_part = match.group(2)
+        if "." not in last_part:
+            last_part = match.group(1).rsplit(".", 1)[0] + "." + last_part
+        last = ipaddress.IPv4Address(last_part)
+        if last < first:
+            raise ValueError(f"invalid range {token}")
+        return [("ip", 4, int(first), int(last))]
+    try:
+        address = ipaddress.ip_address(token)
+        return [("ip", address.version, int(address), int(address))]
+    except ValueError:
+        pass
+    if not valid_host(token):
+        raise ValueError(f"invalid host {token}")
+    return [("name", token)]
+
+
+def _parse(expression: str, groups, stack: tuple = ()) -> List[tuple]:
+    expression = expression or ""
+    items, position = [], 0
+    for match in TOKEN.finditer(expression):
+        start = match.start()
+        gap = expression[position:start]
+        if not SEPARATORS.fullmatch(gap):
+            raise ValueError(f"unexpected {gap.strip()!r}")
+        items.extend(_parse_token(match.group(), groups, stack))
+        position = match.end()
+    if not SEPARATORS.fullmatch(expression[position:]):
+        raise ValueError(f"unexpected {expression[position:].strip()!r}")
+    return items
+
+
+def parse(expression: str, groups: Mapping | None = None) -> List[tuple]:
+    """
+    Разбирает выражение целей без разворачивания в адреса.
+
+    Элементы через запятую или пробел: IP, CIDR (10.0.0.0/24),
+    диапазон (10.0.0.1-10.0.0.50 или 10.0.0.1-50), имя, шаблон имени
+    (sw[01-24].dc1, core-[a,b]) и группа (@core из TARGET_GROUPS).
+
+    Args:
+        expression (str): Выражение.
+        groups (Mapping | None): Группы, как в TARGET_GROUPS
+            (по умолчанию из конфигурации). Нужны только выражениям
+            с @группой.
+
+    Returns:
+        List[tuple]: Элементы ("ip", версия, первый, последний),
+                     ("name", имя) и ("pattern", части).
+
+    Raises:
+        ValueError: Некорректный элемент или неизвестная группа.
+    """
+    if "@" not in (expression or ""):
+        groups = {}
+    elif groups is None:
+        groups = _config_groups()
+    else:
+        groups = parse_groups(groups)
+    return _parse(expression, groups)
+
+
+def _merge(intervals: Dict[int, List[tuple]]) -> int:
+    total = 0
+    for spans in intervals.values():
+        end = -1
+        for first, last in sorted(spans):
+            if last > end:
+                total += last - max(first, end + 1) + 1
+                end = last
+    return total
+
+
+def _count(items: List[tuple], limit: int | None) -> int:
+    intervals: Dict[int, List[tuple]] = {}
+    names, total = set(), 0
+    for item in items:
+        if item[0] == "ip":
+            intervals.setdefault(item[1], []).append(item[2:])
+        elif item[0] == "name":
+            names.add(item[1])
+        else:
+            size = 1
+            for part in item[1]:
+                if not isinstance(part, str):
+                    size *= _size(part)
+            total += size
+    total += len(names) + _merge(intervals)
+    if limit is not None and total > limit:
+        raise ValueError(f"limited to {limit} hosts")
+    return total
+
+
+def count(
+    expression: str,
+    groups: Mapping | None = None,
+    limit: int | None = None,
+) -> int:
+    """
+    Считает узлы выражения, не разворачивая его. Пересекающиеся
+    адреса учитываются один раз; имена из шаблонов — с повторами,
+    поэтому для них это оценка сверху.
+
+    Args:
+        expression (str): Выражение (как у parse).
+        groups (Mapping | None): Группы (по умолчанию из конфигурации).
+        limit (int | None): Максимальное количество узлов.
+
+    Returns:
+        int: Количество узлов.
+
+    Raises:
+        ValueError: Некорректное выражение или превышен лимит.
+    """
+    return _count(parse(expression, groups), limit)
+
+
+def is_expression(expression: str) -> bool:
+    """
+    Определяет, задаёт ли строка выражение (список, подсеть, диапазон,
+    шаблон или группу), а не один IP или имя.
+
+    Args:
+        expression (str): Строка из поля «Хост».
+
+    Returns:
+        bool: True, если строку нужно разворачивать через expand().
+    """
+    text = (expression or "").strip()
+    return bool(MULTI_SYNTAX.search(text) or IP_RANGE.match(text))
+
+
+def max_hosts() -> int:
+    """
+    Возвращает лимит узлов в одном выражении (TARGET_MAX_HOSTS).
+    """
+    if not has_app_context():
+        return MAX_HOSTS
+    return current_app.config.get("TARGET_MAX_HOSTS", MAX_HOSTS)
+
+
+class _Seen:
+    """
+    Уже выданные узлы: адреса — отсортированными непересекающимися
+    интервалами (память не зависит от размера диапазонов), имена —
+    множеством.
+    """
+
+    def __init__(self):
+        self.intervals: Dict[int, List[List[int]]] = {}
+        self.names = set()
+
+    def new_spans(self, version: int, first: int, last: int) -> List[tuple]:
+        """
+        Возвращает части [first, last], которые ещё не выдавались,
+        и отмечает весь интервал выданным.
+        """
+        spans = self.intervals.setdefault(version, [])
+        index = bisect.bisect_left(spans, [first])
+        if index and spans[index - 1][1] >= first - 1:
+            index -= 1
+        new, cursor, end = [], first, index
+        while end < len(spans) and spans[end][0] <= last + 1:
+            start, stop = spans[end]
+            if start > cursor:
+                new.append((cursor, start - 1))
+            cursor = max(cursor, stop + 1)
+            end += 1
+        if cursor <= last:
+            new.append((cursor, last))
+        merged = [first, last]
+        if end > index:
+            merged = [
+                min(first, spans[index][0]),
+                max(last, spans[end - 1][1]),
+            ]
+        spans[index:end] = [merged]
+        return new
+
+
+def _combine(parts: List, prefix: str = "") -> Iterator[str]:
+    if not parts:
+        yield prefix
+        return
+    head, rest = parts[0], parts[1:]
+    if isinstance(head, str):
+        yield from _combine(rest, prefix + head)
+        return
+    for value in _values(head):
+        yield from _combine(rest, prefix + value)
+
+
+def expand(
+    expression: str,
+    groups: Mapping | None = None,
+    limit: int | None = None,
+) -> Iterator[str]:
+    """
+    Разворачивает выражение в адреса и имена по порядку без повторов.
+
+    Выражение разбирается и проверяется сразу (ошибка — до первого
+    узла), узлы создаются по одному: подсеть /16 не превращается
+    в список из 65 тысяч строк.
+
+    Args:
+        expression (str): Выражение (как у parse).
+        groups (Mapping | None): Группы (по умолчанию из конфигурации).
+        limit (int | None): Максимальное количество узлов
+            (по умолчанию TARGET_MAX_HOSTS из конфигурации).
+
+    Returns:
+        Iterator[str]: Адреса и имена узлов.
+
+    Raises:
+        ValueError: Некорректное выражение или превышен лимит.
+    """
+    items = parse(expression, groups)
+    _count(items, max_hosts() if limit is None else limit)
+    return _expand(items)
+
+
+def _ipv4(n: int) -> str:
+    # В несколько раз быстрее str(IPv4Address(n)).
+    return f"{n >> 24}.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def _expand(items: List[tuple]) -> Iterator[str]:
+    seen = _Seen()
+    for item in items:
+        if item[0] == "ip":
+            address = _ipv4 if item[1] == 4 else ipaddress.IPv6Address
+            for first, last in seen.new_spans(*item[1:]):
+                for n in range(first, last + 1):
+                    yield str(address(n))
+            continue
+        names = (item[1],) if item[0] == "name" else _combine(item[1])
+        for name in names:
+            if name not in seen.names:
+                seen.names.add(name)
+                yield name
@@ -0,0 +1,176 @@
+import codecs
+import re
+from typing import List
+
+# Полные escape-последовательности: CSI (ESC [ ... final), OSC
+# (ESC ] ... BEL | ESC \) и короткие ESC-последовательности.
+ESCAPE = (
+    r"\x1b(?:\[[0-?]*[ -/]*[@-~]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[ -/]*[0-Z\\^-~])"
+)
+# Начало последовательности, которая может продолжиться в следующем
+# фрагменте.
+INCOMPLETE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[ -/]*)")
+
+TOKEN = re.compile(
+    r"(?P<text>[^\x00-\x08\n-\x1f\x7f]+)"
+    r"|(?P<nl>\n)"
+    r"|(?P<cr>\r)"
+    r"|(?P<bs>\x08)"
+    r"|(?P<erase>\x1b\[(?P<erase_mode>[02]?)K)"
+    rf"|(?P<esc>{ESCAPE})"
+    r"|(?P<ctl>[\x00-\x07\x0b\x0c\x0e-\x1a\x1c-\x1f\x7f])"
+)
+# Символы, меняющие отрисовку строки. Проверка через «in» (memchr)
+# заметно быстрее поиска по классу символов на каждом фрагменте;
+# прочие управляющие символы в быстром пути остаются как есть.
+CONTROL = ("\x1b", "\r", "\x08", "\x07")
+
+# Незавершённая последовательность в конце фрагмента ждёт продолжения,
+# но не дольше MAX_ESCAPE символов.
+MAX_ESCAPE = 64
+
+
+class TerminalStream:
+    """
+    Потоковая нормализация вывода терминала.
+
+    Байты декодируются инкрементальным UTF-8 декодером (многобайтовый
+    символ на границе recv() не теряется), ANSI/VT100-последовательности
+    удаляются с учётом разрыва между фрагментами, а CR, backspace
+    и ESC[K применяются к текущей строке так, как их отрисовал бы
+    терминал (перерисовка «--More--», индикаторов прогресса и т.п.).
+
+    feed() возвращает завершённые строки; незавершённая (обычно
+    приглашение) доступна в pending до flush().
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)("replace")
+        self._escape = ""
+        self._line = ""
+        # Дописанные в конец строки фрагменты: длинная строка без
+        # перевода не копируется на каждом feed().
+        self._parts: List[str] = []
+        self._cursor = 0
+
+    def _join(self) -> str:
+        if self._parts:
+            self._line += "".join(self._parts)
+            self._parts = []
+        return self._line
+
+    @property
+    def pending(self) -> str:
+        """
+        Текущая незавершённая строка в том виде, как она на экране.
+        """
+        return self._join()
+
+    def tail(self, size: int) -> str:
+        """
+        Последние size символов незавершённой строки.
+
+        Args:
+            size (int): Размер хвоста.
+
+        Returns:
+            str: Хвост строки (без склейки всей строки).
+        """
+        parts, length = [], 0
+        for part in reversed(self._parts):
+            parts.append(part)
+            length += len(part)
+            if length >= size:
+                break
+        else:
+            parts.append(self._line)
+        return "".join(reversed(parts))[-size:]
+
+    def _write(self, text: str) -> None:
+        line, cursor = self._line, self._cursor
+        if cursor == len(line):
+            self._line = line + text
+        else:
+            end = cursor + len(text)
+            self._line = line[:cursor] + text + line[end:]
+        self._cursor = cursor + len(text)
+
+    def feed(self, data: bytes | str) -> str:
+        """
+        Обрабатывает очередной фрагмент.
+
+        Args:
+            data (bytes | str): Сырые байты канала или уже
+                декодированный текст (telnetlib3).
+
+        Returns:
+            str: Завершённые строки (с "\\n") с момента прошлого вызова.
+        """
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        if self._escape:
+            data, self._escape = self._escape + data, ""
+        if not data:
+            return ""
+        if "\r" in data:
+            # CR перед LF ничего не меняет в отрисовке строки.
+            data = data.replace("\r\n", "\n")
+
+        at_end = bool(self._parts) or self._cursor == len(self._line)
+        if at_end and not any(char in data for char in CONTROL):
+            # Быстрый путь: обычный текст без управляющих символов
+            # дописывается в конец строки.
+            cut = data.rfind("\n") + 1
+            if not cut:
+                self._parts.append(data)
+                self._cursor += len(data)
+                return ""
+            done = self._join() + data[:cut]
+            self._line = data[cut:]
+            self._cursor = len(self._line)
+            return done
+
+        self._join()
+        out = []
+        pos, size = 0, len(data)
+        while pos < size:
+            match = TOKEN.match(data, pos)
+            if match is None:
+                # ESC без полной последовательности: ждём продолжения,
+                # если это её начало, иначе пропускаем ESC.
+                tail = data[pos:]
+                if len(tail) < MAX_ESCAPE and INCOMPLETE.fullmatch(tail):
+                    self._escape = tail
+                    break
+                pos += 1
+                continue
+            pos = match.end()
+            kind = match.lastgroup
+            if kind == "text":
+                self._write(match.group())
+            elif kind == "nl":
+                out.append(self._line + "\n")
+                self._line, self._cursor = "", 0
+            elif kind == "cr":
+                self._cursor = 0
+            elif kind == "bs":
+                self._cursor = max(self._cursor - 1, 0)
+            elif kind == "erase" and match.group(kind + "_mode") == "2":
+                self._line, self._cursor = "", 0
+            elif kind == "erase":
+                self._line = self._line[: self._cursor]
+        return "".join(out)
+
+    def flush(self) -> str:
+        """
+        Завершает поток: возвращает остаток декодера и текущую строку.
+
+        Returns:
+            str: Незавершённая часть вывода.
+        """
+        self.feed(self._decoder.decode(b"", final=True))
+        self._escape = ""
+        line, self._line, self._cursor = self._join(), "", 0
+        return line
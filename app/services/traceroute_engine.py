@@ -0,0 +1,263 @@
+import ipaddress
+import selectors
+import socket
+import struct
+import sys
+import time
+from typing import Callable, Dict
+
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+IPV6_RECVERR = getattr(socket, "IPV6_RECVERR", 25)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+
+# (origin, type): промежуточный хоп и недоступность назначения.
+ICMP_TIME_EXCEEDED = {(SO_EE_ORIGIN_ICMP, 11), (SO_EE_ORIGIN_ICMP6, 3)}
+ICMP_UNREACHABLE = {(SO_EE_ORIGIN_ICMP, 3), (SO_EE_ORIGIN_ICMP6, 1)}
+# Port unreachable — ответ конечного узла на UDP-пробу. Остальные коды
+# (host/net/admin prohibited) шлёт маршрутизатор на пути: трассировка
+# на нём заканчивается, но узел не достигнут.
+ICMP_PORT_UNREACHABLE = {(SO_EE_ORIGIN_ICMP, 3), (SO_EE_ORIGIN_ICMP6, 4)}
+
+# Виды ответа на пробу.
+HOP = "hop"
+REACHED = "reached"
+UNREACHABLE = "unreachable"
+
+BASE_PORT = 33434
+SOCK_EXTENDED_ERR = struct.Struct("=IBBBBII")
+
+
+def is_supported() -> bool:
+    """
+    Нативный движок работает только на Linux (нужен IP_RECVERR).
+
+    Returns:
+        bool: True, если движок доступен на этой платформе.
+    """
+    return sys.platform.startswith("linux")
+
+
+def _offender(data: bytes, family: int) -> str | None:
+    """
+    Извлекает адрес узла, приславшего ICMP, из sock_extended_err.
+    """
+    offset = SOCK_EXTENDED_ERR.size
+    sockaddr = data[offset:]
+    if family == socket.AF_INET and len(sockaddr) >= 8:
+        return socket.inet_ntop(socket.AF_INET, sockaddr[4:8])
+    if family == socket.AF_INET6 and len(sockaddr) >= 24:
+        return socket.inet_ntop(socket.AF_INET6, sockaddr[8:24])
+    return None
+
+
+def _open_probe(family: int, ttl: int) -> socket.socket:
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    if family == socket.AF_INET6:
+        sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, ttl)
+    else:
+        sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+    return sock
+
+
+def _same_address(offender: str | None, address: str) -> bool:
+    try:
+        return ipaddress.ip_address(offender) == ipaddress.ip_address(address)
+    except ValueError:
+        return False
+
+
+def _read_error(sock: socket.socket, family: int, address: str):
+    """
+    Читает ICMP-ошибку из очереди ошибок сокета.
+
+    Returns:
+        tuple | None: (адрес узла, вид ответа: HOP, REACHED
+                      или UNREACHABLE)
+    """
+    try:
+        _, ancdata, _, _ = sock.recvmsg(512, 512, socket.MSG_ERRQUEUE)
+    except (BlockingIOError, InterruptedError):
+        # Ошибки нет — возможно, на порту назначения ответил UDP-сервис.
+        try:
+            _, peer = sock.recvfrom(512)
+        except OSError:
+            return None
+        return peer[0], REACHED
+    for _level, _type, data in ancdata:
+        if len(data) < SOCK_EXTENDED_ERR.size:
+            continue
+        _errno, origin, icmp_type, code, _pad, _info, _data = (
+            SOCK_EXTENDED_ERR.unpack_from(data)
+        )
+        kind = (origin, icmp_type)
+        offender = _offender(data, family)
+        if kind in ICMP_TIME_EXCEEDED:
+            return offender, HOP
+        if kind in ICMP_UNREACHABLE:
+            if (origin, code) in ICMP_PORT_UNREACHABLE or _same_address(
+                offender, address
+            ):
+                return offender, REACHED
+            return offender, UNREACHABLE
+    return None
+
+
+def trace(
+    address: str,
+    max_hops: int = 15,
+    timeout: float = 1,
+    queries: int = 1,
+    on_hop: Callable[[Dict], None] | None = None,
+) -> Dict:
+    """
+    Трассировка UDP-пробами: все TTL отправляются одновременно,
+    ответы собираются параллельно через очереди ошибок сокетов.
+
+    Ожидание заканчивается, как только ответил конечный узел
+    (или маршрутизатор сообщил о его недоступности) и все хопы
+    до него, либо по истечении timeout.
+
+    Args:
+        address (str): IP-адрес назначения.
+        max_hops (int): Максимальный TTL.
+        timeout (float): Общее время ожидания ответов (секунды).
+        queries (int): Количество проб на каждый TTL.
+        on_hop (Callable | None): Вызывается с каждым хопом по порядку
+            TTL, как только ответили все его пробы.
+
+    Returns:
+        Dict: address, reached и hops — список
+              {"ttl", "address", "rtts"} (rtt в мс или None).
+    """
+    family = socket.AF_INET6 if ":" in address else socket.AF_INET
+    selector = selectors.DefaultSelector()
+    probes = {}
+    hops = [
+        {"ttl": ttl, "address": None, "rtts": [None] * queries}
+        for ttl in range(1, max_hops + 1)
+    ]
+
+    try:
+        for ttl in range(1, max_hops + 1):
+            for query in range(queries):
+                sock = _open_probe(family, ttl)
+                port = BASE_PORT + (ttl - 1) * queries + query
+                probes[sock] = (ttl, query, time.perf_counter())
+                selector.register(sock, selectors.EVENT_READ)
+                sock.sendto(b"\x00" * 32, (address, port))
+
+        # Последний хоп: конечный узел или маршрутизатор, приславший
+        # destination unreachable.
+        final_ttl, reached = None, False
+        deadline = time.monotonic() + timeout
+        pending = set(probes)
+        reported = 0
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                sock = key.fileobj
+                if sock not in pending:
+                    continue
+                reply = _read_error(sock, family, address)
+                if reply is None:
+                    continue
+                pending.discard(sock)
+                selector.unregister(sock)
+                ttl, query, sent_at = probes[sock]
+                hop = hops[ttl - 1]
+                hop["address"] = hop["address"] or reply[0]
+                hop["rtts"][query] = round(
+                    (time.perf_counter() - sent_at) * 1000, 3
+                )
+                if reply[1] != HOP and (final_ttl is None or ttl < final_ttl):
+                    final_ttl, reached = ttl, reply[1] == REACHED
+                elif reply[1] == REACHED and ttl == final_ttl:
+                    reached = True
+
+            if final_ttl is not None:
+                # Пробы дальше последнего хопа ответа не дадут.
+                pending = {s for s in pending if probes[s][0] < final_ttl}
+
+            if on_hop is not None:
+                last = final_ttl or max_hops
+                while reported < last and None not in hops[reported]["rtts"]:
+                    on_hop(hops[reported])
+                    reported += 1
+    finally:
+        selector.close()
+        for sock in probes:
+            sock.close()
+
+    if final_ttl is not None:
+        hops = hops[:final_ttl]
+    if on_hop is not None:
+        for hop in hops[reported:]:
+            on_hop(hop)
+
+    return {
+        "address": address,
+        "reached": reached,
+        "hops": hops,
+    }
+
+
+def classify(result: Dict) -> str:
+    """
+    Определяет статус трассировки по структурированному результату.
+
+    Args:
+        result (Dict): Результат trace().
+
+    Returns:
+        str: "ok" — узел достигнут и ответили все пробы,
+             "warn" — узел достигнут, но часть проб потеряна,
+             "danger" — узел не достигнут.
+    """
+    if not result["reached"]:
+        return "danger"
+    lost = any(rtt is None for hop in result["hops"] for rtt in hop["rtts"])
+    return "warn" if lost else "ok"
+
+
+def format_hop(hop: Dict) -> str:
+    """
+    Форматирует один хоп в строку вывода traceroute.
+
+    Args:
+        hop (Dict): Элемент result["hops"].
+
+    Returns:
+        str: Строка вида " 1  10.0.0.1  0.512 ms".
+    """
+    rtts = "  ".join(
+        f"{rtt:.3f} ms" if rtt is not None else "*" for rtt in hop["rtts"]
+    )
+    if hop["address"]:
+        return f"{hop['ttl']:>2}  {hop['address']}  {rtts}"
+    return f"{hop['ttl']:>2}  {rtts}"
+
+
+def format_result(host: str, result: Dict, max_hops: int) -> str:
+    """
+    Форматирует результат в привычный вид вывода traceroute.
+
+    Args:
+        host (str): Исходное имя узла.
+        result (Dict): Результат trace().
+        max_hops (int): Максимальный TTL.
+
+    Returns:
+        str: Текстовый отчёт.
+    """
+    lines = [
+        f"traceroute to {host} ({result['address']}), {max_hops} hops max"
+    ]
+    lines.extend(format_hop(hop) for hop in result["hops"])
+    return "\n".join(lines)
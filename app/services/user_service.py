@@ -2,6 +2,7 @@ from typing import List
 
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from app.infrastructure.user_cache import CachedUser, user_cache
 from app.interfaces.repositories import user_repo
 from app.models.user import User
 
@@ -84,6 +85,45 @@ def get_user_by_id(user_id: int) -> List[User]:
     return user_repo.get_by_id(user_id)
 
 
+def load_user(user_id: str) -> CachedUser | None:
+    """
+    Возвращает пользователя для user_loader Flask-Login
+    (из кэша, без обращения к базе на каждый запрос).
+
+    Args:
+        user_id (str): ID пользователя из сессии.
+
+    Returns:
+        CachedUser | None: Пользователь, если найден, иначе None.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return user_cache.get(user_id, user_repo.get_by_id)
+
+
+def change_role(user_id: int, role: str, current_user_role: str) -> bool:
+    """
+    Меняет роль пользователя с проверкой прав доступа.
+
+    Args:
+        user_id (int): ID пользователя.
+        role (str): Новая роль ("user" или "admin").
+        current_user_role (str): Роль текущего пользователя.
+
+    Returns:
+        bool: True, если роль изменена.
+              False, если нет прав, роль неизвестна
+              или пользователь не найден.
+    """
+    if current_user_role != "admin" or role not in ("user", "admin"):
+        return False
+    changed = user_repo.update_role(user_id, role)
+    user_cache.invalidate(user_id)
+    return changed
+
+
 def delete_user(user_id: int, current_user_role: str) -> bool:
     """
     Удаляет пользователя по ID с проверкой прав доступа.
@@ -107,4 +147,6 @@ def delete_user(user_id: int, current_user_role: str) -> bool:
     if user.role == "admin":
         return False
 
-    return user_repo.delete_by_id(user_id)
+    deleted = user_repo.delete_by_id(user_id)
+    user_cache.invalidate(user_id)
+    return deleted
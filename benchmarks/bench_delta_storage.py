@@ -0,0 +1,145 @@
+"""
+Хранение периодического опроса конфигураций: полные снимки в
+хранилище блобов против дельт к снимку (DELTA_SNAPSHOT_INTERVAL).
+Каждый опрос show running-config отличается от предыдущего
+несколькими строками (размер конфигурации, описания портов).
+Выводит объём вывода (файлы блобов и колонка output), место на
+диске (блоки файловой системы и файл базы) и задержку восстановления
+вывода.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_delta_storage [хостов] [опросов]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_output_compression import _show_run
+
+HOSTS = 50
+POLLS = 100
+READS = 2000
+
+
+def _polls(hosts, polls):
+    rnd = random.Random(42)
+    configs = {
+        n: _show_run(random.Random(n), n).splitlines() for n in range(hosts)
+    }
+    for _ in range(polls):
+        for n, lines in configs.items():
+            lines[2] = (
+                f"Current configuration : {rnd.randint(9000, 30000)} bytes"
+            )
+            for _ in range(rnd.randint(0, 2)):
+                port = rnd.randrange(48)
+                lines[18 + port * 7] = (
+                    f" description {rnd.choice(['pc', 'ap', 'phone'])}-"
+                    f"{rnd.randint(1, 999)}"
+                )
+            yield {
+                "action": "ssh",
+                "host": f"10.0.0.{n}",
+                "params": {"command": "show running-config"},
+                "status": "ok",
+                "output": "\n".join(lines),
+            }
+
+
+def _usage(root):
+    # (байты файлов, занято на диске блоками файловой системы)
+    size = disk = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            stat = os.stat(os.path.join(directory, name))
+            size += stat.st_size
+            disk += stat.st_blocks * 512
+    return size, disk
+
+
+def _run(mode, hosts, polls, tmp):
+    root = os.path.join(tmp, mode + "-blobs")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = (
+        f"sqlite:///{os.path.join(tmp, mode + '.db')}"
+    )
+    os.environ["BLOB_STORE_DIR"] = root
+    os.environ["DELTA_SNAPSHOT_INTERVAL"] = (
+        "0" if mode == "snapshots" else "20"
+    )
+    from app.app import create_app
+    from app.infrastructure.extensions import db
+    from app.infrastructure.output_codec import output_codec
+    from app.services import logs_service
+
+    app = create_app()
+    with app.app_context():
+        records = list(_polls(hosts, polls))
+        count = len(records)
+        started = time.perf_counter()
+        # Пачки как у LogWriter: по одному опросу всех хостов.
+        while records:
+            batch, records = records[:hosts], records[hosts:]
+            logs_service.write_logs(batch)
+        write = time.perf_counter() - started
+        stored = db.session.execute(
+            db.text("SELECT sum(length(output)) FROM logs")
+        ).scalar()
+        db.session.remove()
+
+        rnd = random.Random(7)
+        latencies = []
+        for _ in range(READS):
+            log_id = rnd.randint(1, count)
+            output_codec._snapshots.clear()
+            started = time.perf_counter()
+            logs_service.get_log_by_id(log_id).output
+            latencies.append(time.perf_counter() - started)
+            db.session.remove()
+        db.engine.dispose()
+
+    latencies.sort()
+    blobs, disk = _usage(root)
+    return {
+        "blobs": blobs,
+        "disk": disk + os.path.getsize(os.path.join(tmp, mode + ".db")),
+        "stored": stored,
+        "write": write,
+        "p50": statistics.median(latencies) * 1e6,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else HOSTS
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else POLLS
+    os.environ["LOG_WRITER_ENABLED"] = "0"
+    raw = sum(len(r["output"].encode()) for r in _polls(hosts, polls))
+    print(
+        f"{hosts} hosts x {polls} polls, {raw / 2**20:.1f} MB of output\n\n"
+        f"{'mode':<10} {'blobs MB':>9} {'output KB':>10} {'bytes':>6} "
+        f"{'disk MB':>8} {'disk':>6} {'write s':>8} "
+        f"{'read p50':>9} {'read p99':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        base = None
+        for mode in ("snapshots", "delta"):
+            result = _run(mode, hosts, polls, tmp)
+            total = result["blobs"] + result["stored"]
+            base = base or result | {"total": total}
+            print(
+                f"{mode:<10} {result['blobs'] / 2**20:9.2f} "
+                f"{result['stored'] / 2**10:10.0f} "
+                f"{base['total'] / total:5.1f}x "
+                f"{result['disk'] / 2**20:8.2f} "
+                f"{base['disk'] / result['disk']:5.1f}x "
+                f"{result['write']:8.2f} "
+                f"{result['p50']:7.0f}us {result['p99']:7.0f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
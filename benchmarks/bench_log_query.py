@@ -0,0 +1,137 @@
+"""
+Запросы к таблице logs на 1 млн синтетических записей: план
+(EXPLAIN QUERY PLAN) и время выполнения для фильтров истории
+с индексами и генерируемыми колонками из params и без них.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_log_query [количество строк]
+"""
+
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, select, text
+
+from app.models.log import Log
+
+ROWS = 1_000_000
+BATCH = 50_000
+ACTIONS = ["ping", "traceroute", "nslookup", "ssh", "telnet"]
+STATUSES = ["ok", "ok", "ok", "warn", "danger"]
+MODELS = ["cisco", "huawei", "eltex", "linux"]
+START = datetime(2026, 1, 1)
+SINCE = datetime(2026, 12, 1)
+
+
+def _rows(count):
+    rnd = random.Random(42)
+    step = 365 * 24 * 3600 / count
+    for i in range(count):
+        action = rnd.choice(ACTIONS)
+        if action == "nslookup":
+            params = {
+                "qtype": "A",
+                "dns_server": f"10.0.0.{rnd.randint(1, 50)}",
+            }
+        elif action in ("ssh", "telnet"):
+            params = {"command": "show clock", "model": rnd.choice(MODELS)}
+        else:
+            params = {"count": 4}
+        yield {
+            "timestamp": START + timedelta(seconds=int(i * step)),
+            "action": action,
+            "host": f"192.0.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}",
+            "params": json.dumps(params),
+            "status": rnd.choice(STATUSES),
+            "output": "x" * 64,
+        }
+
+
+def _fill(engine, count):
+    table = Log.__table__
+    columns = ["timestamp", "action", "host", "params", "status", "output"]
+    insert = text(
+        f"INSERT INTO logs ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + c for c in columns)})"
+    )
+    with engine.begin() as conn:
+        table.create(conn)
+        batch = []
+        for row in _rows(count):
+            row["timestamp"] = row["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
+            batch.append(row)
+            if len(batch) == BATCH:
+                conn.execute(insert, batch)
+                batch = []
+        if batch:
+            conn.execute(insert, batch)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _queries():
+    columns = select(Log.id, Log.timestamp, Log.action, Log.host, Log.status)
+    newest = (Log.timestamp.desc(), Log.id.desc())
+    return {
+        "host": columns.where(Log.host == "192.0.7.7").order_by(*newest),
+        "action + time window": columns.where(
+            Log.action == "ssh", Log.timestamp >= SINCE
+        ).order_by(*newest),
+        "status (page)": columns.where(Log.status == "danger")
+        .order_by(*newest)
+        .limit(50),
+        "params.dns_server": columns.where(
+            Log.dns_server == "10.0.0.7"
+        ).order_by(*newest),
+        "params.model (page)": columns.where(Log.model == "huawei")
+        .order_by(*newest)
+        .limit(50),
+    }
+
+
+def _run(engine, title):
+    print(title)
+    with engine.connect() as conn:
+        for name, query in _queries().items():
+            compiled = query.compile(
+                engine, compile_kwargs={"literal_binds": True}
+            )
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}"
+            ).fetchall()
+            started = time.perf_counter()
+            rows = len(conn.execute(query).all())
+            elapsed = (time.perf_counter() - started) * 1000
+            detail = "; ".join(step[3] for step in plan)
+            print(f"  {name:<22} {rows:>7} rows {elapsed:9.1f} ms  {detail}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "logs.db")
+        engine = create_engine(f"sqlite:///{path}")
+        event.listen(
+            engine,
+            "connect",
+            lambda conn, _: conn.execute("PRAGMA cache_size=-65536"),
+        )
+        started = time.perf_counter()
+        _fill(engine, count)
+        print(f"{count} rows in {time.perf_counter() - started:.1f} s\n")
+
+        _run(engine, "with indexes:")
+        with engine.begin() as conn:
+            for index in Log.__table__.indexes:
+                conn.exec_driver_sql(f"DROP INDEX {index.name}")
+        engine.dispose()
+        _run(engine, "\nwithout indexes (primary key only):")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
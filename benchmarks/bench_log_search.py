@@ -0,0 +1,117 @@
+"""
+Полнотекстовый поиск по выводу команд (FTS5) на 1 млн логов против
+прежнего способа — LIKE по колонке output (полный просмотр таблицы).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_log_search [количество строк]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.models.log import Log
+from app.services.logs_service import _fts_query
+
+ROWS = 1_000_000
+BATCH = 50_000
+TEMPLATES = [
+    "Interface GigabitEthernet0/{a} is up, line protocol is up\n"
+    "  {b} packets input, {c} bytes, 0 no buffer",
+    "Vlan{a}  {mac}  DYNAMIC  Gi0/{b}",
+    "PING 10.{a}.{b}.{c}: 4 packets transmitted, 4 received, 0% loss",
+    " 1  10.0.{a}.1  {b}.{c} ms\n 2  172.16.{b}.1  {c}.{a} ms",
+    "Building configuration...\nhostname core-{a}\nntp server 10.0.0.{b}",
+]
+RARE = "%LINK-3-UPDOWN: Interface Gi0/{a}, changed state to down"
+MAC = "0011.2233.4455"
+QUERIES = [
+    "%LINK-3-UPDOWN",
+    MAC,
+    "DYNAMIC Gi0/7",
+    "core-17",
+    "UPDO*",
+    "packets",
+]
+
+
+def _output(rnd):
+    values = {
+        "a": rnd.randint(1, 48),
+        "b": rnd.randint(1, 999),
+        "c": rnd.randint(1, 99999),
+        "mac": "{:04x}.{:04x}.{:04x}".format(
+            *(rnd.getrandbits(16) for _ in range(3))
+        ),
+    }
+    if rnd.random() < 0.001:
+        return RARE.format(**values)
+    if rnd.random() < 0.0001:
+        return f"Vlan1  {MAC}  DYNAMIC  Gi0/1"
+    return rnd.choice(TEMPLATES).format(**values)
+
+
+def _fill(engine, count):
+    rnd = random.Random(7)
+    insert = text(
+        "INSERT INTO logs (timestamp, action, host, params, status, output) "
+        "VALUES ('2026-01-01 00:00:00', 'ssh', :host, '{}', 'ok', :output)"
+    )
+    with engine.begin() as conn:
+        Log.__table__.create(conn)
+        for start in range(0, count, BATCH):
+            conn.execute(
+                insert,
+                [
+                    {"host": f"sw{n % 500}", "output": _output(rnd)}
+                    for n in range(start, min(start + BATCH, count))
+                ],
+            )
+
+
+def _timed(conn, sql, params):
+    started = time.perf_counter()
+    rows = conn.execute(text(sql), params).all()
+    return len(rows), (time.perf_counter() - started) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'logs.db')}")
+        started = time.perf_counter()
+        _fill(engine, count)
+        print(
+            f"{count} rows (with FTS triggers) in "
+            f"{time.perf_counter() - started:.1f} s\n"
+        )
+
+        print(f"{'query':<20} {'FTS5 top 50':>18} {'LIKE top 50':>18}")
+        with engine.connect() as conn:
+            for query in QUERIES:
+                found, fts_ms = _timed(
+                    conn,
+                    "SELECT rowid, snippet(logs_fts, 0, '[', ']', '…', 16) "
+                    "FROM logs_fts WHERE logs_fts MATCH :q "
+                    "ORDER BY rank LIMIT 50",
+                    {"q": _fts_query(query)},
+                )
+                like = "%" + query.rstrip("*") + "%"
+                scanned, like_ms = _timed(
+                    conn,
+                    "SELECT id FROM logs WHERE output LIKE :q LIMIT 50",
+                    {"q": like},
+                )
+                print(
+                    f"{query:<20} {found:>4} {fts_ms:>9.1f} ms "
+                    f"{scanned:>4} {like_ms:>9.1f} ms"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
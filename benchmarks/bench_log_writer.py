@@ -0,0 +1,84 @@
+"""
+Пропускная способность записи логов в SQLite-файл: прежняя запись
+с commit на каждую строку против фонового LogWriter (пачки в одной
+транзакции). Логи создают несколько потоков, как при bulk-операциях.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_log_writer [количество логов]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+RECORDS = 5000
+THREADS = 8
+
+
+def _produce(app, create, count):
+    def worker(part):
+        with app.app_context():
+            for i in range(part):
+                create(
+                    "ping",
+                    f"10.0.{i // 250}.{i % 250}",
+                    {"count": 4},
+                    "ok",
+                    "Reply from 10.0.0.1: time=1ms\n" * 4,
+                )
+
+    threads = [
+        threading.Thread(target=worker, args=(count // THREADS,))
+        for _ in range(THREADS)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        from app.app import create_app
+        from app.infrastructure.extensions import db
+        from app.infrastructure.log_writer import log_writer
+        from app.interfaces.repositories import logs_repo
+        from app.services import logs_service
+
+        app = create_app()
+
+        log_writer.enabled = False
+        elapsed = _produce(app, logs_repo.save, count)
+        print(
+            f"commit per row     {count / elapsed:10.0f} logs/s "
+            f"({elapsed:.2f} s)"
+        )
+
+        log_writer.enabled = True
+        started = time.perf_counter()
+        enqueue = _produce(app, logs_service.create_log, count)
+        log_writer.flush()
+        elapsed = time.perf_counter() - started
+        stats = log_writer.stats()
+        print(
+            f"LogWriter          {count / elapsed:10.0f} logs/s "
+            f"({elapsed:.2f} s, enqueue {enqueue:.2f} s, "
+            f"avg batch {stats['avg_batch']})"
+        )
+        log_writer.shutdown()
+
+        with app.app_context():
+            total = db.session.execute(db.text("SELECT count(*) FROM logs"))
+            print(f"rows in table      {total.scalar()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Сбор вывода большого объёма (50 МБ): прежний цикл с конкатенацией
+строки против read_until_prompt() с OutputCollector (хвостовое окно,
+выгрузка во временный файл) и против накопителя с ограничением размера.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_output_collection
+"""
+
+import time
+import tracemalloc
+
+from app.infrastructure.output_collector import OutputCollector
+from app.services.prompt_engine import PromptMatcher, read_until_prompt
+
+CHUNK_SIZE = 4096
+TARGET_SIZE = 50 * 1024 * 1024
+LINE = b"interface GigabitEthernet0/0/1\r\n description uplink-to-core\r\n"
+
+
+class BulkChannel:
+    """Канал, мгновенно отдающий size байт конфигурации и приглашение."""
+
+    def __init__(self, size):
+        block = LINE * (CHUNK_SIZE // len(LINE) + 1)
+        self._chunk = block[:CHUNK_SIZE]
+        self._left = size
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, _size):
+        if self._left <= 0:
+            return b""
+        self._left -= CHUNK_SIZE
+        if self._left <= 0:
+            return self._chunk + b"\r\ncore-1#"
+        return self._chunk
+
+
+def legacy_read(chan):
+    """Прежний цикл: buffer += chunk и strip() по всему буферу."""
+    buffer = ""
+    while True:
+        buffer += chan.recv(CHUNK_SIZE).decode("utf-8", errors="ignore")
+        if buffer.strip().endswith("#"):
+            return buffer
+
+
+def measure(make_run):
+    """
+    Время и пиковая память (tracemalloc замедляет код, поэтому
+    время измеряется отдельным прогоном).
+    """
+    run = make_run()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+
+    run = make_run()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def capped_run():
+    collector = OutputCollector(max_size=8 * 1024 * 1024)
+    chunk = "x" * CHUNK_SIZE
+
+    def run():
+        for _ in range(TARGET_SIZE // CHUNK_SIZE):
+            collector.append(chunk)
+        collector.getvalue()
+        collector.close()
+
+    return run
+
+
+def main():
+    matcher = PromptMatcher("cisco")
+    rows = [
+        (
+            "legacy buffer +=",
+            lambda: lambda: legacy_read(BulkChannel(TARGET_SIZE)),
+        ),
+        (
+            "read_until_prompt",
+            lambda: lambda: read_until_prompt(
+                BulkChannel(TARGET_SIZE), matcher, timeout=600
+            ),
+        ),
+        ("collector, 8 MB cap", capped_run),
+    ]
+    print(f"output size: {TARGET_SIZE // 1024 // 1024} MB")
+    for name, make_run in rows:
+        elapsed, peak = measure(make_run)
+        print(f"{name:<22} {elapsed:6.2f} s   peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
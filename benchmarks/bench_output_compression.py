@@ -0,0 +1,207 @@
+"""
+Размер базы и задержка чтения при хранении вывода команд: без сжатия,
+zlib и zlib со словарём, обученным на выводе устройств. Вывод —
+синтетические show running-config / show ip route / show interfaces
+с различающимися адресами, описаниями и счётчиками.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_output_compression [количество логов]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+RECORDS = 5000
+READS = 2000
+
+
+def _show_run(rnd, n):
+    lines = [
+        "Building configuration...",
+        "",
+        f"Current configuration : {rnd.randint(9000, 30000)} bytes",
+        "!",
+        "version 15.2",
+        "service timestamps debug datetime msec",
+        "service timestamps log datetime msec",
+        "service password-encryption",
+        "!",
+        f"hostname sw-{n:04d}",
+        "!",
+        "aaa new-model",
+        "aaa authentication login default group tacacs+ local",
+        "!",
+        "spanning-tree mode rapid-pvst",
+        "spanning-tree extend system-id",
+        "!",
+    ]
+    for port in range(1, 49):
+        lines += [
+            f"interface GigabitEthernet1/0/{port}",
+            f" description {rnd.choice(['pc', 'ap', 'phone', 'prn'])}-"
+            f"{rnd.randint(1, 999)}",
+            " switchport mode access",
+            f" switchport access vlan {rnd.choice([10, 20, 30, 99])}",
+            " spanning-tree portfast",
+            " spanning-tree bpduguard enable",
+            "!",
+        ]
+    lines += [
+        "interface Vlan99",
+        f" ip address 10.{n % 250}.99.{rnd.randint(2, 250)} 255.255.255.0",
+        "!",
+        "line vty 0 4",
+        " transport input ssh",
+        "end",
+    ]
+    return "\n".join(lines)
+
+
+def _show_route(rnd, n):
+    lines = [
+        "Codes: L - local, C - connected, S - static, R - RIP, "
+        "M - mobile, B - BGP",
+        "       D - EIGRP, EX - EIGRP external, O - OSPF, "
+        "IA - OSPF inter area",
+        "",
+        "Gateway of last resort is 10.0.0.1 to network 0.0.0.0",
+        "",
+    ]
+    for _ in range(rnd.randint(100, 400)):
+        prefix = (
+            f"10.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.0/"
+            f"{rnd.choice([24, 25, 26, 30])}"
+        )
+        lines.append(
+            f"O IA     {prefix} [110/{rnd.randint(2, 200)}] via "
+            f"10.0.{rnd.randint(0, 3)}.{rnd.randint(1, 254)}, "
+            f"{rnd.randint(0, 9)}w{rnd.randint(0, 6)}d, "
+            f"TenGigabitEthernet1/1/{rnd.randint(1, 4)}"
+        )
+    return "\n".join(lines)
+
+
+def _show_interfaces(rnd, n):
+    blocks = []
+    for port in range(1, 25):
+        blocks.append(
+            f"GigabitEthernet1/0/{port} is up, line protocol is up "
+            "(connected)\n"
+            "  Hardware is Gigabit Ethernet, address is "
+            f"{rnd.randrange(16**4):04x}.{rnd.randrange(16**4):04x}."
+            f"{rnd.randrange(16**4):04x}\n"
+            "  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,\n"
+            f"     reliability 255/255, txload {rnd.randint(1, 20)}/255, "
+            f"rxload {rnd.randint(1, 20)}/255\n"
+            "  Full-duplex, 1000Mb/s, media type is 10/100/1000BaseTX\n"
+            f"  5 minute input rate {rnd.randint(0, 10**6)} bits/sec, "
+            f"{rnd.randint(0, 2000)} packets/sec\n"
+            f"     {rnd.randint(0, 10**9)} packets input, "
+            f"{rnd.randint(0, 10**11)} bytes, 0 no buffer\n"
+            f"     {rnd.randint(0, 10**9)} packets output, "
+            f"{rnd.randint(0, 10**11)} bytes, 0 underruns\n"
+            "     0 output errors, 0 collisions, 0 interface resets"
+        )
+    return "\n".join(blocks)
+
+
+def _records(count):
+    rnd = random.Random(42)
+    commands = [_show_run, _show_route, _show_interfaces]
+    for n in range(count):
+        yield {
+            "action": "ssh",
+            "host": f"10.0.{n // 250}.{n % 250}",
+            "params": {"model": "cisco"},
+            "status": "ok",
+            "output": commands[n % 3](rnd, n),
+        }
+
+
+def _run(mode, count, tmp):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = (
+        f"sqlite:///{os.path.join(tmp, mode + '.db')}"
+    )
+    os.environ["OUTPUT_COMPRESSION"] = "0" if mode == "plain" else "1"
+    from app.app import create_app
+    from app.infrastructure.extensions import db
+    from app.interfaces.repositories import logs_repo
+    from app.services import logs_service
+
+    app = create_app()
+    with app.app_context():
+        records = list(_records(count))
+        if mode == "zlib+dict":
+            # Словарь обучается на уже накопленном журнале.
+            logs_repo.save_many(records[:500])
+            logs_service.train_output_dictionary(samples=500)
+            logs_repo.compress_range(0, 500, recompress=True)
+            records = records[500:]
+        started = time.perf_counter()
+        while records:
+            batch, records = records[:500], records[500:]
+            logs_repo.save_many(batch)
+        write = time.perf_counter() - started
+        stored = db.session.execute(
+            db.text("SELECT sum(length(output)) FROM logs")
+        ).scalar()
+        db.session.remove()
+        path = os.path.join(tmp, mode + ".db")
+        size = os.path.getsize(path)
+
+        rnd = random.Random(7)
+        latencies = []
+        for _ in range(READS):
+            log_id = rnd.randint(1, count)
+            started = time.perf_counter()
+            log = logs_service.get_log_by_id(log_id)
+            log.output
+            latencies.append(time.perf_counter() - started)
+            db.session.remove()
+
+        started = time.perf_counter()
+        exported = sum(len(chunk) for chunk in logs_service.export_logs())
+        export = time.perf_counter() - started
+        db.session.remove()
+        db.engine.dispose()
+
+    latencies.sort()
+    return {
+        "size": size,
+        "stored": stored,
+        "write": write,
+        "p50": statistics.median(latencies) * 1e6,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "export": exported / export / 1e6,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    os.environ["LOG_WRITER_ENABLED"] = "0"
+    print(
+        f"{count} logs\n\n"
+        f"{'mode':<10} {'file MB':>8} {'output MB':>10} {'ratio':>6} "
+        f"{'write s':>8} {'read p50':>9} {'read p99':>9} {'export':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = None
+        for mode in ("plain", "zlib", "zlib+dict"):
+            result = _run(mode, count, tmp)
+            plain = plain or result
+            print(
+                f"{mode:<10} {result['size'] / 2**20:8.1f} "
+                f"{result['stored'] / 2**20:10.1f} "
+                f"{plain['stored'] / result['stored']:6.1f} "
+                f"{result['write']:8.2f} "
+                f"{result['p50']:7.0f}us {result['p99']:7.0f}us "
+                f"{result['export']:6.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
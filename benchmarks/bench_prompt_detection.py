@@ -0,0 +1,115 @@
+"""
+Сравнение задержки SSH-команды: фиксированные паузы против
+ожидания приглашения.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_prompt_detection
+"""
+
+import statistics
+import time
+from unittest import mock
+
+from app.services.nettools_service import ssh_command
+
+DEVICE_DELAY = 0.02
+RUNS = 5
+
+
+class SimulatedChannel:
+    """Канал устройства: каждая порция вывода приходит через DEVICE_DELAY."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self._ready_at = time.monotonic() + DEVICE_DELAY
+        self.closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_ready(self):
+        return bool(self._chunks) and time.monotonic() >= self._ready_at
+
+    def recv(self, _size):
+        delay = self._ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._ready_at = time.monotonic() + DEVICE_DELAY
+        return self._chunks.pop(0) if self._chunks else b""
+
+    def send(self, data):
+        pass
+
+    def exit_status_ready(self):
+        return False
+
+    def close(self):
+        pass
+
+
+def session_chunks():
+    return [
+        b"Welcome\r\nR1#",
+        b"terminal length 0\r\nR1#",
+        b"show clock\r\n10:00:00\r\nR1#",
+    ]
+
+
+def legacy_ssh_command(chan):
+    """Воспроизводит прежний цикл чтения с фиксированными паузами."""
+    time.sleep(1)
+    if chan.recv_ready():
+        chan.recv(4096)
+    chan.send("terminal length 0\r")
+    time.sleep(0.5)
+    while chan.recv_ready():
+        chan.recv(4096)
+    chan.send("show clock\r")
+    buffer = ""
+    while True:
+        if chan.recv_ready():
+            buffer += chan.recv(4096).decode()
+            if buffer.strip().endswith("#"):
+                break
+        time.sleep(0.1)
+    return buffer
+
+
+def measure(func):
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run_engine():
+    client = mock.MagicMock()
+    client.invoke_shell.return_value = SimulatedChannel(session_chunks())
+    with (
+        mock.patch(
+            "app.services.nettools_service.paramiko.SSHClient",
+            return_value=client,
+        ),
+        mock.patch(
+            "app.services.nettools_service.ssh_pool.max_size",
+            0,
+        ),
+    ):
+        ssh_command("192.0.2.1", "u", "p", "show clock")
+
+
+def main():
+    legacy = measure(
+        lambda: legacy_ssh_command(SimulatedChannel(session_chunks()))
+    )
+    engine = measure(run_engine)
+    print(f"device delay per chunk: {DEVICE_DELAY * 1000:.0f} ms")
+    print(f"fixed sleeps (legacy):  {legacy * 1000:8.1f} ms")
+    print(f"prompt detection:       {engine * 1000:8.1f} ms")
+    print(f"speedup:                {legacy / engine:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Скорость удаления секретов из вывода: по ключевым словам с проверкой
+только подходящих строк против одного объединённого выражения и
+отдельного выражения на каждый шаблон. Текст — синтетический
+running-config коммутатора (несколько МБ), целиком и порциями по 4 КБ
+целых строк, как его отдаёт TerminalStream.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_redaction [размер в МБ]
+"""
+
+import re
+import sys
+import time
+
+from app.infrastructure.redaction import (
+    MASK,
+    Redactor,
+    SECRET,
+    VENDOR_SECRETS,
+)
+from app.services.terminal_stream import TerminalStream
+
+SIZE_MB = 4
+CHUNK = 4096
+RUNS = 3
+
+BLOCK = """interface GigabitEthernet1/0/{n}
+ description access port {n}
+ switchport access vlan {vlan}
+ switchport mode access
+ spanning-tree portfast
+!
+"""
+SECRETS = """username admin{n} privilege 15 secret 9 $9$abc{n}$def
+snmp-server community c0mm{n} RO 10
+tacacs-server host 10.0.{n}.1 key 7 0822455D0A16
+!
+"""
+
+
+def _config(size):
+    parts, length, n = [], 0, 0
+    while length < size:
+        part = BLOCK.format(n=n % 48, vlan=n % 4000 + 1)
+        if n % 20 == 0:
+            part += SECRETS.format(n=n % 250)
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return "".join(parts)
+
+
+def _chunks(text):
+    """Порции по CHUNK символов, выровненные по концу строки."""
+    chunks, start = [], 0
+    while start < len(text):
+        end = text.find("\n", start + CHUNK)
+        end = len(text) if end < 0 else end + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def _combined():
+    regex = re.compile(
+        "(?P<prefix>" + "|".join(VENDOR_SECRETS) + f")(?:{SECRET})",
+        re.MULTILINE,
+    )
+    return lambda text: regex.sub(rf"\g<prefix>{MASK}", text)
+
+
+def _per_pattern():
+    regexes = [
+        re.compile(f"(?P<prefix>{pattern})(?:{SECRET})", re.MULTILINE)
+        for pattern in VENDOR_SECRETS
+    ]
+
+    def redact(text):
+        for regex in regexes:
+            text = regex.sub(rf"\g<prefix>{MASK}", text)
+        return text
+
+    return redact
+
+
+def _stream(text):
+    stream = TerminalStream()
+    for chunk in _chunks(text):
+        stream.feed(chunk.encode())
+    stream.flush()
+
+
+def _best(func, *args):
+    best = float("inf")
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else SIZE_MB
+    text = _config(int(size_mb * 1e6))
+    chunks = _chunks(text)
+    mb = len(text) / 1e6
+    redactor = Redactor()
+    engines = {
+        "keywords": redactor.redact,
+        "combined": _combined(),
+        "per-pattern": _per_pattern(),
+    }
+    expected = redactor.redact(text)
+    print(
+        f"config {mb:.1f} MB, {text.count(chr(10))} lines, "
+        f"{expected.count(MASK)} secrets\n\n"
+        f"{'engine':<12} {'whole':>10} {'chunks':>10}"
+    )
+    for name, redact in engines.items():
+        whole, result = _best(redact, text)
+        assert result == expected, name
+        streamed, parts = _best(lambda: [redact(c) for c in chunks])
+        assert "".join(parts) == expected, name
+        print(f"{name:<12} {mb / whole:6.1f}MB/s {mb / streamed:6.1f}MB/s")
+    stream, _ = _best(_stream, text)
+    redact, _ = _best(lambda: [redactor.redact(c) for c in chunks])
+    print(
+        f"\nTerminalStream feed {mb / stream:.1f} MB/s, "
+        f"with redaction {mb / (stream + redact):.1f} MB/s, "
+        f"{redact / len(chunks) * 1e6:.0f}us per {CHUNK // 1024} KB chunk"
+    )
+
+
+if __name__ == "__main__":
+    main()
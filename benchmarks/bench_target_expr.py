@@ -0,0 +1,104 @@
+"""
+Выражения целей: проверка имени с предкомпилированным выражением
+против компиляции на каждый вызов (прежний valid_ip) и ленивое
+разворачивание подсети /16 против списка с удалением повторов
+через словарь (прежний ping_sweep.expand_targets).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_target_expr
+"""
+
+import ipaddress
+import re
+import time
+import tracemalloc
+
+from app.services import target_expr
+
+NAMES = [
+    "core-sw1.dc1.example.net",
+    "10.20.30.40",
+    "2001:db8::1",
+    "access-sw-042.floor3.example.net",
+    "exa$mple.com",
+]
+CALLS = 200_000
+NETWORK = "10.0.0.0/16, 10.0.128.0/24"
+
+
+def _valid_ip_recompiled(target):
+    try:
+        ipaddress.ip_address(target)
+        return True
+    except ValueError:
+        pass
+    if all(part.isdigit() for part in target.split(".")):
+        return False
+    target = target.rstrip(".")
+    if len(target) > 253:
+        return False
+    label_regex = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
+    for label in target.split("."):
+        if not label_regex.match(label):
+            return False
+    return True
+
+
+def _expand_eager(expression):
+    hosts = {}
+    for item in re.split(r"[,\s]+", expression.strip()):
+        network = ipaddress.ip_network(item, strict=False)
+        for ip in network.hosts():
+            hosts[str(ip)] = None
+    return list(hosts)
+
+
+def _measure(func):
+    started = time.perf_counter()
+    hosts = iter(func())
+    first = next(hosts)
+    first_at = time.perf_counter() - started
+    total = 1 + sum(1 for _ in hosts)
+    elapsed = time.perf_counter() - started
+    # Память — отдельным проходом: tracemalloc замедляет выполнение.
+    tracemalloc.start()
+    for _ in func():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, first_at, elapsed, peak
+
+
+def main():
+    print(f"{'valid_ip':<12} {'us/call':>8}")
+    for name, func in (
+        ("recompiled", _valid_ip_recompiled),
+        ("precompiled", target_expr.valid_host),
+    ):
+        for target in NAMES:
+            assert func(target) == _valid_ip_recompiled(target), target
+        started = time.perf_counter()
+        for _ in range(CALLS // len(NAMES)):
+            for target in NAMES:
+                func(target)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<12} {elapsed / CALLS * 1e6:8.2f}")
+
+    print(
+        f"\n{NETWORK}\n"
+        f"{'expand':<12} {'hosts':>6} {'first':>9} {'total':>9} {'peak':>9}"
+    )
+    for name, func in (
+        ("eager", lambda: _expand_eager(NETWORK)),
+        ("lazy", lambda: target_expr.expand(NETWORK, limit=2**16)),
+    ):
+        first, total, first_at, elapsed, peak = _measure(func)
+        assert first == "10.0.0.1", first
+        print(
+            f"{name:<12} {total:6d} {first_at * 1e3:7.1f}ms "
+            f"{elapsed * 1e3:7.1f}ms {peak / 1024:7.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
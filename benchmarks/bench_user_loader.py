@@ -0,0 +1,97 @@
+"""
+Задержка аутентифицированных запросов /history и /connect с кэшем
+пользователей user_loader и без него (кэш сбрасывается перед каждым
+запросом).
+Журнал содержит несколько тысяч логов, база — файл SQLite.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_user_loader [запросов на страницу]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REQUESTS = 2000
+LOGS = 5000
+PAGES = ("/history", "/connect")
+MODES = ("no cache", "cache")
+
+
+def _measure(count):
+    from app.app import create_app
+    from app.infrastructure.user_cache import user_cache
+
+    app = create_app()
+    client = app.test_client()
+    client.post("/login", data={"username": "bench", "password": "bench"})
+    latencies = {(page, mode): [] for page in PAGES for mode in MODES}
+    for page in PAGES:
+        for _ in range(50):
+            client.get(page)
+        # Режимы чередуются запрос за запросом: дрейф машины
+        # одинаково влияет на оба.
+        for _ in range(count):
+            for mode in MODES:
+                if mode == "no cache":
+                    user_cache.clear()
+                started = time.perf_counter()
+                response = client.get(page)
+                latencies[page, mode].append(time.perf_counter() - started)
+                assert response.status_code == 200, response.status_code
+    return {
+        key: (
+            statistics.median(values) * 1e6,
+            sorted(values)[int(len(values) * 0.99)] * 1e6,
+        )
+        for key, values in latencies.items()
+    }
+
+
+def _prepare():
+    from app.app import create_app
+    from app.interfaces.repositories import logs_repo
+    from app.services import user_service
+
+    app = create_app()
+    with app.app_context():
+        user_service.register_user("bench", "bench", "bench")
+        logs_repo.save_many(
+            [
+                {
+                    "action": "ping",
+                    "host": f"10.0.{n // 250}.{n % 250}",
+                    "params": {},
+                    "status": "ok",
+                    "output": "Reply from 10.0.0.1: time<1ms",
+                }
+                for n in range(LOGS)
+            ]
+        )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    os.environ["LOG_WRITER_ENABLED"] = "0"
+    print(
+        f"{count} requests per page and mode\n\n"
+        f"{'page':<9} {'mode':<9} {'p50':>8} {'p99':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        _prepare()
+        result = _measure(count)
+    for page in PAGES:
+        for mode in MODES:
+            p50, p99 = result[page, mode]
+            print(f"{page:<9} {mode:<9} {p50:6.0f}us {p99:6.0f}us")
+        saved = result[page, "no cache"][0] - result[page, "cache"][0]
+        print(f"{page:<9} saved    {saved:6.0f}us p50\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Add logs query indexes and generated params columns
+
+Revision ID: 8d3a6f1e2b47
+Revises: 5c2e8d4f7a31
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3a6f1e2b47'
+down_revision = '5c2e8d4f7a31'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_logs_host_timestamp': ['host', 'timestamp'],
+    'ix_logs_action_timestamp': ['action', 'timestamp'],
+    'ix_logs_status_timestamp': ['status', 'timestamp'],
+    'ix_logs_dns_server_timestamp': ['dns_server', 'timestamp'],
+    'ix_logs_model_timestamp': ['model', 'timestamp'],
+}
+
+
+def upgrade():
+    # SQLite добавляет генерируемые колонки через ALTER TABLE только
+    # как VIRTUAL, поэтому без batch-режима (без пересоздания таблицы).
+    op.add_column('logs', sa.Column(
+        'dns_server', sa.String(length=255),
+        sa.Computed("json_extract(params, '$.dns_server')"),
+    ))
+    op.add_column('logs', sa.Column(
+        'model', sa.String(length=64),
+        sa.Computed("json_extract(params, '$.model')"),
+    ))
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'logs', columns, unique=False)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='logs')
+    op.drop_column('logs', 'model')
+    op.drop_column('logs', 'dns_server')
@@ -0,0 +1,35 @@
+"""Add full-text index over logs output
+
+Revision ID: a4f9c7e3d512
+Revises: 8d3a6f1e2b47
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f9c7e3d512'
+down_revision = '8d3a6f1e2b47'
+branch_labels = None
+depends_on = None
+
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(output, content='logs', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN INSERT INTO logs_fts(rowid, output) VALUES (new.id, new.output); END',
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, old.output); END",
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF output ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, old.output); INSERT INTO logs_fts(rowid, output) VALUES (new.id, new.output); END",
+]
+
+
+def upgrade():
+    # Существующие строки индексируются отдельно и порциями:
+    #   flask logs fts-backfill
+    for statement in FTS_DDL:
+        op.execute(statement)
+
+
+def downgrade():
+    for trigger in ('logs_fts_ai', 'logs_fts_ad', 'logs_fts_au'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS logs_fts')
@@ -0,0 +1,131 @@
+"""Compress stored command output
+
+Revision ID: c7b2e5a9f014
+Revises: a4f9c7e3d512
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+from app.infrastructure.output_codec import (
+    output_codec,
+    OutputCodec,
+    train_dictionary,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b2e5a9f014'
+down_revision = 'a4f9c7e3d512'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+SAMPLES = 2000
+TRIGGERS = ('logs_fts_ai', 'logs_fts_ad', 'logs_fts_au')
+
+# Индекс читает текст через nettools_output (сжатый вывод — BLOB).
+# Функция регистрируется OutputCodec в соединениях приложения; без
+# неё триггеры не дают ни вставить, ни удалить строку logs.
+FTS_DDL = [
+    'CREATE VIEW IF NOT EXISTS logs_text AS SELECT id, nettools_output(output) AS output FROM logs',
+    "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(output, content='logs_text', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN INSERT INTO logs_fts(rowid, output) VALUES (new.id, nettools_output(new.output)); END',
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, nettools_output(old.output)); END",
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF output ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) AND nettools_output(old.output) IS NOT nettools_output(new.output) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, nettools_output(old.output)); INSERT INTO logs_fts(rowid, output) VALUES (new.id, nettools_output(new.output)); END",
+]
+
+# Прежняя схема индекса (ревизия a4f9c7e3d512).
+PLAIN_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(output, content='logs', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN INSERT INTO logs_fts(rowid, output) VALUES (new.id, new.output); END',
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, old.output); END",
+    "CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF output ON logs WHEN EXISTS (SELECT 1 FROM logs_fts_docsize WHERE id = old.id) BEGIN INSERT INTO logs_fts(logs_fts, rowid, output) VALUES ('delete', old.id, old.output); INSERT INTO logs_fts(rowid, output) VALUES (new.id, new.output); END",
+]
+
+
+def _drop_fts():
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS logs_fts')
+
+
+def _rewrite(conn, where, convert):
+    # Перезапись вывода диапазонами по первичному ключу: в памяти
+    # не больше BATCH_SIZE строк.
+    after = 0
+    while True:
+        rows = conn.execute(sa.text(
+            f'SELECT id, output FROM logs WHERE id > :after AND {where} '
+            'ORDER BY id LIMIT :n'
+        ), {'after': after, 'n': BATCH_SIZE}).all()
+        if not rows:
+            return
+        conn.execute(
+            sa.text('UPDATE logs SET output = :output WHERE id = :id'),
+            [{'id': row.id, 'output': convert(row.output)} for row in rows],
+        )
+        after = rows[-1].id
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Индекс пересоздаётся с другим источником содержимого; без
+    # триггеров сжатие существующих строк не переиндексирует их.
+    _drop_fts()
+    op.create_table(
+        'output_dictionaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    config = current_app.config
+    if config.get('OUTPUT_COMPRESSION', True):
+        codec = OutputCodec(
+            min_size=config.get('OUTPUT_COMPRESS_MIN_SIZE', 512),
+            level=config.get('OUTPUT_COMPRESS_LEVEL', 6),
+        )
+        samples = conn.execute(sa.text(
+            'SELECT output FROM logs WHERE length(output) >= :min '
+            'ORDER BY id DESC LIMIT :n'
+        ), {'min': codec.min_size, 'n': SAMPLES}).scalars().all()
+        dictionary = train_dictionary(samples)
+        if dictionary:
+            dictionary_id = conn.execute(sa.text(
+                'INSERT INTO output_dictionaries (created_at, samples, data) '
+                'VALUES (CURRENT_TIMESTAMP, :samples, :data) RETURNING id'
+            ), {'samples': len(samples), 'data': dictionary}).scalar()
+            codec.add_dictionary(dictionary_id, dictionary)
+        _rewrite(
+            conn,
+            f"typeof(output) = 'text' AND length(output) >= {codec.min_size}",
+            codec.compress,
+        )
+
+    # Соединение миграции может быть открыто не движком приложения.
+    output_codec.register_function(conn.connection.dbapi_connection)
+    # Существующие строки индексируются отдельно и порциями:
+    #   flask logs fts-backfill
+    for statement in FTS_DDL:
+        op.execute(statement)
+
+
+def downgrade():
+    conn = op.get_bind()
+    _drop_fts()
+    op.execute('DROP VIEW IF EXISTS logs_text')
+
+    codec = OutputCodec()
+    for row in conn.execute(sa.text('SELECT id, data FROM output_dictionaries')):
+        codec.add_dictionary(row.id, row.data)
+    _rewrite(conn, "typeof(output) = 'blob'", codec.decompress)
+    op.drop_table('output_dictionaries')
+
+    # Затем: flask logs fts-backfill
+    for statement in PLAIN_FTS_DDL:
+        op.execute(statement)
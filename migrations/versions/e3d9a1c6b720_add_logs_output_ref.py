@@ -0,0 +1,68 @@
+"""Reference deduplicated output blobs from logs
+
+Revision ID: e3d9a1c6b720
+Revises: c7b2e5a9f014
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+from app.infrastructure.output_codec import output_codec, OutputCodec
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3d9a1c6b720'
+down_revision = 'c7b2e5a9f014'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+OUTPUT_REF_SQL = (
+    "CASE WHEN typeof(output) = 'blob' AND length(output) = 35 "
+    "AND substr(output, 1, 1) = x'02' "
+    "THEN lower(hex(substr(output, 4))) END"
+)
+
+
+def upgrade():
+    # Существующий вывод переносится в хранилище отдельно:
+    #   flask logs compress --recompress
+    op.add_column('logs', sa.Column(
+        'output_ref', sa.String(length=64), sa.Computed(OUTPUT_REF_SQL),
+    ))
+    op.create_index('ix_logs_output_ref', 'logs', ['output_ref'], unique=False)
+
+
+def downgrade():
+    # Вывод из хранилища возвращается в базу (сжатым, если включено);
+    # читает ссылки кодек приложения, у которого настроен BlobStore.
+    conn = op.get_bind()
+    config = current_app.config
+    inline = OutputCodec(
+        enabled=config.get('OUTPUT_COMPRESSION', True),
+        min_size=config.get('OUTPUT_COMPRESS_MIN_SIZE', 512),
+        level=config.get('OUTPUT_COMPRESS_LEVEL', 6),
+    )
+    for row in conn.execute(sa.text('SELECT id, data FROM output_dictionaries')):
+        inline.add_dictionary(row.id, row.data)
+    after = 0
+    while True:
+        rows = conn.execute(sa.text(
+            'SELECT id, output FROM logs WHERE id > :after '
+            'AND output_ref IS NOT NULL ORDER BY id LIMIT :n'
+        ), {'after': after, 'n': BATCH_SIZE}).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text('UPDATE logs SET output = :output WHERE id = :id'),
+            [
+                {'id': row.id,
+                 'output': inline.compress(output_codec.decompress(row.output))}
+                for row in rows
+            ],
+        )
+        after = rows[-1].id
+    op.drop_index('ix_logs_output_ref', table_name='logs')
+    op.drop_column('logs', 'output_ref')
@@ -0,0 +1,83 @@
+"""Delta-encode repeated command output
+
+Revision ID: f5a2d8c4b391
+Revises: e3d9a1c6b720
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.infrastructure.output_codec import output_codec
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a2d8c4b391'
+down_revision = 'e3d9a1c6b720'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+# Ссылка на снимок есть и у дельты (версия 3).
+OUTPUT_REF_SQL = (
+    "CASE WHEN typeof(output) = 'blob' AND ("
+    "(length(output) = 35 AND substr(output, 1, 1) = x'02') "
+    "OR (length(output) > 35 AND substr(output, 1, 1) = x'03')) "
+    "THEN lower(hex(substr(output, 4, 32))) END"
+)
+PREVIOUS_OUTPUT_REF_SQL = (
+    "CASE WHEN typeof(output) = 'blob' AND length(output) = 35 "
+    "AND substr(output, 1, 1) = x'02' "
+    "THEN lower(hex(substr(output, 4))) END"
+)
+
+
+def _replace_output_ref(expression):
+    # Выражение генерируемой колонки в SQLite не меняется —
+    # колонка пересоздаётся.
+    op.drop_index('ix_logs_output_ref', table_name='logs')
+    op.drop_column('logs', 'output_ref')
+    op.add_column('logs', sa.Column(
+        'output_ref', sa.String(length=64), sa.Computed(expression),
+    ))
+    op.create_index('ix_logs_output_ref', 'logs', ['output_ref'], unique=False)
+
+
+def upgrade():
+    # Уже сохранённый вывод остаётся снимками; дельтами кодируются
+    # новые запуски.
+    _replace_output_ref(OUTPUT_REF_SQL)
+    op.add_column('logs', sa.Column(
+        'command', sa.Text(), sa.Computed("json_extract(params, '$.command')"),
+    ))
+    op.create_index(
+        'ix_logs_host_command', 'logs', ['host', 'command'], unique=False
+    )
+
+
+def downgrade():
+    # Дельты заменяются ссылками на полные снимки (кодек приложения
+    # с настроенным BlobStore).
+    conn = op.get_bind()
+    after = 0
+    while True:
+        rows = conn.execute(sa.text(
+            'SELECT id, output FROM logs WHERE id > :after '
+            "AND typeof(output) = 'blob' AND substr(output, 1, 1) = x'03' "
+            'ORDER BY id LIMIT :n'
+        ), {'after': after, 'n': BATCH_SIZE}).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text('UPDATE logs SET output = :output WHERE id = :id'),
+            [
+                {'id': row.id,
+                 'output': output_codec.compress(
+                     output_codec.decompress(row.output))}
+                for row in rows
+            ],
+        )
+        after = rows[-1].id
+    op.drop_index('ix_logs_host_command', table_name='logs')
+    op.drop_column('logs', 'command')
+    _replace_output_ref(PREVIOUS_OUTPUT_REF_SQL)
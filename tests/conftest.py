@@ -5,6 +5,11 @@ import pytest
 
 from app.app import create_app
 from app.infrastructure.extensions import db
+from app.infrastructure.resolver import resolver
+from app.infrastructure.ssh_pool import ssh_pool
+from app.infrastructure.ssh_tunnels import tunnel_manager
+from app.infrastructure.telnet_engine import telnet_engine
+from app.infrastructure.user_cache import user_cache
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -32,3 +37,14 @@ def app():
 def client(app):
     """Тестовый HTTP-клиент Flask."""
     return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def clean_session_pools():
+    """Очищает пулы сессий, туннелей и кэши между тестами."""
+    yield
+    ssh_pool.close_all()
+    telnet_engine.close_all()
+    tunnel_manager.close_all()
+    resolver.clear()
+    user_cache.clear()
@@ -0,0 +1,122 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.blob_store import blob_store, BlobStore
+from app.infrastructure.extensions import db
+from app.infrastructure.output_codec import output_codec
+from app.interfaces.repositories import logs_repo
+from app.services import logs_service, retention_service
+
+
+@pytest.fixture()
+def blobs(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "min_size", 1024)
+    return blob_store
+
+
+def _config(n):
+    return "\n".join(
+        [f"hostname core-{n}"]
+        + [f"interface GigabitEthernet0/{port}\n!" for port in range(100)]
+    )
+
+
+def _files(store):
+    return sorted(digest for digest, _ in store.iter_blobs())
+
+
+def test_identical_output_is_stored_once(blobs):
+    """Одинаковый вывод хранится одним файлом, строки ссылаются на него."""
+    for _ in range(3):
+        logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _config(1))
+    logs_service.create_log("ssh", "10.0.0.2", {}, "ok", _config(2))
+    logs_service.create_log("ping", "10.0.0.3", {}, "ok", "Reply")
+
+    refs = db.session.execute(
+        text("SELECT output_ref, length(output) FROM logs ORDER BY id")
+    ).all()
+    assert len(_files(blobs)) == 2
+    assert refs[0] == refs[1] == refs[2]
+    assert refs[0][1] == 35
+    assert refs[4][0] is None
+    assert os.path.exists(blobs.path(refs[0][0]))
+
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(3).output == _config(1)
+    exported = "".join(logs_service.export_logs("ndjson"))
+    assert exported.count("hostname core-1") == 3
+    assert [r["id"] for r in logs_service.search_logs("core-2")] == [4]
+    assert blobs.stats()["dedup_hits"] == 2
+
+
+def test_gc_removes_only_unreferenced_blobs(blobs):
+    """Сборщик удаляет блобы без ссылок и не трогает свежие."""
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _config(1))
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _config(1))
+    logs_service.create_log("ssh", "10.0.0.2", {}, "ok", _config(2))
+    shared, single = (
+        db.session.execute(
+            text("SELECT output_ref FROM logs WHERE id = :id"), {"id": i}
+        ).scalar()
+        for i in (1, 3)
+    )
+
+    logs_repo.delete_ids([1, 3])
+    assert retention_service.collect_blobs(grace=3600)["checked"] == 0
+
+    result = retention_service.collect_blobs(grace=0)
+    assert result["removed"] == 1
+    assert _files(blobs) == [shared]
+    assert not os.path.exists(blobs.path(single))
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(2).output == _config(1)
+
+
+def test_recompress_moves_existing_output_to_store(app, tmp_path, monkeypatch):
+    """compress --recompress переносит вывод из базы в хранилище."""
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _config(1))
+    monkeypatch.setattr(blob_store, "root", str(tmp_path))
+    monkeypatch.setattr(blob_store, "min_size", 1024)
+
+    assert logs_service.compress_outputs(recompress=True) == 1
+    ref = db.session.execute(text("SELECT output_ref FROM logs")).scalar()
+    assert _files(blob_store) == [ref]
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(1).output == _config(1)
+
+
+def test_put_is_atomic_and_skips_existing(tmp_path):
+    """Повторная запись не вызывает produce и обновляет mtime."""
+    store = BlobStore(str(tmp_path))
+    digest = "ab" * 32
+    assert store.put(digest, lambda: b"data") is True
+    os.utime(store.path(digest), (0, 0))
+    assert store.put(digest, lambda: pytest.fail("produce called")) is False
+    assert os.stat(store.path(digest)).st_mtime > time.time() - 60
+    assert store.read(digest, bytes) == b"data"
+    assert [
+        name for name in os.listdir(os.path.dirname(store.path(digest)))
+    ] == [digest]
+
+
+def test_logs_with_missing_blob_can_be_deleted(blobs):
+    """Потерянный блоб не мешает удалить лог из базы и индекса."""
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _config(1))
+    logs_service.create_log("ssh", "10.0.0.2", {}, "ok", _config(2))
+    logs_service.create_log("ssh", "10.0.0.3", {}, "ok", _config(3))
+    for digest in _files(blobs):
+        os.remove(blobs.path(digest))
+    errors = output_codec.stats()["sql_errors"]
+
+    assert logs_service.delete_log(1)
+    pruned = retention_service.prune_logs({"ssh": {"max_rows": 1}})
+    logs_service.delete_all_logs()
+
+    assert pruned == {"ssh": 1}
+    assert db.session.execute(text("SELECT count(*) FROM logs")).scalar() == 0
+    assert logs_service.search_logs("core") == []
+    assert output_codec.stats()["sql_errors"] > errors
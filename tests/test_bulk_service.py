@@ -0,0 +1,58 @@
+import time
+
+from app.services import bulk_service
+
+
+def test_parse_targets_applies_defaults():
+    """Пустые поля строки берутся из значений по умолчанию."""
+    targets = bulk_service.parse_targets(
+        "10.0.0.1\n\n# comment\n10.0.0.2,root,pw,huawei\n",
+        defaults={"username": "admin", "password": "secret", "model": "cisco"},
+    )
+    assert targets == [
+        {
+            "host": "10.0.0.1",
+            "username": "admin",
+            "password": "secret",
+            "model": "cisco",
+        },
+        {
+            "host": "10.0.0.2",
+            "username": "root",
+            "password": "pw",
+            "model": "huawei",
+        },
+    ]
+
+
+def test_run_bulk_is_concurrent_and_isolates_failures(app, monkeypatch):
+    """Время пакета определяется параллелизмом, а ошибка хоста изолирована."""
+
+    def fake_run_connect(protocol, **kwargs):
+        time.sleep(0.2)
+        if kwargs["host"] == "10.0.0.3":
+            raise RuntimeError("boom")
+        return f"{kwargs['host']}: {kwargs['command']}", "ok"
+
+    monkeypatch.setattr(
+        bulk_service.nettools_service, "run_connect", fake_run_connect
+    )
+    targets = [
+        {"host": f"10.0.0.{i}", "username": "u", "password": "p"}
+        for i in range(1, 9)
+    ]
+
+    with app.app_context():
+        batch = bulk_service.run_bulk(
+            "ssh", targets, ["show version"], max_workers=8
+        )
+
+    assert batch["elapsed"] < 0.2 * 4
+    hosts = [item["host"] for item in batch["results"]]
+    assert hosts == [t["host"] for t in targets]
+    failed = batch["results"][2]
+    assert failed["status"] == "danger"
+    assert failed["results"][0]["output"] == "Bulk error: boom"
+    assert batch["results"][0]["results"][0]["output"] == (
+        "10.0.0.1: show version"
+    )
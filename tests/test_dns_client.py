@@ -0,0 +1,207 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from app.services import dns_client
+from app.services.nettools_service import nslookup
+
+LONG_TXT = "v=spf1 " + "include:example.test " * 30
+
+
+def _rr(rtype, ttl, rdata):
+    """Запись ответа с указателем на имя из вопроса (смещение 12)."""
+    return struct.pack("!HHHIH", 0xC00C, rtype, 1, ttl, len(rdata)) + rdata
+
+
+def _txt(text):
+    raw = text.encode()
+    chunks = [raw[i:][:255] for i in range(0, len(raw), 255)]
+    return b"".join(bytes([len(chunk)]) + chunk for chunk in chunks)
+
+
+ZONE = {
+    ("example.test.", 1): [_rr(1, 300, socket.inet_aton("192.0.2.10"))],
+    ("example.test.", 28): [
+        _rr(28, 60, socket.inet_pton(socket.AF_INET6, "2001:db8::10"))
+    ],
+    ("example.test.", 15): [
+        _rr(15, 3600, struct.pack("!H", 10) + b"\x02mx\xc0\x0c")
+    ],
+    ("example.test.", 16): [_rr(16, 120, _txt(LONG_TXT))],
+    ("10.2.0.192.in-addr.arpa.", 12): [
+        _rr(12, 300, b"\x04host\x07example\x04test\x00")
+    ],
+}
+
+
+def _answer(query, tcp=False):
+    """Формирует ответ заглушки на запрос."""
+    qid, _flags = struct.unpack_from("!HH", query)
+    qname, offset = dns_client.decode_name(query, 12)
+    qtype = struct.unpack_from("!H", query, offset)[0]
+    question = query[12:][: offset - 8]
+    records = ZONE.get((qname.lower(), qtype))
+    rcode = 0 if records is not None or qname == "example.test." else 3
+    records = records or []
+    truncated = not tcp and sum(len(r) for r in records) > 512
+    flags = 0x8180 | rcode | (0x0200 if truncated else 0)
+    if truncated:
+        records = []
+    header = struct.pack("!HHHHHH", qid, flags, 1, len(records), 0, 0)
+    return header + question + b"".join(records)
+
+
+@pytest.fixture()
+def stub_dns():
+    """Локальный DNS-сервер (UDP + TCP) на случайном порту."""
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(("127.0.0.1", 0))
+    port = udp.getsockname()[1]
+    tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp.bind(("127.0.0.1", port))
+    tcp.listen()
+    stats = {"udp": 0, "tcp": 0}
+
+    def serve_udp():
+        while True:
+            try:
+                data, peer = udp.recvfrom(4096)
+            except OSError:
+                return
+            stats["udp"] += 1
+            udp.sendto(_answer(data), peer)
+
+    def serve_tcp():
+        while True:
+            try:
+                conn, _ = tcp.accept()
+            except OSError:
+                return
+            with conn:
+                buffer = b""
+                while True:
+                    try:
+                        chunk = conn.recv(4096)
+                    except OSError:
+                        break
+                    if not chunk:
+                        break
+                    buffer += chunk
+                    while len(buffer) >= 2:
+                        (size,) = struct.unpack_from("!H", buffer)
+                        if len(buffer) < 2 + size:
+                            break
+                        frame, buffer = buffer[2:], b""
+                        query, buffer = frame[:size], frame[size:]
+                        stats["tcp"] += 1
+                        reply = _answer(query, tcp=True)
+                        conn.sendall(struct.pack("!H", len(reply)) + reply)
+
+    for target in (serve_udp, serve_tcp):
+        threading.Thread(target=target, daemon=True).start()
+    yield port, stats
+    udp.close()
+    tcp.close()
+
+
+def test_query_pipelines_several_qtypes(stub_dns):
+    """Несколько типов записей запрашиваются одновременно с TTL."""
+    port, stats = stub_dns
+    results = dns_client.query(
+        "example.test", ["A", "AAAA", "MX"], "127.0.0.1", port=port
+    )
+
+    assert results["A"]["answers"][0]["data"] == "192.0.2.10"
+    assert results["A"]["answers"][0]["ttl"] == 300
+    assert results["AAAA"]["answers"][0]["data"] == "2001:db8::10"
+    assert results["MX"]["answers"][0]["data"] == "10 mx.example.test."
+    assert stats == {"udp": 3, "tcp": 0}
+    assert dns_client.classify(results) == "ok"
+
+
+def test_truncated_answer_falls_back_to_tcp(stub_dns):
+    """Усечённый UDP-ответ повторяется по TCP."""
+    port, stats = stub_dns
+    results = dns_client.query("example.test", ["TXT"], "127.0.0.1", port)
+
+    assert results["TXT"]["answers"][0]["data"].replace('" "', "") == (
+        f'"{LONG_TXT}"'
+    )
+    assert stats["tcp"] == 1
+
+
+def test_tcp_fallback_error_keeps_udp_answers(stub_dns, monkeypatch):
+    """Ошибка TCP помечает только усечённые типы, ответы UDP остаются."""
+    port, stats = stub_dns
+
+    def reset(sock, size):
+        raise ConnectionResetError("connection reset by peer")
+
+    monkeypatch.setattr(dns_client, "_recv_exact", reset)
+    results = dns_client.query(
+        "example.test", ["A", "TXT"], "127.0.0.1", port=port
+    )
+
+    assert results["A"]["answers"][0]["data"] == "192.0.2.10"
+    assert results["TXT"]["rcode"] == "TCP ERROR"
+    assert dns_client.classify(results) == "warn"
+    report = dns_client.format_results("example.test", "127.0.0.1", results)
+    assert "TXT\t*** Truncated answer, TCP retry failed: connection reset" in (
+        report
+    )
+
+
+def test_rcode_classification(stub_dns):
+    """NXDOMAIN — danger, NODATA — warn."""
+    port, _ = stub_dns
+    missing = dns_client.query("nope.test", ["A"], "127.0.0.1", port)
+    nodata = dns_client.query("example.test", ["SRV"], "127.0.0.1", port)
+
+    assert missing["A"]["rcode"] == "NXDOMAIN"
+    assert dns_client.classify(missing) == "danger"
+    assert dns_client.classify(nodata) == "warn"
+
+
+def test_nslookup_timeout(monkeypatch):
+    """Если сервер молчит, статус danger и понятное сообщение."""
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(("127.0.0.1", 0))
+    monkeypatch.setattr(dns_client, "DNS_PORT", silent.getsockname()[1])
+
+    output, status = nslookup("example.test", "A,MX", "127.0.0.1", 0.2)
+    silent.close()
+
+    assert status == "danger"
+    assert "Timeout: no response from DNS server 127.0.0.1" in output
+
+
+def test_nslookup_ip_queries_ptr(stub_dns, monkeypatch):
+    """Для IP-адреса запрашивается PTR его обратного имени."""
+    port, stats = stub_dns
+    monkeypatch.setattr(dns_client, "DNS_PORT", port)
+
+    output, status = nslookup("192.0.2.10", "A,MX", "127.0.0.1")
+
+    assert status == "ok"
+    assert "Name:\t10.2.0.192.in-addr.arpa" in output
+    assert "PTR\t" in output and "host.example.test." in output
+    assert stats["udp"] == 1
+
+
+def test_index_sends_several_qtypes(client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(
+        "app.services.jobs_service.submit_command",
+        lambda action, **kwargs: submitted.append(kwargs["qtype"]) or "job",
+    )
+    client.post(
+        "/",
+        data={
+            "action": "nslookup",
+            "host": "example.test",
+            "ns_type": ["A", "MX"],
+        },
+    )
+    assert submitted == ["A,MX"]
@@ -0,0 +1,254 @@
+from datetime import datetime
+import json
+import threading
+import time
+from unittest import mock
+
+from app.app import create_app
+from app.infrastructure.extensions import db
+from app.infrastructure.job_queue import JobQueue, JobStream, SKIPPED_MARKER
+from app.interfaces.repositories import jobs_repo
+from app.models.job import Job
+from app.services import jobs_service, logs_service
+
+
+def test_submit_command_returns_immediately_and_completes(app):
+    """Задача ставится в очередь и выполняется в фоне."""
+    with mock.patch(
+        "app.services.nettools_service.ping_host",
+        return_value=("pong", "ok"),
+    ):
+        job_id = jobs_service.submit_command("ping", host="192.0.2.1")
+        job = jobs_service.get_job(job_id, wait=5)
+
+    assert job["state"] == "done"
+    assert job["status"] == "ok"
+    assert job["output"] == "pong"
+    assert len(logs_service.get_all_logs()) == 1
+
+
+def test_connect_job_does_not_persist_password(app):
+    """Пароль передаётся рабочему потоку, но не сохраняется в базе."""
+    with mock.patch(
+        "app.services.nettools_service.ssh_command",
+        return_value=("Version 1.0", "ok"),
+    ) as ssh_command:
+        job_id = jobs_service.submit_connect(
+            "ssh",
+            host="192.0.2.1",
+            username="admin",
+            password="secret",
+            command="show version",
+        )
+        job = jobs_service.get_job(job_id, wait=5)
+
+    assert job["output"] == "Version 1.0"
+    assert ssh_command.call_args.args[2] == "secret"
+    assert jobs_repo.get_by_id(job_id).params["password"] == "******"
+
+
+def _expire(job_id):
+    Job.query.filter_by(id=job_id).update(
+        {"heartbeat_at": datetime(2000, 1, 1)}
+    )
+    db.session.commit()
+
+
+def test_recover_jobs(app):
+    """Брошенные команды перезапускаются, подключения — завершаются."""
+    jobs_repo.create("a" * 32, "command", "ping", "192.0.2.1", {"count": 1})
+    jobs_repo.create("b" * 32, "connect", "ssh", "192.0.2.2", {})
+    jobs_repo.claim("a" * 32)
+    _expire("a" * 32)
+    _expire("b" * 32)
+
+    with mock.patch(
+        "app.services.nettools_service.ping_host",
+        return_value=("pong", "ok"),
+    ) as ping_host:
+        assert jobs_service.recover_jobs() == 1
+        command = jobs_service.get_job("a" * 32, wait=5)
+
+    connect = jobs_service.get_job("b" * 32)
+    assert command["state"] == "done"
+    assert ping_host.call_args.kwargs["count"] == 1
+    assert connect["state"] == "failed"
+    assert "credentials are not persisted" in connect["output"]
+
+
+def test_recover_skips_jobs_of_live_processes(app):
+    """Задачи, которые продлевает живой процесс, не трогаются."""
+    jobs_repo.create("a" * 32, "command", "ping", "192.0.2.1", {})
+    jobs_repo.create("b" * 32, "connect", "ssh", "192.0.2.2", {})
+    jobs_repo.claim("a" * 32)
+    _expire("b" * 32)
+    jobs_repo.touch(["b" * 32])
+
+    assert jobs_service.recover_jobs() == 0
+    assert jobs_repo.get_by_id("a" * 32).state == "running"
+    assert jobs_repo.get_by_id("b" * 32).state == "queued"
+
+
+def test_recovery_runs_only_from_cli(app):
+    """create_app() не восстанавливает задачи, это делает flask jobs
+    recover."""
+    jobs_repo.create("a" * 32, "command", "ping", "192.0.2.1", {})
+    jobs_repo.claim("a" * 32)
+    _expire("a" * 32)
+    create_app()
+    assert jobs_repo.get_by_id("a" * 32).state == "running"
+
+    with mock.patch(
+        "app.services.nettools_service.ping_host",
+        return_value=("pong", "ok"),
+    ):
+        result = app.test_cli_runner().invoke(args=["jobs", "recover"])
+
+    assert result.output == ("pruned 0 finished jobs\nrequeued 1 jobs\ndone\n")
+    assert jobs_repo.get_by_id("a" * 32).state == "done"
+
+
+def test_job_keeps_only_output_tail(app):
+    """Задача хранит хвост вывода, полный вывод — только в логах."""
+    app.config["JOB_OUTPUT_TAIL"] = 10
+    with mock.patch(
+        "app.services.nettools_service.ping_host",
+        return_value=("x" * 100 + "0123456789", "ok"),
+    ):
+        job_id = jobs_service.submit_command("ping", host="192.0.2.1")
+        job = jobs_service.get_job(job_id, wait=5)
+
+    assert job["output"].endswith("\n0123456789")
+    assert job["output"].startswith("... (последние 10 символов")
+
+
+def test_prune_jobs_removes_old_finished_jobs(app):
+    """Удаляются только завершённые задачи старше срока хранения."""
+    for job_id in ("a" * 32, "b" * 32, "c" * 32):
+        jobs_repo.create(job_id, "command", "ping", "192.0.2.1", {})
+    jobs_repo.finish("a" * 32, "done", "ok", "old")
+    jobs_repo.finish("b" * 32, "done", "ok", "new")
+    Job.query.filter_by(id="a" * 32).update(
+        {"finished_at": datetime(2000, 1, 1)}
+    )
+    db.session.commit()
+
+    assert jobs_service.prune_jobs() == 1
+    assert jobs_repo.get_by_id("a" * 32) is None
+    assert jobs_repo.get_by_id("b" * 32).output == "new"
+    assert jobs_repo.get_by_id("c" * 32).state == "queued"
+    result = app.test_cli_runner().invoke(
+        args=["jobs", "prune", "--hours", "0"]
+    )
+    assert result.output == "pruned 1 finished jobs\n"
+
+
+def test_job_queue_heartbeat_reports_pending_jobs(app):
+    """Пока задача выполняется, её ID периодически передаётся
+    в on_heartbeat."""
+    queue = JobQueue()
+    beats = []
+    queue.init_app(app, on_heartbeat=beats.append)
+    queue.heartbeat_interval = 0.02
+    release = threading.Event()
+    queue.submit(app, "a" * 32, lambda job_id: release.wait(5))
+    time.sleep(0.2)
+    release.set()
+    queue.join()
+    queue.shutdown()
+
+    assert ["a" * 32] in beats
+    beats.clear()
+    time.sleep(0.1)
+    assert beats == []
+
+
+def test_job_stream_keeps_bounded_replay_window():
+    """Поток хранит только последние replay_limit символов вывода."""
+    stream = JobStream(replay_limit=10)
+    live = stream.follow(heartbeat=0.01)
+
+    stream.publish("aaaa")
+    assert next(live) == "aaaa"
+    for chunk in ("bbbb", "cccc", "dddd"):
+        stream.publish(chunk)
+    assert stream.size <= 10
+    assert list(stream.chunks) == ["cccc", "dddd"]
+
+    # Отставший подписчик узнаёт о пропуске, новый — получает хвост.
+    assert next(live) == SKIPPED_MARKER + "ccccdddd"
+    late = stream.follow(heartbeat=0.01)
+    stream.close()
+    assert list(late) == [SKIPPED_MARKER + "ccccdddd"]
+    assert list(live) == []
+
+
+def test_job_stream_trims_chunk_larger_than_window():
+    """Фрагмент больше окна обрезается до хвоста."""
+    stream = JobStream(replay_limit=4)
+    stream.publish("0123456789")
+    stream.close()
+    assert list(stream.follow(heartbeat=0.01)) == [SKIPPED_MARKER + "6789"]
+
+
+def test_job_status_endpoint_waits_for_result(client):
+    """Эндпоинт /jobs/<id> отдаёт результат после завершения задачи."""
+    with mock.patch(
+        "app.services.nettools_service.ping_host",
+        return_value=("pong", "warn"),
+    ):
+        response = client.post(
+            "/", data={"action": "ping", "host": "192.0.2.1"}
+        )
+        job_id = response.text.split('data-job-url="/jobs/')[1][:32]
+        result = client.get(f"/jobs/{job_id}?wait=5").get_json()
+
+    assert result["state"] == "done"
+    assert result["status"] == "warn"
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_job_stream_sends_output_then_final_state(client):
+    """SSE-поток отдаёт фрагменты вывода и итоговое событие done."""
+
+    def fake_ping(host, count, timeout, on_output=None):
+        on_output("Reply from 192.0.2.1\n")
+        on_output("Reply from 192.0.2.1\n")
+        # Подписчик подключается, пока задача ещё выполняется.
+        time.sleep(0.3)
+        return "2 replies", "ok"
+
+    with mock.patch(
+        "app.services.nettools_service.ping_host", side_effect=fake_ping
+    ):
+        job_id = jobs_service.submit_command("ping", host="192.0.2.1")
+        response = client.get(f"/jobs/{job_id}/stream")
+        body = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/event-stream"
+    events = [e for e in body.split("\n\n") if e.startswith("event:")]
+    assert events[-1].startswith("event: done")
+    assert '"output": "2 replies"' in events[-1]
+    streamed = "".join(
+        json.loads(e.split("data: ", 1)[1])
+        for e in events
+        if e.startswith("event: output")
+    )
+    assert streamed == "Reply from 192.0.2.1\n" * 2
+
+
+def test_job_timestamps_are_utc(app, monkeypatch):
+    """started_at и finished_at в том же UTC, что и created_at."""
+    monkeypatch.setenv("TZ", "Asia/Vladivostok")
+    time.tzset()
+    try:
+        jobs_repo.create("c" * 32, "command", "ping", "192.0.2.1", {})
+        jobs_repo.claim("c" * 32)
+        jobs_repo.finish("c" * 32, "done", "ok", "")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    job = jobs_repo.get_by_id("c" * 32)
+
+    assert job.created_at <= job.started_at <= job.finished_at
+    assert (job.finished_at - job.created_at).total_seconds() < 60
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from app.infrastructure.log_writer import LogWriter
+from app.services import logs_service
+
+
+def _writer(app, write_batch, **settings):
+    writer = LogWriter()
+    writer.init_app(app, write_batch)
+    writer.enabled = True
+    for name, value in settings.items():
+        setattr(writer, name, value)
+    return writer
+
+
+def test_records_are_written_in_batches(app):
+    """Записи из очереди вставляются пачками не больше batch_size."""
+    batches = []
+    writer = _writer(
+        app, lambda records: batches.append(len(records)), batch_size=10
+    )
+
+    for i in range(25):
+        writer.submit({"n": i})
+    writer.flush()
+    writer.shutdown()
+
+    assert sum(batches) == 25
+    assert max(batches) <= 10
+    assert len(batches) < 25
+    assert writer.stats()["written"] == 25
+
+
+def test_full_queue_applies_backpressure(app):
+    """При заполненной очереди вызывающий поток ждёт, записи не теряются."""
+    written = []
+    release = threading.Event()
+
+    def slow_write(records):
+        release.wait(1)
+        written.extend(records)
+
+    app.config["LOG_WRITER_QUEUE_SIZE"] = 1
+    writer = _writer(app, slow_write, batch_size=1)
+
+    def produce():
+        for i in range(4):
+            writer.submit({"n": i})
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.2)
+    assert producer.is_alive()
+    release.set()
+    producer.join(5)
+    writer.shutdown()
+
+    assert [record["n"] for record in written] == [0, 1, 2, 3]
+    assert writer.stats()["blocked"] > 0
+
+
+def test_shutdown_flushes_queue(app):
+    """Остановка дописывает очередь, не дожидаясь flush_interval."""
+    written = []
+    writer = _writer(app, written.extend, batch_size=100, flush_interval=30)
+
+    for i in range(3):
+        writer.submit({"n": i})
+    started = time.monotonic()
+    writer.shutdown()
+
+    assert len(written) == 3
+    assert time.monotonic() - started < 5
+    writer.submit({"n": 3})
+    assert len(written) == 4
+    assert writer.stats()["sync_writes"] == 1
+
+
+def test_create_log_through_background_writer(app, monkeypatch):
+    """create_log() через фоновый поток сохраняет логи в базу."""
+    from app.interfaces.repositories import logs_repo
+
+    writer = _writer(app, logs_repo.save_many, flush_interval=0.05)
+    monkeypatch.setattr(logs_service, "log_writer", writer)
+
+    for i in range(5):
+        logs_service.create_log("ping", f"10.0.0.{i}", {}, "ok", "x")
+    writer.flush()
+    writer.shutdown()
+
+    assert len(logs_service.get_all_logs()) == 5
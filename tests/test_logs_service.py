@@ -1,3 +1,9 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.extensions import db
 from app.services import logs_service
 
 
@@ -34,3 +40,138 @@ def test_delete_all_logs(app):
             logs_service.create_log("ping", f"8.8.8.{i}", {}, "ok", "Success")
         logs_service.delete_all_logs()
         assert len(logs_service.get_all_logs()) == 0
+
+
+def test_logs_page_keyset_pagination(app):
+    """Страницы не пересекаются при одинаковом timestamp."""
+    with app.app_context():
+        for i in range(5):
+            logs_service.create_log("ping", f"10.0.0.{i}", {}, "ok", "x")
+
+        first = logs_service.get_logs_page(limit=2)
+        second = logs_service.get_logs_page(
+            limit=2, cursor=first["next_cursor"]
+        )
+        third = logs_service.get_logs_page(
+            limit=2, cursor=second["next_cursor"]
+        )
+
+        ids = [
+            log.id for page in (first, second, third) for log in page["logs"]
+        ]
+        assert ids == [5, 4, 3, 2, 1]
+        assert third["next_cursor"] is None
+
+
+def test_logs_page_filters_and_defers_output(app):
+    """Фильтры применяются, а output не загружается в списке."""
+    with app.app_context():
+        logs_service.create_log("ping", "10.0.0.1", {}, "ok", "big output")
+        logs_service.create_log("ssh", "10.0.0.1", {}, "danger", "error")
+        logs_service.create_log("ssh", "10.0.0.2", {}, "ok", "done")
+
+        page = logs_service.get_logs_page(action="ssh", host="10.0.0.1")
+
+        assert [log.status for log in page["logs"]] == ["danger"]
+        log = page["logs"][0]
+        assert "output" not in log.__dict__
+        assert log.output == "error"
+
+
+def test_export_logs_streams_in_batches(app):
+    """Экспорт читает базу пачками и формирует корректный документ."""
+    with app.app_context():
+        for i in range(5):
+            logs_service.create_log("ping", f"10.0.0.{i}", {}, "ok", "вывод")
+        logs_service.create_log("ssh", "10.0.0.9", {}, "ok", "x")
+
+        chunks = list(logs_service.export_logs("ndjson", batch_size=2))
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        array = json.loads(
+            "".join(logs_service.export_logs("json", action="ping"))
+        )
+
+        assert len(chunks) == 3
+        assert [r["id"] for r in records] == [1, 2, 3, 4, 5, 6]
+        assert records[0]["output"] == "вывод"
+        assert [r["host"] for r in array] == [f"10.0.0.{i}" for i in range(5)]
+
+
+def test_export_logs_empty_json_array(app):
+    """Пустой экспорт в JSON — пустой массив."""
+    with app.app_context():
+        assert json.loads("".join(logs_service.export_logs("json"))) == []
+
+
+def test_query_logs_by_params_and_time(app):
+    """Фильтры по ключам params и интервалу времени."""
+    with app.app_context():
+        logs_service.create_log(
+            "nslookup", "example.com", {"dns_server": "1.1.1.1"}, "ok", ""
+        )
+        logs_service.create_log(
+            "nslookup", "example.com", {"dns_server": "8.8.8.8"}, "ok", ""
+        )
+        logs_service.create_log(
+            "ssh", "10.0.0.1", {"model": "huawei"}, "ok", ""
+        )
+
+        by_dns = logs_service.query_logs({"dns_server": "8.8.8.8"})
+        by_model = logs_service.query_logs({"model": "huawei", "limit": "1"})
+        future = logs_service.query_logs({"since": "2999-01-01T00:00:00"})
+
+        assert [log["params"] for log in by_dns["logs"]] == [
+            {"dns_server": "8.8.8.8"}
+        ]
+        assert [log["host"] for log in by_model["logs"]] == ["10.0.0.1"]
+        assert future == {"logs": [], "next_cursor": None}
+
+
+def test_query_logs_rejects_bad_limit(app):
+    """Недопустимый limit — ValueError."""
+    with app.app_context():
+        with pytest.raises(ValueError):
+            logs_service.query_logs({"limit": "0"})
+
+
+def test_search_logs_ranks_and_highlights(app):
+    """Поиск по выводу находит сообщения и MAC-адреса с подсветкой."""
+    with app.app_context():
+        logs_service.create_log(
+            "ssh", "sw1", {}, "ok", "%LINK-3-UPDOWN: Gi0/1 <down>"
+        )
+        logs_service.create_log(
+            "ssh", "sw2", {}, "ok", "0011.2233.4455 DYNAMIC Gi0/2"
+        )
+        logs_service.create_log("ssh", "sw3", {}, "ok", "no match here")
+
+        link = logs_service.search_logs("%LINK-3-UPDOWN")
+        mac = logs_service.search_logs("0011.2233.4455", host="sw2")
+        prefix = logs_service.search_logs("DYNA*")
+
+        assert [r["host"] for r in link] == ["sw1"]
+        assert "<mark>LINK-3-UPDOWN</mark>" in link[0]["snippet"]
+        assert "&lt;down&gt;" in link[0]["snippet"]
+        assert [r["host"] for r in mac] == ["sw2"]
+        assert [r["host"] for r in prefix] == ["sw2"]
+        with pytest.raises(ValueError):
+            logs_service.search_logs("  ")
+
+
+def test_search_index_follows_deletes_and_backfill(app):
+    """Индекс синхронизирован с удалением и дополняется backfill'ом."""
+    with app.app_context():
+        logs_service.create_log("ssh", "sw1", {}, "ok", "error one")
+        logs_service.create_log("ssh", "sw2", {}, "ok", "error two")
+        # Строка, записанная до появления индекса.
+        db.session.execute(
+            text(
+                "INSERT INTO logs_fts(logs_fts, rowid, output) "
+                "VALUES ('delete', 2, 'error two')"
+            )
+        )
+        logs_service.delete_log(1)
+
+        assert logs_service.search_logs("error") == []
+        assert logs_service.backfill_search_index(batch_size=1) == 1
+        assert [r["id"] for r in logs_service.search_logs("error")] == [2]
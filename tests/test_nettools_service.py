@@ -1,9 +1,10 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
 from unittest import mock
 from unittest.mock import Mock
 
-import pytest
-
+from app.infrastructure.ssh_pool import ssh_pool
 from app.services.nettools_service import (
     ssh_command,
     ssh_via_jumphost,
@@ -46,38 +47,32 @@ class FakeTelnetReader:
     def __init__(self, readuntil_responses, read_responses):
         self._readuntil_responses = iter(readuntil_responses)
         self._read_responses = iter(read_responses)
+        # Уже полученный, но не прочитанный вывод: read() отдаёт его
+        # без ожидания, как буфер telnetlib3.
+        self.buffered = []
 
     async def readuntil(self, *args, **kwargs):
         return next(self._readuntil_responses)
 
     async def read(self, _size):
+        if self.buffered:
+            return self.buffered.pop(0)
+        await asyncio.sleep(0)
         return next(self._read_responses)
 
-
-class FakeTelnetConnection:
-    """Асинхронный контекст-менеджер, возвращающий reader/writer."""
-
-    def __init__(self, reader, writer):
-        self._reader = reader
-        self._writer = writer
-
-    async def __aenter__(self):
-        return self._reader, self._writer
-
-    async def __aexit__(self, exc_type, exc, tb):
+    def at_eof(self):
         return False
 
 
-@pytest.fixture()
-def patch_asyncio_run(monkeypatch):
-    """Подменяет asyncio.run на loop.run_until_complete для тестов."""
+def fake_open_connection(reader, writer, calls=None):
+    """Возвращает подмену telnetlib3.open_connection."""
+
+    async def open_connection(*args, **kwargs):
+        if calls is not None:
+            calls.append(args)
+        return reader, writer
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    monkeypatch.setattr(asyncio, "run", loop.run_until_complete)
-    yield loop
-    loop.close()
-    asyncio.set_event_loop(None)
+    return open_connection
 
 
 def test_valid_ip_correct_ipv4():
@@ -114,11 +109,11 @@ def test_ssh_command_success_invokes_connect_with_expected_args():
     """Проверяет успешный SSH-вызов и корректные параметры connect."""
     channel = FakeChannel(
         recv_sequence=[
-            b"Welcome!\n",
-            b"terminal length 0\n#",
-            b"show version\nVersion 1.0\n#",
+            b"Welcome!\r\nR1#",
+            b"terminal length 0\r\nR1#",
+            b"show version\r\nVersion 1.0\r\nR1#",
         ],
-        ready_sequence=[True, True, False, True],
+        ready_sequence=[],
     )
     mock_client = mock.MagicMock()
     mock_client.__enter__.return_value = mock_client
@@ -139,7 +134,7 @@ def test_ssh_command_success_invokes_connect_with_expected_args():
         )
 
     assert status == "ok"
-    assert output == "Version 1.0\n#"
+    assert output == "Version 1.0"
     mock_client.connect.assert_called_once_with(
         "192.0.2.1",
         port=2222,
@@ -153,6 +148,38 @@ def test_ssh_command_success_invokes_connect_with_expected_args():
     assert "show version\r" in channel.sent
 
 
+def test_ssh_command_reuses_pooled_session():
+    """Повторная команда на тот же хост не открывает новое подключение."""
+    channel = FakeChannel(
+        recv_sequence=[
+            b"Welcome!\r\nR1>",
+            b"terminal length 0\r\nR1>",
+            b"show clock\r\n10:00\r\nR1>",
+            b"show clock\r\n10:01\r\nR1>",
+        ],
+        ready_sequence=[],
+    )
+    mock_client = mock.MagicMock()
+    mock_client.invoke_shell.return_value = channel
+    channel.closed = False
+    channel.exit_status_ready = lambda: False
+    before = ssh_pool.stats()
+
+    with mock.patch(
+        "app.services.nettools_service.paramiko.SSHClient",
+        return_value=mock_client,
+    ):
+        first = ssh_command("192.0.2.5", "admin", "secret", "show clock")
+        second = ssh_command("192.0.2.5", "admin", "secret", "show clock")
+
+    assert first == ("10:00", "ok")
+    assert second == ("10:01", "ok")
+    mock_client.connect.assert_called_once()
+    stats = ssh_pool.stats()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 1
+
+
 def test_ssh_command_returns_danger_on_exception():
     """Проверяет, что при ошибке подключения возвращается статус danger."""
     mock_client = mock.MagicMock()
@@ -185,10 +212,18 @@ def test_ssh_via_jumphost_connects_through_chain():
     transport.open_channel.return_value = mock.Mock()
 
     stdout = mock.MagicMock()
-    stderr = mock.MagicMock()
-    stdout.read.return_value = b"OK\n"
-    stderr.read.return_value = b""
-    dest_client.exec_command.return_value = (mock.Mock(), stdout, stderr)
+    stdout.channel.recv.side_effect = [
+        b"enable sec",
+        b"ret 9 $9$verysecret\r\nO",
+        b"K\n",
+        b"",
+    ]
+    dest_client.exec_command.return_value = (
+        mock.Mock(),
+        stdout,
+        mock.MagicMock(),
+    )
+    streamed = []
 
     with mock.patch(
         "app.services.nettools_service.paramiko.SSHClient",
@@ -211,10 +246,14 @@ def test_ssh_via_jumphost_connects_through_chain():
             model="cisco",
             port=22,
             timeout=4,
+            on_output=streamed.append,
         )
 
     assert status == "ok"
-    assert output == "OK\n"
+    assert output == "enable secret 9 <removed>\nOK\n"
+    assert streamed == ["enable secret 9 <removed>\n", "OK\n"]
+    stdout.read.assert_not_called()
+    stdout.channel.set_combine_stderr.assert_called_once_with(True)
     jump_client.connect.assert_called_once_with(
         "203.0.113.10",
         port=22,
@@ -231,15 +270,20 @@ def test_ssh_via_jumphost_connects_through_chain():
     )
 
 
-def test_telnet_command_ok(monkeypatch, patch_asyncio_run):
+def test_telnet_command_ok(monkeypatch):
     """Проверяет успешное выполнение telnet-команды."""
 
-    reader = FakeTelnetReader(["login:", "Password:"], ["command output", ""])
+    reader = FakeTelnetReader(
+        ["login:", "Password:"],
+        [
+            "Last login: Mon\r\nadmin@srv:~$ ",
+            "show version\r\ncommand output\r\nadmin@srv:~$ ",
+        ],
+    )
     writer = Mock()
-    connection = FakeTelnetConnection(reader, writer)
     monkeypatch.setattr(
         "app.services.nettools_service.telnetlib3.open_connection",
-        lambda *args, **kwargs: connection,
+        fake_open_connection(reader, writer),
     )
 
     output, status = telnet_command(
@@ -257,7 +301,7 @@ def test_telnet_command_ok(monkeypatch, patch_asyncio_run):
     writer.write.assert_any_call("show version\n")
 
 
-def test_telnet_command_timeout(monkeypatch, patch_asyncio_run):
+def test_telnet_command_timeout(monkeypatch):
     """Проверяет обработку таймаута telnet-сессии."""
 
     class TimeoutReader:
@@ -272,10 +316,9 @@ def test_telnet_command_timeout(monkeypatch, patch_asyncio_run):
 
     reader = TimeoutReader()
     writer = Mock()
-    connection = FakeTelnetConnection(reader, writer)
     monkeypatch.setattr(
         "app.services.nettools_service.telnetlib3.open_connection",
-        lambda *args, **kwargs: connection,
+        fake_open_connection(reader, writer),
     )
 
     output, status = telnet_command(
@@ -289,3 +332,94 @@ def test_telnet_command_timeout(monkeypatch, patch_asyncio_run):
 
     assert status == "danger"
     assert output == "Telnet error: session timeout"
+
+
+def test_telnet_command_reuses_session_on_shared_loop(monkeypatch):
+    """Повторная telnet-команда не открывает новое соединение."""
+    reader = FakeTelnetReader(
+        ["Username:", "Password:"],
+        [
+            "\r\nSW1#",
+            "terminal datadump\r\nSW1#",
+            "show clock\r\n10:00\r\nSW1#",
+            "show clock\r\n10:01\r\nSW1#",
+        ],
+    )
+    writer = Mock()
+    writer.is_closing.return_value = False
+    calls = []
+    monkeypatch.setattr(
+        "app.services.nettools_service.telnetlib3.open_connection",
+        fake_open_connection(reader, writer, calls),
+    )
+
+    first = telnet_command("10.0.0.9", "admin", "pw", "show clock", "eltex")
+    second = telnet_command("10.0.0.9", "admin", "pw", "show clock", "eltex")
+
+    assert first == ("10:00", "ok")
+    assert second == ("10:01", "ok")
+    assert len(calls) == 1
+    writer.write.assert_any_call("terminal datadump\n")
+
+
+def test_telnet_command_drains_stale_output_on_reuse(monkeypatch):
+    """Опоздавший вывод прошлой команды не попадает в следующую."""
+    reader = FakeTelnetReader(
+        ["Username:", "Password:"],
+        [
+            "\r\nSW1#",
+            "terminal datadump\r\nSW1#",
+            "show clock\r\n10:00\r\nSW1#",
+            "show clock\r\n10:01\r\nSW1#",
+        ],
+    )
+    writer = Mock()
+    writer.is_closing.return_value = False
+    monkeypatch.setattr(
+        "app.services.nettools_service.telnetlib3.open_connection",
+        fake_open_connection(reader, writer),
+    )
+
+    first = telnet_command("10.0.0.8", "admin", "pw", "show clock", "eltex")
+    reader.buffered = ["%LINK-3-UPDOWN: Gi0/1 down\r\n", "SW1#"]
+    second = telnet_command("10.0.0.8", "admin", "pw", "show clock", "eltex")
+
+    assert first == ("10:00", "ok")
+    assert second == ("10:01", "ok")
+    assert reader.buffered == []
+
+
+def test_telnet_commands_to_many_devices_run_concurrently(monkeypatch):
+    """Команды к разным устройствам выполняются параллельно в одном loop."""
+
+    class SlowReader(FakeTelnetReader):
+        async def read(self, _size):
+            await asyncio.sleep(0.1)
+            return await super().read(_size)
+
+    async def open_connection(host, **kwargs):
+        reader = SlowReader(
+            ["login:", "Password:"],
+            ["\r\nsrv$ ", "show clock\r\n10:00\r\nsrv$ "],
+        )
+        return reader, Mock()
+
+    monkeypatch.setattr(
+        "app.services.nettools_service.telnetlib3.open_connection",
+        open_connection,
+    )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pool.map(
+                lambda i: telnet_command(
+                    f"10.0.1.{i}", "u", "p", "show clock", "linux"
+                ),
+                range(8),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    assert results == [("10:00", "ok")] * 8
+    assert elapsed < 0.2 * 4
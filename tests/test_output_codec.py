@@ -0,0 +1,98 @@
+from sqlalchemy import text
+
+from app.infrastructure.extensions import db
+from app.infrastructure.output_codec import output_codec, OutputCodec
+from app.infrastructure.output_codec import train_dictionary
+from app.services import logs_service
+
+
+def _show_run(n):
+    lines = ["Building configuration...", "!", f"hostname core-{n}", "!"]
+    for port in range(24):
+        lines += [
+            f"interface GigabitEthernet0/{port}",
+            f" description uplink-{n}-{port}",
+            " switchport mode access",
+            f" switchport access vlan {100 + n % 7}",
+            " spanning-tree portfast",
+            "!",
+        ]
+    return "\n".join(lines + ["end"])
+
+
+def _stored(log_id):
+    return db.session.execute(
+        text("SELECT typeof(output), length(output) FROM logs WHERE id = :id"),
+        {"id": log_id},
+    ).one()
+
+
+def test_large_output_is_stored_compressed(app):
+    """Большой вывод хранится сжатым и читается как текст."""
+    output = _show_run(1)
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", output)
+    logs_service.create_log("ping", "10.0.0.2", {}, "ok", "Reply from x")
+
+    big, small = logs_service.get_all_logs()
+    assert _stored(big.id)[0] == "blob"
+    assert _stored(big.id)[1] < len(output) / 4
+    assert _stored(small.id)[0] == "text"
+
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(big.id).output == output
+    exported = "".join(logs_service.export_logs("ndjson"))
+    assert "interface GigabitEthernet0/23" in exported
+
+
+def test_dictionary_improves_ratio_and_keeps_old_rows(app):
+    """Словарь уменьшает размер; строки до обучения остаются читаемыми."""
+    logs_service.create_log("ssh", "10.0.0.1", {}, "ok", _show_run(1))
+    for n in range(2, 20):
+        logs_service.create_log("ssh", f"10.0.0.{n}", {}, "ok", _show_run(n))
+    plain_size = _stored(19)[1]
+
+    result = logs_service.train_output_dictionary(samples=20)
+    assert result["id"] == 1
+    logs_service.create_log("ssh", "10.0.0.99", {}, "ok", _show_run(99))
+
+    assert _stored(20)[1] < plain_size * 0.8
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(1).output == _show_run(1)
+    assert logs_service.get_log_by_id(20).output == _show_run(99)
+
+
+def test_search_and_backfill_compress_existing_rows(app, monkeypatch):
+    """Сжатие старых строк не ломает полнотекстовый поиск."""
+    monkeypatch.setattr(output_codec, "enabled", False)
+    for n in range(5):
+        logs_service.create_log("ssh", f"10.0.0.{n}", {}, "ok", _show_run(n))
+    assert _stored(1)[0] == "text"
+    monkeypatch.setattr(output_codec, "enabled", True)
+
+    assert logs_service.compress_outputs(batch_size=2) == 5
+    assert logs_service.compress_outputs(batch_size=2) == 0
+    assert _stored(1)[0] == "blob"
+
+    results = logs_service.search_logs("core-3")
+    assert [result["id"] for result in results] == [4]
+    assert "<mark>core-3</mark>" in results[0]["snippet"]
+    db.session.execute(
+        text("INSERT INTO logs_fts(logs_fts) VALUES ('integrity-check')")
+    )
+
+
+def test_codec_keeps_incompressible_output_as_text():
+    """Если сжатие не выгодно, вывод хранится как есть."""
+    codec = OutputCodec(min_size=3)
+    codec._dictionaries = {}
+    assert codec.compress("abc") == "abc"
+    assert codec.compress("ab") == "ab"
+    assert codec.stats()["stored_plain"] == 1
+    assert codec.decompress(codec.compress("x" * 100)) == "x" * 100
+
+
+def test_train_dictionary_prefers_shared_lines():
+    """В словарь попадают строки, общие для нескольких образцов."""
+    data = train_dictionary(["common line\nunique a\n", "common line\nb\n"])
+    assert data == b"common line\n"
+    assert train_dictionary(["a\n", "b\n"]) == b""
@@ -0,0 +1,68 @@
+from app.infrastructure.output_collector import OutputCollector
+from app.services.prompt_engine import PromptMatcher, read_until_prompt
+
+
+class ChunkChannel:
+    """Канал, отдающий заранее заданные порции."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, _size):
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+def test_tail_is_bounded():
+    """Хвост для поиска приглашения не превышает tail_size."""
+    collector = OutputCollector(tail_size=8)
+    collector.append("0123456789")
+    collector.append("ab")
+
+    assert collector.tail == "456789ab"
+    assert collector.getvalue() == "0123456789ab"
+
+
+def test_spills_to_temporary_file():
+    """После spool_size данные переносятся во временный файл."""
+    collector = OutputCollector(spool_size=10)
+    collector.append("привет, ")
+    collector.append("мир\n" * 5)
+
+    assert collector._file is not None
+    assert collector._chunks == []
+    assert collector.getvalue() == "привет, " + "мир\n" * 5
+    collector.append("!")
+    assert collector.getvalue().endswith("мир\n!")
+    collector.close()
+
+
+def test_size_cap_truncates_but_keeps_tail():
+    """Сверх max_size вывод обрезается, а хвост продолжает обновляться."""
+    collector = OutputCollector(max_size=5, tail_size=4)
+    collector.append("abc")
+    collector.append("defgh")
+    collector.append("R1#")
+
+    assert collector.truncated
+    assert collector.tail == "hR1#"
+    assert collector.getvalue() == (
+        "abcde\n... output truncated (6 chars dropped)"
+    )
+
+
+def test_read_until_prompt_on_large_output(monkeypatch):
+    """Приглашение находится по хвосту после большого вывода."""
+    monkeypatch.setattr(
+        "app.services.prompt_engine.output_limits.spool_size", 1024
+    )
+    chunks = [b"x" * 4096] * 64 + [b"\r\nR1#"]
+
+    buffer = read_until_prompt(
+        ChunkChannel(chunks), PromptMatcher("cisco"), timeout=5
+    )
+
+    assert len(buffer) == 4096 * 64 + 4
+    assert buffer.endswith("R1#")
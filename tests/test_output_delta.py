@@ -0,0 +1,155 @@
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.blob_store import blob_store
+from app.infrastructure.extensions import db
+from app.infrastructure.output_codec import output_codec
+from app.infrastructure.output_delta import apply_delta, make_delta
+from app.services import logs_service, retention_service
+
+
+@pytest.fixture()
+def blobs(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "min_size", 1024)
+    monkeypatch.setattr(output_codec, "delta_interval", 3)
+    return blob_store
+
+
+def _config(n, vlan=10):
+    return "\n".join(
+        [f"hostname core-{n}", f"! uptime {n * 7} minutes"]
+        + [
+            f"interface GigabitEthernet0/{port}\n"
+            f" switchport access vlan {vlan if port == 5 else 20}\n!"
+            for port in range(100)
+        ]
+    )
+
+
+def _run(n, host="10.0.0.1", command="show run", **kwargs):
+    logs_service.create_log(
+        "ssh", host, {"command": command}, "ok", _config(n, **kwargs)
+    )
+
+
+def _stored():
+    return db.session.execute(
+        text(
+            "SELECT id, substr(output, 1, 1), length(output), output_ref "
+            "FROM logs ORDER BY id"
+        )
+    ).all()
+
+
+def test_make_and_apply_delta():
+    """Дельта восстанавливает текст, в том числе без общих строк."""
+    base = _config(1).splitlines(keepends=True)
+    shifted = base[1:] + ["!\n"]
+    for target in (_config(2), _config(1, vlan=30), "", "other\n"):
+        delta = make_delta(base, target.splitlines(keepends=True))
+        assert apply_delta(base, delta) == target
+    delta = make_delta(base, shifted)
+    assert apply_delta(base, delta) == "".join(shifted)
+    assert len(delta) < 100
+
+
+def test_repeated_command_is_stored_as_delta(blobs):
+    """Повторы команды хранятся дельтами, снимок — раз в интервал."""
+    for n in range(6):
+        _run(n)
+    _run(0, host="10.0.0.2")
+
+    rows = _stored()
+    versions = [row[1] for row in rows]
+    assert versions == [b"\x02", b"\x03", b"\x03", b"\x03", b"\x02"] + [
+        b"\x03",
+        b"\x02",
+    ]
+    assert all(row[2] < 200 for row in rows)
+    # Дельты ссылаются на свой снимок — сборщик его не удалит.
+    assert rows[1][3] == rows[3][3] == rows[0][3]
+    assert rows[5][3] == rows[4][3] != rows[0][3]
+
+    db.session.expire_all()
+    for n, row in enumerate(rows[:6]):
+        assert logs_service.get_log_by_id(row[0]).output == _config(n)
+    assert [r["id"] for r in logs_service.search_logs("core-3")] == [4]
+    assert retention_service.collect_blobs(grace=0)["removed"] == 0
+
+
+def test_same_output_and_other_command_are_not_deltas(blobs):
+    """Тот же текст — ссылка на снимок, другая команда — свой снимок."""
+    hits = blobs.stats()["dedup_hits"]
+    _run(1)
+    _run(1)
+    _run(1, command="show startup")
+
+    rows = _stored()
+    assert [row[1] for row in rows] == [b"\x02"] * 3
+    assert rows[0][3] == rows[1][3] == rows[2][3]
+    assert blobs.stats()["dedup_hits"] - hits == 2
+
+
+def test_delta_with_large_change_falls_back_to_snapshot(blobs):
+    """Невыгодная дельта заменяется новым снимком."""
+    _run(1)
+    logs_service.create_log(
+        "ssh",
+        "10.0.0.1",
+        {"command": "show run"},
+        "ok",
+        "\n".join(f"line {i}" for i in range(400)),
+    )
+    assert [row[1] for row in _stored()] == [b"\x02", b"\x02"]
+
+
+def test_deltas_disabled_without_blob_store(app):
+    """Без хранилища блобов вывод хранится как раньше."""
+    _run(1)
+    _run(2)
+    assert [row[3] for row in _stored()] == [None, None]
+    db.session.expire_all()
+    assert logs_service.get_log_by_id(2).output == _config(2)
+
+
+def test_diff_with_previous(blobs):
+    """Дифф с прошлым запуском той же команды на том же хосте."""
+    _run(1)
+    _run(1, command="show version")
+    _run(1, vlan=30)
+    _run(1, vlan=30)
+
+    log = logs_service.get_log_by_id(3)
+    diff = logs_service.diff_with_previous(log)
+    assert diff["previous"].id == 1
+    assert "- switchport access vlan 10" in diff["lines"]
+    assert "+ switchport access vlan 30" in diff["lines"]
+    assert (
+        logs_service.diff_with_previous(logs_service.get_log_by_id(4))["lines"]
+        == []
+    )
+    assert (
+        logs_service.diff_with_previous(logs_service.get_log_by_id(1)) is None
+    )
+
+
+def test_history_detail_shows_diff(client, blobs):
+    _run(1)
+    _run(1, vlan=30)
+
+    html = client.get("/history_detail/2").get_data(as_text=True)
+    assert "Изменения с прошлого запуска" in html
+    assert "+ switchport access vlan 30" in html
+    assert "Изменения с прошлого запуска" not in client.get(
+        "/history_detail/1"
+    ).get_data(as_text=True)
+
+
+def test_recompress_keeps_deltas(blobs):
+    """compress --recompress не превращает дельты в снимки."""
+    _run(1)
+    _run(2)
+    before = _stored()
+    logs_service.compress_outputs(recompress=True)
+    assert _stored() == before
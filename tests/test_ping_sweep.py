@@ -0,0 +1,158 @@
+import socket
+import time
+
+import pytest
+
+from app.services import logs_service, ping_sweep
+from app.services.nettools_service import run_commands, sweep_hosts
+
+
+def _icmp_available():
+    try:
+        ping_sweep._open_socket()[0].close()
+        return True
+    except OSError:
+        return False
+
+
+icmp_only = pytest.mark.skipif(
+    not _icmp_available(),
+    reason="нет прав на ICMP-сокет",
+)
+
+
+@pytest.mark.parametrize(
+    "target, expected",
+    [
+        ("10.0.0.0/24", True),
+        ("10.0.0.1-50", True),
+        ("10.0.0.1, r1.example", True),
+        ("10.0.0.1 10.0.0.2", True),
+        ("10.0.0.1", False),
+        ("core-sw1.example", False),
+    ],
+)
+def test_is_sweep(target, expected):
+    """CIDR, диапазоны и списки распознаются, имена с дефисом — нет."""
+    assert ping_sweep.is_sweep(target) is expected
+
+
+def test_expand_targets_deduplicates_and_keeps_order():
+    """Элементы разворачиваются по порядку без повторов."""
+    hosts = ping_sweep.expand_targets(
+        "10.0.0.1-3, 10.0.0.2/31 10.0.0.9-10.0.0.10, r1"
+    )
+    assert hosts == [
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.9",
+        "10.0.0.10",
+        "r1",
+    ]
+
+
+def test_expand_targets_enforces_limit():
+    """Слишком большая подсеть отклоняется."""
+    with pytest.raises(ValueError):
+        ping_sweep.expand_targets("10.0.0.0/16", limit=1024)
+
+
+def test_expand_targets_uses_target_max_hosts(app):
+    """По умолчанию лимит — TARGET_MAX_HOSTS."""
+    app.config["TARGET_MAX_HOSTS"] = 8
+    assert len(ping_sweep.expand_targets("10.0.0.0/29")) == 6
+    with pytest.raises(ValueError, match="8 hosts"):
+        ping_sweep.expand_targets("10.0.0.0/28")
+
+
+def test_format_result_collapses_down_hosts():
+    """Недоступные узлы сворачиваются в диапазоны."""
+    result = {
+        "elapsed": 1.0,
+        "hosts": [
+            {"address": "10.0.0.1", "sent": 2, "received": 1, "rtts": [1.5]},
+            {"address": "10.0.0.2", "sent": 2, "received": 0, "rtts": []},
+            {"address": "10.0.0.3", "sent": 2, "received": 0, "rtts": []},
+            {"address": "10.0.0.5", "sent": 2, "received": 0, "rtts": []},
+        ],
+    }
+
+    lines = ping_sweep.format_result("10.0.0.1-5", result).splitlines()
+
+    assert lines[0].startswith("Sweep 10.0.0.1-5: 4 hosts, 1 up, 3 down")
+    assert lines[1].split()[:4] == ["10.0.0.1", "1/2", "loss", "50%"]
+    assert lines[2] == "down: 10.0.0.2-10.0.0.3, 10.0.0.5"
+    assert ping_sweep.classify(result) == "warn"
+
+
+@icmp_only
+def test_sweep_loopback_range():
+    """Все адреса loopback отвечают в пределах одного окна ожидания."""
+    result = ping_sweep.sweep(
+        ping_sweep.expand_targets("127.0.0.1-8"), count=2, timeout=1
+    )
+
+    assert [h["received"] for h in result["hosts"]] == [2] * 8
+    assert result["elapsed"] < 1
+    assert ping_sweep.classify(result) == "ok"
+
+
+@icmp_only
+def test_run_commands_logs_single_sweep_record(app, monkeypatch):
+    """Sweep сохраняется одной записью лога."""
+    monkeypatch.setattr(
+        "app.infrastructure.resolver.socket.getaddrinfo",
+        lambda *a, **k: [(socket.AF_INET, 1, 6, "", ("127.0.0.9", 0))],
+    )
+
+    output, status = run_commands(
+        "ping", host="127.0.0.1-4, lo.example", count=1, timeout=1
+    )
+
+    assert status == "ok"
+    assert output.startswith("Sweep 127.0.0.1-4, lo.example: 5 hosts, 5 up")
+    logs = logs_service.get_all_logs()
+    assert len(logs) == 1
+    assert logs[0].action == "ping"
+
+
+def test_sweep_resolves_names_in_parallel_and_reports_ipv6(app, monkeypatch):
+    """Имена разрешаются параллельно, IPv6-узлы не считаются неразрешёнными."""
+
+    def getaddrinfo(host, port, family=0, type=0, *args):
+        time.sleep(0.2)
+        if host.startswith("v6only") and family == socket.AF_INET6:
+            return [(family, type, 6, "", ("2001:db8::5", 0, 0, 0))]
+        if host.startswith(("v6only", "missing")):
+            raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+        return [(socket.AF_INET, type, 6, "", ("192.0.2.1", 0))]
+
+    def sweep(addresses, count, timeout):
+        swept.extend(addresses)
+        return {
+            "elapsed": 0.0,
+            "hosts": [
+                {"address": a, "sent": 1, "received": 1, "rtts": [1.0]}
+                for a in addresses
+            ],
+        }
+
+    swept = []
+    monkeypatch.setattr(
+        "app.infrastructure.resolver.socket.getaddrinfo", getaddrinfo
+    )
+    monkeypatch.setattr(ping_sweep, "sweep", sweep)
+    app.config["BULK_MAX_WORKERS"] = 8
+
+    started = time.monotonic()
+    output, status = sweep_hosts(
+        "r1.example, r2.example, r3.example, v6only.example, "
+        "missing.example, 2001:db8::1"
+    )
+
+    assert time.monotonic() - started < 0.6
+    assert swept == ["192.0.2.1"] * 3
+    assert "\nunsupported (IPv6): v6only.example, 2001:db8::1" in output
+    assert "\nunresolved: missing.example" in output
+    assert status == "warn"
@@ -0,0 +1,129 @@
+import time
+from unittest import mock
+
+import pytest
+
+from app.services.nettools_service import ssh_command
+from app.services.prompt_engine import (
+    extract_output,
+    PromptMatcher,
+    PromptTimeoutError,
+    read_until_prompt,
+)
+
+
+class DelayedChannel:
+    """Канал, отдающий порции вывода с задержкой, как реальное устройство."""
+
+    def __init__(self, chunks, delay=0.02):
+        self._chunks = list(chunks)
+        self._delay = delay
+        self.sent = []
+        self.closed = False
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv_ready(self):
+        return False
+
+    def recv(self, _size):
+        time.sleep(self._delay)
+        return self._chunks.pop(0) if self._chunks else b""
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def exit_status_ready(self):
+        return False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize(
+    "model, prompt",
+    [
+        ("cisco", "R1#"),
+        ("cisco", "core-sw01(config-if)#"),
+        ("huawei", "<HUAWEI>"),
+        ("huawei", "[~HUAWEI-GigabitEthernet0/0/1]"),
+        ("eltex", "MES2324>"),
+        ("ecorouter", "ecorouter(config)#"),
+        ("linux", "admin@srv:~$"),
+        ("linux", "[root@srv tmp]#"),
+    ],
+)
+def test_matcher_recognises_vendor_prompts(model, prompt):
+    """Регулярные выражения вендоров распознают типовые приглашения."""
+    matcher = PromptMatcher(model)
+    assert matcher.is_complete(f"banner\r\n{prompt} ")
+    assert matcher.learn(f"banner\r\n{prompt}") == prompt
+
+
+def test_learned_prompt_ignores_other_hosts():
+    """После обучения приглашение чужого хоста не завершает чтение."""
+    matcher = PromptMatcher("cisco")
+    matcher.learn("R1#")
+    assert matcher.is_complete("R1(config)#")
+    assert not matcher.is_complete("interface Gi0/1\nR2#")
+    assert not matcher.is_complete("Version 1.0")
+
+
+def test_read_until_prompt_raises_with_partial_buffer():
+    """Если приглашения нет, PromptTimeoutError содержит прочитанное."""
+    chan = DelayedChannel([b"partial output"], delay=0)
+    with pytest.raises(PromptTimeoutError) as exc:
+        read_until_prompt(chan, PromptMatcher("cisco"), timeout=1)
+    assert exc.value.buffer == "partial output"
+
+
+def test_read_until_prompt_reports_chunks_as_they_arrive():
+    """on_data получает каждую порцию вывода сразу после приёма."""
+    chan = DelayedChannel([b"line 1\r\n", b"line 2\r\nR1#"], delay=0)
+    chunks = []
+
+    buffer = read_until_prompt(
+        chan, PromptMatcher("cisco"), timeout=1, on_data=chunks.append
+    )
+
+    assert chunks == ["line 1\n", "line 2\n", "R1#"]
+    assert buffer == "".join(chunks)
+
+
+def test_extract_output_strips_echo_and_prompt():
+    """Эхо команды и завершающее приглашение не попадают в результат."""
+    matcher = PromptMatcher("huawei")
+    matcher.learn("<HW>")
+    raw = "display clock\n2025-01-01\n<HW>"
+    assert extract_output(raw, "display clock", matcher) == "2025-01-01"
+
+
+def test_ssh_command_latency_is_bound_by_device_not_sleeps():
+    """
+    Команда завершается сразу после появления приглашения.
+
+    Прежняя реализация тратила не меньше 1.5 с на фиксированные паузы
+    (1 с после invoke_shell и 0.5 с после terminal length 0).
+    """
+    channel = DelayedChannel(
+        [
+            b"Welcome\r\nR1#",
+            b"terminal length 0\r\nR1#",
+            b"show clock\r\n",
+            b"10:00:00\r\nR1#",
+        ]
+    )
+    client = mock.MagicMock()
+    client.invoke_shell.return_value = channel
+
+    with mock.patch(
+        "app.services.nettools_service.paramiko.SSHClient",
+        return_value=client,
+    ):
+        started = time.perf_counter()
+        output, status = ssh_command("192.0.2.50", "u", "p", "show clock")
+        elapsed = time.perf_counter() - started
+
+    assert (output, status) == ("10:00:00", "ok")
+    assert elapsed < 0.5
@@ -0,0 +1,167 @@
+import pytest
+
+from app.infrastructure.redaction import Redactor, redactor
+from app.services.nettools_service import mask_sensitive_values
+from app.services.prompt_engine import PromptMatcher, read_until_prompt
+
+
+class ChunkChannel:
+    """Канал, отдающий вывод заданными порциями."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_ready(self):
+        return False
+
+    def recv(self, _size):
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("enable secret 9 $9$abc$def", "enable secret 9 <removed>"),
+        (
+            "username admin privilege 15 secret 5 $1$mERr$hx5rVt7",
+            "username admin privilege 15 secret 5 <removed>",
+        ),
+        (
+            "username bob password 7 0822455D0A16",
+            "username bob password 7 <removed>",
+        ),
+        (" password 7 0822455D0A16", " password 7 <removed>"),
+        (
+            "tacacs-server host 10.0.0.5 key 7 05080F1C2243",
+            "tacacs-server host 10.0.0.5 key 7 <removed>",
+        ),
+        (" key 7 05080F1C2243", " key 7 <removed>"),
+        ("  key-string 7 104D000A0618", "  key-string 7 <removed>"),
+        (
+            "snmp-server community s3cr3t RO 10",
+            "snmp-server community <removed> RO 10",
+        ),
+        (
+            "snmp-server host 10.1.1.1 version 2c public",
+            "snmp-server host 10.1.1.1 version 2c <removed>",
+        ),
+        (
+            "snmp-server user u1 grp v3 auth sha AUTH priv aes 128 PRIV",
+            "snmp-server user u1 grp v3 auth sha <removed> "
+            "priv aes 128 <removed>",
+        ),
+        (
+            "crypto isakmp key SharedKey address 1.2.3.4",
+            "crypto isakmp key <removed> address 1.2.3.4",
+        ),
+        (
+            " ip ospf message-digest-key 1 md5 7 0822455D0A16",
+            " ip ospf message-digest-key 1 md5 7 <removed>",
+        ),
+        (
+            "ntp authentication-key 1 md5 NTPSECRET 7",
+            "ntp authentication-key 1 md5 <removed> 7",
+        ),
+        (
+            " local-user admin password irreversible-cipher $1a$xyz$",
+            " local-user admin password irreversible-cipher <removed>",
+        ),
+        (
+            "snmp-agent community read cipher %^%#abc%^%#",
+            "snmp-agent community read cipher <removed>",
+        ),
+        (
+            "snmp-agent community write private",
+            "snmp-agent community write <removed>",
+        ),
+        (
+            '    encrypted-password "$6$abc"; ## SECRET-DATA',
+            "    encrypted-password <removed>; ## SECRET-DATA",
+        ),
+        ("        community public {", "        community <removed> {"),
+        (" wpa-psk ascii 0 MyWifiPass", " wpa-psk ascii 0 <removed>"),
+        ("set wpa2-pre-shared-key=abc", "set wpa2-pre-shared-key=<removed>"),
+    ],
+)
+def test_vendor_secrets_are_removed(line, expected):
+    result = Redactor().redact(line + "\n")
+    assert result.startswith(expected)
+    assert result.endswith("\n")
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "service password-encryption",
+        "password encryption aes",
+        "key chain OSPF",
+        " key 1",
+        "crypto key generate rsa modulus 2048",
+        "interface GigabitEthernet0/1",
+        " description uplink to core",
+        "Password:",
+    ],
+)
+def test_regular_lines_are_kept(line):
+    assert Redactor().redact(line + "\n") == line + "\n"
+
+
+def test_redaction_disabled():
+    text = "enable secret 5 $1$abc\n"
+    assert Redactor(enabled=False).redact(text) == text
+
+
+def test_large_config_is_redacted_in_one_pass():
+    """Секреты находятся в любой части большого вывода."""
+    block = "".join(
+        f"interface GigabitEthernet1/0/{port}\n description port {port}\n!\n"
+        for port in range(48)
+    )
+    text = (block + "snmp-server community c0mm RO\n") * 200
+    result = Redactor().redact(text)
+    assert "c0mm" not in result
+    assert result.count("<removed>") == 200
+    assert len(result) == len(text) - 200 * (len("c0mm") - len("<removed>"))
+
+
+def test_streamed_output_is_redacted_before_callbacks():
+    """Секрет на границе фрагментов не попадает ни в вывод, ни в поток."""
+    chan = ChunkChannel(
+        [
+            b"show run\r\nenable sec",
+            b"ret 9 $9$verysecret\r\nsnmp-server comm",
+            b"unity pub",
+            b"lic RO\r\nR1#",
+        ]
+    )
+    streamed = []
+    output = read_until_prompt(
+        chan, PromptMatcher("cisco"), 5, streamed.append
+    )
+
+    assert "verysecret" not in output
+    assert "public" not in output
+    assert "enable secret 9 <removed>\n" in output
+    assert "snmp-server community <removed> RO\n" in output
+    assert "verysecret" not in "".join(streamed)
+    assert redactor.stats()["redacted"] >= 2
+
+
+def test_mask_sensitive_values_redacts_commands():
+    params = {
+        "username": "admin",
+        "Password": "p",
+        "enable_secret": "s",
+        "command": "conf t\nsnmp-server community private RW\nend",
+        "targets": [{"api_token": "t", "host": "r1"}],
+    }
+    assert mask_sensitive_values(params) == {
+        "username": "admin",
+        "Password": "******",
+        "enable_secret": "******",
+        "command": "conf t\nsnmp-server community <removed> RW\nend",
+        "targets": [{"api_token": "******", "host": "r1"}],
+    }
@@ -0,0 +1,137 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from app.infrastructure import resolver as resolver_module
+from app.infrastructure.resolver import ResolverCache
+
+
+@pytest.fixture()
+def lookups(monkeypatch):
+    """Подменяет getaddrinfo и считает обращения к нему."""
+    calls = []
+
+    def getaddrinfo(host, port, family=0, type=0, *args):
+        calls.append(host)
+        if host.startswith("slow"):
+            time.sleep(0.1)
+        if host.startswith("missing"):
+            raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+        address = f"192.0.2.{len(calls)}"
+        return [(socket.AF_INET, type, 6, "", (address, 0))]
+
+    monkeypatch.setattr(resolver_module.socket, "getaddrinfo", getaddrinfo)
+    return calls
+
+
+def test_ip_literal_bypasses_cache(lookups):
+    """IP-адрес не разрешается и не попадает в кэш."""
+    cache = ResolverCache()
+    assert cache.resolve("2001:db8::1") == "2001:db8::1"
+    assert lookups == []
+    assert cache.stats()["entries"] == 0
+
+
+def test_positive_answer_is_cached_until_ttl(lookups):
+    """Повторный запрос берётся из кэша, после TTL — разрешается заново."""
+    cache = ResolverCache(ttl=0.05)
+
+    assert cache.resolve("r1.example") == "192.0.2.1"
+    assert cache.resolve("R1.example.") == "192.0.2.1"
+    time.sleep(0.06)
+    assert cache.resolve("r1.example") == "192.0.2.2"
+
+    stats = cache.stats()
+    assert lookups == ["r1.example", "r1.example"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_negative_answer_is_cached(lookups):
+    """Ошибка разрешения кэшируется на negative_ttl."""
+    cache = ResolverCache(negative_ttl=60)
+
+    for _ in range(3):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("missing.example")
+
+    assert lookups == ["missing.example"]
+    assert cache.stats()["negative_hits"] == 2
+
+
+def test_lru_evicts_least_recently_used(lookups):
+    """При переполнении вытесняется давно не использованное имя."""
+    cache = ResolverCache(max_size=2)
+    cache.resolve("a.example")
+    cache.resolve("b.example")
+    cache.resolve("a.example")
+    cache.resolve("c.example")
+    cache.resolve("a.example")
+    cache.resolve("b.example")
+
+    assert lookups == ["a.example", "b.example", "c.example", "b.example"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_concurrent_misses_share_one_lookup(lookups):
+    """Параллельные промахи по одному имени дают один запрос."""
+    cache = ResolverCache()
+    results = []
+
+    def worker():
+        results.append(cache.resolve("slow.example"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert lookups == ["slow.example"]
+    assert results == ["192.0.2.1"] * 8
+    stats = cache.stats()
+    assert stats["coalesced"] + stats["hits"] == 7
+    assert stats["lookup_ms_max"] >= 100
+
+
+def test_connect_falls_back_to_next_address(monkeypatch):
+    """connect() пробует следующий адрес, если предыдущий недоступен."""
+
+    def getaddrinfo(host, port, family=0, type=0, *args):
+        return [
+            (socket.AF_INET6, type, 6, "", ("2001:db8::1", 0, 0, 0)),
+            (socket.AF_INET, type, 6, "", ("192.0.2.1", 0)),
+        ]
+
+    monkeypatch.setattr(resolver_module.socket, "getaddrinfo", getaddrinfo)
+    cache = ResolverCache()
+    tried = []
+
+    def connect(address):
+        tried.append(address)
+        if address == "2001:db8::1":
+            raise ConnectionRefusedError("refused")
+        return f"connected to {address}"
+
+    assert cache.connect("dual.example", connect) == "connected to 192.0.2.1"
+    assert tried == ["2001:db8::1", "192.0.2.1"]
+    assert cache.resolve_all("dual.example") == ["2001:db8::1", "192.0.2.1"]
+
+    def refuse(address):
+        raise ConnectionRefusedError(address)
+
+    with pytest.raises(ConnectionRefusedError, match="192.0.2.1"):
+        cache.connect("dual.example", refuse)
+
+
+def test_connect_does_not_retry_non_network_errors(lookups):
+    """Ошибки не сетевого уровня (например, авторизации) не перебираются."""
+    cache = ResolverCache()
+
+    def connect(address):
+        raise ValueError("auth failed")
+
+    with pytest.raises(ValueError):
+        cache.connect("r1.example", connect)
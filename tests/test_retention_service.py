@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import gzip
+import json
+
+import pytest
+
+from app.infrastructure.output_codec import output_codec
+from app.interfaces.repositories import logs_repo
+from app.services import logs_service, retention_service
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _seed(action, count, days_step=1, output="x"):
+    logs_repo.save_many(
+        [
+            {
+                "timestamp": NOW - timedelta(days=i * days_step),
+                "action": action,
+                "host": f"10.0.0.{i}",
+                "params": {},
+                "status": "ok",
+                "output": output,
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def _hosts(action):
+    return sorted(
+        log.host for log in logs_service.get_all_logs() if log.action == action
+    )
+
+
+def test_prune_by_age_rows_and_size(app, monkeypatch):
+    """Каждая политика оставляет только свежие строки своего действия."""
+    # Размер считается по хранимому (сжатому) выводу.
+    monkeypatch.setattr(output_codec, "enabled", False)
+    _seed("ping", 10)
+    _seed("traceroute", 10)
+    _seed("ssh", 10, output="y" * 1000)
+    _seed("telnet", 10)
+
+    result = retention_service.prune_logs(
+        {
+            "*": {"max_age_days": 4.5},
+            "traceroute": {"max_rows": 3},
+            "ssh": {"max_size_mb": 2500 / 1024 / 1024},
+        },
+        chunk_size=2,
+        now=NOW,
+    )
+
+    assert result == {"*": 10, "traceroute": 7, "ssh": 8}
+    assert _hosts("ping") == [f"10.0.0.{i}" for i in range(5)]
+    assert _hosts("telnet") == [f"10.0.0.{i}" for i in range(5)]
+    assert _hosts("traceroute") == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
+    assert _hosts("ssh") == ["10.0.0.0", "10.0.0.1"]
+
+
+def test_prune_dry_run_keeps_rows(app):
+    """dry_run только считает."""
+    _seed("ping", 6)
+    result = retention_service.prune_logs(
+        {"ping": {"max_rows": 2}}, dry_run=True, now=NOW
+    )
+    assert result == {"ping": 4}
+    assert len(logs_service.get_all_logs()) == 6
+
+
+def test_archive_round_trip(app, tmp_path):
+    """Удалённые строки попадают в архив по дням и восстанавливаются."""
+    _seed("ping", 4, output="Ответ от 8.8.8.8")
+    before = {log.id: log.output for log in logs_service.get_all_logs()}
+
+    result = retention_service.prune_logs(
+        {"ping": {"max_age_days": 1.5}},
+        archive_dir=str(tmp_path),
+        chunk_size=1,
+        now=NOW,
+    )
+    assert result == {"ping": 2}
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ["logs-2025-05-29.ndjson.gz", "logs-2025-05-30.ndjson.gz"]
+
+    path = tmp_path / files[0]
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert record["timestamp"] == "2025-05-29T12:00:00"
+
+    for name in files:
+        assert retention_service.import_archive(str(tmp_path / name)) == 1
+    # Повторный импорт не создаёт дублей.
+    assert retention_service.import_archive(str(path)) == 0
+
+    after = {log.id: log.output for log in logs_service.get_all_logs()}
+    assert after == before
+
+
+def test_parse_policies_rejects_unknown_keys():
+    """Опечатка в политике — ошибка, а не тихое хранение всего."""
+    assert retention_service.parse_policies("") == {}
+    assert retention_service.parse_policies('{"ping": {"max_rows": 5}}') == {
+        "ping": {"max_rows": 5}
+    }
+    with pytest.raises(ValueError):
+        retention_service.parse_policies('{"ping": {"max_days": 5}}')
+    with pytest.raises(ValueError):
+        retention_service.parse_policies('{"ping": {"max_rows": 0}}')
+
+
+def test_delete_all_in_chunks(app):
+    """delete_all удаляет всё пачками."""
+    _seed("ping", 7)
+    logs_repo.delete_all(batch_size=3)
+    assert logs_service.get_all_logs() == []
+
+
+def test_prune_shrinks_database_file(tmp_path, monkeypatch):
+    """После очистки incremental_vacuum возвращает все свободные страницы."""
+    from app.app import create_app
+
+    path = tmp_path / "logs.db"
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{path}")
+    monkeypatch.setenv("OUTPUT_COMPRESSION", "0")
+    app = create_app()
+    with app.app_context():
+        _seed("ping", 500, output="z" * 4000)
+        size = path.stat().st_size
+        retention_service.prune_logs({"ping": {"max_rows": 10}}, now=NOW)
+        stats = retention_service.vacuum()
+
+    assert stats["auto_vacuum"] == "incremental"
+    assert stats["freed_pages"] > 100
+    assert path.stat().st_size < size / 10
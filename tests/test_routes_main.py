@@ -1,3 +1,10 @@
+import gzip
+import json
+
+from app.interfaces.repositories import jobs_repo
+from app.services import jobs_service, logs_service
+
+
 def test_index_page_loads(client):
     """Главная страница должна быть доступна."""
     response = client.get("/")
@@ -9,3 +16,116 @@ def test_connect_page_loads(client):
     """Страница подключения должна открываться."""
     response = client.get("/connect")
     assert response.status_code == 200
+
+
+def test_history_page_filters(client):
+    """История показывает только записи, подходящие под фильтр."""
+    logs_service.create_log("ping", "192.0.2.1", {}, "ok", "")
+    logs_service.create_log("traceroute", "192.0.2.2", {}, "ok", "")
+
+    response = client.get("/history?action=traceroute")
+
+    assert response.status_code == 200
+    assert b"192.0.2.2" in response.data
+    assert b"192.0.2.1" not in response.data
+
+
+def test_export_ndjson_gzip(client):
+    """NDJSON-экспорт с фильтром отдаётся сжатым потоком."""
+    logs_service.create_log("ping", "192.0.2.1", {}, "ok", "")
+    logs_service.create_log("ping", "192.0.2.2", {}, "ok", "")
+
+    response = client.get(
+        "/export/json?format=ndjson&gzip=1&host=192.0.2.2"
+        "&since=2000-01-01T00:00:00"
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/gzip"
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert [json.loads(line)["host"] for line in lines] == ["192.0.2.2"]
+
+
+def test_export_rejects_bad_time_range(client):
+    """Некорректная дата в фильтре — 400."""
+    assert client.get("/export/json?since=yesterday").status_code == 400
+
+
+def test_logs_query_api(client):
+    """API запросов к логам возвращает JSON без вывода команд."""
+    logs_service.create_log("ping", "192.0.2.1", {}, "danger", "secret")
+
+    response = client.get("/logs?status=danger&host=192.0.2.1")
+
+    assert response.status_code == 200
+    assert [log["host"] for log in response.json["logs"]] == ["192.0.2.1"]
+    assert "output" not in response.json["logs"][0]
+    assert client.get("/logs?since=bad").status_code == 400
+
+
+def test_logs_search_api_and_history(client):
+    """Полнотекстовый поиск доступен через API и страницу истории."""
+    logs_service.create_log("ssh", "sw1", {}, "ok", "%LINK-3-UPDOWN Gi0/1")
+
+    response = client.get("/logs/search?q=LINK-3-UPDOWN")
+    page = client.get("/history?q=LINK-3-UPDOWN")
+
+    assert [r["host"] for r in response.json] == ["sw1"]
+    assert client.get("/logs/search?q=").status_code == 400
+    assert "<mark>LINK-3-UPDOWN</mark>" in page.text
+
+
+def test_bulk_validates_concurrency(app, client, monkeypatch):
+    """Параллелизм ограничивается 1..BULK_MAX_WORKERS, не число —
+    ошибка без запуска."""
+    app.config["BULK_MAX_WORKERS"] = 8
+    calls = []
+    monkeypatch.setattr(
+        "app.services.jobs_service.submit_bulk",
+        lambda protocol, targets, commands, max_workers: calls.append(
+            max_workers
+        )
+        or "job",
+    )
+    form = {"targets": "10.0.0.1", "commands": "show clock"}
+    for value in ("abc", "2.5"):
+        response = client.post("/bulk", data={**form, "concurrency": value})
+        assert "от 1 до 8" in response.get_data(as_text=True)
+    for value in ("0", "-3", "3", "999", ""):
+        client.post("/bulk", data={**form, "concurrency": value})
+
+    assert calls == [1, 1, 3, 8, 8]
+
+
+def test_bulk_runs_as_background_job(app, client, monkeypatch):
+    """Пакет ставится в очередь задач, страница задачи получает
+    результаты хостов."""
+    monkeypatch.setattr(
+        "app.services.nettools_service.run_connect",
+        lambda protocol, **kwargs: (f"{kwargs['host']} up", "ok"),
+    )
+    response = client.post(
+        "/bulk",
+        data={
+            "targets": "10.0.0.1-2,admin,secret",
+            "commands": "show clock",
+            "concurrency": "2",
+        },
+    )
+    assert response.status_code == 302
+    job_id = response.headers["Location"].split("job=")[1]
+
+    job = jobs_service.get_job(job_id, wait=5)
+    assert job["kind"] == "bulk"
+    assert job["host"] == "10.0.0.1-2"
+    assert job["status"] == "ok"
+    assert "=== 10.0.0.1 · ok" in job["output"]
+    assert "10.0.0.2 up" in job["output"]
+    assert "secret" not in str(jobs_repo.get_by_id(job_id).params)
+    page = client.get(response.headers["Location"]).get_data(as_text=True)
+    assert f"/jobs/{job_id}/stream" in page
+
+    response = client.post(
+        "/bulk", data={"targets": "10.0.0.0/8", "commands": "show clock"}
+    )
+    assert "Ошибка в списке устройств" in response.get_data(as_text=True)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from app.infrastructure.ssh_pool import SSHSession, SSHSessionPool
+
+
+def make_session():
+    """Создаёт сессию с живыми фейковыми транспортом и каналом."""
+    client = mock.MagicMock()
+    channel = mock.MagicMock()
+    channel.closed = False
+    channel.exit_status_ready.return_value = False
+    return SSHSession(client, channel)
+
+
+def test_pool_does_not_share_session_with_other_password():
+    """Сессия с другим паролем не выдаётся повторно."""
+    pool = SSHSessionPool()
+    first = pool.acquire("h", 22, "u", "p1", "cisco", make_session)
+    pool.release(first)
+
+    second = pool.acquire("h", 22, "u", "p2", "cisco", make_session)
+
+    assert second is not first
+    first.client.close.assert_called_once()
+    assert pool.stats()["hits"] == 0
+
+
+def test_pool_replaces_dead_session():
+    """Сессия, не прошедшая проверку, закрывается и пересоздаётся."""
+    pool = SSHSessionPool()
+    first = pool.acquire("h", 22, "u", "p", "cisco", make_session)
+    first.client.get_transport.return_value.is_active.return_value = False
+    pool.release(first)
+
+    second = pool.acquire("h", 22, "u", "p", "cisco", make_session)
+
+    assert second is not first
+    assert pool.stats()["failed_health_checks"] == 1
+
+
+def test_pool_evicts_idle_and_oversized():
+    """Пул вытесняет просроченные сессии и соблюдает лимит размера."""
+    pool = SSHSessionPool(max_size=1, idle_timeout=60)
+    old = pool.acquire("a", 22, "u", "p", "cisco", make_session)
+    new = pool.acquire("b", 22, "u", "p", "cisco", make_session)
+    pool.release(old)
+    pool.release(new)
+
+    assert pool.stats()["idle"] == 1
+    old.client.close.assert_called_once()
+
+    new.last_used -= 120
+    pool.acquire("c", 22, "u", "p", "cisco", make_session)
+    new.client.close.assert_called_once()
+    assert pool.stats()["evictions"] == 2
+    pool.close_all()
@@ -0,0 +1,85 @@
+import time
+from unittest import mock
+
+from app.infrastructure.ssh_tunnels import TunnelManager
+
+CHAIN = [
+    {"host": "198.51.100.1", "username": "j1", "password": "p1"},
+    {"host": "198.51.100.2", "username": "j2", "password": "p2"},
+]
+
+
+def make_client():
+    """Фейковый SSHClient с активным транспортом."""
+    client = mock.MagicMock()
+    client.get_transport.return_value.is_active.return_value = True
+    return client
+
+
+def test_chain_is_built_once_and_reused_for_many_destinations():
+    """Двуххоповая цепочка авторизуется один раз на все устройства."""
+    manager = TunnelManager()
+    clients = [make_client(), make_client()]
+
+    with mock.patch(
+        "app.infrastructure.ssh_tunnels.paramiko.SSHClient",
+        side_effect=clients,
+    ) as ssh_client:
+        for i in range(5):
+            manager.open_channel(CHAIN, f"10.0.0.{i}", 22, timeout=3)
+
+    assert ssh_client.call_count == 2
+    clients[0].connect.assert_called_once()
+    clients[1].connect.assert_called_once()
+    inner_sock = clients[1].connect.call_args.kwargs["sock"]
+    assert inner_sock is clients[0].get_transport().open_channel.return_value
+    assert clients[1].get_transport().open_channel.call_count == 5
+    stats = manager.stats()
+    assert stats["hop_misses"] == 2
+    assert stats["hop_hits"] == 8
+    assert stats["channels"] == 5
+
+
+def test_dead_hop_is_evicted_and_rebuilt():
+    """Упавший бастион перестраивается вместе с зависимыми хопами."""
+    manager = TunnelManager()
+    first, second = make_client(), make_client()
+
+    with mock.patch(
+        "app.infrastructure.ssh_tunnels.paramiko.SSHClient",
+        side_effect=[first, second],
+    ):
+        manager.open_channel(CHAIN[:1], "10.0.0.1", 22, timeout=3)
+        first.get_transport.return_value.is_active.return_value = False
+        manager.open_channel(CHAIN[:1], "10.0.0.2", 22, timeout=3)
+
+    first.close.assert_called_once()
+    second.get_transport().open_channel.assert_called_once()
+    assert manager.stats()["evictions"] == 1
+    manager.close_all()
+    second.close.assert_called_once()
+
+
+def test_idle_hops_are_reaped_in_background():
+    """Фоновый поток закрывает простаивающие хопы и их блокировки."""
+    manager = TunnelManager(idle_timeout=0.01)
+    clients = [make_client(), make_client()]
+
+    with mock.patch(
+        "app.infrastructure.ssh_tunnels.paramiko.SSHClient",
+        side_effect=clients,
+    ):
+        manager.open_channel(CHAIN, "10.0.0.1", 22, timeout=3)
+
+    assert len(manager._build_locks) == 2
+    deadline = time.monotonic() + 5
+    while manager.stats()["hops"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert manager.stats()["hops"] == 0
+    assert manager.stats()["evictions"] == 2
+    assert manager._build_locks == {}
+    for client in clients:
+        client.close.assert_called_once()
+    manager._reaper.join(timeout=5)
+    assert not manager._reaper.is_alive()
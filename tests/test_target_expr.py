@@ -0,0 +1,248 @@
+from itertools import islice
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from app.app import create_app
+from app.services import bulk_service, logs_service, target_expr
+from app.services.nettools_service import run_commands, run_connect
+
+GROUPS = {
+    "core": "10.0.0.1-2, @edge",
+    "edge": ["edge[1-2]", "10.0.0.2"],
+}
+
+
+def test_expand_keeps_order_and_removes_duplicates():
+    """Пересекающиеся диапазоны и повторы имён выдаются один раз."""
+    hosts = target_expr.expand(
+        "10.0.0.4-6 10.0.0.1-10.0.0.8, 10.0.0.5/31, "
+        "sw[01-02,core].dc1 sw02.dc1, 2001:db8::/126"
+    )
+    assert list(hosts) == [
+        "10.0.0.4",
+        "10.0.0.5",
+        "10.0.0.6",
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.7",
+        "10.0.0.8",
+        "sw01.dc1",
+        "sw02.dc1",
+        "swcore.dc1",
+        "2001:db8::1",
+        "2001:db8::2",
+        "2001:db8::3",
+    ]
+
+
+def test_groups_are_resolved_recursively():
+    """Группы раскрываются с вложенными группами, циклы отклоняются."""
+    hosts = target_expr.expand("@core, edge2", groups=GROUPS)
+    assert list(hosts) == ["10.0.0.1", "10.0.0.2", "edge1", "edge2"]
+    assert target_expr.count("@core", groups=GROUPS) == 4
+    with pytest.raises(ValueError, match="includes itself"):
+        target_expr.parse("@a", groups={"a": "@b", "b": "r1, @a"})
+
+
+def test_groups_from_config(app):
+    """Без явных групп используется TARGET_GROUPS."""
+    app.config["TARGET_GROUPS"] = '{"lab": "r[1-3]"}'
+    target_expr.init_app(app)
+    assert app.config["TARGET_GROUPS"] == {"lab": "r[1-3]"}
+    assert list(target_expr.expand("@lab")) == ["r1", "r2", "r3"]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    ['{"lab": ', '["r1"]', '{"lab": "@core"}', '{"lab": "r[3-1]"}'],
+)
+def test_invalid_groups_fail_at_startup(monkeypatch, raw):
+    """Ошибка в TARGET_GROUPS не даёт запустить приложение."""
+    monkeypatch.setenv("TARGET_GROUPS", raw)
+    with pytest.raises(ValueError, match="TARGET_GROUPS"):
+        create_app()
+
+
+def test_plain_hosts_ignore_groups():
+    """Группы нужны только выражениям с @группой."""
+    assert target_expr.count("10.0.0.1, r1", groups='{"lab": ') == 2
+    with pytest.raises(ValueError, match="TARGET_GROUPS"):
+        target_expr.parse("@lab", groups='{"lab": ')
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "10.0.0.5-1",
+        "10.0.0.1-300",
+        "sw[1-3",
+        "sw[3-1]",
+        "sw[a b]",
+        "exa$mple.com",
+        "10.0.0.1, bad_host",
+        "@missing",
+        "10.0.0.0/33",
+    ],
+)
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        target_expr.expand(expression)
+
+
+def test_expansion_is_lazy():
+    """Большая подсеть проверяется без разворачивания в список."""
+    assert target_expr.count("10.0.0.0/8, 10.0.0.0/16") == 2**24 - 2
+    with pytest.raises(ValueError):
+        target_expr.expand("10.0.0.0/16")
+
+    tracemalloc.start()
+    try:
+        hosts = target_expr.expand("10.0.0.0/16, 10.0.1.0/24", limit=2**16)
+        assert list(islice(hosts, 2)) == ["10.0.0.1", "10.0.0.2"]
+        total = 2 + sum(1 for _ in hosts)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert total == 2**16 - 2
+    assert peak < 64 * 1024
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("10.0.0.0/24", True),
+        ("10.0.0.1-50", True),
+        ("r1, r2", True),
+        ("sw[1-2]", True),
+        ("@core", True),
+        ("10.0.0.1", False),
+        ("core-sw1.example", False),
+        ("exa$mple.com", False),
+    ],
+)
+def test_is_expression(expression, expected):
+    assert target_expr.is_expression(expression) is expected
+
+
+def test_run_commands_runs_each_host(app, monkeypatch):
+    """Каждый узел выражения выполняется и логируется отдельно."""
+    monkeypatch.setattr(
+        "app.services.nettools_service.nslookup",
+        lambda host, **kwargs: (
+            f"{host} has address",
+            "danger" if host == "r2" else "ok",
+        ),
+    )
+    streamed = []
+    output, status = run_commands(
+        "nslookup", host="r[1-3]", on_output=streamed.append
+    )
+
+    assert status == "danger"
+    assert output.split("\n") == [
+        "=== r1 ===",
+        "r1 has address",
+        "=== r2 ===",
+        "r2 has address",
+        "=== r3 ===",
+        "r3 has address",
+    ]
+    assert "".join(streamed).count("===") == 6
+    logs = logs_service.get_all_logs()
+    assert sorted(log.host for log in logs) == ["r1", "r2", "r3"]
+
+    output, status = run_commands("nslookup", host="r[3-1]")
+    assert status == "danger"
+    assert output.startswith("Ошибка в списке узлов")
+
+
+def test_run_each_runs_hosts_in_parallel(app, monkeypatch):
+    """Узлы выполняются одновременно (не больше BULK_MAX_WORKERS),
+    а вывод передаётся в порядке узлов."""
+    app.config["BULK_MAX_WORKERS"] = 3
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_traceroute(host, on_output=None, **kwargs):
+        barrier.wait()
+        if host == "r1":
+            time.sleep(0.1)
+        on_output(f"{host} hop 1\n")
+        return f"{host} hop 1", "ok"
+
+    monkeypatch.setattr(
+        "app.services.nettools_service.traceroute_host", fake_traceroute
+    )
+    streamed = []
+    output, status = run_commands(
+        "traceroute", host="r[1-3]", on_output=streamed.append
+    )
+
+    assert status == "ok"
+    assert "".join(streamed) == (
+        "=== r1 ===\nr1 hop 1\n=== r2 ===\nr2 hop 1\n=== r3 ===\nr3 hop 1\n"
+    )
+    assert output == (
+        "=== r1 ===\nr1 hop 1\n=== r2 ===\nr2 hop 1\n=== r3 ===\nr3 hop 1"
+    )
+
+
+def test_run_connect_runs_each_host(app, monkeypatch):
+    calls = []
+
+    def fake_ssh_command(host, username, password, command, **kwargs):
+        calls.append(host)
+        return f"{host}: {command}", "ok"
+
+    monkeypatch.setattr(
+        "app.services.nettools_service.ssh_command", fake_ssh_command
+    )
+    output, status = run_connect(
+        "ssh",
+        host="10.0.0.1-2",
+        username="u",
+        password="p",
+        command="show clock",
+    )
+    assert status == "ok"
+    assert calls == ["10.0.0.1", "10.0.0.2"]
+    assert "10.0.0.2: show clock" in output
+
+
+def test_bulk_expands_target_rows(app, monkeypatch):
+    """Строка с выражением применяется к каждому узлу."""
+    monkeypatch.setattr(
+        bulk_service.nettools_service,
+        "run_connect",
+        lambda protocol, **kwargs: (kwargs["host"], "ok"),
+    )
+    targets = bulk_service.parse_targets(
+        "sw[1-2],root,pw\n10.0.0.1",
+        defaults={"username": "admin", "password": "p"},
+    )
+    batch = bulk_service.run_bulk("ssh", targets, ["show version"])
+
+    assert [r["host"] for r in batch["results"]] == ["sw1", "sw2", "10.0.0.1"]
+    assert batch["results"][1]["results"][0]["output"] == "sw2"
+
+    with pytest.raises(ValueError, match="bad_host"):
+        bulk_service.parse_targets("bad_host", defaults={})
+    app.config["TARGET_MAX_HOSTS"] = 2
+    with pytest.raises(ValueError):
+        bulk_service.run_bulk("ssh", targets, ["show version"])
+
+
+def test_index_rejects_invalid_expression(client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(
+        "app.services.jobs_service.submit_command",
+        lambda action, **kwargs: submitted.append(kwargs["host"]) or "job",
+    )
+    for host in ("10.0.0.0/16", "sw[1-", "exa$mple.com"):
+        response = client.post("/", data={"action": "ping", "host": host})
+        assert "Некорректный" in response.get_data(as_text=True)
+    client.post("/", data={"action": "traceroute", "host": "r[1-2]"})
+    assert submitted == ["r[1-2]"]
@@ -0,0 +1,66 @@
+from app.services.prompt_engine import PromptMatcher, read_until_prompt
+from app.services.terminal_stream import TerminalStream
+
+
+class ChunkChannel:
+    """Канал, отдающий заранее заданные фрагменты."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def _feed_all(chunks):
+    stream = TerminalStream()
+    return "".join(stream.feed(chunk) for chunk in chunks) + stream.flush()
+
+
+def test_multibyte_char_split_between_chunks():
+    """Символ UTF-8, разорванный между recv(), не теряется."""
+    raw = "Интерфейс up\r\n".encode()
+    assert _feed_all([raw[:1], raw[1:3], raw[3:]]) == "Интерфейс up\n"
+
+
+def test_escape_sequence_split_between_chunks():
+    """ANSI-последовательность удаляется даже при разрыве."""
+    chunks = [b"\x1b[1", b";32mOK\x1b", b"[0m\r\n", b"\x1b]0;R1\x07R1#"]
+    assert _feed_all(chunks) == "OK\nR1#"
+
+
+def test_carriage_return_and_backspace_redraw_line():
+    """CR, backspace и ESC[K перерисовывают строку как терминал."""
+    chunks = [
+        b"progress 10%\rprogress 100%\r\n",
+        b" --More-- " + b"\x08" * 10 + b"\x1b[K" + b"next line\r\n",
+        b"abc\x08\x08XY\r\n",
+    ]
+    assert _feed_all(chunks) == "progress 100%\nnext line\naXY\n"
+
+
+def test_pending_holds_prompt_until_flush():
+    """Незавершённая строка доступна в pending."""
+    stream = TerminalStream()
+    assert stream.feed(b"line\r\nR1#") == "line\n"
+    assert stream.pending == "R1#"
+    assert stream.flush() == "R1#"
+    assert stream.pending == ""
+
+
+def test_read_until_prompt_normalizes_output():
+    """Вывод канала приходит уже очищенным."""
+    chunks = [
+        b"show clock\r\n\x1b[1m12:00\xe2",
+        b"\x80\xa6\x1b[0m\r\nR1",
+        b"#",
+    ]
+
+    buffer = read_until_prompt(
+        ChunkChannel(chunks), PromptMatcher("cisco"), timeout=1
+    )
+
+    assert buffer == "show clock\n12:00…\nR1#"
@@ -0,0 +1,123 @@
+import socket
+import sys
+
+import pytest
+
+from app.services import traceroute_engine
+from app.services.nettools_service import traceroute_host
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"),
+    reason="IP_RECVERR доступен только на Linux",
+)
+
+
+@linux_only
+def test_trace_loopback_stops_at_destination():
+    """Loopback отвечает на первом TTL, дальнейшие хопы отбрасываются."""
+    result = traceroute_engine.trace(
+        "127.0.0.1", max_hops=10, timeout=1, queries=2
+    )
+
+    assert result["reached"] is True
+    assert len(result["hops"]) == 1
+    hop = result["hops"][0]
+    assert hop["ttl"] == 1
+    assert hop["address"] == "127.0.0.1"
+    assert all(rtt is not None for rtt in hop["rtts"])
+
+
+@linux_only
+def test_traceroute_host_uses_structured_result():
+    """traceroute_host форматирует хопы и берёт статус из результата."""
+    output, status = traceroute_host("127.0.0.1", max_hops=5, timeout=1)
+
+    assert status == "ok"
+    assert output.splitlines()[0].startswith("traceroute to 127.0.0.1")
+    assert output.splitlines()[1].split()[:2] == ["1", "127.0.0.1"]
+
+
+@linux_only
+def test_traceroute_host_streams_hops():
+    """Заголовок и хопы передаются в on_output по мере ответа."""
+    chunks = []
+    output, _ = traceroute_host(
+        "127.0.0.1", max_hops=5, timeout=1, on_output=chunks.append
+    )
+
+    assert "".join(chunks).strip() == output
+
+
+class ErrorQueueSocket:
+    """Сокет с одной ICMP-ошибкой в очереди ошибок."""
+
+    def __init__(self, icmp_type, code, offender):
+        self.data = traceroute_engine.SOCK_EXTENDED_ERR.pack(
+            113, traceroute_engine.SO_EE_ORIGIN_ICMP, icmp_type, code, 0, 0, 0
+        ) + (b"\x02\x00\x00\x00" + socket.inet_aton(offender) + bytes(8))
+
+    def recvmsg(self, *args):
+        return b"", [(socket.IPPROTO_IP, 11, self.data)], 0, None
+
+
+@pytest.mark.parametrize(
+    "icmp_type, code, offender, expected",
+    [
+        (11, 0, "10.0.0.1", traceroute_engine.HOP),
+        (3, 3, "192.0.2.1", traceroute_engine.REACHED),
+        (3, 1, "10.0.0.2", traceroute_engine.UNREACHABLE),
+        (3, 13, "10.0.0.2", traceroute_engine.UNREACHABLE),
+        (3, 10, "192.0.2.1", traceroute_engine.REACHED),
+    ],
+)
+def test_read_error_kinds(icmp_type, code, offender, expected):
+    """Конечным считается только port unreachable или ответ от цели."""
+    sock = ErrorQueueSocket(icmp_type, code, offender)
+    assert traceroute_engine._read_error(
+        sock, socket.AF_INET, "192.0.2.1"
+    ) == (offender, expected)
+
+
+@linux_only
+def test_trace_stops_at_unreachable_router(monkeypatch):
+    """Host unreachable от маршрутизатора на пути: узел не достигнут."""
+
+    def fake_read_error(sock, family, address):
+        sock.recvmsg(512, 512, socket.MSG_ERRQUEUE)
+        ttl = sock.getsockopt(socket.IPPROTO_IP, socket.IP_TTL)
+        if ttl == 1:
+            return "10.0.0.1", traceroute_engine.HOP
+        if ttl == 2:
+            return "10.0.0.2", traceroute_engine.UNREACHABLE
+        return address, traceroute_engine.REACHED
+
+    monkeypatch.setattr(traceroute_engine, "_read_error", fake_read_error)
+    result = traceroute_engine.trace("127.0.0.1", max_hops=5, timeout=1)
+
+    assert result["reached"] is False
+    assert [hop["address"] for hop in result["hops"]] == [
+        "10.0.0.1",
+        "10.0.0.2",
+    ]
+    assert traceroute_engine.classify(result) == "danger"
+
+
+@pytest.mark.parametrize(
+    "reached, rtts, expected",
+    [
+        (True, [[1.0], [2.0]], "ok"),
+        (True, [[None], [2.0]], "warn"),
+        (False, [[1.0], [None]], "danger"),
+    ],
+)
+def test_classify(reached, rtts, expected):
+    """Статус определяется достижимостью узла и потерями проб."""
+    result = {
+        "address": "192.0.2.1",
+        "reached": reached,
+        "hops": [
+            {"ttl": i + 1, "address": "192.0.2.1", "rtts": r}
+            for i, r in enumerate(rtts)
+        ],
+    }
+    assert traceroute_engine.classify(result) == expected
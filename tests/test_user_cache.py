@@ -0,0 +1,132 @@
+import threading
+
+from flask import g
+
+from app.infrastructure.user_cache import user_cache, UserCache
+from app.interfaces.repositories import user_repo
+from app.services import user_service
+
+
+def _counting_loader(monkeypatch):
+    calls = []
+    get_by_id = user_repo.get_by_id
+
+    def load(user_id):
+        calls.append(user_id)
+        return get_by_id(user_id)
+
+    monkeypatch.setattr(user_repo, "get_by_id", load)
+    return calls
+
+
+def _register(username, role="user"):
+    user_service.register_user(username, "123", "123", role=role)
+    return user_repo.get_by_username(username).id
+
+
+def test_load_user_is_cached(app, monkeypatch):
+    """Повторная загрузка пользователя не обращается к базе."""
+    user_id = _register("alex")
+    calls = _counting_loader(monkeypatch)
+
+    first = user_service.load_user(str(user_id))
+    second = user_service.load_user(str(user_id))
+
+    assert calls == [user_id]
+    assert second is first
+    assert (first.id, first.username, first.role) == (user_id, "alex", "user")
+    assert first.get_id() == str(user_id)
+    assert first.is_authenticated
+    assert not hasattr(first, "password_hash")
+    assert user_service.load_user("missing") is None
+    assert user_service.load_user("999") is None
+    assert user_cache.stats()["entries"] == 1
+
+
+def test_delete_user_invalidates_cache(app):
+    """Удалённый пользователь сразу перестаёт загружаться."""
+    user_id = _register("alex")
+    assert user_service.load_user(str(user_id)) is not None
+
+    assert user_service.delete_user(user_id, "admin")
+    assert user_service.load_user(str(user_id)) is None
+
+
+def test_change_role_invalidates_cache(app):
+    """Смена роли видна в следующем запросе."""
+    user_id = _register("alex")
+    assert user_service.load_user(str(user_id)).role == "user"
+
+    assert not user_service.change_role(user_id, "admin", "user")
+    assert not user_service.change_role(user_id, "root", "admin")
+    assert user_service.change_role(user_id, "admin", "admin")
+    assert user_service.load_user(str(user_id)).role == "admin"
+    assert not user_service.change_role(999, "admin", "admin")
+
+
+def test_entries_expire_after_ttl(app, monkeypatch):
+    """Запись перечитывается из базы после ttl."""
+    user_id = _register("alex")
+    calls = _counting_loader(monkeypatch)
+    monkeypatch.setattr(user_cache, "ttl", 0)
+
+    user_service.load_user(str(user_id))
+    user_service.load_user(str(user_id))
+    assert calls == [user_id, user_id]
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    """Данные, загруженные до сброса, не попадают в кэш."""
+    cache = UserCache()
+    loading, invalidated = threading.Event(), threading.Event()
+
+    class Stale:
+        id, username, role = 1, "alex", "user"
+
+    def load(user_id):
+        loading.set()
+        invalidated.wait(5)
+        return Stale()
+
+    worker = threading.Thread(target=cache.get, args=(1, load))
+    worker.start()
+    loading.wait(5)
+    cache.invalidate(1)
+    invalidated.set()
+    worker.join(5)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    """Размер кэша ограничен, вытесняются давно не использованные."""
+    cache = UserCache(max_size=2)
+
+    class User:
+        def __init__(self, user_id):
+            self.id, self.username, self.role = user_id, "u", "user"
+
+    for user_id in (1, 2, 1, 3):
+        cache.get(user_id, User)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+
+
+def test_authenticated_requests_use_cache(client, monkeypatch):
+    """Запросы залогиненного пользователя не читают его из базы."""
+    _register("alex")
+    client.post("/login", data={"username": "alex", "password": "123"})
+    calls = _counting_loader(monkeypatch)
+    hits = user_cache.stats()["hits"]
+
+    for _ in range(3):
+        # Контекст приложения фикстуры общий для запросов — сбрасываем
+        # пользователя, загруженного предыдущим запросом.
+        g.pop("_login_user", None)
+        response = client.get("/history")
+        assert response.status_code == 200
+        assert "alex" in response.get_data(as_text=True)
+    assert len(calls) == 1
+    assert user_cache.stats()["hits"] - hits == 2